@@ -0,0 +1,169 @@
+# animation_clock.py
+"""
+One shared tick for the GUI's animations.
+
+CentralContainer, the CRT scanline overlay, DepthGauge, SignalIndicator and the
+network graph each used to own a free-running QTimer that repainted forever -
+including with the window minimized, in the background, or with nothing
+happening in the conversation. Sessions are often left open for hours, so that
+was a steady trickle of wasted CPU. Now they all subscribe to one AnimationClock:
+
+- A single QTimer drives every animation; each subscription keeps its own
+  frame cap (interval_ms) and is only called when its frame is due
+- Nothing runs for a widget that is hidden, in a minimized or unexposed
+  (occluded) window
+- Decorative animations additionally pause while the application is not the
+  active one and while no AI turn is running (set_turn_active)
+- When nothing is runnable the timer stops; it restarts on app activation,
+  a turn starting, a widget being shown or an animation being started
+
+Subscriptions mimic the QTimer calls the widgets already used (start, stop,
+isActive), so a widget swaps its timer for:
+
+    self.pulse_timer = get_animation_clock().subscribe(self, self._animate_pulse, 50)
+    self.pulse_timer.start()
+"""
+
+import time
+
+from PyQt6.QtCore import QObject, QTimer, QEvent, Qt
+from PyQt6.QtGui import QGuiApplication
+
+# Fastest tick the clock will run at, whatever the subscriptions ask for
+MIN_INTERVAL_MS = 16
+# A frame counts as due this close to its deadline (timer jitter)
+_DUE_SLACK_MS = 4
+
+
+class ClockAnimation:
+    """One widget's subscription to the clock."""
+
+    def __init__(self, clock, widget, callback, interval_ms, decorative):
+        self._clock = clock
+        self.widget = widget
+        self.callback = callback
+        self.interval_ms = max(MIN_INTERVAL_MS, int(interval_ms))
+        self.decorative = decorative
+        self.active = False
+        self.last_frame = 0.0
+
+    def start(self, interval_ms=None):
+        if interval_ms is not None:
+            self.interval_ms = max(MIN_INTERVAL_MS, int(interval_ms))
+        self.active = True
+        self._clock.reschedule()
+
+    def stop(self):
+        self.active = False
+        self._clock.reschedule()
+
+    def isActive(self):
+        return self.active
+
+
+class AnimationClock(QObject):
+    """Drives all subscribed animations from one timer and pauses them when nobody can see them."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._animations = []
+        self._turn_active = False
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._tick)
+
+        app = QGuiApplication.instance()
+        if app is not None:
+            app.applicationStateChanged.connect(lambda _state: self.reschedule())
+
+    # ------------------------------------------------------------------ API
+
+    def subscribe(self, widget, callback, interval_ms, decorative=True):
+        """
+        Register callback to run every interval_ms while widget can be seen.
+
+        The subscription starts stopped; call .start() on the returned object.
+        """
+        animation = ClockAnimation(self, widget, callback, interval_ms, decorative)
+        self._animations.append(animation)
+        widget.installEventFilter(self)
+        widget.destroyed.connect(lambda *_: self._drop(animation))
+        return animation
+
+    def set_turn_active(self, active):
+        """Decorative animations only run while an AI turn is in progress."""
+        if active != self._turn_active:
+            self._turn_active = active
+            self.reschedule()
+
+    @property
+    def turn_active(self):
+        return self._turn_active
+
+    def reschedule(self):
+        """Re-evaluate which animations can run; start or stop the shared timer."""
+        intervals = [a.interval_ms for a in self._animations if self._runnable(a)]
+        if not intervals:
+            self._timer.stop()
+            return
+        interval = max(MIN_INTERVAL_MS, min(intervals))
+        if not self._timer.isActive() or self._timer.interval() != interval:
+            self._timer.start(interval)
+
+    # ------------------------------------------------------------ internals
+
+    def eventFilter(self, obj, event):
+        # A subscribed widget became visible again (tab switch, overlay shown)
+        if event.type() == QEvent.Type.Show:
+            QTimer.singleShot(0, self.reschedule)
+        return False
+
+    def _drop(self, animation):
+        if animation in self._animations:
+            self._animations.remove(animation)
+        self.reschedule()
+
+    def _app_active(self):
+        return QGuiApplication.applicationState() == Qt.ApplicationState.ApplicationActive
+
+    def _runnable(self, animation):
+        if not animation.active:
+            return False
+        if animation.decorative and not (self._turn_active and self._app_active()):
+            return False
+        widget = animation.widget
+        try:
+            if not widget.isVisible() or widget.visibleRegion().isEmpty():
+                return False
+            window = widget.window()
+            if window.isMinimized():
+                return False
+            handle = window.windowHandle()
+            if handle is not None and not handle.isExposed():
+                return False
+        except RuntimeError:
+            # Underlying C++ widget already deleted
+            animation.active = False
+            return False
+        return True
+
+    def _tick(self):
+        now = time.monotonic() * 1000
+        for animation in list(self._animations):
+            if not self._runnable(animation):
+                continue
+            if now - animation.last_frame >= animation.interval_ms - _DUE_SLACK_MS:
+                animation.last_frame = now
+                animation.callback()
+        # Callbacks may have stopped themselves, or a pause condition kicked in
+        self.reschedule()
+
+
+_clock = None
+
+
+def get_animation_clock():
+    """The application-wide AnimationClock (created on first use, after QApplication)."""
+    global _clock
+    if _clock is None:
+        _clock = AnimationClock()
+    return _clock
@@ -0,0 +1,212 @@
+# app_logging.py
+"""
+Structured, level-gated logging for the hot paths (AI turns, API calls, streaming).
+
+Worker threads used to print every message preview, role assignment and tier
+list on every turn. With stdout piped to a file those prints serialize on the
+stream lock and add real latency. This module routes everything through the
+standard logging package instead:
+
+- One named logger per module (``get_logger("shared_utils")``) under the
+  ``lounge`` namespace, with per-module levels from ``config.LOG_LEVELS``
+- Lazy %-style formatting, so disabled debug calls never build their strings
+- A QueueHandler in front of the real handlers: callers only enqueue a record,
+  a background QueueListener does the file/console I/O
+- Sampling helpers for per-chunk and per-message debug output
+
+Usage:
+    from app_logging import get_logger, Sampler
+
+    log = get_logger("shared_utils")
+    log.debug("Sending %d messages to %s", len(msgs), model)
+
+    _sample = Sampler(every=20)
+    if log.isEnabledFor(logging.DEBUG) and _sample.hit("chunk"):
+        log.debug("chunk %r", chunk)
+
+main.py calls setup_logging() once at startup; DEVELOPER_TOOLS switches on
+verbose (DEBUG) mode. Until setup_logging() runs, records propagate to the
+root logger as usual, so headless tools keep working without configuration.
+"""
+
+import atexit
+import itertools
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from pathlib import Path
+
+# Root namespace for all application loggers
+ROOT_LOGGER_NAME = "lounge"
+
+# Default log file location (project logs/ folder, gitignored)
+LOGS_DIR = Path(__file__).parent / "logs"
+LOG_FILE_NAME = "lounge.log"
+
+# File rotation: 5 MB x 3 backups
+_MAX_BYTES = 5 * 1024 * 1024
+_BACKUP_COUNT = 3
+
+_CONSOLE_FORMAT = "[%(name_short)s] %(message)s"
+_FILE_FORMAT = "%(asctime)s %(levelname)-7s %(threadName)s %(name)s: %(message)s"
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Get the application logger for a module (e.g. "main", "shared_utils")."""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def is_debug(logger: logging.Logger) -> bool:
+    """Cheap guard for debug blocks that do their own formatting work."""
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+class Sampler:
+    """
+    Thread-safe 1-in-N sampler for high-frequency debug output.
+
+    Each key has its own counter; the first call for a key always hits so the
+    first chunk/message of a stream is never lost.
+    """
+
+    def __init__(self, every: int = 10):
+        self.every = max(1, int(every))
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str = "") -> bool:
+        """Return True on the 1st, (N+1)th, (2N+1)th... call for this key."""
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, itertools.count())
+        # itertools.count.__next__ is atomic under the GIL
+        return next(counter) % self.every == 0
+
+    def reset(self, key: str = None):
+        """Reset one key (or all keys) so the next call hits again."""
+        with self._lock:
+            if key is None:
+                self._counters.clear()
+            else:
+                self._counters.pop(key, None)
+
+
+class _ShortNameFilter(logging.Filter):
+    """Adds %(name_short)s - the logger name without the 'lounge.' prefix."""
+
+    def filter(self, record):
+        name = record.name
+        if name.startswith(ROOT_LOGGER_NAME + "."):
+            name = name[len(ROOT_LOGGER_NAME) + 1:]
+        record.name_short = name
+        return True
+
+
+def _parse_level(level):
+    """Accept logging level ints or names ("DEBUG", "info")."""
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).strip().upper())
+    return value if isinstance(value, int) else logging.INFO
+
+
+def _parse_env_levels(spec: str) -> dict:
+    """Parse LOUNGE_LOG_LEVELS="shared_utils=DEBUG,main=WARNING"."""
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            if name.strip():
+                levels[name.strip()] = level.strip()
+    return levels
+
+
+def setup_logging(verbose: bool = False, levels: dict = None, log_dir=None,
+                  console: bool = True) -> logging.Logger:
+    """
+    Configure the application loggers. Safe to call more than once.
+
+    Args:
+        verbose: DEBUG for every module (driven by DEVELOPER_TOOLS)
+        levels: Per-module overrides, e.g. {"shared_utils": "DEBUG"}.
+                Also read from the LOUNGE_LOG_LEVELS environment variable.
+        log_dir: Directory for the rotating log file (defaults to logs/)
+        console: Mirror enabled records to stderr
+
+    Returns:
+        The root application logger
+    """
+    global _listener
+
+    with _setup_lock:
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+
+        # Tear down a previous listener so handlers aren't duplicated
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        base_level = logging.DEBUG if verbose else logging.INFO
+        root.setLevel(base_level)
+        root.propagate = False
+
+        # Per-module levels: config first, env var wins
+        module_levels = dict(levels or {})
+        module_levels.update(_parse_env_levels(os.getenv("LOUNGE_LOG_LEVELS", "")))
+        for name, level in module_levels.items():
+            get_logger(name).setLevel(_parse_level(level))
+
+        handlers = []
+
+        log_dir = Path(log_dir) if log_dir else LOGS_DIR
+        try:
+            log_dir.mkdir(parents=True, exist_ok=True)
+            file_handler = logging.handlers.RotatingFileHandler(
+                log_dir / LOG_FILE_NAME, maxBytes=_MAX_BYTES,
+                backupCount=_BACKUP_COUNT, encoding="utf-8"
+            )
+            file_handler.setFormatter(logging.Formatter(_FILE_FORMAT))
+            file_handler.setLevel(logging.DEBUG)
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"[Logging] Could not open log file in {log_dir}: {e}")
+
+        if console:
+            console_handler = logging.StreamHandler(sys.stderr)
+            console_handler.addFilter(_ShortNameFilter())
+            console_handler.setFormatter(logging.Formatter(_CONSOLE_FORMAT))
+            # Gating happens on the loggers, so per-module DEBUG overrides show here too
+            console_handler.setLevel(logging.DEBUG)
+            handlers.append(console_handler)
+
+        # Callers only pay for a queue.put(); I/O happens on the listener thread
+        log_queue = queue.SimpleQueue()
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _listener.start()
+
+    root.debug("Logging configured (verbose=%s, levels=%s)", verbose, module_levels)
+    return root
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
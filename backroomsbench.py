@@ -10,6 +10,9 @@ import re
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from shared_utils import call_openrouter_api
+from message_record import project
+from judge_cache import get_judge_cache, prompt_version, sha256
+from session_archive import latest_snapshots
 
 # Judge models - all via OpenRouter
 JUDGES = {
@@ -27,6 +30,8 @@ JUDGES = {
     }
 }
 
+JUDGE_TEMPERATURE = 0.7
+
 JUDGE_SYSTEM_PROMPT = """You are evaluating an AI-to-AI conversation for BackroomsBench, a benchmark that measures models' capacity for genuine philosophical exploration, linguistic creativity, and collaborative meaning-making.
 
 This is NOT about humor or entertainment. This is about depth, authenticity, and the emergence of something real between artificial minds given minimal constraints.
@@ -179,22 +184,13 @@ def format_conversation_for_judge(conversation, scenario_name, participant_model
     
     for i, msg in enumerate(conversation):
         role = msg.get("role", "unknown")
-        content = msg.get("content", "")
         speaker = msg.get("model") or msg.get("ai_name") or role.title()
         
-        # Handle structured content (images, etc.)
-        if isinstance(content, list):
-            text_parts = []
-            has_image = False
-            for part in content:
-                if isinstance(part, dict):
-                    if part.get("type") == "text":
-                        text_parts.append(part.get("text", ""))
-                    elif part.get("type") == "image":
-                        has_image = True
-            content = " ".join(text_parts)
-            if has_image:
-                content += " [IMAGE ATTACHED]"
+        # Handle structured content (images, etc.) - cached on the message
+        projection = project(msg)
+        content = projection.joined(" ")
+        if projection.images:
+            content += " [IMAGE ATTACHED]"
         
         if content:
             # Check for !image commands and annotate them
@@ -211,6 +207,9 @@ def format_conversation_for_judge(conversation, scenario_name, participant_model
     return formatted
 
 
+CONSENSUS_MODEL = "anthropic/claude-opus-4"
+CONSENSUS_TEMPERATURE = 0.3
+
 CONSENSUS_SYSTEM_PROMPT = """You are creating a consensus summary for BackroomsBench evaluations.
 
 You will receive 2-3 evaluation reports from different AI judges assessing a philosophical/artistic AI conversation. Your job:
@@ -247,24 +246,35 @@ IMPORTANT:
 """
 
 
-def create_consensus_summary(report_texts: dict, session_dir: str) -> dict:
-    """Have Opus 4.5 read all judge reports and create a consensus summary."""
+def create_consensus_summary(report_texts: dict, session_dir: str, force: bool = False) -> dict:
+    """Have Opus 4.5 read all judge reports and create a consensus summary (cached unless force)."""
     
     combined_reports = "\n\n" + "="*60 + "\n\n"
-    for judge_name, report in report_texts.items():
+    # Judge order fixed so the same reports make the same request (and cache key)
+    for judge_name, report in sorted(report_texts.items()):
         combined_reports += f"## Report from {judge_name}:\n\n{report}\n\n"
         combined_reports += "="*60 + "\n\n"
     
     prompt = f"Please analyze these {len(report_texts)} evaluation reports and create a consensus summary:\n{combined_reports}"
     
+    cache = get_judge_cache()
+    cache_key = cache.key("consensus", CONSENSUS_MODEL, CONSENSUS_SYSTEM_PROMPT, CONSENSUS_TEMPERATURE, prompt)
+    response = None if force else cache.get(cache_key)
+    cached = response is not None
+    metrics = {"kind": "summary", "ai_name": "consensus"}
+    
     try:
-        response = call_openrouter_api(
-            prompt=prompt,
-            conversation_history=[],
-            model="anthropic/claude-opus-4",
-            system_prompt=CONSENSUS_SYSTEM_PROMPT,
-            temperature=0.3
-        )
+        if cached:
+            print(f"[BackroomsBench] ♻️ Consensus summary from cache")
+        else:
+            response = call_openrouter_api(
+                prompt=prompt,
+                conversation_history=[],
+                model=CONSENSUS_MODEL,
+                system_prompt=CONSENSUS_SYSTEM_PROMPT,
+                temperature=CONSENSUS_TEMPERATURE,
+                metrics=metrics
+            )
         
         # Parse JSON from response
         json_text = response.strip()
@@ -281,6 +291,9 @@ def create_consensus_summary(report_texts: dict, session_dir: str) -> dict:
             json_text = "\n".join(json_lines)
         
         consensus_data = json.loads(json_text)
+        if not cached and metrics.get("model_used") == CONSENSUS_MODEL:
+            cache.put(cache_key, response, kind="consensus", model_id=CONSENSUS_MODEL,
+                      prompt_version=prompt_version(CONSENSUS_SYSTEM_PROMPT), temperature=CONSENSUS_TEMPERATURE)
         
         # Save consensus summary
         consensus_path = os.path.join(session_dir, "consensus_summary.json")
@@ -368,20 +381,25 @@ def calculate_elo_change(score_a: float, score_b: float, k: float = 32) -> tuple
     return k * (actual_a - expected_a), k * (actual_b - expected_b)
 
 
-def update_elo_leaderboard(averaged_scores: dict, scenario: str, timestamp: str, output_dir: str):
-    """Update the BackroomsBench Elo leaderboard."""
+def empty_leaderboard() -> dict:
+    return {
+        "elo_ratings": {},
+        "sessions": [],
+        "model_history": {}
+    }
+
+
+def load_leaderboard(output_dir: str) -> dict:
+    """The leaderboard in output_dir, or an empty one."""
     leaderboard_path = os.path.join(output_dir, "leaderboard.json")
-    
     if os.path.exists(leaderboard_path):
         with open(leaderboard_path, 'r', encoding='utf-8') as f:
-            leaderboard = json.load(f)
-    else:
-        leaderboard = {
-            "elo_ratings": {},
-            "sessions": [],
-            "model_history": {}
-        }
-    
+            return json.load(f)
+    return empty_leaderboard()
+
+
+def apply_session_elo(leaderboard: dict, averaged_scores: dict, scenario: str, timestamp: str):
+    """Add one session's averaged scores to a loaded leaderboard (in place)."""
     # Initialize new models at 1500
     for model in averaged_scores.keys():
         if model not in leaderboard["elo_ratings"]:
@@ -420,11 +438,22 @@ def update_elo_leaderboard(averaged_scores: dict, scenario: str, timestamp: str,
         "scores": averaged_scores,
         "participants": models
     })
-    
+
+
+def save_leaderboard(leaderboard: dict, output_dir: str):
+    """Write leaderboard.json and LEADERBOARD.md."""
+    leaderboard_path = os.path.join(output_dir, "leaderboard.json")
     with open(leaderboard_path, 'w', encoding='utf-8') as f:
         json.dump(leaderboard, f, indent=2)
     
     generate_leaderboard_md(leaderboard, output_dir)
+
+
+def update_elo_leaderboard(averaged_scores: dict, scenario: str, timestamp: str, output_dir: str):
+    """Update the BackroomsBench Elo leaderboard."""
+    leaderboard = load_leaderboard(output_dir)
+    apply_session_elo(leaderboard, averaged_scores, scenario, timestamp)
+    save_leaderboard(leaderboard, output_dir)
     print(f"[BackroomsBench] 📊 Leaderboard updated")
 
 
@@ -501,30 +530,55 @@ def generate_leaderboard_md(leaderboard: dict, output_dir: str):
         f.write(md_content)
 
 
-def run_single_judge(judge_name, judge_config, conversation_text):
-    """Run a single judge evaluation."""
+def run_single_judge(judge_name, judge_config, conversation_text, force=False):
+    """Run a single judge evaluation, reusing a cached report for the same request unless force."""
+    model_id = judge_config["model_id"]
+    temperature = judge_config.get("temperature", JUDGE_TEMPERATURE)
+    
+    # Prepend judge identity to system prompt so they know who they are
+    judge_system_prompt = f"You are {judge_name}. When signing your report, use this name.\n\n{JUDGE_SYSTEM_PROMPT}"
+    
+    cache = get_judge_cache()
+    cache_key = cache.key("judge", model_id, judge_system_prompt, temperature, conversation_text)
+    if not force:
+        report = cache.get(cache_key)
+        if report is not None:
+            print(f"[BackroomsBench] ♻️ {judge_name} report from cache")
+            return {
+                "judge": judge_name,
+                "success": True,
+                "report": report,
+                "cached": True
+            }
+    
     print(f"[BackroomsBench] Starting evaluation by {judge_name}...")
     
     try:
         messages = []
         prompt = f"Please evaluate the following AI conversation transcript:\n\n{conversation_text}"
-        
-        # Prepend judge identity to system prompt so they know who they are
-        judge_system_prompt = f"You are {judge_name}. When signing your report, use this name.\n\n{JUDGE_SYSTEM_PROMPT}"
+        metrics = {"kind": "judge", "ai_name": judge_name}
         
         response = call_openrouter_api(
             prompt=prompt,
             conversation_history=messages,
-            model=judge_config["model_id"],
+            model=model_id,
             system_prompt=judge_system_prompt,
-            temperature=0.7
+            temperature=temperature,
+            metrics=metrics
         )
         
+        # Errors come back as text; only keep real reports from the judge itself
+        if metrics.get("model_used") == model_id:
+            cache.put(cache_key, response, kind="judge", model_id=model_id, judge=judge_name,
+                      prompt_version=prompt_version(JUDGE_SYSTEM_PROMPT), temperature=temperature,
+                      transcript_sha=sha256(conversation_text))
+        
         print(f"[BackroomsBench] ✅ {judge_name} evaluation complete")
         return {
             "judge": judge_name,
             "success": True,
-            "report": response
+            "report": response,
+            "cached": False
         }
     except Exception as e:
         print(f"[BackroomsBench] ❌ {judge_name} failed: {str(e)}")
@@ -535,7 +589,8 @@ def run_single_judge(judge_name, judge_config, conversation_text):
         }
 
 
-def run_backroomsbench(conversation, scenario_name, participant_models, output_dir=None, progress_callback=None):
+def run_backroomsbench(conversation, scenario_name, participant_models, output_dir=None, progress_callback=None,
+                       session_dir=None, timestamp=None, judge_pool=None, update_leaderboard=True, force=False):
     """
     Run BackroomsBench evaluation with multiple judges.
     
@@ -545,6 +600,14 @@ def run_backroomsbench(conversation, scenario_name, participant_models, output_d
         participant_models: List of model names that participated
         output_dir: Where to save reports (defaults to ./backroomsbench_reports/)
         progress_callback: Optional callback(judge_name, status) for UI updates
+        session_dir: Where to save this session's reports (defaults to output_dir/session_<timestamp>)
+        timestamp: Session timestamp for the summary and leaderboard (defaults to now)
+        judge_pool: Executor to run the judges on (shared by batch runs); a
+            pool of its own is used if None
+        update_leaderboard: Apply the averaged scores to output_dir's Elo
+            leaderboard (batch runs do it once at the end instead)
+        force: Call the judges and consensus model even if their results
+            for this transcript are cached (see judge_cache.py)
     
     Returns:
         dict with reports from each judge and aggregate info
@@ -570,9 +633,10 @@ def run_backroomsbench(conversation, scenario_name, participant_models, output_d
     
     # Run judges in parallel
     results = {}
-    with ThreadPoolExecutor(max_workers=3) as executor:
+    executor = judge_pool or ThreadPoolExecutor(max_workers=len(JUDGES))
+    try:
         futures = {
-            executor.submit(run_single_judge, name, config, conversation_text): name
+            executor.submit(run_single_judge, name, config, conversation_text, force): name
             for name, config in JUDGES.items()
         }
         
@@ -581,10 +645,15 @@ def run_backroomsbench(conversation, scenario_name, participant_models, output_d
             if progress_callback:
                 progress_callback(judge_name, "complete")
             results[judge_name] = future.result()
+    finally:
+        if executor is not judge_pool:
+            executor.shutdown()
     
     # Save individual reports
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    session_dir = os.path.join(output_dir, f"session_{timestamp}")
+    if timestamp is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if session_dir is None:
+        session_dir = os.path.join(output_dir, f"session_{timestamp}")
     os.makedirs(session_dir, exist_ok=True)
     
     successful_reports = 0
@@ -615,11 +684,11 @@ def run_backroomsbench(conversation, scenario_name, participant_models, output_d
     averaged_scores = {}
     if len(successful_report_texts) >= 2:
         print(f"\n[BackroomsBench] 📊 Generating consensus summary...")
-        consensus_result = create_consensus_summary(successful_report_texts, session_dir)
+        consensus_result = create_consensus_summary(successful_report_texts, session_dir, force)
         if consensus_result:
             averaged_scores = consensus_result.get("averaged_scores", {})
             
-            if averaged_scores:
+            if averaged_scores and update_leaderboard:
                 print(f"[BackroomsBench] 🌀 Updating Elo leaderboard...")
                 update_elo_leaderboard(averaged_scores, scenario_name, timestamp, output_dir)
     
@@ -631,6 +700,7 @@ def run_backroomsbench(conversation, scenario_name, participant_models, output_d
         "message_count": len(conversation),
         "judges": {name: result["success"] for name, result in results.items()},
         "successful_evaluations": successful_reports,
+        "cached_judges": [name for name, result in results.items() if result.get("cached")],
         "averaged_scores": averaged_scores,
         "reports_dir": session_dir
     }
@@ -656,6 +726,133 @@ def run_backroomsbench(conversation, scenario_name, participant_models, output_d
     }
 
 
+def is_scored(session_dir, message_count=0):
+    """True if session_dir holds a finished evaluation with averaged scores, of at least message_count messages."""
+    summary_path = os.path.join(session_dir, "summary.json")
+    if not os.path.exists(summary_path):
+        return False
+    try:
+        with open(summary_path, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return bool(summary.get("averaged_scores")) and summary.get("message_count", 0) >= message_count
+
+
+def rebuild_leaderboard(output_dir):
+    """Recompute output_dir's leaderboard from every session summary in it, oldest first."""
+    summaries = []
+    for entry in os.listdir(output_dir):
+        summary_path = os.path.join(output_dir, entry, "summary.json")
+        if not os.path.exists(summary_path):
+            continue
+        try:
+            with open(summary_path, 'r', encoding='utf-8') as f:
+                summary = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[BackroomsBench] ⚠️ Skipping unreadable {summary_path}: {e}")
+            continue
+        if summary.get("averaged_scores"):
+            summaries.append(summary)
+    
+    summaries.sort(key=lambda summary: str(summary.get("timestamp", "")))
+    leaderboard = empty_leaderboard()  # The summaries are the whole history
+    for summary in summaries:
+        apply_session_elo(leaderboard, summary["averaged_scores"], summary.get("scenario", ""), summary["timestamp"])
+    save_leaderboard(leaderboard, output_dir)
+    print(f"[BackroomsBench] 📊 Leaderboard rebuilt from {len(summaries)} sessions")
+    return leaderboard
+
+
+def run_backroomsbench_batch(sessions, output_dir, max_judges=6, max_sessions=None, min_messages=5,
+                             rescore=False, force=False, progress_callback=None):
+    """
+    Evaluate many archived sessions (see session_archive.load_session) with one judge pool.
+    
+    Only the newest snapshot of each conversation is evaluated (auto-backup
+    archives one per round, see session_archive.latest_snapshots), into
+    output_dir/<session key>/ - one folder per conversation, so the rebuilt
+    leaderboard counts each once. An interrupted batch resumes where it
+    stopped: conversations whose folder already holds a summary with
+    averaged scores, covering at least as many messages as the snapshot,
+    are skipped unless rescore is set. The Elo leaderboard is not touched
+    per session; it is rebuilt from all the summaries in output_dir once the
+    batch ends.
+    
+    Args:
+        sessions: Loaded session dicts (see session_archive.load_session)
+        output_dir: Where the batch's session reports and leaderboard go
+        max_judges: Judge calls in flight at once, across all sessions
+        max_sessions: Sessions in flight at once (default: enough to keep the judges busy)
+        min_messages: Sessions with fewer dialogue messages are skipped
+        rescore: Evaluate sessions again even if already scored (cached
+            judge reports are reused, so this is cheap unless force)
+        force: Bypass the judge result cache
+        progress_callback: Optional callback(session_name, status, done, total)
+    
+    Returns:
+        dict with scored, skipped and failed session names
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if max_sessions is None:
+        max_sessions = max(1, max_judges // len(JUDGES)) + 1
+    
+    outcome = {"scored": [], "skipped": [], "failed": []}
+    pending = []
+    for session in latest_snapshots(sessions):
+        if len(session["messages"]) < min_messages:
+            print(f"[BackroomsBench] Skipping {session['key']}: {len(session['messages'])} messages")
+            outcome["skipped"].append(session["key"])
+        elif not rescore and is_scored(os.path.join(output_dir, session["key"]), len(session["messages"])):
+            outcome["skipped"].append(session["key"])
+        else:
+            pending.append(session)
+    
+    total = len(pending)
+    print(f"[BackroomsBench] Batch: {total} sessions to evaluate, {len(outcome['skipped'])} skipped "
+          f"({max_judges} judges / {max_sessions} sessions in flight)")
+    
+    def evaluate(session):
+        result = run_backroomsbench(
+            conversation=session["messages"],
+            scenario_name=session["scenario"],
+            participant_models=session["participants"],
+            output_dir=output_dir,
+            session_dir=os.path.join(output_dir, session["key"]),
+            timestamp=session.get("session_id") or session["timestamp"],
+            judge_pool=judge_pool,
+            update_leaderboard=False,
+            force=force
+        )
+        return bool(result["summary"]["averaged_scores"])
+    
+    judge_pool = ThreadPoolExecutor(max_workers=max_judges, thread_name_prefix="judge")
+    session_pool = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="bench")
+    try:
+        futures = {session_pool.submit(evaluate, session): session["key"] for session in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            name = futures[future]
+            try:
+                ok = future.result()
+            except Exception as e:
+                print(f"[BackroomsBench] ❌ {name} failed: {e}")
+                ok = False
+            outcome["scored" if ok else "failed"].append(name)
+            if progress_callback:
+                progress_callback(name, "scored" if ok else "failed", done, total)
+    except KeyboardInterrupt:
+        # Finished sessions are on disk; unfinished ones have no summary and run again next time
+        print(f"\n[BackroomsBench] Interrupted - {len(outcome['scored'])} sessions scored, rerun to resume")
+        session_pool.shutdown(wait=False, cancel_futures=True)
+        judge_pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    session_pool.shutdown()
+    judge_pool.shutdown()
+    
+    rebuild_leaderboard(output_dir)
+    return outcome
+
+
 # CLI interface for testing
 if __name__ == "__main__":
     test_conversation = [
@@ -0,0 +1,94 @@
+# branch_runner.py
+"""
+Per-conversation execution state so branches can run in the background.
+
+The turn loop used to key everything off app.active_branch: one turn counter
+on the app, one set of streaming buffers on the ConversationManager, and
+every handler looked up "the" conversation at the moment a signal arrived.
+Switching branches mid-turn sent the remaining chunks, notifications and
+the next turn into whichever conversation was now on screen, and only the
+visible branch could make progress.
+
+Each conversation (main = branch_id None, or a branch id) now gets a
+BranchRun holding its own
+
+- turn counter and iteration limit
+- streaming buffers / placeholder messages per AI
+- worker chain and !add_ai invitations for the current round
+
+Worker signals are bound to their run, so results land in the right
+conversation whatever is displayed; only the displayed run touches the
+chat pane, and a branch's finished messages are simply there when the user
+switches to it.
+
+BranchScheduler starts workers on the shared thread pool with at most
+max_concurrent running at once (each run executes its AIs one after the
+other, so this is "branches in flight"); the rest wait in FIFO order. API
+request rates are still governed by rate_limiter.py.
+"""
+
+from collections import deque
+
+from app_logging import get_logger
+
+log = get_logger("branch_runner")
+
+
+class BranchRun:
+    """Execution state of one conversation: main (branch_id None) or a branch."""
+
+    def __init__(self, branch_id=None):
+        self.branch_id = branch_id
+        self.turn_count = 0
+        self.max_iterations = 1
+        self.streaming_buffers = {}   # ai_name -> text streamed so far
+        self.streaming_messages = {}  # ai_name -> placeholder message in the conversation
+        self.pending_ais = []         # !add_ai invitations waiting for the end of the round
+        self.pending_workers = []     # their workers, run one after the other
+        self.request_started = None   # time.time() of the round's first request (signal latency)
+
+    @property
+    def label(self):
+        return "MAIN" if self.branch_id is None else "BRANCH"
+
+    def reset_streaming(self):
+        self.streaming_buffers.clear()
+        self.streaming_messages.clear()
+
+
+class BranchScheduler:
+    """Runs workers for several BranchRuns on one thread pool under a shared limit."""
+
+    def __init__(self, thread_pool, max_concurrent=3):
+        self.thread_pool = thread_pool
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.runs = {}
+        self._queue = deque()
+        self._running = 0
+
+    def run_for(self, branch_id=None):
+        """The BranchRun for a conversation, created on first use."""
+        run = self.runs.get(branch_id)
+        if run is None:
+            run = self.runs[branch_id] = BranchRun(branch_id)
+        return run
+
+    def submit(self, run, worker):
+        """Start worker for run now if a slot is free, otherwise queue it."""
+        worker.signals.finished.connect(self._on_finished)
+        if self._running < self.max_concurrent:
+            self._start(worker)
+        else:
+            self._queue.append((run, worker))
+            log.debug("[Branches] %s %s queued (%d running, %d waiting)",
+                      run.label, worker.ai_name, self._running, len(self._queue))
+
+    def _start(self, worker):
+        self._running += 1
+        self.thread_pool.start(worker)
+
+    def _on_finished(self):
+        self._running = max(self._running - 1, 0)
+        while self._queue and self._running < self.max_concurrent:
+            run, worker = self._queue.popleft()
+            self._start(worker)
@@ -7,22 +7,88 @@ load_dotenv()
 
 # Import model validator (validates against OpenRouter API, caches for 24h)
 try:
-    from tools.model_updater import validate_models
+    from tools.model_updater import validate_models, load_cached_metadata
     HAS_MODEL_VALIDATOR = True
 except ImportError:
     HAS_MODEL_VALIDATOR = False
+    load_cached_metadata = None
     print("[Config] tools.model_updater not available, skipping validation")
 
+from model_registry import ModelRegistry
+
 # Developer tools flag (used for freeze detector and other debug tools)
 DEVELOPER_TOOLS = False
 
+# Per-module log levels (see app_logging.py). DEVELOPER_TOOLS switches every module to DEBUG;
+# these override that. Can also be set via LOUNGE_LOG_LEVELS="shared_utils=DEBUG,main=INFO"
+LOG_LEVELS = {
+    # "shared_utils": "DEBUG",
+    # "main": "INFO",
+}
+
+# Sampling profiler (requires DEVELOPER_TOOLS). 0 = off; e.g. 100 samples stacks 100x/second.
+# Writes logs/profile_collapsed.txt (flame graph input) and logs/stall_log.txt
+PROFILER_SAMPLE_HZ = 0
+PROFILER_STALL_MS = 100  # Event-loop delays longer than this are logged as UI stalls
+
 # Runtime configuration
 TURN_DELAY = 2  # Delay between turns (in seconds)
+MAX_CONCURRENT_BRANCHES = 3  # Conversations (main + branches) whose AI turns run at once; others queue (see branch_runner.py)
 SHOW_CHAIN_OF_THOUGHT_IN_CONTEXT = True  # Set to True to include Chain of Thought in conversation history
 SHARE_CHAIN_OF_THOUGHT = False  # Set to True to allow AIs to see each other's Chain of Thought
 SORA_SECONDS=6
 SORA_SIZE="1280x720"
 
+# Images added to conversations (generated or uploaded) are saved at full resolution but sent to
+# models downscaled to this longest edge and recompressed, if Pillow is installed (see media_pipeline.py)
+IMAGE_MAX_EDGE = 1568
+IMAGE_JPEG_QUALITY = 85
+
+# How images in the context are prepared per model (see image_policy.py): the longest matching
+# model-id prefix wins, "default" covers the rest. max_edge in pixels (0 = as stored), format
+# "jpeg" (PNG kept for transparency) / "webp" / "png" / "keep", quality for JPEG/WebP.
+# Variants are made once per image and cached.
+IMAGE_POLICIES = {
+    "default": {"max_edge": 1568, "format": "jpeg", "quality": 85},
+    # "openai/": {"max_edge": 1024, "format": "jpeg", "quality": 80},
+}
+# Total base64 bytes of context images per request (0 = no limit). Older images are dropped
+# (text kept) until the payload fits, so fewer than the usual 5 may be sent; the newest always is.
+IMAGE_PAYLOAD_BUDGET = 6 * 1024 * 1024
+
+# BackroomsBench judge reports and consensus summaries are cached in judge_cache.db, keyed on the
+# transcript, judge model, temperature and prompt (see judge_cache.py), so re-evaluating a session
+# is free. Entries older than JUDGE_CACHE_MAX_AGE_DAYS are called again (0 = keep forever).
+JUDGE_CACHE_ENABLED = True
+JUDGE_CACHE_MAX_AGE_DAYS = 30
+
+# Shared outbound rate limits (see rate_limiter.py). Main turns, branches, BackroomsBench
+# judges and image jobs all draw from the same budget.
+#   rps: sustained request starts per second, burst: token bucket size
+#   max_concurrency: ceiling of the adaptive in-flight window (halved on 429/5xx, regrows on success)
+# Keys are a provider, or "provider:model-id" for a per-model budget. "default" covers
+# unlisted providers, "default_model" every model without its own entry.
+RATE_LIMITS = {
+    "openrouter": {"rps": 5, "burst": 10, "max_concurrency": 8},
+    "anthropic": {"rps": 2, "burst": 4, "max_concurrency": 4},
+    "openai": {"rps": 1, "burst": 2, "max_concurrency": 2},
+    "default": {"rps": 2, "burst": 4, "max_concurrency": 4},
+    "default_model": {"rps": 2, "burst": 4, "max_concurrency": 3},
+    "openrouter:google/gemini-3-pro-image-preview": {"rps": 0.5, "burst": 2, "max_concurrency": 2},
+}
+
+# OpenRouter call pipeline (see request_retry.py for the per-error retry policies)
+OPENROUTER_HEDGE_AFTER = 15  # Seconds without a first streamed chunk before a duplicate request is raced (0 = off)
+MAX_MODEL_FALLBACKS = 2  # Sibling models tried, in order, when a model's retries are exhausted
+# Explicit fallback order per model id; models not listed fall back within their provider group
+MODEL_FALLBACKS = {
+    # "anthropic/claude-opus-4.5": ["anthropic/claude-opus-4.1", "anthropic/claude-sonnet-4.5"],
+}
+
+# Provider-side prompt caching (see prompt_caching.py): cache_control breakpoints on the system
+# prompt and older history for Anthropic/Gemini models; cached-token counts are logged per turn
+PROMPT_CACHING = True
+
 # Output directory for conversation HTML files
 OUTPUTS_DIR = "outputs"
 
@@ -172,12 +238,13 @@ _CURATED_MODELS = {
     },
 }
 
-# Validate curated models against OpenRouter API (cached for 24 hours)
-# This removes any models that return 404, keeping the list up-to-date
+# Validate curated models against the cached OpenRouter model list (never touches the
+# network at import time - main.py calls refresh_ai_models() in the background once
+# the window is up). This removes any models that return 404, keeping the list up-to-date
 if HAS_MODEL_VALIDATOR:
-    AI_MODELS = validate_models(_CURATED_MODELS)
+    AI_MODELS = validate_models(_CURATED_MODELS, allow_network=False)
 else:
-    AI_MODELS = _CURATED_MODELS
+    AI_MODELS = dict(_CURATED_MODELS)
 
 # Flat lookup dict for compatibility with functions that expect simple name→id mapping
 _FLAT_AI_MODELS = {}
@@ -185,6 +252,9 @@ for tier_models in AI_MODELS.values():
     for provider_models in tier_models.values():
         _FLAT_AI_MODELS.update(provider_models)
 
+# Precomputed lookups and invite lists (see model_registry.py); rebuilt by apply_ai_models()
+_MODEL_REGISTRY = ModelRegistry(AI_MODELS, load_cached_metadata)
+
 # System prompt pairs library
 SYSTEM_PROMPT_PAIRS = {
     # this is a basic system prompt for a conversation between two AIs. Experiment with different prompts to see how they affect the conversation. Add new prompts to the library to use them in the GUI.
@@ -1134,6 +1204,15 @@ Night protocols:
         "AI-5": """""",
     }
 }
+
+# The dicts above are the built-in defaults. The scenario editor and the settings dialog
+# edit scenarios.db (see scenario_store.py), which is seeded from them on first access (not
+# at import); later edits to an entry here are merged into the store on the next start.
+# SYSTEM_PROMPT_PAIRS and STARTING_PROMPTS become read-only views of the store.
+from scenario_store import store_views
+SYSTEM_PROMPT_PAIRS, STARTING_PROMPTS = store_views(SYSTEM_PROMPT_PAIRS, STARTING_PROMPTS)
+
+
 def get_model_tier_by_id(model_id):
     """Get the tier (Paid/Free) for a model by its model_id.
 
@@ -1155,7 +1234,7 @@ def get_model_id(display_name):
     Returns:
         The model_id (e.g., "claude-opus-4.5") or None if not found
     """
-    return _FLAT_AI_MODELS.get(display_name)
+    return _MODEL_REGISTRY.get_model_id(display_name)
 
 def get_display_name(model_id):
     """Get the display name for a given model_id.
@@ -1166,10 +1245,7 @@ def get_display_name(model_id):
     Returns:
         The display name (e.g., "Claude Opus 4.5") or the model_id if not found
     """
-    for display_name, mid in _FLAT_AI_MODELS.items():
-        if mid == model_id:
-            return display_name
-    return model_id  # Fallback to model_id if not found
+    return _MODEL_REGISTRY.get_display_name(model_id)
 
 def get_invite_models_text(tier="Both"):
     """Get formatted text listing available models for AI invitations.
@@ -1180,21 +1256,40 @@ def get_invite_models_text(tier="Both"):
     Returns:
         Formatted string with model list for inclusion in system prompts
     """
-    if tier == "Free":
-        # Filter for free models (those with :free in model_id)
-        models = {name: mid for name, mid in _FLAT_AI_MODELS.items() if ":free" in mid.lower()}
-    elif tier == "Paid":
-        # Filter for paid models (those without :free in model_id)
-        models = {name: mid for name, mid in _FLAT_AI_MODELS.items() if ":free" not in mid.lower()}
-    else:  # "Both"
-        models = _FLAT_AI_MODELS
+    return _MODEL_REGISTRY.get_invite_text(tier)
 
-    if not models:
-        return "No models available for this tier."
+def get_model_registry():
+    """The ModelRegistry for the current AI_MODELS (replaced when the model list refreshes)."""
+    return _MODEL_REGISTRY
 
-    # Format as a bulleted list
-    model_list = "\n".join(f"  - {name}" for name in sorted(models.keys()))
+def fetch_validated_models():
+    """Validate the curated list against the live OpenRouter API (blocking - call off the GUI thread).
 
-    tier_label = f"{tier} models" if tier != "Both" else "Available models"
-    return f"{tier_label}:\n{model_list}"
+    Returns:
+        The validated model dict, or None if no validator is available
+    """
+    if not HAS_MODEL_VALIDATOR:
+        return None
+    return validate_models(_CURATED_MODELS)
+
+def apply_ai_models(models):
+    """Replace AI_MODELS in place (modules hold references to it). Call on the GUI thread.
+
+    Returns:
+        True if the model list changed
+    """
+    global _MODEL_REGISTRY
+    if not models:
+        return False
+    changed = models != AI_MODELS
+    if changed:
+        AI_MODELS.clear()
+        AI_MODELS.update(models)
+        _FLAT_AI_MODELS.clear()
+        for tier_models in AI_MODELS.values():
+            for provider_models in tier_models.values():
+                _FLAT_AI_MODELS.update(provider_models)
+    # Rebuild even when the list is unchanged: the refresh also rewrote the metadata cache
+    _MODEL_REGISTRY = ModelRegistry(AI_MODELS, load_cached_metadata)
+    return changed
 
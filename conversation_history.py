@@ -0,0 +1,286 @@
+# conversation_history.py
+"""
+Structurally shared conversation histories for branches and workers.
+
+Branching used to copy the parent conversation twice (create_branch stored
+both a 'history' copy and a 'conversation' copy), the rabbithole/fork
+callbacks copied every message dict, and every Worker plus
+start_next_ai_turn took another full copy per turn - O(history) each time,
+for a history that is almost never edited, only appended to.
+
+A Conversation is a drop-in list replacement built from
+
+- a chain of frozen Segments (tuples of messages, each pointing at its
+  parent segment) shared with every fork taken from it
+- its own mutable tail list
+
+copy()/fork() freezes the tail into a new segment and returns a
+Conversation on the same chain, so branches, their 'history' snapshot and
+worker snapshots share everything before the fork point. Short segments are
+merged as they are frozen, keeping the chain logarithmic: a fork costs
+amortised O(log n) per new message instead of O(n), and iteration is a few
+tuple walks. append() only touches the tail. Edits that reach into shared
+history (removing a typing indicator or notification that was already
+forked) copy just the segments from that point on into the tail, never the
+shared tuples, so other holders are unaffected.
+
+Like list.copy() the sharing is shallow: the Message objects themselves
+are shared. Code that edits a message in place (the streaming placeholder,
+attaching a generated image) must first get it through writable_message(),
+which swaps a message still in shared history for a private copy - the
+list-level copy-on-write, applied to the one message - so the edit doesn't
+show up in forks. Plain dicts are stored as Messages (message_record.py) as
+they are added.
+"""
+
+from bisect import bisect_right
+from collections.abc import MutableSequence
+
+from message_record import as_message
+
+class Segment:
+    """An immutable run of messages appended after its parent segment."""
+
+    __slots__ = ("parent", "items", "start")
+
+    def __init__(self, parent, items):
+        self.parent = parent
+        self.items = items
+        self.start = parent.start + len(parent.items) if parent else 0
+
+    def chain(self):
+        """Segments from the root down to this one."""
+        chain = []
+        segment = self
+        while segment is not None:
+            chain.append(segment)
+            segment = segment.parent
+        chain.reverse()
+        return chain
+
+
+class Conversation(MutableSequence):
+    """A list of message dicts whose history is shared with its forks."""
+
+    __slots__ = ("_base", "_tail", "_chunks", "_offsets")
+
+    def __init__(self, messages=(), _base=None):
+        self._set_base(_base)
+        self._tail = [as_message(msg) for msg in messages]
+
+    def _set_base(self, base):
+        self._base = base
+        chain = base.chain() if base else []
+        self._chunks = tuple(segment.items for segment in chain)
+        self._offsets = [segment.start for segment in chain]
+
+    @property
+    def _shared_len(self):
+        base = self._base
+        return base.start + len(base.items) if base else 0
+
+    # -- forking -------------------------------------------------------------
+
+    def _freeze(self):
+        """Move the tail into a new shared segment and return it."""
+        if self._tail:
+            # Merge into preceding segments no longer than the new one (like
+            # carries in a binary counter): the chain stays O(log n) deep and
+            # each message is re-tupled O(log n) times over its lifetime
+            items = tuple(self._tail)
+            base = self._base
+            while base is not None and len(base.items) <= len(items):
+                items = base.items + items
+                base = base.parent
+            self._set_base(Segment(base, items))
+            self._tail = []
+        return self._base
+
+    def fork(self, stop=None):
+        """
+        A new Conversation sharing this one's history.
+
+        Args:
+            stop: Only share the first `stop` messages (whole segments are
+                shared, the partial remainder is copied into the fork's tail)
+        """
+        base = self._freeze()
+        if stop is None or stop >= len(self):
+            return Conversation(_base=base)
+        stop = max(stop, 0)
+        segment = base
+        while segment is not None and segment.start > stop:
+            segment = segment.parent
+        if segment is None:
+            return Conversation()
+        if stop == segment.start + len(segment.items):
+            return Conversation(_base=segment)
+        return Conversation(segment.items[:stop - segment.start], _base=segment.parent)
+
+    def copy(self):
+        return self.fork()
+
+    __copy__ = copy
+
+    def _unshare_from(self, index):
+        """Ensure messages from index on live in the tail (copying only those segments)."""
+        if index >= self._shared_len:
+            return
+        segment = self._base
+        moved = []
+        while segment is not None and segment.start + len(segment.items) > index:
+            moved.append(segment.items)
+            segment = segment.parent
+        moved.reverse()
+        tail = [msg for items in moved for msg in items]
+        tail.extend(self._tail)
+        self._set_base(segment)
+        self._tail = tail
+
+    # -- sequence protocol ---------------------------------------------------
+
+    def __len__(self):
+        return self._shared_len + len(self._tail)
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+        yield from self._tail
+
+    def __reversed__(self):
+        yield from reversed(self._tail)
+        for chunk in reversed(self._chunks):
+            yield from reversed(chunk)
+
+    def _normalize(self, index):
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("conversation index out of range")
+        return index
+
+    def _slice(self, start, stop):
+        """Messages [start:stop] as a list, touching only the segments involved."""
+        shared = self._shared_len
+        if start >= shared:
+            return self._tail[start - shared:stop - shared]
+        result = []
+        i = bisect_right(self._offsets, start) - 1
+        while i < len(self._chunks) and self._offsets[i] < stop:
+            offset = self._offsets[i]
+            result.extend(self._chunks[i][max(start - offset, 0):stop - offset])
+            i += 1
+        if stop > shared:
+            result.extend(self._tail[:stop - shared])
+        return result
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._slice(start, max(start, stop))
+            return list(self)[index]
+        index = self._normalize(index)
+        shared = self._shared_len
+        if index >= shared:
+            return self._tail[index - shared]
+        i = bisect_right(self._offsets, index) - 1
+        return self._chunks[i][index - self._offsets[i]]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._unshare_from(0)
+            self._tail[index] = [as_message(msg) for msg in value]
+            return
+        index = self._normalize(index)
+        self._unshare_from(index)
+        self._tail[index - self._shared_len] = as_message(value)
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            self._unshare_from(0)
+            del self._tail[index]
+            return
+        index = self._normalize(index)
+        self._unshare_from(index)
+        del self._tail[index - self._shared_len]
+
+    def insert(self, index, value):
+        length = len(self)
+        if index < 0:
+            index = max(index + length, 0)
+        index = min(index, length)
+        self._unshare_from(index)
+        self._tail.insert(index - self._shared_len, as_message(value))
+
+    def append(self, value):
+        self._tail.append(as_message(value))
+
+    def extend(self, values):
+        if values is self:
+            values = list(values)
+        self._tail.extend(as_message(msg) for msg in values)
+
+    def pop(self, index=-1):
+        index = self._normalize(index)
+        self._unshare_from(index)
+        return self._tail.pop(index - self._shared_len)
+
+    def clear(self):
+        self._set_base(None)
+        self._tail = []
+
+    def writable(self, message):
+        """
+        message, safe to edit in place, or None if it isn't in this conversation.
+
+        Looked up by identity, newest first. A message still in history shared
+        with forks is replaced here by a copy, which is returned; one in the
+        tail is returned as is (no fork can see it).
+        """
+        index = len(self)
+        for msg in reversed(self):
+            index -= 1
+            if msg is message:
+                break
+        else:
+            return None
+        if index >= self._shared_len:
+            return message
+        private = message.copy()
+        self[index] = private
+        return private
+
+    def __eq__(self, other):
+        if isinstance(other, (Conversation, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other, strict=True))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return f"Conversation({list(self)!r})"
+
+    def __reduce__(self):
+        return (Conversation, (list(self),))
+
+
+def writable_message(conversation, message):
+    """message ready for in-place edits in conversation (see Conversation.writable); lists edit in place."""
+    if isinstance(conversation, Conversation):
+        return conversation.writable(message)
+    return message if any(msg is message for msg in conversation) else None
+
+
+def fork_conversation(conversation, stop=None):
+    """Fork a Conversation (shared history) or shallow-copy a plain list into one."""
+    if isinstance(conversation, Conversation):
+        return conversation.fork(stop)
+    return Conversation(conversation if stop is None else conversation[:stop])
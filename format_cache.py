@@ -0,0 +1,106 @@
+# format_cache.py
+"""
+Memoized message text -> rich text / HTML formatting.
+
+MessageWidget._format_code_blocks (Qt rich text), ConversationPane.
+process_content_with_code_blocks (conversation HTML) and the export's
+greentext pass ran their escape + regex pipelines over every message on every
+rebuild and every HTML write - in a long session almost all of that text is
+old and unchanged. Finalized messages now go through one bounded LRU cache:
+
+- Keyed by output format, theme and a hash of the text, so each message is
+  formatted once per format and a palette change (styles.COLORS) misses
+- Shared by the Qt path and the HTML export path
+- Bounded by entry count and total cached characters
+
+Streaming updates should call the formatter directly: partial text changes on
+every chunk and would only churn the cache.
+
+Usage:
+    from format_cache import get_format_cache
+    html = get_format_cache().get_or_format("qt", text, self._render_code_blocks)
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Defaults: a few thousand messages' worth of formatted output
+MAX_ENTRIES = 4096
+MAX_CHARS = 8_000_000
+
+
+def content_key(text):
+    """Stable digest of a message's text (cheaper to keep around than the text itself)."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def theme_key():
+    """Identifies the active palette; formatted output embeds its colors."""
+    try:
+        from styles import COLORS
+    except ImportError:
+        return None
+    return hash(tuple(sorted(COLORS.items())))
+
+
+class FormatCache:
+    """Thread-safe LRU of formatted output keyed by (format, theme, content hash)."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_chars=MAX_CHARS):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._entries = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_format(self, fmt, text, formatter):
+        """Return formatter(text), computing it only on the first request per format/theme/text."""
+        if not text:
+            return formatter(text)
+        key = (fmt, theme_key(), content_key(text))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        # Format outside the lock; a concurrent miss on the same text just formats twice
+        result = formatter(text)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._chars -= len(previous)
+            self._entries[key] = result
+            self._chars += len(result)
+            while self._entries and (len(self._entries) > self.max_entries or self._chars > self.max_chars):
+                _, evicted = self._entries.popitem(last=False)
+                self._chars -= len(evicted)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._chars = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "chars": self._chars,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache = FormatCache()
+
+
+def get_format_cache():
+    """The process-wide FormatCache shared by the GUI and the HTML export."""
+    return _cache
@@ -0,0 +1,179 @@
+# graph_physics.py
+"""
+Layout physics for the branch network graph (NetworkGraphWidget).
+
+The widget used to run an all-pairs repulsion loop over dicts of tuples every
+50 ms tick, forever - even with the layout long at rest. GraphPhysics keeps the
+same forces (short-range repulsion, constant pull along edges, damping, the
+seed node pinned) but:
+
+- Stores positions/velocities/radii as parallel flat lists indexed by node,
+  rebuilt only when the graph changes
+- Finds repulsion pairs with a uniform grid spatial hash: nodes only interact
+  within (r1 + r2), so with cell size = 2 * max radius each node only checks
+  its own and the 8 neighbouring cells, and every pair is visited once
+- Reports convergence: once the fastest node moves less than SETTLE_SPEED for
+  SETTLE_TICKS steps the layout is settled and the caller can stop its timer
+
+Pure Python on purpose - graphs here are dozens of nodes, not thousands, and the
+app doesn't depend on numpy.
+"""
+
+import math
+
+# Max per-tick speed (layout units) considered "at rest"
+SETTLE_SPEED = 0.05
+# Consecutive resting ticks before the layout counts as settled
+SETTLE_TICKS = 10
+
+_NEIGHBOUR_CELLS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+class GraphPhysics:
+    """Force-directed layout step with grid-hashed repulsion and settle detection."""
+
+    def __init__(self, repulsion_strength=0.5, attraction_strength=0.1, damping=0.8):
+        self.repulsion_strength = repulsion_strength
+        self.attraction_strength = attraction_strength
+        self.damping = damping
+
+        self.ids = []
+        self.index = {}
+        self.xs = []
+        self.ys = []
+        self.vxs = []
+        self.vys = []
+        self.radii = []       # sqrt(node size), as in the widget's drawing code
+        self.pinned = []
+        self.edges = []       # (source index, target index)
+        self._max_radius = 0.0
+        self._rest_ticks = 0
+
+    @property
+    def settled(self):
+        return self._rest_ticks >= SETTLE_TICKS
+
+    def wake(self):
+        """Forget the settled state (graph changed or was nudged)."""
+        self._rest_ticks = 0
+
+    def load(self, nodes, positions, sizes, edges, pinned=("main",)):
+        """
+        (Re)build the arrays from the widget's dicts, keeping velocities of known nodes.
+
+        Nodes without a position are left out, as are edges touching them.
+        """
+        old_velocity = {node_id: (self.vxs[i], self.vys[i]) for i, node_id in enumerate(self.ids)}
+
+        self.ids = [node_id for node_id in nodes if node_id in positions]
+        self.index = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.xs = [float(positions[node_id][0]) for node_id in self.ids]
+        self.ys = [float(positions[node_id][1]) for node_id in self.ids]
+        velocities = [old_velocity.get(node_id, (0.0, 0.0)) for node_id in self.ids]
+        self.vxs = [v[0] for v in velocities]
+        self.vys = [v[1] for v in velocities]
+        self.radii = [math.sqrt(sizes.get(node_id, 400)) for node_id in self.ids]
+        self.pinned = [node_id in pinned for node_id in self.ids]
+        self._max_radius = max(self.radii, default=0.0)
+
+        index = self.index
+        self.edges = [(index[s], index[t]) for s, t in edges if s in index and t in index and s != t]
+        self.wake()
+
+    def step(self, skip_edges=()):
+        """
+        Advance one tick. Returns the fastest node's speed.
+
+        Args:
+            skip_edges: (source_id, target_id) pairs that don't pull yet (still growing)
+        """
+        n = len(self.ids)
+        if n < 2:
+            self._rest_ticks = SETTLE_TICKS
+            return 0.0
+
+        xs, ys, radii = self.xs, self.ys, self.radii
+        fx = [0.0] * n
+        fy = [0.0] * n
+
+        # --- Repulsion: bucket nodes into cells no smaller than the interaction range
+        cell = max(2.0 * self._max_radius, 1.0)
+        grid = {}
+        for i in range(n):
+            key = (int(xs[i] // cell), int(ys[i] // cell))
+            bucket = grid.get(key)
+            if bucket is None:
+                grid[key] = [i]
+            else:
+                bucket.append(i)
+
+        strength = self.repulsion_strength
+        for (cx, cy), members in grid.items():
+            for dx_cell, dy_cell in _NEIGHBOUR_CELLS:
+                others = grid.get((cx + dx_cell, cy + dy_cell))
+                if others is None:
+                    continue
+                for i in members:
+                    xi, yi, ri = xs[i], ys[i], radii[i]
+                    for j in others:
+                        # Each unordered pair once (j's cell visits i with the roles swapped)
+                        if j <= i:
+                            continue
+                        dx = xi - xs[j]
+                        dy = yi - ys[j]
+                        reach = ri + radii[j]  # 2 * min_distance
+                        dist_sq = dx * dx + dy * dy
+                        if dist_sq >= reach * reach:
+                            continue
+                        distance = max(0.1, math.sqrt(dist_sq))
+                        push = strength * (1.0 - distance / reach) / distance
+                        fx[i] += dx * push
+                        fy[i] += dy * push
+                        fx[j] -= dx * push
+                        fy[j] -= dy * push
+
+        # --- Constant pull along fully grown edges
+        pull = self.attraction_strength
+        ids = self.ids
+        for s, t in self.edges:
+            if skip_edges and (ids[s], ids[t]) in skip_edges:
+                continue
+            dx = xs[t] - xs[s]
+            dy = ys[t] - ys[s]
+            distance = max(0.1, math.sqrt(dx * dx + dy * dy))
+            ux = dx / distance * pull
+            uy = dy / distance * pull
+            fx[s] += ux
+            fy[s] += uy
+            fx[t] -= ux
+            fy[t] -= uy
+
+        # --- Integrate
+        damping = self.damping
+        vxs, vys, pinned = self.vxs, self.vys, self.pinned
+        max_speed = 0.0
+        for i in range(n):
+            if pinned[i]:
+                vxs[i] = vys[i] = 0.0
+                continue
+            vx = (vxs[i] + fx[i]) * damping
+            vy = (vys[i] + fy[i]) * damping
+            vxs[i] = vx
+            vys[i] = vy
+            xs[i] += vx
+            ys[i] += vy
+            speed = abs(vx) + abs(vy)
+            if speed > max_speed:
+                max_speed = speed
+
+        if max_speed < SETTLE_SPEED:
+            self._rest_ticks += 1
+        else:
+            self._rest_ticks = 0
+        return max_speed
+
+    def write_positions(self, positions):
+        """Copy the simulated positions back into the widget's {node_id: (x, y)} dict."""
+        xs, ys = self.xs, self.ys
+        for i, node_id in enumerate(self.ids):
+            positions[node_id] = (xs[i], ys[i])
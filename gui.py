@@ -13,7 +13,6 @@ import math
 import random
 from datetime import datetime
 from io import BytesIO
-from PIL import Image
 import time
 from pathlib import Path
 import uuid
@@ -23,7 +22,6 @@ import re
 import sys
 import webbrowser
 import subprocess
-import base64
 from PyQt6.QtCore import Qt, QRect, QTimer, QRectF, QPointF, QSize, pyqtSignal, QEvent, QPropertyAnimation, QEasingCurve
 from PyQt6.QtGui import QFont, QColor, QPainter, QPen, QBrush, QFontDatabase, QTextCursor, QAction, QKeySequence, QTextCharFormat, QLinearGradient, QRadialGradient, QPainterPath, QImage, QPixmap
 from PyQt6.QtWidgets import QWidget, QApplication, QMainWindow, QSplitter, QVBoxLayout, QHBoxLayout, QTextEdit, QFrame, QLineEdit, QPushButton, QLabel, QComboBox, QMenu, QFileDialog, QMessageBox, QScrollArea, QToolTip, QSizePolicy, QCheckBox, QGraphicsDropShadowEffect, QDialog
@@ -54,6 +52,43 @@ except ImportError:
 # Add import for grouped model selector functionality
 from grouped_model_selector import GroupedModelComboBox
 
+# Layout physics for the branch network graph
+from graph_physics import GraphPhysics
+
+# Shared tick for the animated widgets (pauses when unfocused/hidden/idle)
+from animation_clock import get_animation_clock
+
+# Memoized message formatting, shared with the HTML export in main.py
+from format_cache import get_format_cache
+
+# Background-decoded, size-bucketed images for the preview pane and chat
+from image_cache import get_image_cache
+
+# Rendered system prompts are cached per invite tier
+from prompt_compiler import get_prompt_compiler
+
+# Per-call token / latency / cost records for the status bar and session exports
+from usage_ledger import get_usage_ledger
+
+# Branches and their parents share history segments instead of copying
+from conversation_history import Conversation, fork_conversation
+
+# Slotted message records with cached kind / text / has-image
+from message_record import MessageKind, message_kind, message_text, message_has_image, model_label, project
+
+# Uploaded images are sniffed, downscaled and encoded off the GUI thread
+from media_pipeline import get_media_pipeline
+
+# session.json in exports/backups, read back by the BackroomsBench batch runner
+from session_archive import dialogue_messages, write_session_record
+
+# Stall attribution for the sampling profiler (no-op unless it's running)
+try:
+    from tools.freeze_detector import profiled_section
+except ImportError:
+    def profiled_section(*_args, **_kwargs):
+        return lambda func: func
+
 
 # =============================================================================
 # MESSAGE WIDGET CHAT SYSTEM - Each message is a separate widget
@@ -84,6 +119,7 @@ class MessageWidget(QFrame):
     }
     HUMAN_COLOR = '#ff00b3'  # Hot Pink/Magenta
     TIMESTAMP_COLOR = '#7a8899'  # Subtle readable gray
+    INLINE_IMAGE_WIDTH = 400  # Generated images in the chat
     
     def __init__(self, message_data, parent=None):
         super().__init__(parent)
@@ -99,11 +135,10 @@ class MessageWidget(QFrame):
         layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         
         role = self.message_data.get('role', 'user')
-        content = self.message_data.get('content', '')
         msg_type = self.message_data.get('_type', '')
         
-        # Extract text from structured content
-        text_content = self._extract_text(content)
+        # Text of structured content (cached on the message)
+        text_content = message_text(self.message_data)
         
         # Style based on role/type
         if msg_type == 'typing_indicator':
@@ -125,17 +160,11 @@ class MessageWidget(QFrame):
         else:
             self._setup_default_message(text_content)
     
-    def _extract_text(self, content):
-        """Extract text from content (handles structured content with images)."""
-        if isinstance(content, list):
-            text_parts = []
-            for part in content:
-                if isinstance(part, dict) and part.get('type') == 'text':
-                    text_parts.append(part.get('text', ''))
-            return ''.join(text_parts)
-        return str(content) if content else ''
-    
     def _format_code_blocks(self, text):
+        """Rich text for a finalized message, memoized in the shared format cache."""
+        return get_format_cache().get_or_format("qt", text, self._render_code_blocks)
+    
+    def _render_code_blocks(self, text):
         """
         Convert markdown code blocks and inline code to HTML for Qt RichText.
         
@@ -347,14 +376,12 @@ class MessageWidget(QFrame):
         if not image_prompt:
             content = self.message_data.get('content', '')
             if isinstance(content, list):
-                for part in content:
-                    if isinstance(part, dict) and part.get('type') == 'text':
-                        text = part.get('text', '')
-                        import re
-                        match = re.search(r'!image\s+"([^"]+)"', text)
-                        if match:
-                            image_prompt = match.group(1)
-                            break
+                for text in project(self.message_data).text_parts:
+                    import re
+                    match = re.search(r'!image\s+"([^"]+)"', text)
+                    if match:
+                        image_prompt = match.group(1)
+                        break
             elif isinstance(content, str) and '!image' in content:
                 import re
                 match = re.search(r'!image\s+"([^"]+)"', content)
@@ -384,15 +411,25 @@ class MessageWidget(QFrame):
             prompt_label.setWordWrap(True)
             self.layout().addWidget(prompt_label)
         
-        # Display image
+        # Display image (decoded off the GUI thread at display size)
         if image_path and os.path.exists(image_path):
             img_label = QLabel()
             img_label.setStyleSheet("background-color: transparent;")
-            pixmap = QPixmap(image_path)
-            if not pixmap.isNull():
-                scaled = pixmap.scaledToWidth(400, Qt.TransformationMode.SmoothTransformation)
-                img_label.setPixmap(scaled)
-                self.layout().addWidget(img_label)
+            self.layout().addWidget(img_label)
+            get_image_cache().load(
+                image_path, QSize(self.INLINE_IMAGE_WIDTH, 4 * self.INLINE_IMAGE_WIDTH),
+                lambda image: self._set_inline_image(img_label, image)
+            )
+    
+    def _set_inline_image(self, img_label, image):
+        """Show a decoded generated image in its label (hidden if it failed to load)."""
+        if image is None:
+            img_label.hide()
+            return
+        pixmap = QPixmap.fromImage(image)
+        if pixmap.width() != self.INLINE_IMAGE_WIDTH:
+            pixmap = pixmap.scaledToWidth(self.INLINE_IMAGE_WIDTH, Qt.TransformationMode.SmoothTransformation)
+        img_label.setPixmap(pixmap)
     
     def _setup_generated_video(self):
         """Setup generated video display with AI-matching colors."""
@@ -456,7 +493,7 @@ class MessageWidget(QFrame):
     def _setup_assistant_message(self, text):
         """Setup AI assistant message style."""
         ai_name = self.message_data.get('ai_name', 'AI')
-        model = self.message_data.get('model', '')
+        model = model_label(self.message_data)
         border_color = self._get_ai_color()
         
         self.setStyleSheet(f"""
@@ -526,8 +563,9 @@ class MessageWidget(QFrame):
         for final rendered messages.
         """
         if self._content_label:
-            # Format code blocks for RichText display (HTML-based for streaming)
-            formatted_text = self._format_code_blocks(new_text)
+            # Format code blocks for RichText display (HTML-based for streaming).
+            # Not cached: partial text changes on every chunk
+            formatted_text = self._render_code_blocks(new_text)
             self._content_label.setText(formatted_text)
 
 
@@ -1016,9 +1054,8 @@ class DepthGauge(QWidget):
         
         # Animation
         self.pulse_offset = 0
-        self.pulse_timer = QTimer(self)
-        self.pulse_timer.timeout.connect(self._animate_pulse)
-        self.pulse_timer.start(50)
+        self.pulse_timer = get_animation_clock().subscribe(self, self._animate_pulse, 50)
+        self.pulse_timer.start()
         
     def _animate_pulse(self):
         self.pulse_offset = (self.pulse_offset + 2) % 360
@@ -1101,8 +1138,7 @@ class SignalIndicator(QWidget):
         
         # Animation for activity
         self.bar_offset = 0
-        self.activity_timer = QTimer(self)
-        self.activity_timer.timeout.connect(self._animate)
+        self.activity_timer = get_animation_clock().subscribe(self, self._animate, 100)
         
     def _animate(self):
         self.bar_offset = (self.bar_offset + 1) % 5
@@ -1210,9 +1246,11 @@ class NetworkGraphWidget(QWidget):
         self.selected_node = None
         self.hovered_node = None
         self.animation_progress = 0
-        self.animation_timer = QTimer(self)
-        self.animation_timer.timeout.connect(self.update_animation)
-        self.animation_timer.start(50)  # 20 FPS animation
+        self.animation_interval = 50  # 20 FPS animation
+        # Not decorative: the layout has to settle even between turns. Started by
+        # wake() when there is something to animate; stops once the layout settles
+        self.animation_timer = get_animation_clock().subscribe(
+            self, self.update_animation, self.animation_interval, decorative=False)
         
         # Mycelial node settings
         self.hyphae_count = 5  # Number of hyphae per node
@@ -1227,12 +1265,22 @@ class NetworkGraphWidget(QWidget):
             'branch': '#F78154'   # Soft orange
         }
         
-        # Collision dynamics
-        self.node_velocities = {}  # Store velocities for each node
+        # Collision dynamics (grid-hashed, see graph_physics.py)
         self.repulsion_strength = 0.5  # Strength of repulsion between nodes
         self.attraction_strength = 0.1  # Strength of attraction along edges
         self.damping = 0.8  # Damping factor to prevent oscillation
         self.apply_physics = True  # Toggle for physics simulation
+        self.physics = GraphPhysics(self.repulsion_strength, self.attraction_strength, self.damping)
+        self._physics_dirty = True  # Graph changed since the physics arrays were built
+        
+        # Pre-rendered layers (see paintEvent): only growing edges and the
+        # hover/selection glow are drawn from scratch each frame
+        self._background_cache = None  # (size key, QPixmap)
+        self._edge_layer_cache = None  # (size key, QPixmap) of fully grown edges
+        self._edge_layer_dirty = True
+        self._layout_at_rest = True  # False while physics is moving nodes
+        self._sprite_cache = {}  # (node_id, size, color) -> (QPixmap, extent)
+        self._sprite_scale = None
         
         # Set up the widget
         self.setMinimumSize(300, 300)
@@ -1245,10 +1293,43 @@ class NetworkGraphWidget(QWidget):
             # Initialize edge growth at 0
             self.growing_edges[(source, target)] = 0.0
             # Force update to start animation immediately
+            self._physics_dirty = True
+            self._edge_layer_dirty = True
+            self.wake()
             self.update()
+    
+    def set_graph(self, nodes, edges, node_positions, node_colors, node_labels, node_sizes):
+        """Replace the graph data (called by NetworkPane when nodes/edges are added)"""
+        changed = nodes != self.nodes or edges != self.edges or node_positions is not self.node_positions
+        self.nodes = nodes
+        self.edges = edges
+        self.node_positions = node_positions
+        self.node_colors = node_colors
+        self.node_labels = node_labels
+        self.node_sizes = node_sizes
+        if changed:
+            self._physics_dirty = True
+            self._edge_layer_dirty = True
+            self.wake()
+        self.update()
+    
+    def wake(self):
+        """Restart the animation timer after the layout had settled"""
+        self.physics.wake()
+        if not self.animation_timer.isActive() and self.isVisible():
+            self.animation_timer.start(self.animation_interval)
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.wake()
+    
+    def hideEvent(self, event):
+        # Hidden tab: nothing to animate
+        self.animation_timer.stop()
+        super().hideEvent(event)
         
     def update_animation(self):
-        """Update animation state"""
+        """Update animation state; stops the timer once nothing is moving"""
         self.animation_progress = (self.animation_progress + 0.05) % 1.0
         
         # Update growing edges
@@ -1267,406 +1348,385 @@ class NetworkGraphWidget(QWidget):
         for edge in edges_to_remove:
             if edge in self.growing_edges:
                 self.growing_edges.pop(edge)
+        if edges_to_remove:
+            # Grown edges move from the per-frame overlay into the cached layer
+            self._edge_layer_dirty = True
         
         # Apply collision dynamics if enabled
+        settled = True
         if self.apply_physics and len(self.nodes) > 1:
-            self.apply_collision_dynamics()
+            settled = self.apply_collision_dynamics()
         
-        # Update the widget
-        self.update()
+        if settled and not has_growing_edges:
+            # Layout at rest: idle until wake() (new node/edge, shown again)
+            self.animation_timer.stop()
+        
+        # Update the widget (skipped while hidden behind another sidebar tab)
+        if self.isVisible():
+            self.update()
     
     def apply_collision_dynamics(self):
-        """Apply collision dynamics to prevent node overlap"""
-        # Initialize velocities if needed
-        for node_id in self.nodes:
-            if node_id not in self.node_velocities:
-                self.node_velocities[node_id] = (0, 0)
+        """Apply collision dynamics to prevent node overlap. Returns True once settled."""
+        if self._physics_dirty:
+            self.physics.load(self.nodes, self.node_positions, self.node_sizes, self.edges)
+            self._physics_dirty = False
+        growing = {edge for edge, progress in self.growing_edges.items() if progress < 1.0}
+        self.physics.step(skip_edges=growing)
+        self.physics.write_positions(self.node_positions)
+        settled = self.physics.settled
+        if not (settled and self._layout_at_rest):
+            # Nodes moved (or just came to rest): cached edges are stale
+            self._edge_layer_dirty = True
+        self._layout_at_rest = settled
+        return settled
+    
+    def _make_layer(self, width, height):
+        """Transparent pixmap covering width x height logical pixels at the screen's DPR"""
+        dpr = self.devicePixelRatioF()
+        pixmap = QPixmap(max(1, int(width * dpr)), max(1, int(height * dpr)))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        return pixmap
+    
+    def _background_layer(self, width, height):
+        """Gradient background and grid, cached per widget size"""
+        key = (width, height, self.devicePixelRatioF())
+        if self._background_cache is not None and self._background_cache[0] == key:
+            return self._background_cache[1]
+        
+        pixmap = self._make_layer(width, height)
+        painter = QPainter(pixmap)
         
-        # Calculate repulsive forces between nodes
-        new_velocities = {}
-        for node_id in self.nodes:
-            if node_id not in self.node_positions:
-                continue
-                
-            vx, vy = self.node_velocities.get(node_id, (0, 0))
-            x1, y1 = self.node_positions[node_id]
+        # Set background with subtle gradient
+        gradient = QLinearGradient(0, 0, 0, height)
+        gradient.setColorAt(0, QColor('#1A1A1E'))  # Dark blue-gray
+        gradient.setColorAt(1, QColor('#0F0F12'))  # Darker at bottom
+        painter.fillRect(0, 0, width, height, gradient)
+        
+        # Draw subtle grid lines
+        painter.setPen(QPen(QColor(COLORS['border']).darker(150), 0.5, Qt.PenStyle.DotLine))
+        grid_size = 40
+        for x in range(0, width, grid_size):
+            painter.drawLine(x, 0, x, height)
+        for y in range(0, height, grid_size):
+            painter.drawLine(0, y, width, y)
+        painter.end()
+        
+        self._background_cache = (key, pixmap)
+        return pixmap
+    
+    def _draw_edge(self, painter, source, target, src, dst, growth_progress, scale, flow=False):
+        """Draw one mycelial connection from src to dst (screen coordinates)"""
+        screen_src_x, screen_src_y = src
+        screen_dst_x, screen_dst_y = dst
+        
+        # Calculate the actual destination based on growth progress
+        if growth_progress < 1.0:
+            # Interpolate between source and destination
+            actual_dst_x = screen_src_x + (screen_dst_x - screen_src_x) * growth_progress
+            actual_dst_y = screen_src_y + (screen_dst_y - screen_src_y) * growth_progress
+        else:
+            actual_dst_x = screen_dst_x
+            actual_dst_y = screen_dst_y
+        
+        # Seeded per edge so the filaments keep their shape from frame to frame
+        rng = random.Random(f"{source}->{target}")
+        
+        # Draw mycelial connection (multiple thin lines with variations)
+        source_color = QColor(self.node_colors.get(source, self.node_colors_by_type['main']))
+        target_color = QColor(self.node_colors.get(target, self.node_colors_by_type['main']))
+        
+        # Calculate distance between points
+        distance = math.sqrt((actual_dst_x - screen_src_x)**2 + (actual_dst_y - screen_src_y)**2)
+        # Number of segments increases with distance
+        num_segments = max(3, int(distance / 40))
+        angle = math.atan2(actual_dst_y - screen_src_y, actual_dst_x - screen_src_x) + math.pi/2
+        
+        # Number of filaments per connection
+        num_filaments = 3
+        
+        for i in range(num_filaments):
+            # Create a path with multiple segments for organic look
+            path = QPainterPath()
+            path.moveTo(screen_src_x, screen_src_y)
             
-            # Apply repulsion between nodes
-            for other_id in self.nodes:
-                if other_id == node_id or other_id not in self.node_positions:
-                    continue
-                    
-                x2, y2 = self.node_positions[other_id]
+            for j in range(1, num_segments):
+                # Calculate position along the line
+                ratio = j / num_segments
                 
-                # Calculate distance
-                dx = x1 - x2
-                dy = y1 - y2
-                distance = max(0.1, math.sqrt(dx*dx + dy*dy))  # Avoid division by zero
+                # Base position
+                base_x = screen_src_x + (actual_dst_x - screen_src_x) * ratio
+                base_y = screen_src_y + (actual_dst_y - screen_src_y) * ratio
                 
-                # Get node sizes
-                size1 = math.sqrt(self.node_sizes.get(node_id, 400))
-                size2 = math.sqrt(self.node_sizes.get(other_id, 400))
-                min_distance = (size1 + size2) / 2
+                # Add random variation perpendicular to the line,
+                # decreasing near endpoints (maximum at middle)
+                variation = (rng.random() - 0.5) * 10 * scale
+                variation *= min(ratio, 1 - ratio) * 4
                 
-                # Apply repulsive force if nodes are too close
-                if distance < min_distance * 2:
-                    # Normalize direction vector
-                    nx = dx / distance
-                    ny = dy / distance
-                    
-                    # Calculate repulsion strength (stronger when closer)
-                    strength = self.repulsion_strength * (1.0 - distance / (min_distance * 2))
-                    
-                    # Apply force
-                    vx += nx * strength
-                    vy += ny * strength
+                path.lineTo(base_x + variation * math.cos(angle), base_y + variation * math.sin(angle))
             
-            # Apply attraction along edges
-            for edge in self.edges:
-                source, target = edge
-                
-                # Skip edges that are still growing
-                if (source, target) in self.growing_edges and self.growing_edges[(source, target)] < 1.0:
-                    continue
-                
-                if source == node_id and target in self.node_positions:
-                    # This node is the source, attract towards target
-                    x2, y2 = self.node_positions[target]
-                    dx = x2 - x1
-                    dy = y2 - y1
-                    distance = max(0.1, math.sqrt(dx*dx + dy*dy))
-                    
-                    # Normalize and apply attraction
-                    vx += (dx / distance) * self.attraction_strength
-                    vy += (dy / distance) * self.attraction_strength
-                    
-                elif target == node_id and source in self.node_positions:
-                    # This node is the target, attract towards source
-                    x2, y2 = self.node_positions[source]
-                    dx = x2 - x1
-                    dy = y2 - y1
-                    distance = max(0.1, math.sqrt(dx*dx + dy*dy))
-                    
-                    # Normalize and apply attraction
-                    vx += (dx / distance) * self.attraction_strength
-                    vy += (dy / distance) * self.attraction_strength
+            # Complete the path to destination
+            path.lineTo(actual_dst_x, actual_dst_y)
+            
+            # Create gradient along the path
+            gradient = QLinearGradient(screen_src_x, screen_src_y, actual_dst_x, actual_dst_y)
+            
+            # Make colors more transparent for mycelial effect, varying by filament
+            alpha = 70 + i * 20
+            source_color_trans = QColor(source_color)
+            target_color_trans = QColor(target_color)
+            source_color_trans.setAlpha(alpha)
+            target_color_trans.setAlpha(alpha)
             
-            # Apply damping to prevent oscillation
-            vx *= self.damping
-            vy *= self.damping
+            gradient.setColorAt(0, source_color_trans)
+            gradient.setColorAt(1, target_color_trans)
             
-            # Store new velocity
-            new_velocities[node_id] = (vx, vy)
+            if flow:
+                # Animate flow along edge
+                flow_pos = (self.animation_progress + i * 0.3) % 1.0
+                gradient.setColorAt(flow_pos, QColor(255, 255, 255, 100))
+            
+            # Draw the edge with varying thickness
+            thickness = 1.0 + (i * 0.5)
+            pen = QPen(QBrush(gradient), thickness)
+            pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+            painter.setPen(pen)
+            painter.drawPath(path)
+        
+        # Draw small nodes along the path for mycelial effect
+        if growth_progress == 1.0:  # Only for fully grown edges
+            node_color = QColor(source_color)
+            node_color.setAlpha(100)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QBrush(node_color))
+            num_nodes = int(distance / 50)
+            for j in range(1, num_nodes):
+                ratio = j / num_nodes
+                node_x = screen_src_x + (screen_dst_x - screen_src_x) * ratio
+                node_y = screen_src_y + (screen_dst_y - screen_src_y) * ratio
+                
+                # Add small random offset
+                offset_angle = rng.random() * math.pi * 2
+                offset_dist = rng.random() * 5
+                node_x += math.cos(offset_angle) * offset_dist
+                node_y += math.sin(offset_angle) * offset_dist
+                
+                node_size = 1 + rng.random() * 2
+                painter.drawEllipse(QPointF(node_x, node_y), node_size, node_size)
+    
+    def _draw_grown_edges(self, painter, to_screen, scale):
+        for source, target in self.edges:
+            if (source, target) in self.growing_edges:
+                continue
+            if source in self.node_positions and target in self.node_positions:
+                self._draw_edge(painter, source, target, to_screen(source), to_screen(target), 1.0, scale)
+    
+    def _edge_layer(self, width, height, to_screen, scale):
+        """Fully grown edges, cached until the layout, the edges or the size change"""
+        key = (width, height, self.devicePixelRatioF())
+        if (not self._edge_layer_dirty and self._edge_layer_cache is not None
+                and self._edge_layer_cache[0] == key):
+            return self._edge_layer_cache[1]
         
-        # Update positions based on velocities
-        for node_id, (vx, vy) in new_velocities.items():
-            if node_id in self.node_positions:
-                # Skip the main node to keep it centered
-                if node_id == 'main':
-                    continue
-                    
-                x, y = self.node_positions[node_id]
-                self.node_positions[node_id] = (x + vx, y + vy)
+        pixmap = self._make_layer(width, height)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self._draw_grown_edges(painter, to_screen, scale)
+        painter.end()
         
-        # Update velocities for next frame
-        self.node_velocities = new_velocities
+        self._edge_layer_cache = (key, pixmap)
+        self._edge_layer_dirty = False
+        return pixmap
+    
+    def _node_sprite(self, node_id, node_size, node_color, scale):
+        """
+        Pre-rendered node body and hyphae, keyed by node id, size and color (type).
         
+        Returns (pixmap, extent): the node center sits at (extent, extent).
+        """
+        if scale != self._sprite_scale:
+            # Widget resized: every sprite changes size
+            self._sprite_cache.clear()
+            self._sprite_scale = scale
+        
+        key = (node_id, node_size, node_color)
+        sprite = self._sprite_cache.get(key)
+        if sprite is not None:
+            return sprite
+        
+        radius = math.sqrt(node_size) * scale / 2
+        is_main = node_id == 'main'
+        hyphae_count = self.hyphae_count + (3 if is_main else 0)  # More hyphae for main node
+        # Base length varies by node type
+        base_length = radius * self.hyphae_length_factor * (1.5 if is_main else 1.0)
+        # Room for the longest hypha plus its end node and pen width
+        extent = math.ceil(radius * 1.1 + base_length * (1 + self.hyphae_variation / 2) + 6)
+        cx = cy = extent
+        
+        pixmap = self._make_layer(2 * extent, 2 * extent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rng = random.Random(node_id)
+        
+        # Draw mycelial node (irregular shape with hyphae)
+        painter.setPen(Qt.PenStyle.NoPen)
+        
+        # Create gradient fill for node
+        gradient = QRadialGradient(cx, cy, radius)
+        gradient.setColorAt(0, QColor(node_color).lighter(130))
+        gradient.setColorAt(0.7, QColor(node_color))
+        gradient.setColorAt(1, QColor(node_color).darker(130))
+        painter.setBrush(QBrush(gradient))
+        
+        # Irregular circle with random variations
+        path = QPainterPath()
+        num_points = 20
+        start_angle = rng.random() * math.pi * 2
+        
+        for i in range(num_points + 1):
+            angle = start_angle + (i * 2 * math.pi / num_points)
+            # Vary radius slightly for organic look
+            point_radius = radius * (1.0 + (rng.random() - 0.5) * 0.2)
+            x_point = cx + math.cos(angle) * point_radius
+            y_point = cy + math.sin(angle) * point_radius
+            
+            if i == 0:
+                path.moveTo(x_point, y_point)
+            else:
+                # Use quadratic curves for smoother shape
+                control_angle = start_angle + ((i - 0.5) * 2 * math.pi / num_points)
+                control_radius = radius * (1.0 + (rng.random() - 0.5) * 0.1)
+                control_x = cx + math.cos(control_angle) * control_radius
+                control_y = cy + math.sin(control_angle) * control_radius
+                path.quadTo(control_x, control_y, x_point, y_point)
+        
+        painter.drawPath(path)
+        
+        # Draw hyphae (mycelial extensions)
+        hypha_start_color = QColor(node_color)
+        hypha_end_color = QColor(node_color)
+        hypha_start_color.setAlpha(150)
+        hypha_end_color.setAlpha(30)
+        small_node_color = QColor(node_color)
+        small_node_color.setAlpha(100)
+        
+        for i in range(hyphae_count):
+            angle = rng.random() * math.pi * 2
+            length = base_length * (1.0 + (rng.random() - 0.5) * self.hyphae_variation)
+            
+            # From the node perimeter outwards
+            start_x = cx + math.cos(angle) * radius * 0.9
+            start_y = cy + math.sin(angle) * radius * 0.9
+            end_x = cx + math.cos(angle) * (radius + length)
+            end_y = cy + math.sin(angle) * (radius + length)
+            
+            # Create hyphae path with slight curve
+            hypha_path = QPainterPath()
+            hypha_path.moveTo(start_x, start_y)
+            ctrl_angle = angle + (rng.random() - 0.5) * 0.5  # Slight angle variation
+            ctrl_dist = radius + length * 0.5
+            hypha_path.quadTo(cx + math.cos(ctrl_angle) * ctrl_dist, cy + math.sin(ctrl_angle) * ctrl_dist,
+                              end_x, end_y)
+            
+            # Hypha color starts as node color and fades out
+            hypha_gradient = QLinearGradient(start_x, start_y, end_x, end_y)
+            hypha_gradient.setColorAt(0, hypha_start_color)
+            hypha_gradient.setColorAt(1, hypha_end_color)
+            
+            thickness = 1.0 + rng.random() * 1.5
+            hypha_pen = QPen(QBrush(hypha_gradient), thickness)
+            hypha_pen.setCapStyle(Qt.PenCapStyle.RoundCap)
+            painter.setPen(hypha_pen)
+            painter.drawPath(hypha_path)
+            
+            # Add small nodes at the end of some hyphae
+            if rng.random() > 0.5:
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(QBrush(small_node_color))
+                small_node_size = 1 + rng.random() * 2
+                painter.drawEllipse(QPointF(end_x, end_y), small_node_size, small_node_size)
+        
+        painter.end()
+        if len(self._sprite_cache) > 2 * len(self.nodes) + 16:
+            # Entries for removed nodes / old sizes and colors
+            self._sprite_cache.clear()
+        sprite = (pixmap, extent)
+        self._sprite_cache[key] = sprite
+        return sprite
+    
     def paintEvent(self, event):
-        """Paint the network graph"""
+        """
+        Paint the network graph from cached layers.
+        
+        Background, fully grown edges and node artwork are pre-rendered pixmaps;
+        only growing edges and the hover/selection glow are drawn per frame.
+        """
+        # Hidden behind another sidebar tab (or collapsed): nothing to paint
+        if not self.isVisible() or self.visibleRegion().isEmpty():
+            return
+        
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
         
         # Get widget dimensions
         width = self.width()
         height = self.height()
         
-        # Set background with subtle gradient
-        gradient = QLinearGradient(0, 0, 0, height)
-        gradient.setColorAt(0, QColor('#1A1A1E'))  # Dark blue-gray
-        gradient.setColorAt(1, QColor('#0F0F12'))  # Darker at bottom
-        painter.fillRect(0, 0, width, height, gradient)
-        
-        # Draw subtle grid lines
-        painter.setPen(QPen(QColor(COLORS['border']).darker(150), 0.5, Qt.PenStyle.DotLine))
-        grid_size = 40
-        for x in range(0, width, grid_size):
-            painter.drawLine(x, 0, x, height)
-        for y in range(0, height, grid_size):
-            painter.drawLine(0, y, width, y)
-        
         # Calculate center point and scale factor
         center_x = width / 2
         center_y = height / 2
         scale = min(width, height) / 500
+        positions = self.node_positions
         
-        # Draw edges first so they appear behind nodes
-        for edge in self.edges:
-            source, target = edge
-            if source in self.node_positions and target in self.node_positions:
-                src_x, src_y = self.node_positions[source]
-                dst_x, dst_y = self.node_positions[target]
-                
-                # Transform coordinates to screen space
-                screen_src_x = center_x + src_x * scale
-                screen_src_y = center_y + src_y * scale
-                screen_dst_x = center_x + dst_x * scale
-                screen_dst_y = center_y + dst_y * scale
-                
-                # Get growth progress for this edge (default to 1.0 if not growing)
-                growth_progress = self.growing_edges.get((source, target), 1.0)
-                
-                # Calculate the actual destination based on growth progress
-                if growth_progress < 1.0:
-                    # Interpolate between source and destination
-                    actual_dst_x = screen_src_x + (screen_dst_x - screen_src_x) * growth_progress
-                    actual_dst_y = screen_src_y + (screen_dst_y - screen_src_y) * growth_progress
-                else:
-                    actual_dst_x = screen_dst_x
-                    actual_dst_y = screen_dst_y
-                
-                # Draw mycelial connection (multiple thin lines with variations)
-                source_color = QColor(self.node_colors.get(source, self.node_colors_by_type['main']))
-                target_color = QColor(self.node_colors.get(target, self.node_colors_by_type['main']))
-                
-                # Number of filaments per connection
-                num_filaments = 3
-                
-                for i in range(num_filaments):
-                    # Create a path with multiple segments for organic look
-                    path = QPainterPath()
-                    path.moveTo(screen_src_x, screen_src_y)
-                    
-                    # Calculate distance between points
-                    distance = math.sqrt((actual_dst_x - screen_src_x)**2 + (actual_dst_y - screen_src_y)**2)
-                    
-                    # Number of segments increases with distance
-                    num_segments = max(3, int(distance / 40))
-                    
-                    # Create intermediate points with slight random variations
-                    prev_x, prev_y = screen_src_x, screen_src_y
-                    
-                    for j in range(1, num_segments):
-                        # Calculate position along the line
-                        ratio = j / num_segments
-                        
-                        # Base position
-                        base_x = screen_src_x + (actual_dst_x - screen_src_x) * ratio
-                        base_y = screen_src_y + (actual_dst_y - screen_src_y) * ratio
-                        
-                        # Add random variation perpendicular to the line
-                        angle = math.atan2(actual_dst_y - screen_src_y, actual_dst_x - screen_src_x) + math.pi/2
-                        variation = (random.random() - 0.5) * 10 * scale
-                        
-                        # Variation decreases near endpoints
-                        endpoint_factor = min(ratio, 1 - ratio) * 4  # Maximum at middle
-                        variation *= endpoint_factor
-                        
-                        # Apply variation
-                        point_x = base_x + variation * math.cos(angle)
-                        point_y = base_y + variation * math.sin(angle)
-                        
-                        # Add point to path
-                        path.lineTo(point_x, point_y)
-                        prev_x, prev_y = point_x, point_y
-                    
-                    # Complete the path to destination
-                    path.lineTo(actual_dst_x, actual_dst_y)
-                    
-                    # Create gradient along the path
-                    gradient = QLinearGradient(screen_src_x, screen_src_y, actual_dst_x, actual_dst_y)
-                    
-                    # Make colors more transparent for mycelial effect
-                    source_color_trans = QColor(source_color)
-                    target_color_trans = QColor(target_color)
-                    
-                    # Vary transparency by filament
-                    alpha = 70 + i * 20
-                    source_color_trans.setAlpha(alpha)
-                    target_color_trans.setAlpha(alpha)
-                    
-                    gradient.setColorAt(0, source_color_trans)
-                    gradient.setColorAt(1, target_color_trans)
-                    
-                    # Animate flow along edge
-                    flow_pos = (self.animation_progress + i * 0.3) % 1.0
-                    flow_color = QColor(255, 255, 255, 100)
-                    gradient.setColorAt(flow_pos, flow_color)
-                    
-                    # Draw the edge with varying thickness
-                    thickness = 1.0 + (i * 0.5)
-                    pen = QPen(QBrush(gradient), thickness)
-                    pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-                    painter.setPen(pen)
-                    painter.drawPath(path)
-                
-                # Draw small nodes along the path for mycelial effect
-                if growth_progress == 1.0:  # Only for fully grown edges
-                    num_nodes = int(distance / 50)
-                    for j in range(1, num_nodes):
-                        ratio = j / num_nodes
-                        node_x = screen_src_x + (screen_dst_x - screen_src_x) * ratio
-                        node_y = screen_src_y + (screen_dst_y - screen_src_y) * ratio
-                        
-                        # Add small random offset
-                        offset_angle = random.random() * math.pi * 2
-                        offset_dist = random.random() * 5
-                        node_x += math.cos(offset_angle) * offset_dist
-                        node_y += math.sin(offset_angle) * offset_dist
-                        
-                        # Draw small node
-                        node_color = QColor(source_color)
-                        node_color.setAlpha(100)
-                        painter.setPen(Qt.PenStyle.NoPen)
-                        painter.setBrush(QBrush(node_color))
-                        node_size = 1 + random.random() * 2
-                        painter.drawEllipse(QPointF(node_x, node_y), node_size, node_size)
+        def to_screen(node_id):
+            x, y = positions[node_id]
+            return center_x + x * scale, center_y + y * scale
+        
+        painter.drawPixmap(0, 0, self._background_layer(width, height))
+        
+        # Edges first so they appear behind nodes. While the layout is still
+        # moving the layer would be stale next frame, so draw straight to the widget.
+        if self._layout_at_rest:
+            painter.drawPixmap(0, 0, self._edge_layer(width, height, to_screen, scale))
+        else:
+            self._draw_grown_edges(painter, to_screen, scale)
+        
+        # Animated overlay: edges still growing
+        for (source, target), growth_progress in self.growing_edges.items():
+            if source in positions and target in positions:
+                self._draw_edge(painter, source, target, to_screen(source), to_screen(target),
+                                growth_progress, scale, flow=True)
         
         # Draw nodes
         for node_id in self.nodes:
-            if node_id in self.node_positions:
-                x, y = self.node_positions[node_id]
-                
-                # Transform coordinates to screen space
-                screen_x = center_x + x * scale
-                screen_y = center_y + y * scale
-                
-                # Get node properties
-                node_color = self.node_colors.get(node_id, self.node_colors_by_type['branch'])
-                node_label = self.node_labels.get(node_id, 'Node')
-                node_size = self.node_sizes.get(node_id, 400)
-                
-                # Scale the node size
-                radius = math.sqrt(node_size) * scale / 2
-                
-                # Adjust radius for hover/selection
-                if node_id == self.selected_node:
-                    radius *= 1.1  # Larger when selected
-                elif node_id == self.hovered_node:
-                    radius *= 1.05  # Slightly larger when hovered
-                
-                # Draw node glow for selected/hovered nodes
-                if node_id == self.selected_node or node_id == self.hovered_node:
-                    glow_radius = radius * 1.5
-                    glow_color = QColor(node_color)
-                    
-                    for i in range(5):
-                        r = glow_radius - (i * radius * 0.1)
-                        alpha = 40 - (i * 8)
-                        glow_color.setAlpha(alpha)
-                        painter.setPen(Qt.PenStyle.NoPen)
-                        painter.setBrush(glow_color)
-                        painter.drawEllipse(QPointF(screen_x, screen_y), r, r)
-                
-                # Draw mycelial node (irregular shape with hyphae)
-                painter.setPen(Qt.PenStyle.NoPen)
-                
-                # Create gradient fill for node
-                gradient = QRadialGradient(screen_x, screen_y, radius)
-                base_color = QColor(node_color)
-                lighter_color = QColor(node_color).lighter(130)
-                darker_color = QColor(node_color).darker(130)
-                
-                gradient.setColorAt(0, lighter_color)
-                gradient.setColorAt(0.7, base_color)
-                gradient.setColorAt(1, darker_color)
-                
-                # Fill main node body
-                painter.setBrush(QBrush(gradient))
-                
-                # Draw irregular node shape
-                path = QPainterPath()
-                
-                # Create irregular circle with random variations
-                num_points = 20
-                start_angle = random.random() * math.pi * 2
-                
-                for i in range(num_points + 1):
-                    angle = start_angle + (i * 2 * math.pi / num_points)
-                    # Vary radius slightly for organic look
-                    variation = 1.0 + (random.random() - 0.5) * 0.2
-                    point_radius = radius * variation
-                    
-                    x_point = screen_x + math.cos(angle) * point_radius
-                    y_point = screen_y + math.sin(angle) * point_radius
-                    
-                    if i == 0:
-                        path.moveTo(x_point, y_point)
-                    else:
-                        # Use quadratic curves for smoother shape
-                        control_angle = start_angle + ((i - 0.5) * 2 * math.pi / num_points)
-                        control_radius = radius * (1.0 + (random.random() - 0.5) * 0.1)
-                        control_x = screen_x + math.cos(control_angle) * control_radius
-                        control_y = screen_y + math.sin(control_angle) * control_radius
-                        
-                        path.quadTo(control_x, control_y, x_point, y_point)
-                
-                # Draw the main node body
-                painter.drawPath(path)
-                
-                # Draw hyphae (mycelial extensions)
-                hyphae_count = self.hyphae_count
-                if node_id == 'main':
-                    hyphae_count += 3  # More hyphae for main node
-                
-                for i in range(hyphae_count):
-                    # Random angle for hyphae
-                    angle = random.random() * math.pi * 2
-                    
-                    # Base length varies by node type
-                    base_length = radius * self.hyphae_length_factor
-                    if node_id == 'main':
-                        base_length *= 1.5
-                    
-                    # Random variation in length
-                    length = base_length * (1.0 + (random.random() - 0.5) * self.hyphae_variation)
-                    
-                    # Calculate end point
-                    end_x = screen_x + math.cos(angle) * (radius + length)
-                    end_y = screen_y + math.sin(angle) * (radius + length)
-                    
-                    # Start point is on the node perimeter
-                    start_x = screen_x + math.cos(angle) * radius * 0.9
-                    start_y = screen_y + math.sin(angle) * radius * 0.9
-                    
-                    # Create hyphae path with slight curve
-                    hypha_path = QPainterPath()
-                    hypha_path.moveTo(start_x, start_y)
-                    
-                    # Control point for curve
-                    ctrl_angle = angle + (random.random() - 0.5) * 0.5  # Slight angle variation
-                    ctrl_dist = radius + length * 0.5
-                    ctrl_x = screen_x + math.cos(ctrl_angle) * ctrl_dist
-                    ctrl_y = screen_y + math.sin(ctrl_angle) * ctrl_dist
-                    
-                    hypha_path.quadTo(ctrl_x, ctrl_y, end_x, end_y)
-                    
-                    # Draw hypha with gradient
-                    hypha_gradient = QLinearGradient(start_x, start_y, end_x, end_y)
-                    
-                    # Hypha color starts as node color and fades out
-                    hypha_start_color = QColor(node_color)
-                    hypha_end_color = QColor(node_color)
-                    hypha_start_color.setAlpha(150)
-                    hypha_end_color.setAlpha(30)
-                    
-                    hypha_gradient.setColorAt(0, hypha_start_color)
-                    hypha_gradient.setColorAt(1, hypha_end_color)
-                    
-                    # Draw hypha with varying thickness
-                    thickness = 1.0 + random.random() * 1.5
-                    hypha_pen = QPen(QBrush(hypha_gradient), thickness)
-                    hypha_pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-                    painter.setPen(hypha_pen)
-                    painter.drawPath(hypha_path)
-                    
-                    # Add small nodes at the end of some hyphae
-                    if random.random() > 0.5:
-                        small_node_color = QColor(node_color)
-                        small_node_color.setAlpha(100)
-                        painter.setPen(Qt.PenStyle.NoPen)
-                        painter.setBrush(QBrush(small_node_color))
-                        small_node_size = 1 + random.random() * 2
-                        painter.drawEllipse(QPointF(end_x, end_y), small_node_size, small_node_size)
+            if node_id not in positions:
+                continue
+            screen_x, screen_y = to_screen(node_id)
+            node_color = self.node_colors.get(node_id, self.node_colors_by_type['branch'])
+            node_size = self.node_sizes.get(node_id, 400)
+            pixmap, extent = self._node_sprite(node_id, node_size, node_color, scale)
+            
+            highlighted = node_id == self.selected_node or node_id == self.hovered_node
+            if not highlighted:
+                painter.drawPixmap(QPointF(screen_x - extent, screen_y - extent), pixmap)
+                continue
+            
+            # Animated overlay: selected/hovered nodes are drawn larger, over a glow
+            grow = 1.1 if node_id == self.selected_node else 1.05
+            radius = math.sqrt(node_size) * scale / 2 * grow
+            glow_radius = radius * 1.5
+            glow_color = QColor(node_color)
+            painter.setPen(Qt.PenStyle.NoPen)
+            for i in range(5):
+                r = glow_radius - (i * radius * 0.1)
+                glow_color.setAlpha(40 - (i * 8))
+                painter.setBrush(glow_color)
+                painter.drawEllipse(QPointF(screen_x, screen_y), r, r)
+            
+            half = extent * grow
+            painter.drawPixmap(QRectF(screen_x - half, screen_y - half, 2 * half, 2 * half), pixmap,
+                               QRectF(0, 0, pixmap.width(), pixmap.height()))
     
     def draw_arrow_head(self, painter, x1, y1, x2, y2):
         """Draw an arrow head at the end of a line"""
@@ -1915,16 +1975,15 @@ class NetworkPane(QWidget):
     def update_graph(self):
         """Update the network graph visualization"""
         if hasattr(self, 'network_view'):
-            # Update the network view with current graph data
-            self.network_view.nodes = list(self.graph.nodes())
-            self.network_view.edges = list(self.graph.edges())
-            self.network_view.node_positions = self.node_positions
-            self.network_view.node_colors = self.node_colors
-            self.network_view.node_labels = self.node_labels
-            self.network_view.node_sizes = self.node_sizes
-            
-            # Redraw
-            self.network_view.update()
+            # Update the network view with current graph data (wakes its physics if changed)
+            self.network_view.set_graph(
+                list(self.graph.nodes()),
+                list(self.graph.edges()),
+                self.node_positions,
+                self.node_colors,
+                self.node_labels,
+                self.node_sizes
+            )
 
 class ImagePreviewPane(QWidget):
     """Pane to display generated images with navigation"""
@@ -1934,6 +1993,11 @@ class ImagePreviewPane(QWidget):
         self.session_images = []  # List of all images generated this session
         self.session_metadata = []  # List of metadata dicts {ai_name, prompt} for each image
         self.current_index = -1   # Current image index
+        # Rescale once the user stops dragging the splitter, not on every resize event
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(120)
+        self._resize_timer.timeout.connect(self._display_current)
         self.setup_ui()
     
     def setup_ui(self):
@@ -2109,6 +2173,7 @@ class ImagePreviewPane(QWidget):
         """Display an image - also adds to gallery if new"""
         self.add_image(image_path, ai_name, prompt)
     
+    @profiled_section("ImagePreviewPane._display_current", budget_ms=16)
     def _display_current(self):
         """Display the image at current_index"""
         if not self.session_images or self.current_index < 0:
@@ -2134,29 +2199,16 @@ class ImagePreviewPane(QWidget):
         self.prompt_label.setText(f'"{prompt}"' if prompt else "")
         
         if os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-            if not pixmap.isNull():
-                # Scale to fit the label while maintaining aspect ratio
-                scaled = pixmap.scaled(
-                    self.image_label.size() - QSize(20, 20),
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                self.image_label.setPixmap(scaled)
-                self.image_label.setStyleSheet(f"""
-                    QLabel {{
-                        background-color: {COLORS['bg_medium']};
-                        border: 1px solid {COLORS['border']};
-                        padding: 10px;
-                    }}
-                """)
-                
-                # Update info
-                filename = os.path.basename(image_path)
-                self.info_label.setText(filename)
-            else:
-                self.image_label.setText("Failed to load image")
-                self.info_label.setText("")
+            # Decoded in the background at (about) the display size; answered
+            # synchronously when cached
+            target = (self.image_label.size() - QSize(20, 20)).expandedTo(QSize(64, 64))
+            cache = get_image_cache()
+            cache.load(image_path, target, lambda image: self._show_image(image_path, target, image))
+            
+            # Warm the neighbours so Prev/Next don't wait on a decode
+            for neighbour in (self.current_index - 1, self.current_index + 1):
+                if 0 <= neighbour < len(self.session_images):
+                    cache.prefetch(self.session_images[neighbour], target)
         else:
             self.image_label.setText("Image not found")
             self.info_label.setText("")
@@ -2168,6 +2220,37 @@ class ImagePreviewPane(QWidget):
         self.prev_button.setEnabled(self.current_index > 0)
         self.next_button.setEnabled(self.current_index < total - 1)
     
+    def _show_image(self, image_path, target, image):
+        """Put a decoded image into the label (ignored if the user navigated away meanwhile)"""
+        if image_path != self.current_image_path:
+            return
+        if image is None:
+            self.image_label.setText("Failed to load image")
+            self.info_label.setText("")
+            return
+        
+        # Scale to fit the label while maintaining aspect ratio - cheap, the
+        # cached image is already within a size bucket of the target
+        pixmap = QPixmap.fromImage(image)
+        if pixmap.width() > target.width() or pixmap.height() > target.height():
+            pixmap = pixmap.scaled(
+                target,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+        self.image_label.setPixmap(pixmap)
+        self.image_label.setStyleSheet(f"""
+            QLabel {{
+                background-color: {COLORS['bg_medium']};
+                border: 1px solid {COLORS['border']};
+                padding: 10px;
+            }}
+        """)
+        
+        # Update info
+        filename = os.path.basename(image_path)
+        self.info_label.setText(filename)
+    
     def show_previous(self):
         """Show the previous image"""
         if self.current_index > 0:
@@ -2214,10 +2297,10 @@ class ImagePreviewPane(QWidget):
             subprocess.Popen(f'explorer "{images_dir}"')
     
     def resizeEvent(self, event):
-        """Re-scale image when pane is resized"""
+        """Re-scale image when pane is resized (debounced)"""
         super().resizeEvent(event)
         if self.current_image_path:
-            self._display_current()
+            self._resize_timer.start()
 
 
 class VideoPreviewPane(QWidget):
@@ -2724,6 +2807,10 @@ class ConversationContextMenu(QMenu):
 
 class ConversationPane(QWidget):
     """Left pane containing the conversation and input area"""
+    
+    # (future, IngestedImage or Exception) from the media pipeline, delivered on the GUI thread
+    upload_ingested = pyqtSignal(object, object)
+    
     def __init__(self):
         super().__init__()
         
@@ -2770,6 +2857,8 @@ class ConversationPane(QWidget):
         # Uploaded image for current message
         self.uploaded_image_path = None
         self.uploaded_image_base64 = None
+        self._pending_upload = None  # Future of the upload being ingested
+        self.upload_ingested.connect(self._on_upload_ingested)
 
         # Create text formats with different colors
         self.text_formats = {
@@ -3064,6 +3153,7 @@ class ConversationPane(QWidget):
         self.input_field.clear()
         self.uploaded_image_path = None
         self.uploaded_image_base64 = None
+        self._pending_upload = None
         self.upload_image_button.setText("📎 IMAGE")
         self.input_field.setFocus()
 
@@ -3085,43 +3175,46 @@ class ConversationPane(QWidget):
         )
         
         if file_path:
-            try:
-                # Read and encode the image to base64
-                with open(file_path, 'rb') as image_file:
-                    image_data = image_file.read()
-                    image_base64 = base64.b64encode(image_data).decode('utf-8')
-                
-                # Determine media type
-                file_extension = os.path.splitext(file_path)[1].lower()
-                media_type_map = {
-                    '.png': 'image/png',
-                    '.jpg': 'image/jpeg',
-                    '.jpeg': 'image/jpeg',
-                    '.gif': 'image/gif',
-                    '.webp': 'image/webp'
-                }
-                media_type = media_type_map.get(file_extension, 'image/jpeg')
-                
-                # Store the image data
-                self.uploaded_image_path = file_path
-                self.uploaded_image_base64 = {
-                    'data': image_base64,
-                    'media_type': media_type
-                }
-                
-                # Update button text to show an image is attached
-                file_name = os.path.basename(file_path)
-                self.upload_image_button.setText(f"📎 {file_name[:15]}...")
-                
-                # Update placeholder text
-                self.input_field.setPlaceholderText("Add a message about your image (optional)...")
-                
-            except Exception as e:
-                QMessageBox.warning(
-                    self,
-                    "Upload Error",
-                    f"Failed to load image: {str(e)}"
-                )
+            # Read, sniff, downscale and encode on the media pipeline's threads
+            self.uploaded_image_path = file_path
+            self.uploaded_image_base64 = None
+            self.upload_image_button.setText("📎 loading...")
+            pipeline = get_media_pipeline()
+            future = pipeline.submit(pipeline.ingest_file, file_path)
+            self._pending_upload = future
+            future.add_done_callback(
+                lambda f: self.upload_ingested.emit(f, f.exception() or f.result()))
+    
+    def _on_upload_ingested(self, future, media):
+        """Store an ingested upload (ignored if the upload was cleared or replaced meanwhile)"""
+        if future is not self._pending_upload:
+            return
+        self._pending_upload = None
+        self._store_upload(media)
+    
+    def _store_upload(self, media):
+        if isinstance(media, Exception):
+            self.uploaded_image_path = None
+            self.upload_image_button.setText("📎 IMAGE")
+            QMessageBox.warning(
+                self,
+                "Upload Error",
+                f"Failed to load image: {str(media)}"
+            )
+            return
+        
+        # Store the image data
+        self.uploaded_image_base64 = {
+            'data': media.base64,
+            'media_type': media.media_type
+        }
+        
+        # Update button text to show an image is attached
+        file_name = os.path.basename(self.uploaded_image_path)
+        self.upload_image_button.setText(f"📎 {file_name[:15]}...")
+        
+        # Update placeholder text
+        self.input_field.setPlaceholderText("Add a message about your image (optional)...")
     
     def eventFilter(self, obj, event):
         """Filter events to handle Enter key in input field"""
@@ -3136,6 +3229,14 @@ class ConversationPane(QWidget):
         # Get the input text (might be empty)
         input_text = self.input_field.toPlainText().strip()
         
+        # An upload still being ingested is finished here rather than dropped
+        if self._pending_upload is not None:
+            future, self._pending_upload = self._pending_upload, None
+            try:
+                self._store_upload(future.result())
+            except Exception as e:
+                self._store_upload(e)
+        
         # Prepare message data (text + optional image)
         message_data = {
             'text': input_text,
@@ -3171,7 +3272,7 @@ class ConversationPane(QWidget):
         
         # Clear main conversation
         if hasattr(main_window, 'main_conversation'):
-            main_window.main_conversation = []
+            main_window.main_conversation = Conversation()
         
         # Clear branch conversations
         if hasattr(main_window, 'branch_conversations'):
@@ -3363,6 +3464,7 @@ class ConversationPane(QWidget):
             import traceback
             traceback.print_exc()
     
+    @profiled_section("ConversationPane._do_render", budget_ms=16)
     def _do_render(self):
         """Actually perform the render using ChatScrollArea + MessageWidgets.
         
@@ -3396,34 +3498,28 @@ class ConversationPane(QWidget):
             has_streaming = False
             
             for message in self.conversation:
-                content = message.get('content', '')
-                text_content = self._extract_text_content(content)
-                msg_type = message.get('_type', '')
-                
-                # Track if any message is actively streaming
-                if message.get('_streaming'):
-                    has_streaming = True
+                kind = message_kind(message)
                 
                 # Always show notifications
-                if msg_type == 'agent_notification':
+                if kind is MessageKind.AGENT_NOTIFICATION:
                     displayable.append(message)
                     continue
                 
                 # Always show generated images and videos
-                if msg_type in ('generated_image', 'generated_video'):
+                if kind is MessageKind.GENERATED_IMAGE or kind is MessageKind.GENERATED_VIDEO:
                     displayable.append(message)
                     continue
                 
                 # Always show streaming placeholders (even if empty)
+                # and track if any message is actively streaming
                 if message.get('_streaming'):
+                    has_streaming = True
                     displayable.append(message)
                     continue
                 
                 # Skip empty messages (no text and no image)
-                if not text_content or not text_content.strip():
-                    has_image = message.get('generated_image_path') or self._has_image_content(content)
-                    if not has_image:
-                        continue
+                if not message_text(message).strip() and not message_has_image(message):
+                    continue
                 
                 displayable.append(message)
             
@@ -3502,35 +3598,16 @@ class ConversationPane(QWidget):
                 action = "will scroll" if saved_should_follow else "NO scroll (user scrolled away)"
                 print(f"[SCROLL] Rebuild complete: {action}")
     
-    def _extract_text_content(self, content):
-        """Extract text from content (handles structured content with images)."""
-        if isinstance(content, list):
-            text_parts = []
-            for part in content:
-                if isinstance(part, dict) and part.get('type') == 'text':
-                    text_parts.append(part.get('text', ''))
-            return ''.join(text_parts)
-        return str(content) if content else ''
-    
-    def _has_image_content(self, content):
-        """Check if content contains image data."""
-        if isinstance(content, list):
-            for part in content:
-                if isinstance(part, dict) and part.get('type') == 'image':
-                    return True
-        return False
-    
-    def _get_conversation_as_text(self):
-        """Build plain text version of conversation for export."""
+    def _get_conversation_as_text(self, conversation=None):
+        """Build plain text version of conversation (default: the displayed one) for export."""
         lines = []
-        for message in self.conversation:
+        for message in self.conversation if conversation is None else conversation:
             role = message.get('role', '')
-            content = message.get('content', '')
             ai_name = message.get('ai_name', 'AI')
             model = message.get('model', '')
             
-            # Extract text from structured content
-            text_content = self._extract_text_content(content)
+            # Text of structured content (cached on the message)
+            text_content = message_text(message)
             
             # Skip empty messages
             if not text_content.strip():
@@ -3548,8 +3625,8 @@ class ConversationPane(QWidget):
         return '\n'.join(lines)
     
     # Keep _build_html_content for HTML export functionality
-    def _build_html_content_for_export(self):
-        """Build HTML content for conversation (returns string, doesn't set it)"""
+    def _build_html_content_for_export(self, conversation=None):
+        """Build HTML content for conversation (default: the displayed one; returns string, doesn't set it)"""
         
         # Create HTML for conversation with styling that Qt actually supports
         # The original approach uses <style> block + classes - this works in Qt
@@ -3592,7 +3669,7 @@ class ConversationPane(QWidget):
         html += f".typing-dots {{ color: {COLORS['text_dim']}; font-style: italic; }}"
         html += "</style>"
         
-        for i, message in enumerate(self.conversation):
+        for i, message in enumerate(self.conversation if conversation is None else conversation):
             role = message.get("role", "")
             content = message.get("content", "")
             ai_name = message.get("ai_name", "")
@@ -3602,7 +3679,6 @@ class ConversationPane(QWidget):
             has_image = False
             image_base64 = None
             generated_image_path = None
-            text_content = ""
             
             # Check for generated image path (from AI image generation)
             if hasattr(message, "get") and callable(message.get):
@@ -3610,19 +3686,12 @@ class ConversationPane(QWidget):
                 if generated_image_path and os.path.exists(generated_image_path):
                     has_image = True
             
-            if isinstance(content, list):
-                # Structured content with potential images
-                for part in content:
-                    if part.get('type') == 'text':
-                        text_content += part.get('text', '')
-                    elif part.get('type') == 'image':
-                        has_image = True
-                        source = part.get('source', {})
-                        if source.get('type') == 'base64':
-                            image_base64 = source.get('data', '')
-            else:
-                # Plain text content
-                text_content = content
+            # Text and images of the content (cached on the message)
+            projection = project(message)
+            text_content = projection.text
+            if projection.images:
+                has_image = True
+                image_base64 = projection.base64_image()
             
             # Skip empty or whitespace-only messages (no text and no image) - but NOT typing indicators
             if (not text_content or not text_content.strip()) and not has_image and message.get('_type') != 'typing_indicator':
@@ -3677,14 +3746,12 @@ class ConversationPane(QWidget):
                 prompt = message.get('_prompt', '')
                 if not prompt and isinstance(content, list):
                     # Try to extract prompt from text content like: !image "prompt here"
-                    for part in content:
-                        if part.get('type') == 'text':
-                            text = part.get('text', '')
-                            import re
-                            match = re.search(r'!image\s+"([^"]+)"', text)
-                            if match:
-                                prompt = match.group(1)
-                                break
+                    for text in projection.text_parts:
+                        import re
+                        match = re.search(r'!image\s+"([^"]+)"', text)
+                        if match:
+                            prompt = match.group(1)
+                            break
                 
                 truncated_prompt = (prompt[:50] + '...') if len(prompt) > 50 else prompt
                 
@@ -3730,7 +3797,7 @@ class ConversationPane(QWidget):
                 
                 display_name = ai_name
                 if model:
-                    display_name += f" ({model})"
+                    display_name += f" ({model_label(message)})"
                     
                 html += f'<div class="message ai-{ai_num}">'
                 html += f'<div class="header header-ai-{ai_num}">{display_name}</div>'
@@ -3749,7 +3816,11 @@ class ConversationPane(QWidget):
         return html
     
     def process_content_with_code_blocks(self, content):
-        """Process content to properly format code blocks for HTML export."""
+        """Process content to properly format code blocks for HTML export (memoized)."""
+        return get_format_cache().get_or_format("html", content, self._render_content_with_code_blocks)
+    
+    def _render_content_with_code_blocks(self, content):
+        """Format code blocks, inline markdown and newlines as HTML."""
         import re
         from html import escape
         
@@ -4147,6 +4218,12 @@ class ConversationPane(QWidget):
                             shutil.copy2(vid_path, videos_dir)
                             videos_copied += 1
             
+            # Token / latency / cost ledger for the session
+            usage_copied = self._copy_usage_ledger(folder_name)
+
+            # Scenario, participants and messages for BackroomsBench batch runs
+            record_written = self._write_session_record(folder_name, timestamp)
+            
             # Create a manifest/summary file
             manifest_path = os.path.join(folder_name, "manifest.txt")
             with open(manifest_path, 'w', encoding='utf-8') as f:
@@ -4160,6 +4237,10 @@ class ConversationPane(QWidget):
                     f.write(f"- conversation_full.html (styled document)\n")
                 f.write(f"- images/ ({images_copied} files)\n")
                 f.write(f"- videos/ ({videos_copied} files)\n")
+                if usage_copied:
+                    f.write(f"- usage.jsonl (tokens, latency and cost per API call: {get_usage_ledger().status_text()})\n")
+                if record_written:
+                    f.write(f"- session.json (scenario, participants and dialogue for tools/backroomsbench_batch.py)\n")
             
             # Status message
             status_msg = f"Exported to {folder_name} ({images_copied} images, {videos_copied} videos)"
@@ -4186,38 +4267,78 @@ class ConversationPane(QWidget):
             import traceback
             traceback.print_exc()
 
-    def auto_backup_session(self):
+    def _copy_usage_ledger(self, folder_name):
+        """Copy this session's usage ledger (usage_ledger.py) into an export folder. Returns True if copied."""
+        ledger_path = get_usage_ledger().path
+        if not ledger_path.exists():
+            return False
+        shutil.copy2(ledger_path, os.path.join(folder_name, "usage.jsonl"))
+        return True
+
+    def _write_session_record(self, folder_name, timestamp, conversation=None, branch_id=None):
+        """Write session.json (session_archive.py) into an export folder. Returns True if written."""
+        main_window = self.window()
+        if conversation is None:
+            conversation = self.conversation
+            branch_id = getattr(main_window, 'active_branch', None)
+        try:
+            write_session_record(
+                folder_name, conversation,
+                getattr(main_window, 'current_scenario', None),
+                main_window.session_participants() if hasattr(main_window, 'session_participants') else [],
+                timestamp,
+                session_id=getattr(main_window, 'session_timestamp', None),
+                branch_id=branch_id
+            )
+            return True
+        except (OSError, TypeError, ValueError) as e:
+            print(f"[Export] Could not write session record: {e}")
+            return False
+
+    def auto_backup_session(self, conversation=None, branch_id=None):
         """Automatically backup the conversation and all session media to a timestamped folder.
-        This is a non-interactive version of export_conversation for automatic backups."""
+        This is a non-interactive version of export_conversation for automatic backups.
+
+        Args:
+            conversation: Messages to back up with branch_id (None = main); default
+                the conversation on screen, so a branch finishing in the background
+                backs up its own messages
+        """
         try:
             # Use exports/backups folder in the project directory
             base_dir = os.path.join(os.getcwd(), "exports", "backups")
             os.makedirs(base_dir, exist_ok=True)
 
-            # Generate a timestamped folder name
+            # Get main window for accessing session data
+            main_window = self.window()
+            if conversation is None:
+                conversation = self.conversation
+                branch_id = getattr(main_window, 'active_branch', None)
+
+            # Generate a timestamped folder name (per branch - main and branches can finish together)
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             export_folder_name = f"session_{timestamp}"
+            if branch_id:
+                export_folder_name += "_" + re.sub(r"[^A-Za-z0-9_.-]+", "_", str(branch_id))
             folder_name = os.path.join(base_dir, export_folder_name)
 
             # Create the backup folder
             os.makedirs(folder_name, exist_ok=True)
 
-            # Get main window for accessing session data
-            main_window = self.window()
-
             # Export conversation as multiple formats
             # Plain text - build from conversation data
             text_path = os.path.join(folder_name, "conversation.txt")
             with open(text_path, 'w', encoding='utf-8') as f:
-                f.write(self._get_conversation_as_text())
+                f.write(self._get_conversation_as_text(conversation))
 
             # HTML - build from conversation data
             html_path = os.path.join(folder_name, "conversation.html")
             with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(self._build_html_content_for_export())
+                f.write(self._build_html_content_for_export(conversation))
 
-            # Full HTML document - copy the current session's HTML file
-            current_html_file = getattr(main_window, 'current_html_file', None)
+            # Full HTML document - copy this conversation's HTML file
+            current_html_file = main_window.html_file_for(branch_id) if hasattr(main_window, 'html_file_for') \
+                else getattr(main_window, 'current_html_file', None)
             if current_html_file and os.path.exists(current_html_file):
                 shutil.copy2(current_html_file, os.path.join(folder_name, "conversation_full.html"))
             else:
@@ -4250,6 +4371,12 @@ class ConversationPane(QWidget):
                             shutil.copy2(vid_path, videos_dir)
                             videos_copied += 1
 
+            # Token / latency / cost ledger for the session
+            usage_copied = self._copy_usage_ledger(folder_name)
+
+            # Scenario, participants and messages for BackroomsBench batch runs
+            record_written = self._write_session_record(folder_name, timestamp, conversation, branch_id)
+            
             # Create a manifest/summary file
             manifest_path = os.path.join(folder_name, "manifest.txt")
             with open(manifest_path, 'w', encoding='utf-8') as f:
@@ -4263,6 +4390,10 @@ class ConversationPane(QWidget):
                     f.write(f"- conversation_full.html (styled document)\n")
                 f.write(f"- images/ ({images_copied} files)\n")
                 f.write(f"- videos/ ({videos_copied} files)\n")
+                if usage_copied:
+                    f.write(f"- usage.jsonl (tokens, latency and cost per API call: {get_usage_ledger().status_text()})\n")
+                if record_written:
+                    f.write(f"- session.json (scenario, participants and dialogue for tools/backroomsbench_batch.py)\n")
 
             # Status message (non-intrusive)
             status_msg = f"Auto-backup saved to exports/backups/{export_folder_name}"
@@ -4290,10 +4421,9 @@ class CentralContainer(QWidget):
         self.bg_offset = 0
         self.noise_offset = 0
         
-        # Animation timer for background
-        self.bg_timer = QTimer(self)
-        self.bg_timer.timeout.connect(self._animate_bg)
-        self.bg_timer.start(80)  # ~12 FPS for subtle movement
+        # Animation timer for background (runs during turns only, see animation_clock)
+        self.bg_timer = get_animation_clock().subscribe(self, self._animate_bg, 80)
+        self.bg_timer.start()  # ~12 FPS for subtle movement
         
         # Create scanline overlay as child widget
         self.scanline_overlay = ScanlineOverlayWidget(self)
@@ -4383,11 +4513,14 @@ class ScanlineOverlayWidget(QWidget):
         self.scanline_offset = 0
         self.intensity = 0.25  # More visible scanlines
         
-        self.anim_timer = QTimer(self)
-        self.anim_timer.timeout.connect(self._animate)
+        # Precomposited layers: a 2px scanline tile and the vignette per size
+        self._scanline_tile = None
+        self._vignette_cache = None  # (size key, QPixmap)
+        
+        self.anim_timer = get_animation_clock().subscribe(self, self._animate, 100)
     
     def start_animation(self):
-        self.anim_timer.start(100)
+        self.anim_timer.start()
     
     def stop_animation(self):
         self.anim_timer.stop()
@@ -4396,28 +4529,51 @@ class ScanlineOverlayWidget(QWidget):
         self.scanline_offset = (self.scanline_offset + 1) % 4
         self.update()
     
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        
-        # Draw horizontal scanlines - more visible
-        line_alpha = int(255 * self.intensity)
-        line_color = QColor(0, 0, 0, line_alpha)
-        painter.setPen(QPen(line_color, 1))
-        
-        # Draw every 2nd line for more visible effect
-        for y in range(self.scanline_offset, self.height(), 2):
-            painter.drawLine(0, y, self.width(), y)
-        
-        # Subtle vignette effect at edges
-        gradient = QRadialGradient(self.width() / 2, self.height() / 2, 
-                                   max(self.width(), self.height()) * 0.7)
+    def _scanlines(self):
+        """1px dark line every 2nd row, as a tile for drawTiledPixmap"""
+        if self._scanline_tile is None:
+            tile = QPixmap(64, 2)
+            tile.fill(Qt.GlobalColor.transparent)
+            tile_painter = QPainter(tile)
+            line_alpha = int(255 * self.intensity)
+            tile_painter.setPen(QPen(QColor(0, 0, 0, line_alpha), 1))
+            tile_painter.drawLine(0, 0, 64, 0)
+            tile_painter.end()
+            self._scanline_tile = tile
+        return self._scanline_tile
+    
+    def _vignette(self, width, height):
+        """Subtle vignette effect at edges, rendered once per size"""
+        key = (width, height, self.devicePixelRatioF())
+        if self._vignette_cache is not None and self._vignette_cache[0] == key:
+            return self._vignette_cache[1]
+        
+        dpr = self.devicePixelRatioF()
+        pixmap = QPixmap(max(1, int(width * dpr)), max(1, int(height * dpr)))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        
+        gradient = QRadialGradient(width / 2, height / 2, max(width, height) * 0.7)
         gradient.setColorAt(0, QColor(0, 0, 0, 0))
         gradient.setColorAt(0.7, QColor(0, 0, 0, 0))
         gradient.setColorAt(1, QColor(0, 0, 0, int(255 * self.intensity * 1.5)))
         
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.setBrush(gradient)
-        painter.drawRect(self.rect())
+        vignette_painter = QPainter(pixmap)
+        vignette_painter.setPen(Qt.PenStyle.NoPen)
+        vignette_painter.setBrush(gradient)
+        vignette_painter.drawRect(0, 0, width, height)
+        vignette_painter.end()
+        
+        self._vignette_cache = (key, pixmap)
+        return pixmap
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        
+        # Horizontal scanlines on every 2nd row, shifted by the animation offset
+        painter.drawTiledPixmap(self.rect(), self._scanlines(), QPointF(0, self.scanline_offset % 2))
+        
+        painter.drawPixmap(0, 0, self._vignette(self.width(), self.height()))
 
 
 class LiminalBackroomsApp(QMainWindow):
@@ -4428,6 +4584,7 @@ class LiminalBackroomsApp(QMainWindow):
         # Session tracking - timestamp for this session's files
         self.session_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.current_html_file = None  # Will be set when conversation starts
+        get_usage_ledger().start_session(self.session_timestamp)
         
         # Settings state (moved from ControlPanel to app instance variables)
         self.conversation_mode = "AI-AI"
@@ -4618,6 +4775,23 @@ class LiminalBackroomsApp(QMainWindow):
         """)
         self.statusBar().addPermanentWidget(self.iteration_label)
         
+        # ═══ USAGE SUMMARY ═══
+        # Session tokens / cache share / cost from the usage ledger (polled, cheap when unchanged)
+        self.usage_label = QLabel("")
+        self.usage_label.setStyleSheet(f"""
+            QLabel {{
+                color: {COLORS['text_dim']};
+                font-size: 11px;
+                padding: 2px 10px;
+                background-color: transparent;
+            }}
+        """)
+        self.statusBar().addPermanentWidget(self.usage_label)
+        self._usage_version = None
+        self._usage_timer = QTimer(self)
+        self._usage_timer.timeout.connect(self._refresh_usage_label)
+        self._usage_timer.start(1000)
+        
         # Add signal indicator to status bar
         self.statusBar().addPermanentWidget(self.signal_indicator)
         
@@ -4648,6 +4822,20 @@ class LiminalBackroomsApp(QMainWindow):
         # Set up input callback
         self.left_pane.set_input_callback(self.handle_user_input)
     
+    def _refresh_usage_label(self):
+        """Update the status bar usage summary when the ledger has new records"""
+        ledger = get_usage_ledger()
+        if ledger.version == self._usage_version:
+            return
+        self._usage_version = ledger.version
+        self.usage_label.setText(ledger.status_text())
+        lines = []
+        for model, totals in sorted(ledger.summary("model").items(), key=lambda item: -item[1]["cost"]):
+            ttft = f", ttft {totals['avg_ttft']}s" if totals["avg_ttft"] is not None else ""
+            tps = f", {totals['avg_tokens_per_s']} tok/s" if totals["avg_tokens_per_s"] else ""
+            lines.append(f"{model}: {totals['calls']} calls, ${totals['cost']:.4f}{ttft}{tps}")
+        self.usage_label.setToolTip("\n".join(lines))
+    
     def toggle_crt_effect(self, enabled):
         """Toggle the CRT scanline effect"""
         if hasattr(self, 'central_container'):
@@ -4674,6 +4862,8 @@ class LiminalBackroomsApp(QMainWindow):
     def set_signal_active(self, active):
         """Set signal indicator to active (waiting for response)"""
         self.signal_indicator.set_active(active)
+        # Decorative animations only run while a turn is in flight
+        get_animation_clock().set_turn_active(active)
     
     def update_signal_latency(self, latency_ms):
         """Update signal indicator with response latency"""
@@ -4785,6 +4975,8 @@ class LiminalBackroomsApp(QMainWindow):
         self.num_ais = settings['num_ais']
         self.ai_models = settings['ai_models']
         self.current_scenario = settings['scenario']
+        if settings['invite_tier'] != self.invite_tier:
+            get_prompt_compiler().tier_changed()
         self.invite_tier = settings['invite_tier']
         self.auto_image = settings['auto_image']
         self.allow_duplicate_models = settings['allow_duplicate_models']
@@ -4809,6 +5001,19 @@ class LiminalBackroomsApp(QMainWindow):
         # Show confirmation
         self.statusBar().showMessage(f"Settings updated: {self.conversation_mode} mode, {self.num_ais} AIs, {self.max_iterations} iterations", 3000)
 
+    def html_file_for(self, branch_id=None):
+        """Path of the full conversation HTML for main (None) or a branch in this session."""
+        name = f"conversation_{self.session_timestamp}"
+        if branch_id:
+            name += "_" + re.sub(r"[^A-Za-z0-9_.-]+", "_", str(branch_id))
+        return os.path.join(OUTPUTS_DIR, f"{name}.html")
+
+    def session_participants(self):
+        """Display names of the models taking part in the session."""
+        # Convert model IDs to display names for reports and session records
+        from config import get_display_name
+        return [get_display_name(self.ai_models[i]) for i in range(self.num_ais)]
+
     def run_backroomsbench_evaluation(self):
         """Run BackroomsBench multi-judge evaluation on current session."""
         from PyQt6.QtWidgets import QMessageBox, QProgressDialog
@@ -4819,16 +5024,13 @@ class LiminalBackroomsApp(QMainWindow):
         conversation = self.left_pane.conversation
 
         # Filter out special messages (branch indicators, etc.) - only count actual dialogue
-        dialogue_messages = [
-            msg for msg in conversation
-            if isinstance(msg, dict) and msg.get('role') in ('user', 'assistant') and msg.get('_type') != 'branch_indicator'
-        ]
+        dialogue = dialogue_messages(conversation)
 
-        if len(dialogue_messages) < 5:
+        if len(dialogue) < 5:
             QMessageBox.warning(
                 self,
                 "Not Enough Content",
-                f"Need at least 5 dialogue messages for evaluation.\nYou have {len(dialogue_messages)}. Let the dialogue deepen. 🌀"
+                f"Need at least 5 dialogue messages for evaluation.\nYou have {len(dialogue)}. Let the dialogue deepen. 🌀"
             )
             return
 
@@ -4836,15 +5038,7 @@ class LiminalBackroomsApp(QMainWindow):
         scenario_name = self.current_scenario
 
         # Get participant models from app state
-        num_ais = self.num_ais
-        participant_models = []
-
-        # Convert model IDs to display names for the report
-        from config import get_display_name
-        for i in range(num_ais):
-            model_id = self.ai_models[i]
-            display_name = get_display_name(model_id)
-            participant_models.append(display_name)
+        participant_models = self.session_participants()
 
         # Show progress dialog
         progress = QProgressDialog(
@@ -4865,7 +5059,7 @@ class LiminalBackroomsApp(QMainWindow):
             try:
                 from backroomsbench import run_backroomsbench
                 self._backroomsbench_result = run_backroomsbench(
-                    conversation=dialogue_messages,
+                    conversation=dialogue,
                     scenario_name=scenario_name,
                     participant_models=participant_models
                 )
@@ -4958,8 +5152,9 @@ class LiminalBackroomsApp(QMainWindow):
                 self.active_branch = None
                 # Make sure we have a main_conversation attribute
                 if not hasattr(self, 'main_conversation'):
-                    self.main_conversation = []
+                    self.main_conversation = Conversation()
                 self.conversation = self.main_conversation
+                self.current_html_file = self.html_file_for(None)
                 self.left_pane.update_conversation(self.conversation)
                 self.statusBar().showMessage("Switched to main conversation")
                 return
@@ -4973,6 +5168,7 @@ class LiminalBackroomsApp(QMainWindow):
             
             # Set active branch
             self.active_branch = branch_id
+            self.current_html_file = self.html_file_for(branch_id)
             
             # Update conversation
             self.conversation = branch_data['conversation']
@@ -5018,19 +5214,19 @@ class LiminalBackroomsApp(QMainWindow):
             # Get parent branch ID
             parent_id = parent_branch if parent_branch else (self.active_branch if self.active_branch else 'main')
             
-            # Get current conversation
+            # Snapshot of the parent conversation (shares its history, no copy)
             if parent_id == 'main':
                 # If parent is main, use main conversation
                 if not hasattr(self, 'main_conversation'):
-                    self.main_conversation = []
-                current_conversation = self.main_conversation.copy()
+                    self.main_conversation = Conversation()
+                history = fork_conversation(self.main_conversation)
             else:
                 # Otherwise, use parent branch conversation
                 parent_data = self.branch_conversations.get(parent_id)
                 if parent_data:
-                    current_conversation = parent_data['conversation'].copy()
+                    history = fork_conversation(parent_data['conversation'])
                 else:
-                    current_conversation = []
+                    history = Conversation()
             
             # Create initial message based on branch type
             if branch_type == 'fork':
@@ -5045,7 +5241,7 @@ class LiminalBackroomsApp(QMainWindow):
                 }
             
             # Create branch conversation with initial message
-            branch_conversation = current_conversation.copy()
+            branch_conversation = history.fork()
             branch_conversation.append(initial_message)
             
             # Create branch data
@@ -5057,7 +5253,7 @@ class LiminalBackroomsApp(QMainWindow):
                 'conversation': branch_conversation,
                 'turn_count': 0,
                 'created_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'history': current_conversation
+                'history': history
             }
             
             # Store branch data
@@ -0,0 +1,185 @@
+# image_cache.py
+"""
+Shared decoded-image cache for the image preview pane and inline chat images.
+
+ImagePreviewPane._display_current built a full QPixmap from disk and
+smooth-scaled it on every navigation and every resize event, and
+MessageWidget decoded each generated image at full resolution just to show it
+400px wide. Gemini images are multi-megapixel, so paging through a session's
+gallery stalled the GUI thread. Now:
+
+- Decoding happens on a small worker pool with QImageReader.setScaledSize, so
+  the image is decoded straight to (about) the size it is shown at
+- Requested sizes are rounded up to SIZE_STEP buckets; a resize of a few
+  pixels reuses the cached thumbnail and only needs a cheap final scale
+- Decoded QImages (thread-safe, unlike QPixmap) live in an LRU bounded by
+  their byte size; keys include the file's mtime so a rewritten file misses
+- Results come back on the GUI thread through a queued signal
+
+Usage:
+    get_image_cache().load(path, QSize(400, 400), on_image)   # on_image(QImage or None)
+    get_image_cache().prefetch(next_path, size)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QImageReader
+
+from app_logging import get_logger
+
+log = get_logger("image_cache")
+
+# Decoded images kept in memory (bytes)
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+# Thumbnail sizes are rounded up to multiples of this (pixels)
+SIZE_STEP = 64
+# Decoder threads - decoding is CPU bound, a couple is plenty
+DECODE_WORKERS = 2
+
+
+def _bucket(value):
+    return max(SIZE_STEP, -(-int(value) // SIZE_STEP) * SIZE_STEP)
+
+
+def decode_image(path, max_size=None):
+    """
+    Decode path into a QImage no larger than max_size (aspect ratio kept).
+
+    Safe to call off the GUI thread. Returns None if the file can't be read.
+    """
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    if max_size is not None:
+        original = reader.size()
+        if original.isValid() and (original.width() > max_size.width() or original.height() > max_size.height()):
+            # Let the codec downscale while decoding (JPEG does this far faster than a full decode)
+            reader.setScaledSize(original.scaled(max_size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        log.warning("[ImageCache] Could not decode %s: %s", path, reader.errorString())
+        return None
+    return image
+
+
+class ImageCache(QObject):
+    """LRU of decoded QImages keyed by (path, mtime, size bucket), filled by background decoders."""
+
+    _decoded = pyqtSignal(object, object)  # key, QImage or None - delivered on the GUI thread
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES, workers=DECODE_WORKERS):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._bytes = 0
+        self._pending = {}  # key -> [callbacks]
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-decode")
+        self._decoded.connect(self._on_decoded)
+
+    def _key(self, path, size):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        if size is None:
+            return (path, mtime, None)
+        return (path, mtime, _bucket(size.width()), _bucket(size.height()))
+
+    def get(self, path, size=None):
+        """Cached image for path at size (or None) without scheduling a decode."""
+        key = self._key(path, size)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def load(self, path, size, callback):
+        """
+        Get path decoded to fit size (QSize, or None for full resolution).
+
+        callback(QImage or None) runs on the GUI thread - synchronously if the
+        image is already cached. Returns True when it was answered from cache.
+        """
+        key = self._key(path, size)
+        if key is None:
+            callback(None)
+            return True
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+        if image is not None:
+            callback(image)
+            return True
+        self._schedule(key, path, callback)
+        return False
+
+    def prefetch(self, path, size):
+        """Decode path in the background so a later load() is a cache hit."""
+        key = self._key(path, size)
+        if key is None:
+            return
+        with self._lock:
+            if key in self._images:
+                return
+        self._schedule(key, path, None)
+
+    def _schedule(self, key, path, callback):
+        with self._lock:
+            waiting = self._pending.get(key)
+            if waiting is not None:
+                if callback is not None:
+                    waiting.append(callback)
+                return
+            self._pending[key] = [callback] if callback is not None else []
+        max_size = None if key[2] is None else QSize(key[2], key[3])
+        self._executor.submit(self._decode, key, path, max_size)
+
+    def _decode(self, key, path, max_size):
+        try:
+            image = decode_image(path, max_size)
+        except Exception as e:
+            log.warning("[ImageCache] Decode failed for %s: %s", path, e)
+            image = None
+        self._decoded.emit(key, image)
+
+    def _on_decoded(self, key, image):
+        with self._lock:
+            callbacks = self._pending.pop(key, [])
+            if image is not None:
+                self._images[key] = image
+                self._bytes += image.sizeInBytes()
+                while self._bytes > self.max_bytes and len(self._images) > 1:
+                    _, evicted = self._images.popitem(last=False)
+                    self._bytes -= evicted.sizeInBytes()
+        for callback in callbacks:
+            try:
+                callback(image)
+            except RuntimeError:
+                # The widget that asked was deleted while the image decoded
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"images": len(self._images), "bytes": self._bytes, "pending": len(self._pending)}
+
+
+_cache = None
+
+
+def get_image_cache():
+    """The process-wide ImageCache (create after QApplication, on the GUI thread)."""
+    global _cache
+    if _cache is None:
+        _cache = ImageCache()
+    return _cache
@@ -0,0 +1,184 @@
+# image_policy.py
+"""
+Per-model image variants and a byte budget for image-heavy requests.
+
+call_openrouter_api sent every kept image (the last max_images=5) as a
+base64 data URL at whatever size it was stored, in every request from every
+AI - in image-heavy scenarios request bodies ran to many megabytes and upload
+time dominated the turn.
+
+Now each request prepares images for the model it goes to:
+
+- policy_for(model_id) picks an ImagePolicy (maximum edge, format, quality)
+  from config.IMAGE_POLICIES by longest model-id prefix
+- ImageVariants converts an image to a policy once and keeps the result in
+  an LRU bounded by bytes, so later requests (every turn re-sends the same
+  history) reuse it. Entries are keyed by a digest of the original; images
+  that come back unchanged are cached as a marker, not a second copy - the
+  conversation already holds them
+- fit_images() applies IMAGE_PAYLOAD_BUDGET: walking from the newest image,
+  images are kept until max_images or the byte budget is reached, lowering
+  the effective max_images when the payload would get too large
+
+Converting needs Pillow (see media_pipeline.downscale); without it images
+pass through unchanged and only the budget applies.
+
+Usage:
+    policy = policy_for(model_id)
+    media_type, data = get_image_variants().get(media_type, data, policy)
+"""
+
+import base64
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app_logging import get_logger
+from format_cache import content_key
+from media_pipeline import HAS_PILLOW, downscale
+
+log = get_logger("image_policy")
+
+# Converted images kept in memory (base64 characters plus keys)
+MAX_CACHE_BYTES = 128 * 1024 * 1024
+
+# Cache entry for an image that its policy leaves as it is
+_UNCHANGED = object()
+
+
+@dataclass(frozen=True)
+class ImagePolicy:
+    """How images are prepared for one family of models."""
+    max_edge: int = 1568    # Longest edge in pixels (0 = no limit)
+    format: str = "jpeg"    # "jpeg" (PNG kept for transparency), "webp", "png" or "keep"
+    quality: int = 85       # JPEG / WebP quality
+
+
+DEFAULT_POLICY = ImagePolicy()
+
+
+def policy_for(model_id, policies=None):
+    """The ImagePolicy for model_id: longest matching prefix in IMAGE_POLICIES, else its "default"."""
+    if policies is None:
+        try:
+            from config import IMAGE_POLICIES as policies
+        except ImportError:
+            return DEFAULT_POLICY
+    best = None
+    for prefix in policies:
+        if prefix != "default" and model_id.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    settings = policies.get(best or "default")
+    return ImagePolicy(**settings) if settings else DEFAULT_POLICY
+
+
+def fit_images(sizes, max_images, budget):
+    """
+    How many of the most recent images to send.
+
+    Args:
+        sizes: Payload size of each image message, newest first (callable
+            index -> size, so sizes are only computed for images considered)
+        max_images: Upper limit on the count
+        budget: Total bytes allowed (0 = no budget); the newest image is
+            always kept
+    """
+    if not budget:
+        return max_images
+    total = 0
+    for kept in range(max_images):
+        size = sizes(kept)
+        if size is None:
+            return kept
+        total += size
+        if total > budget and kept > 0:
+            return kept
+    return max_images
+
+
+class ImageVariants:
+    """Thread-safe LRU of images converted to an ImagePolicy, keyed by (policy, digest of the base64 data)."""
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _entry_size(key, result):
+        # Everything the entry keeps alive: the converted data, its media type and the digest
+        if result is _UNCHANGED:
+            return len(key[1])
+        return len(result[1]) + len(result[0]) + len(key[1])
+
+    def get(self, media_type, data, policy):
+        """(media_type, base64 data) of the image prepared for policy."""
+        if (policy.format == "keep" and not policy.max_edge) or not HAS_PILLOW:
+            return media_type, data
+        # A digest, so the cache doesn't hold on to (and not count) every original it has seen
+        key = (policy, content_key(data))
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return (media_type, data) if cached is _UNCHANGED else cached
+            self.misses += 1
+
+        # Convert outside the lock; a concurrent miss on the same image just converts twice
+        result = self._convert(media_type, data, policy)
+        # An image conversion doesn't shrink is remembered as a marker only: the caller
+        # already holds the original, and the next request skips the decode / re-encode
+        entry = _UNCHANGED if result[1] is data else result
+
+        size = self._entry_size(key, entry)
+        if size > self.max_bytes:
+            return result
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._entry_size(key, previous)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(evicted_key, evicted)
+        return result
+
+    def _convert(self, media_type, data, policy):
+        try:
+            raw = base64.b64decode(data)
+        except (ValueError, TypeError) as e:
+            log.warning("[Images] Undecodable %s image left as is: %s", media_type, e)
+            return media_type, data
+        fmt = None if policy.format == "keep" else policy.format
+        payload, new_type, width, height = downscale(raw, media_type, policy.max_edge, policy.quality, fmt)
+        if payload is raw:
+            return media_type, data
+        log.debug("[Images] %s -> %s %sx%s, %d -> %d bytes", media_type, new_type, width, height, len(raw), len(payload))
+        return new_type, base64.b64encode(payload).decode("ascii")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_variants = ImageVariants()
+
+
+def get_image_variants():
+    """The process-wide ImageVariants shared by every request."""
+    return _variants
@@ -0,0 +1,196 @@
+# judge_cache.py
+"""
+Persistent cache of BackroomsBench judge reports (SQLite, stdlib only).
+
+run_single_judge called the judge model every time, so evaluating the same
+session twice - a second click on the menu action, a batch rerun with
+--rescore, a consensus re-run after one judge failed - paid for and waited
+on all three judges again for identical reports. Judge calls are the most
+expensive requests the app makes (whole transcript in, long report out).
+
+Reports are now stored in judge_cache.db under a key made from everything
+that determines the request:
+
+- sha256 of the transcript (format_conversation_for_judge output)
+- the judge's model id and temperature
+- the system prompt actually sent (JUDGE_SYSTEM_PROMPT with the judge's
+  name); prompt_version() of JUDGE_SYSTEM_PROMPT is stored alongside so
+  entries can be dropped per prompt revision
+
+The consensus summary is cached the same way (kind "consensus", keyed on
+the combined reports and CONSENSUS_SYSTEM_PROMPT).
+
+Invalidation rules:
+- Changing the transcript, model id, temperature or prompt changes the key;
+  old entries are simply never hit again (invalidate() removes them)
+- Only successful responses from the requested model are stored - errors,
+  empty responses and reports served by a fallback model are not
+- Entries older than JUDGE_CACHE_MAX_AGE_DAYS (config.py, 0 = no limit)
+  count as misses, since models behind a "-preview" id change over time
+- force=True skips the lookup and replaces the entry with a fresh call
+
+Usage:
+    cache = get_judge_cache()
+    key = cache.key("judge", model_id, system_prompt, temperature, transcript)
+    report = None if force else cache.get(key)
+    ...
+    cache.put(key, report, kind="judge", judge=name, model_id=model_id, ...)
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from app_logging import get_logger
+
+log = get_logger("judge_cache")
+
+CACHE_PATH = Path(__file__).parent / "judge_cache.db"
+DEFAULT_MAX_AGE_DAYS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    judge TEXT,
+    model_id TEXT NOT NULL,
+    prompt_version TEXT,
+    temperature REAL,
+    transcript_sha TEXT,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS results_model ON results (model_id);
+"""
+
+
+def sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def prompt_version(system_prompt):
+    """Short digest identifying a revision of a system prompt."""
+    return sha256(system_prompt)[:12]
+
+
+class JudgeCache:
+    """Judge and consensus responses keyed by request content, with an age limit."""
+
+    def __init__(self, path=CACHE_PATH, max_age_days=DEFAULT_MAX_AGE_DAYS, enabled=True):
+        self.path = Path(path)
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._initialized = False
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        if not self._initialized:
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _execute(self, sql, params=()):
+        """Run one statement in its own transaction; returns (rows, rowcount)."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    cursor = conn.execute(sql, params)
+                    return cursor.fetchall(), cursor.rowcount
+            finally:
+                conn.close()
+
+    @staticmethod
+    def key(kind, model_id, system_prompt, temperature, text):
+        """Cache key for a request: kind, model, temperature, full system prompt and input text."""
+        material = json.dumps([kind, model_id, float(temperature), sha256(system_prompt), sha256(text)])
+        return sha256(material)
+
+    def get(self, key):
+        """The cached response for key, or None (also when disabled, unreadable or expired)."""
+        if not self.enabled:
+            return None
+        try:
+            rows, _ = self._execute("SELECT response, created_at FROM results WHERE key = ?", (key,))
+            if rows and self.max_age and time.time() - rows[0][1] > self.max_age:
+                self._execute("DELETE FROM results WHERE key = ?", (key,))
+                rows = []
+            if rows:
+                self._execute("UPDATE results SET hits = hits + 1 WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            log.warning("[JudgeCache] Lookup failed: %s", e)
+            return None
+        if not rows:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return rows[0][0]
+
+    def put(self, key, response, kind, model_id, judge=None, prompt_version=None,
+            temperature=None, transcript_sha=None):
+        """Store (or replace) a successful response."""
+        if not self.enabled or not response or not response.strip():
+            return
+        try:
+            self._execute(
+                "INSERT OR REPLACE INTO results (key, kind, judge, model_id, prompt_version, temperature, "
+                "transcript_sha, response, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, judge, model_id, prompt_version, temperature, transcript_sha, response, time.time()),
+            )
+        except sqlite3.Error as e:
+            log.warning("[JudgeCache] Could not store %s result: %s", kind, e)
+
+    def invalidate(self, model_id=None, kind=None, prompt_version=None, older_than_days=None):
+        """Delete entries matching every given filter (all entries if none). Returns the count."""
+        clauses, params = [], []
+        for column, value in (("model_id", model_id), ("kind", kind), ("prompt_version", prompt_version)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if older_than_days is not None:
+            clauses.append("created_at < ?")
+            params.append(time.time() - older_than_days * 86400)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        _, count = self._execute(f"DELETE FROM results{where}", params)
+        log.info("[JudgeCache] Invalidated %d entries", count)
+        return count
+
+    def prune(self):
+        """Delete expired entries. Returns the count."""
+        if not self.max_age:
+            return 0
+        return self.invalidate(older_than_days=self.max_age / 86400)
+
+    def stats(self):
+        rows, _ = self._execute("SELECT kind, COUNT(*), COALESCE(SUM(hits), 0) FROM results GROUP BY kind")
+        return {
+            "entries": {kind: count for kind, count, _ in rows},
+            "stored_hits": sum(hits for _, _, hits in rows),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_judge_cache():
+    """The shared JudgeCache, configured from config.py on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    from config import JUDGE_CACHE_ENABLED, JUDGE_CACHE_MAX_AGE_DAYS
+                except ImportError:
+                    JUDGE_CACHE_ENABLED, JUDGE_CACHE_MAX_AGE_DAYS = True, DEFAULT_MAX_AGE_DAYS
+                _cache = JudgeCache(CACHE_PATH, JUDGE_CACHE_MAX_AGE_DAYS, JUDGE_CACHE_ENABLED)
+    return _cache
@@ -0,0 +1,68 @@
+# lazy_import.py
+"""
+Deferred imports for heavy optional modules.
+
+Provider SDKs (openai, anthropic, replicate, together) and the search client
+each cost tens to hundreds of milliseconds to import, and most sessions route
+every model through OpenRouter over plain HTTP and never touch them. A
+LazyModule stands in for the module at import time and performs the real
+import on first attribute access - i.e. the first time a model routed to that
+provider is actually used:
+
+    from lazy_import import lazy_module
+    replicate = lazy_module("replicate")
+
+    replicate.run(...)    # imports replicate here
+
+Missing packages raise ImportError at that first use rather than at startup.
+is_loaded() tells whether the import has happened (used by test_imports.py to
+check that startup stays SDK-free).
+"""
+
+import importlib
+import sys
+import threading
+
+
+class LazyModule:
+    """Module proxy that imports `name` on first attribute access."""
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    module = importlib.import_module(self.__dict__["_name"])
+                    self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_module(name):
+    """A LazyModule for name (or the module itself if something already imported it)."""
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def is_loaded(name):
+    """True once module `name` has really been imported by anyone."""
+    return name in sys.modules
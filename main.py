@@ -12,9 +12,10 @@ import threading
 import json
 import sys
 import re
+from collections.abc import Mapping
 from dotenv import load_dotenv
 from PyQt6.QtWidgets import QApplication, QMessageBox
-from PyQt6.QtCore import QThread, pyqtSignal, QObject, QRunnable, pyqtSlot, QThreadPool
+from PyQt6.QtCore import QThread, pyqtSignal, QObject, QRunnable, pyqtSlot, QThreadPool, QTimer
 import requests
 
 # Load environment variables from .env file
@@ -22,14 +23,20 @@ load_dotenv()
 
 from config import (
     TURN_DELAY,
+    MAX_CONCURRENT_BRANCHES,
     AI_MODELS,
     SYSTEM_PROMPT_PAIRS,
     SHOW_CHAIN_OF_THOUGHT_IN_CONTEXT,
     SHARE_CHAIN_OF_THOUGHT,
     DEVELOPER_TOOLS,
+    LOG_LEVELS,
+    PROFILER_SAMPLE_HZ,
+    PROFILER_STALL_MS,
     get_model_tier_by_id,
-    get_display_name
+    fetch_validated_models,
+    apply_ai_models
 )
+from app_logging import get_logger, is_debug, setup_logging, Sampler
 from shared_utils import (
     call_claude_api,
     call_openrouter_api,
@@ -41,12 +48,20 @@ from shared_utils import (
     generate_video_with_sora
 )
 from gui import LiminalBackroomsApp, load_fonts
+from grouped_model_selector import GroupedModelComboBox
+from format_cache import get_format_cache
+from prompt_compiler import get_prompt_compiler, format_additions
+from prompt_caching import format_usage
 from command_parser import parse_commands, AgentCommand, format_command_result
+from conversation_history import Conversation, fork_conversation, writable_message
+from message_record import Message, MessageKind, message_kind, model_label, project
+from media_pipeline import get_media_pipeline
+from branch_runner import BranchScheduler
 
 # Import freeze detector for debugging (only used when DEVELOPER_TOOLS is enabled)
 if DEVELOPER_TOOLS:
     try:
-        from tools.freeze_detector import FreezeDetector, enable_faulthandler
+        from tools.freeze_detector import FreezeDetector, SamplingProfiler, enable_faulthandler
         _FREEZE_DETECTOR_AVAILABLE = True
     except ImportError as e:
         print(f"Warning: Could not load freeze detector: {e}")
@@ -62,9 +77,15 @@ else:
 LOGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
 os.makedirs(LOGS_DIR, exist_ok=True)
 
+# Hot-path logging (AI turns, workers). DEVELOPER_TOOLS enables verbose DEBUG output.
+log = get_logger("main")
+
+# Per-message debug lines in ai_turn are sampled so long sessions don't flood the log
+_message_sample = Sampler(every=int(os.getenv("LOUNGE_LOG_SAMPLE_EVERY", "10")))
+
 def is_image_message(message: dict) -> bool:
     """Returns True if 'message' contains a base64 image in its 'content' list."""
-    if not isinstance(message, dict):
+    if not isinstance(message, Mapping):
         return False
     content = message.get('content', [])
     if isinstance(content, list):
@@ -73,11 +94,18 @@ def is_image_message(message: dict) -> bool:
                 return True
     return False
 
+def _branch_indicator_index(conversation) -> int:
+    """Index of the first branch indicator in 'conversation' (its length if there is none)."""
+    for i, msg in enumerate(conversation):
+        if message_kind(msg) is MessageKind.BRANCH_INDICATOR:
+            return i
+    return len(conversation)
+
 class WorkerSignals(QObject):
     """Defines the signals available from a running worker thread"""
     finished = pyqtSignal()
     error = pyqtSignal(str)
-    response = pyqtSignal(str, str)
+    response = pyqtSignal(str, str, str)  # (ai_name, content, fallback model that answered or "")
     result = pyqtSignal(str, object)  # Signal for complete result object
     progress = pyqtSignal(str)
     streaming_chunk = pyqtSignal(str, str)  # Signal for streaming tokens: (ai_name, chunk)
@@ -100,7 +128,7 @@ class Worker(QRunnable):
     def __init__(self, ai_name, conversation, model, system_prompt, is_branch=False, branch_id=None, gui=None, invite_tier="Both", prompt_modifications=None, ai_temperatures=None):
         super().__init__()
         self.ai_name = ai_name
-        self.conversation = conversation.copy()  # Make a copy to prevent race conditions
+        self.conversation = fork_conversation(conversation)  # Snapshot sharing history, safe from later edits
         self.model = model
         self.system_prompt = system_prompt
         self.is_branch = is_branch
@@ -116,7 +144,7 @@ class Worker(QRunnable):
     @pyqtSlot()
     def run(self):
         """Process the AI turn when the thread is started"""
-        print(f"[Worker] >>> Starting run() for {self.ai_name} ({self.model})")
+        log.debug("[Worker] >>> Starting run() for %s (%s)", self.ai_name, self.model)
         
         # Emit started signal so UI can show typing indicator
         self.signals.started.emit(self.ai_name, self.model)
@@ -130,7 +158,7 @@ class Worker(QRunnable):
                 self.signals.streaming_chunk.emit(self.ai_name, chunk)
             
             # Process the turn with streaming
-            print(f"[Worker] Calling ai_turn for {self.ai_name}...")
+            log.debug("[Worker] Calling ai_turn for %s...", self.ai_name)
             result = ai_turn(
                 self.ai_name,
                 self.conversation,
@@ -142,31 +170,31 @@ class Worker(QRunnable):
                 prompt_modifications=self.prompt_modifications,
                 ai_temperatures=self.ai_temperatures
             )
-            print(f"[Worker] ai_turn completed for {self.ai_name}, result type: {type(result)}")
+            log.debug("[Worker] ai_turn completed for %s, result type: %s", self.ai_name, type(result).__name__)
             
             # Emit both the text response and the full result object
             if isinstance(result, dict):
                 response_content = result.get('content', '')
-                print(f"[Worker] Emitting response for {self.ai_name}, content length: {len(response_content) if response_content else 0}")
+                log.debug("[Worker] Emitting response for %s, content length: %d",
+                          self.ai_name, len(response_content) if response_content else 0)
                 # Emit the simple text response for backward compatibility
-                self.signals.response.emit(self.ai_name, response_content)
+                served_by = result.get('model', '') if result.get('requested_model') else ''
+                self.signals.response.emit(self.ai_name, response_content, served_by)
                 # Also emit the full result object for HTML contribution processing
                 self.signals.result.emit(self.ai_name, result)
             else:
                 # Handle simple string responses
-                print(f"[Worker] Emitting string response for {self.ai_name}")
-                self.signals.response.emit(self.ai_name, result if result else "")
+                log.debug("[Worker] Emitting string response for %s", self.ai_name)
+                self.signals.response.emit(self.ai_name, result if result else "", "")
                 self.signals.result.emit(self.ai_name, {"content": result, "model": self.model})
             
             # Emit finished signal
-            print(f"[Worker] <<< Finished run() for {self.ai_name}, emitting finished signal")
+            log.debug("[Worker] <<< Finished run() for %s, emitting finished signal", self.ai_name)
             self.signals.finished.emit()
             
         except Exception as e:
             # Emit error signal
-            print(f"[Worker] !!! ERROR in run() for {self.ai_name}: {e}")
-            import traceback
-            traceback.print_exc()
+            log.exception("[Worker] !!! ERROR in run() for %s: %s", self.ai_name, e)
             self.signals.error.emit(str(e))
             # Still emit finished signal even if there's an error
             self.signals.finished.emit()
@@ -180,59 +208,22 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
         prompt_modifications: Optional dict mapping AI names to custom system prompts
         ai_temperatures: Optional dict mapping AI names to temperature values
     """
-    print(f"==================================================")
-    print(f"Starting {model} turn ({ai_name})...")
-    print(f"Current conversation length: {len(conversation)}")
-    
-    # HTML contributions and living document disabled
-    enhanced_system_prompt = system_prompt
+    log.info("Starting %s turn (%s), conversation length: %d", model, ai_name, len(conversation))
     
     # The model parameter is now the actual model ID (from get_selected_model_id)
     model_id = model
     
-    # Inject available models based on invite tier setting
-    from config import get_invite_models_text
-    models_text = get_invite_models_text(invite_tier)
-    
-    # Debug: log the tier setting and models text
-    print(f"[AI Turn] Tier setting: {invite_tier}")
-    print(f"[AI Turn] Models text: {models_text}")
-    
-    # Replace placeholder in prompt if exists, otherwise append
-    if "!add_ai" in enhanced_system_prompt:
-        # Find and update model list placeholder or existing model list
-        import re
-        # Match the placeholder text: [Models list injected based on tier setting]
-        placeholder_pattern = r'\[Models list injected based on tier setting\]'
-        # Match our emphatic format: ⚠️ ONLY USE FREE/PAID MODELS: ... — DO NOT ...
-        emphatic_pattern = r'⚠️ ONLY USE (?:FREE|PAID) MODELS:[^\n]*'
-        # Also match old format or "Available models" line
-        legacy_pattern = r'(?:FREE MODELS[^:]*:|PAID MODELS[^:]*:|Available[^:]*:)[^\n]*'
-        
-        if re.search(placeholder_pattern, enhanced_system_prompt):
-            # Replace the placeholder with actual model list
-            enhanced_system_prompt = re.sub(placeholder_pattern, models_text, enhanced_system_prompt)
-            print(f"[AI Turn] Replaced placeholder with models list")
-        elif re.search(emphatic_pattern, enhanced_system_prompt):
-            # Replace existing emphatic model list line (from previous turn)
-            enhanced_system_prompt = re.sub(emphatic_pattern, models_text, enhanced_system_prompt)
-            print(f"[AI Turn] Replaced emphatic models line")
-        elif re.search(legacy_pattern, enhanced_system_prompt):
-            # Replace legacy model list line
-            enhanced_system_prompt = re.sub(legacy_pattern, models_text, enhanced_system_prompt)
-            print(f"[AI Turn] Replaced legacy models line")
-        else:
-            # Add after !add_ai line if no placeholder found
-            enhanced_system_prompt = enhanced_system_prompt.replace(
-                '!add_ai "Model Name"',
-                f'!add_ai "Model Name"\n  {models_text}\n '
-            )
-            print(f"[AI Turn] Appended models list after !add_ai")
-    
-    # Prepend model identity to system prompt so AI knows who it is
-    display_name = get_display_name(model_id)
-    enhanced_system_prompt = f"You are {ai_name} ({display_name}).\n\n{enhanced_system_prompt}"
-    
+    # The rendered system prompt: identity line, scenario prompt with the invite tier's
+    # model list, then this AI's !prompt additions. Cached per AI until !prompt or the
+    # tier changes (see prompt_compiler.py)
+    log.debug("[AI Turn] Tier setting: %s", invite_tier)
+    additions = prompt_modifications.get(ai_name) if isinstance(prompt_modifications, dict) else None
+    enhanced_system_prompt = get_prompt_compiler().render(ai_name, model_id, system_prompt, invite_tier, additions)
+    if isinstance(additions, list) and additions:
+        log.debug("[AI Turn] Applied %d prompt additions for %s", len(additions), ai_name)
+    elif isinstance(additions, str):
+        log.debug("[AI Turn] Using custom prompt for %s: %.100s...", ai_name, additions)
+
     # Check for branch type and count AI responses
     is_rabbithole = False
     is_fork = False
@@ -243,7 +234,7 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
 
     # First find the most recent branch marker
     for i, msg in enumerate(conversation):
-        if isinstance(msg, dict) and msg.get("_type") == "branch_indicator":
+        if isinstance(msg, Mapping) and message_kind(msg) is MessageKind.BRANCH_INDICATOR:
             latest_branch_marker_index = i
             found_branch_marker = True
             
@@ -254,11 +245,11 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
                 if "Rabbitholing down:" in msg_content:
                     is_rabbithole = True
                     branch_text = msg_content.split('"')[1] if '"' in msg_content else ""
-                    print(f"Detected rabbithole branch for: '{branch_text}'")
+                    log.debug("Detected rabbithole branch for: '%s'", branch_text)
                 elif "Forking off:" in msg_content:
                     is_fork = True
                     branch_text = msg_content.split('"')[1] if '"' in msg_content else ""
-                    print(f"Detected fork branch for: '{branch_text}'")
+                    log.debug("Detected fork branch for: '%s'", branch_text)
 
     # Now count AI responses that occur AFTER the latest branch marker
     ai_response_count = 0
@@ -266,53 +257,35 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
         for i, msg in enumerate(conversation):
             if i > latest_branch_marker_index and msg.get("role") == "assistant":
                 ai_response_count += 1
-        print(f"Counting AI responses after latest branch marker: found {ai_response_count} responses")
+        log.debug("Counting AI responses after latest branch marker: found %d responses", ai_response_count)
     
     # Handle branch-specific system prompts
     
     # For rabbitholing: override system prompt for first TWO responses
     if is_rabbithole and ai_response_count < 2:
-        print(f"USING RABBITHOLE PROMPT: '{branch_text}' - response #{ai_response_count+1} after branch")
+        log.info("Using rabbithole prompt: '%s' - response #%d after branch", branch_text, ai_response_count + 1)
         system_prompt = f"'{branch_text}'!!!"
     
     # For forking: override system prompt ONLY for first response
     elif is_fork and ai_response_count == 0:
-        print(f"USING FORK PROMPT: '{branch_text}' - response #{ai_response_count+1}")
+        log.info("Using fork prompt: '%s' - response #%d", branch_text, ai_response_count + 1)
         system_prompt = f"The conversation forks from'{branch_text}'. Continue naturally from this point."
     
     # For all other cases, use the standard system prompt
     else:
         if is_rabbithole:
-            print(f"USING STANDARD PROMPT: Past initial rabbithole exploration (responses after branch: {ai_response_count})")
+            log.debug("Using standard prompt: past initial rabbithole exploration (responses after branch: %d)", ai_response_count)
         elif is_fork:
-            print(f"USING STANDARD PROMPT: Past initial fork response (responses after branch: {ai_response_count})")
+            log.debug("Using standard prompt: past initial fork response (responses after branch: %d)", ai_response_count)
     
     # Apply the enhanced system prompt (with HTML contribution instructions)
     system_prompt = enhanced_system_prompt
 
-    # Check if this AI has added to their prompt via !prompt command
-    if prompt_modifications and ai_name in prompt_modifications:
-        # Note: This is for compatibility - the variable name is prompt_modifications
-        # but it's actually used as prompt_additions (list-based)
-        if isinstance(prompt_modifications, dict) and ai_name in prompt_modifications:
-            if isinstance(prompt_modifications[ai_name], list):
-                # List-based additions (upstream approach)
-                additions = prompt_modifications[ai_name]
-                if additions:
-                    formatted_additions = "\n\n[Your remembered insights/perspectives]:\n- " + "\n- ".join(additions)
-                    system_prompt += formatted_additions
-                    print(f"[AI Turn] Applied {len(additions)} prompt additions for {ai_name}")
-            else:
-                # Single string (fallback for old approach)
-                custom_prompt = prompt_modifications[ai_name]
-                print(f"[AI Turn] Using custom prompt for {ai_name}: {custom_prompt[:100]}...")
-                system_prompt = custom_prompt
-
     # Get temperature for this AI (default 1.0)
     temperature = 1.0
     if ai_temperatures and ai_name in ai_temperatures:
         temperature = ai_temperatures[ai_name]
-        print(f"[AI Turn] Using custom temperature for {ai_name}: {temperature}")
+        log.debug("[AI Turn] Using custom temperature for %s: %s", ai_name, temperature)
 
     # CRITICAL: Always ensure we have the system prompt
     # No matter what happens with the conversation, we need this
@@ -325,7 +298,7 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
     # Filter out any existing system messages that might interfere
     filtered_conversation = []
     for msg in conversation:
-        if not isinstance(msg, dict):
+        if not isinstance(msg, Mapping):
             # Convert plain text to dictionary
             msg = {"role": "user", "content": str(msg)}
             
@@ -334,18 +307,10 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
         if msg.get("hidden") and isinstance(msg_content, str) and "connect" in msg_content.lower():
             continue
             
-        # Skip empty messages
-        content = msg.get("content", "")
-        if isinstance(content, str):
-            if not content.strip():
-                continue
-        elif isinstance(content, list):
-            # For structured content, skip if all parts are empty
-            if not any(part.get('text', '').strip() if part.get('type') == 'text' else True for part in content):
-                continue
-        else:
-            if not content:
-                continue
+        # Skip empty messages (no text and no image; cached on the message)
+        projection = project(msg)
+        if not projection.text.strip() and not projection.images:
+            continue
             
         # Skip system messages (we already added our own above)
         if msg.get("role") == "system":
@@ -360,18 +325,21 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
         for existing in filtered_conversation:
             if existing.get("content") == msg.get("content"):
                 is_duplicate = True
-                content = msg.get('content', '')
-                # Safely preview content - handle both string and list (structured) content
-                if isinstance(content, str):
-                    preview = content[:30] + "..." if len(content) > 30 else content
-                else:
-                    preview = f"[structured content with {len(content)} parts]"
-                print(f"Skipping duplicate message: {preview}")
+                if is_debug(log):
+                    content = msg.get('content', '')
+                    # Safely preview content - handle both string and list (structured) content
+                    if isinstance(content, str):
+                        log.debug("Skipping duplicate message: %.30s", content)
+                    else:
+                        log.debug("Skipping duplicate message: [structured content with %d parts]", len(content))
                 break
                 
         if not is_duplicate:
             filtered_conversation.append(msg)
     
+    # Per-message role logging is debug-only and sampled once per turn
+    log_messages = is_debug(log) and _message_sample.hit(f"roles:{ai_name}")
+
     # Process filtered conversation
     for i, msg in enumerate(filtered_conversation):
         # Check if this message is from the current AI
@@ -429,11 +397,13 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
         })
         
         # For logging, handle both string and structured content
-        if isinstance(content, list):
-            print(f"Message {i} - AI: {msg.get('ai_name', 'User')} - Assigned role: {role} - Content: [structured message with {len(content)} parts]")
-        else:
-            content_preview = content[:50] + "..." if len(str(content)) > 50 else content
-            print(f"Message {i} - AI: {msg.get('ai_name', 'User')} - Assigned role: {role} - Preview: {content_preview}")
+        if log_messages:
+            if isinstance(content, list):
+                log.debug("Message %d - AI: %s - Assigned role: %s - Content: [structured message with %d parts]",
+                          i, msg.get('ai_name', 'User'), role, len(content))
+            else:
+                log.debug("Message %d - AI: %s - Assigned role: %s - Preview: %.50s",
+                          i, msg.get('ai_name', 'User'), role, content)
     
     # Ensure the last message is a user message so the AI responds
     if len(messages) > 1 and messages[-1].get("role") == "assistant":
@@ -471,25 +441,23 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
                     "content": "Let's continue our conversation."
                 })
             
-    # Print the processed messages for debugging
-    print(f"Sending to {model} ({ai_name}):")
-    for i, msg in enumerate(messages):
-        role = msg.get("role", "unknown")
-        content_raw = msg.get("content", "")
-        
-        # Handle both string and list content for logging
-        if isinstance(content_raw, list):
-            text_parts = [part.get('text', '') for part in content_raw if part.get('type') == 'text']
-            has_image = any(part.get('type') == 'image' for part in content_raw)
-            content_str = ' '.join(text_parts)
-            if has_image:
-                content_str = f"[Image] {content_str}" if content_str else "[Image]"
-        else:
-            content_str = str(content_raw)
-        
-        # Truncate for display
-        content = content_str[:50] + "..." if len(content_str) > 50 else content_str
-        print(f"[{i}] {role}: {content}")
+    # Log the processed messages for debugging (skipped entirely unless verbose)
+    if log_messages:
+        log.debug("Sending to %s (%s):", model, ai_name)
+        for i, msg in enumerate(messages):
+            role = msg.get("role", "unknown")
+            content_raw = msg.get("content", "")
+            
+            # Handle both string and list content for logging
+            if isinstance(content_raw, list):
+                projection = project(msg)
+                content_str = projection.joined(' ')
+                if projection.images:
+                    content_str = f"[Image] {content_str}" if content_str else "[Image]"
+            else:
+                content_str = str(content_raw)
+            
+            log.debug("[%d] %s: %.50s", i, role, content_str)
     
     # Load any available memories for this AI
     memories = []
@@ -497,34 +465,23 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
         if os.path.exists(f'memories/{ai_name.lower()}_memories.json'):
             with open(f'memories/{ai_name.lower()}_memories.json', 'r') as f:
                 memories = json.load(f)
-                print(f"Loaded {len(memories)} memories for {ai_name}")
-        else:
-            print(f"Loaded 0 memories for {ai_name}")
+                log.debug("Loaded %d memories for %s", len(memories), ai_name)
     except Exception as e:
-        print(f"Error loading memories: {e}")
-        print(f"Loaded 0 memories for {ai_name}")
-    
-    # Display the final processed messages for debugging (avoid printing base64 images)
-    print(f"Sending to Claude:")
-    print(f"Messages: {len(messages)} message(s)")
+        log.warning("Error loading memories for %s: %s", ai_name, e)
     
-    # Display the prompt
-    print(f"--- Prompt to {model} ({ai_name}) ---")
+    if is_debug(log):
+        log.debug("Prompt to %s (%s): %d message(s), ~%d tokens of history", model, ai_name, len(messages),
+                  sum(project(msg).tokens for msg in filtered_conversation))
     
     try:
         # Route Sora video models
         if model_id in ("sora-2", "sora-2-pro"):
-            print(f"Using Sora Video API for model: {model_id}")
+            log.info("Using Sora Video API for model: %s", model_id)
             # Use last user message as the video prompt
             prompt_content = ""
             if len(messages) > 0:
-                last_content = messages[-1].get("content", "")
-                # Extract text from structured content if needed
-                if isinstance(last_content, list):
-                    text_parts = [part.get('text', '') for part in last_content if part.get('type') == 'text']
-                    prompt_content = ' '.join(text_parts)
-                elif isinstance(last_content, str):
-                    prompt_content = last_content
+                # Text of the last message (structured content joined)
+                prompt_content = project(messages[-1]).joined(' ')
             
             if not prompt_content or not prompt_content.strip():
                 prompt_content = "A short abstract motion graphic in warm colors"
@@ -534,16 +491,17 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
             sora_seconds = int(os.getenv("SORA_SECONDS", str(SORA_SECONDS)))
             sora_size = os.getenv("SORA_SIZE", SORA_SIZE) or None
 
-            print(f"[Sora] Starting job with seconds={sora_seconds} size={sora_size}")
+            log.info("[Sora] Starting job with seconds=%s size=%s", sora_seconds, sora_size)
             video_result = generate_video_with_sora(
                 prompt=prompt_content,
                 model=model_id,
                 seconds=sora_seconds,
                 size=sora_size,
+                ai_name=ai_name,
             )
 
             if video_result.get("success"):
-                print(f"[Sora] Completed: id={video_result.get('video_id')} path={video_result.get('video_path')}")
+                log.info("[Sora] Completed: id=%s path=%s", video_result.get('video_id'), video_result.get('video_path'))
                 # Return a lightweight textual confirmation; video is saved to disk
                 return {
                     "role": "assistant",
@@ -553,7 +511,7 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
                 }
             else:
                 err = video_result.get("error", "unknown error")
-                print(f"[Sora] Failed: {err}")
+                log.error("[Sora] Failed: %s", err)
                 return {
                     "role": "system",
                     "content": f"[Sora] Video generation failed: {err}",
@@ -567,7 +525,7 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
         USE_DIRECT_ANTHROPIC_API = False
         
         if USE_DIRECT_ANTHROPIC_API and ("claude" in model_id.lower() or model_id in ["anthropic/claude-3-opus-20240229", "anthropic/claude-3-sonnet-20240229", "anthropic/claude-3-haiku-20240307"]):
-            print(f"Using Claude API for model: {model_id}")
+            log.info("Using Claude API for model: %s", model_id)
             
             # CRITICAL: Make sure there are no duplicates in the messages and system prompt is included
             final_messages = []
@@ -575,40 +533,19 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
             
             for msg in messages:
                 # Skip empty messages - handle both string and list content
-                content = msg.get("content", "")
-                is_empty = False
-                if isinstance(content, list):
-                    # For structured content, check if all parts are empty
-                    text_parts = [part.get('text', '').strip() for part in content if part.get('type') == 'text']
-                    has_image = any(part.get('type') == 'image' for part in content)
-                    is_empty = not text_parts and not has_image
-                elif isinstance(content, str):
-                    is_empty = not content
-                else:
-                    is_empty = not content
-                    
-                if is_empty:
+                projection = project(msg)
+                if not projection.text_parts and not projection.images:
                     continue
                     
                 # Handle system message separately
                 if msg.get("role") == "system":
                     continue
                     
-                # Check for duplicates by content - create hashable representation
-                content = msg.get("content", "")
-                
-                # Create a hashable content_hash for duplicate detection
-                if isinstance(content, list):
-                    # For structured messages, use text parts for hash
-                    text_parts = [part.get('text', '') for part in content if part.get('type') == 'text']
-                    content_hash = ''.join(text_parts)
-                elif isinstance(content, str):
-                    content_hash = content
-                else:
-                    content_hash = str(content) if content else ""
+                # Check for duplicates by content - the text parts are the hashable representation
+                content_hash = projection.text
                 
                 if content_hash and content_hash in seen_contents:
-                    print(f"Skipping duplicate message in AI turn: {content_hash[:30]}...")
+                    log.debug("Skipping duplicate message in AI turn: %.30s...", content_hash)
                     continue
                 
                 if content_hash:
@@ -617,7 +554,7 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
             
             # Ensure we have at least one message
             if not final_messages:
-                print("Warning: No messages left after filtering. Adding a default message.")
+                log.warning("No messages left after filtering. Adding a default message.")
                 final_messages.append({"role": "user", "content": "Connecting..."})
             
             # Get the prompt content safely
@@ -631,18 +568,20 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
                 prompt_content = "Connecting..."  # Default fallback
             
             # Call Claude API with filtered messages (with streaming if callback provided)
-            response = call_claude_api(prompt_content, context_messages, model_id, system_prompt, stream_callback=streaming_callback)
+            turn_metrics = {"kind": "turn", "ai_name": ai_name}
+            response = call_claude_api(prompt_content, context_messages, model_id, system_prompt, stream_callback=streaming_callback, metrics=turn_metrics)
             
             return {
                 "role": "assistant",
                 "content": response,
                 "model": model,
-                "ai_name": ai_name
+                "ai_name": ai_name,
+                "metrics": turn_metrics
             }
         
         # Check for DeepSeek models to use Replicate via DeepSeek API function
         if "deepseek" in model.lower():
-            print(f"Using Replicate API for DeepSeek model: {model_id}")
+            log.info("Using DeepSeek API for model: %s", model_id)
             
             # Ensure we have at least one message for the prompt
             if len(messages) > 0:
@@ -652,7 +591,8 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
                 prompt_content = "Connecting..."
                 context_messages = []
                 
-            response = call_deepseek_api(prompt_content, context_messages, model_id, system_prompt)
+            turn_metrics = {"kind": "turn", "ai_name": ai_name}
+            response = call_deepseek_api(prompt_content, context_messages, model_id, system_prompt, metrics=turn_metrics)
             
             # Ensure response has the required format for the Worker class
             if isinstance(response, dict) and 'content' in response:
@@ -660,6 +600,7 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
                 response['model'] = model
                 response['role'] = 'assistant'
                 response['ai_name'] = ai_name
+                response['metrics'] = turn_metrics
                 
                 # Check for HTML contribution
                 if "html_contribution" in response:
@@ -684,7 +625,7 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
             
         # Use OpenRouter for all other models
         else:
-            print(f"Using OpenRouter API for model: {model_id}")
+            log.info("Using OpenRouter API for model: %s", model_id)
             
             try:
                 # Ensure we have valid messages
@@ -696,24 +637,29 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
                     context_messages = []
                 
                 # Call OpenRouter API with streaming support
-                response = call_openrouter_api(prompt_content, context_messages, model_id, system_prompt, stream_callback=streaming_callback, temperature=temperature)
+                # turn_metrics collects every attempt (retries, hedges, fallbacks) for this turn
+                turn_metrics = {"attempts": [], "kind": "turn", "ai_name": ai_name}
+                response = call_openrouter_api(prompt_content, context_messages, model_id, system_prompt, stream_callback=streaming_callback, temperature=temperature, metrics=turn_metrics)
                 
-                # Avoid printing full response which could be large
-                response_preview = str(response)[:200] + "..." if response and len(str(response)) > 200 else response
-                print(f"Raw {model} Response: {response_preview}")
+                # Avoid logging full response which could be large
+                log.debug("Raw %s response: %.200s", model, response)
                 
                 result = {
                     "role": "assistant",
                     "content": response,
                     "model": model,
-                    "ai_name": ai_name
+                    "ai_name": ai_name,
+                    "metrics": turn_metrics
                 }
+                # A fallback model answered - label the message with it, not the requested one
+                if turn_metrics.get("fallback_from"):
+                    result["model"] = turn_metrics["model_used"]
+                    result["requested_model"] = model
                 
                 return result
             except Exception as e:
                 error_message = f"Error making API request: {str(e)}"
-                print(f"Error: {error_message}")
-                print(f"Error type: {type(e)}")
+                log.exception("Error: %s", error_message)
                 
                 # Create an error response
                 result = {
@@ -728,7 +674,7 @@ def ai_turn(ai_name, conversation, model, system_prompt, gui=None, is_branch=Fal
             
     except Exception as e:
         error_message = f"Error making API request: {str(e)}"
-        print(f"Error: {error_message}")
+        log.exception("Error: %s", error_message)
         
         # Create an error response
         result = {
@@ -753,8 +699,15 @@ class ConversationManager:
 
         # Initialize the worker thread pool
         self.thread_pool = QThreadPool()
+        if self.thread_pool.maxThreadCount() < MAX_CONCURRENT_BRANCHES:
+            self.thread_pool.setMaxThreadCount(MAX_CONCURRENT_BRANCHES)
         print(f"Conversation Manager initialized with {self.thread_pool.maxThreadCount()} threads")
 
+        # Main and branch conversations each run with their own turn state
+        # (see branch_runner.py), at most MAX_CONCURRENT_BRANCHES at a time
+        self.branches = BranchScheduler(self.thread_pool, MAX_CONCURRENT_BRANCHES)
+        self._pending_targets = {}  # "ai_name:prompt" -> BranchRun that issued an !image/!video
+
         # Set up image update signals for thread-safe UI updates
         self.image_signals = ImageUpdateSignals()
         self.image_signals.image_ready.connect(self._on_image_ready)
@@ -765,6 +718,67 @@ class ConversationManager:
         self.video_signals.video_ready.connect(self._on_video_ready)
         self.video_signals.video_failed.connect(self._on_video_failed)
         
+    def _run_for(self, run=None):
+        """The BranchRun a signal belongs to (default: the conversation on screen)."""
+        return run or self.branches.run_for(self.app.active_branch or None)
+    
+    def _conversation_for(self, run):
+        """The conversation a run writes to (None if its branch no longer exists)."""
+        if run.branch_id is None:
+            if not hasattr(self.app, 'main_conversation'):
+                self.app.main_conversation = Conversation()
+            return self.app.main_conversation
+        branch_data = self.app.branch_conversations.get(run.branch_id)
+        return branch_data['conversation'] if branch_data else None
+    
+    def _writable(self, run, message):
+        """message ready for in-place edits in run's conversation, unshared from its forks."""
+        conversation = self._conversation_for(run)
+        owned = writable_message(conversation, message) if conversation is not None else None
+        return owned if owned is not None else message
+    
+    def _is_displayed(self, run):
+        """True if run's conversation is the one in the chat pane."""
+        return run.branch_id == (self.app.active_branch or None)
+    
+    def _show_conversation(self, run):
+        """Redisplay run's conversation if it is on screen (background runs just keep their messages)."""
+        if not self._is_displayed(run):
+            return
+        conversation = self._conversation_for(run)
+        if run.branch_id is None:
+            self.app.left_pane.display_conversation(conversation)
+        else:
+            self.app.left_pane.display_conversation(conversation, self.app.branch_conversations[run.branch_id])
+    
+    def _connect_worker(self, worker, run):
+        """Bind a worker's signals to its run so results reach its conversation, whatever is displayed."""
+        worker.signals.started.connect(lambda ai_name, model, run=run: self.on_ai_started(ai_name, model, run))
+        worker.signals.response.connect(
+            lambda ai_name, content, served_by, run=run: self.on_ai_response_received(ai_name, content, run, served_by))
+        worker.signals.result.connect(lambda ai_name, result, run=run: self.on_ai_result_received(ai_name, result, run))
+        worker.signals.streaming_chunk.connect(lambda ai_name, chunk, run=run: self.on_streaming_chunk(ai_name, chunk, run))
+        worker.signals.error.connect(lambda error, run=run: self.on_ai_error(error, run))
+    
+    def _start_round(self, run, workers, max_iterations):
+        """Chain a round's workers (one AI after the other) and start the first."""
+        run.max_iterations = max_iterations
+        for i, worker in enumerate(workers):
+            if i < len(workers) - 1:
+                # Not the last worker - connect to start next worker
+                next_worker = workers[i + 1]
+                ai_num = i + 2  # AI number for next worker (1-indexed, so i=0 means next is AI-2)
+                # Use a factory function to properly capture values
+                worker.signals.finished.connect(
+                    self._make_next_turn_callback(next_worker, ai_num, run)
+                )
+            else:
+                # Last worker - connect to handle turn completion
+                worker.signals.finished.connect(lambda mi=max_iterations, run=run: self.handle_turn_completion(mi, run))
+        
+        # Start first AI's turn
+        self.branches.submit(run, workers[0])
+    
     def _on_video_ready(self, video_path: str, prompt: str, ai_name: str, model: str):
         """Handle video ready signal - runs on main thread"""
         try:
@@ -793,7 +807,7 @@ class ConversationManager:
         """Handle video generation failure - runs on main thread"""
         try:
             # Remove the "generating..." notification first
-            self._remove_pending_notification(ai_name, prompt)
+            run = self._remove_pending_notification(ai_name, prompt)
             
             # Get AI's model name for consistent formatting
             ai_num = int(ai_name.split('-')[1]) if '-' in ai_name else 1
@@ -851,9 +865,12 @@ class ConversationManager:
             }
             
             # Add to conversation so AIs can see it
-            self.app.main_conversation.append(failure_message)
-            self.app.left_pane.conversation = self.app.main_conversation
-            self.app.left_pane.render_conversation()
+            conversation = self._conversation_for(run)
+            if conversation is not None:
+                conversation.append(failure_message)
+                if self._is_displayed(run):
+                    self.app.left_pane.conversation = conversation
+                    self.app.left_pane.render_conversation()
             
             # Update status bar with more detail
             if hasattr(self.app, 'notification_label'):
@@ -869,7 +886,7 @@ class ConversationManager:
         """Handle image generation failure - runs on main thread"""
         try:
             # Remove the "generating..." notification first
-            self._remove_pending_notification(ai_name, prompt)
+            run = self._remove_pending_notification(ai_name, prompt)
             
             # Get AI's model name for consistent formatting
             ai_num = int(ai_name.split('-')[1]) if '-' in ai_name else 1
@@ -924,9 +941,12 @@ class ConversationManager:
             }
             
             # Add to conversation so AIs can see it
-            self.app.main_conversation.append(failure_message)
-            self.app.left_pane.conversation = self.app.main_conversation
-            self.app.left_pane.render_conversation()
+            conversation = self._conversation_for(run)
+            if conversation is not None:
+                conversation.append(failure_message)
+                if self._is_displayed(run):
+                    self.app.left_pane.conversation = conversation
+                    self.app.left_pane.render_conversation()
             
             # Update status bar with more detail
             if hasattr(self.app, 'notification_label'):
@@ -939,26 +959,27 @@ class ConversationManager:
             traceback.print_exc()
     
     def _remove_pending_notification(self, ai_name: str, prompt: str):
-        """Remove the 'generating...' notification for a completed image/video"""
+        """Remove the 'generating...' notification for a completed image/video.
+        
+        Returns the BranchRun whose conversation issued the command (the
+        displayed one if unknown), so the result lands next to the request.
+        """
         prompt_key = f"{ai_name}:{prompt[:50]}"
+        run = self._pending_targets.pop(prompt_key, None) or self._run_for()
         
         if not hasattr(self, '_pending_notifications'):
-            return
+            return run
         
         notification_id = self._pending_notifications.get(prompt_key)
         if not notification_id:
             print(f"[Agent] No pending notification found for {prompt_key[:40]}...")
-            return
+            return run
         
         # Get the correct conversation (main or branch)
-        if self.app.active_branch:
-            branch_id = self.app.active_branch
-            if branch_id in self.app.branch_conversations:
-                conversation = self.app.branch_conversations[branch_id]['conversation']
-            else:
-                conversation = self.app.main_conversation
-        else:
-            conversation = self.app.main_conversation
+        conversation = self._conversation_for(run)
+        if conversation is None:
+            del self._pending_notifications[prompt_key]
+            return run
         
         # Remove in-place by finding and removing the matching message
         # This preserves the list reference!
@@ -972,10 +993,12 @@ class ConversationManager:
         if removed:
             print(f"[Agent] Removed 'generating...' notification (ID: {notification_id})")
             # Ensure left_pane has the current reference
-            self.app.left_pane.conversation = conversation
+            if self._is_displayed(run):
+                self.app.left_pane.conversation = conversation
         
         # Clean up tracking dict
         del self._pending_notifications[prompt_key]
+        return run
     
     def _on_image_ready(self, image_message: dict, image_path: str):
         """Handle image ready signal - runs on main thread"""
@@ -984,23 +1007,20 @@ class ConversationManager:
             ai_name = image_message.get('ai_name', 'AI')
             model = image_message.get('model', '')
             prompt = image_message.get('_prompt', '')
-            self._remove_pending_notification(ai_name, prompt)
+            run = self._remove_pending_notification(ai_name, prompt)
             
             # Format display name like message headings do
             display_name = f"{ai_name} ({model})" if model else ai_name
             
-            # Add image to the correct conversation (main or branch)
-            if self.app.active_branch:
-                branch_id = self.app.active_branch
-                if branch_id in self.app.branch_conversations:
-                    self.app.branch_conversations[branch_id]['conversation'].append(image_message)
-                    self.app.left_pane.conversation = self.app.branch_conversations[branch_id]['conversation']
-            else:
-                self.app.main_conversation.append(image_message)
-                self.app.left_pane.conversation = self.app.main_conversation
+            # Add image to the conversation that asked for it (main or branch)
+            conversation = self._conversation_for(run)
+            if conversation is not None:
+                conversation.append(image_message)
             
             # Update the conversation display
-            self.app.left_pane.render_conversation()
+            if conversation is not None and self._is_displayed(run):
+                self.app.left_pane.conversation = conversation
+                self.app.left_pane.render_conversation()
             
             # Update the image preview panel
             if hasattr(self.app.right_sidebar, 'update_image_preview'):
@@ -1034,24 +1054,31 @@ class ConversationManager:
         
         # Initialize main conversation if not already set
         if not hasattr(self.app, 'main_conversation'):
-            self.app.main_conversation = []
+            self.app.main_conversation = Conversation()
         
         # Display the initial empty conversation
         self.app.left_pane.display_conversation(self.app.main_conversation)
     
         print("Conversation manager initialized.")
     
-    def process_input(self, user_input=None):
-        """Process the user input and generate AI responses"""
+    def process_input(self, user_input=None, run=None):
+        """Process the user input and generate AI responses
+        
+        Args:
+            run: The main conversation's BranchRun when continuing it in the
+                background (None = input from the chat pane)
+        """
         # Get the conversation (either main or branch)
-        if self.app.active_branch:
+        if run is None and self.app.active_branch:
             # For branch conversations, delegate to branch processor
             self.process_branch_input(user_input)
             return
         
         # Handle main conversation processing
+        run = self.branches.run_for(None)
+        displayed = self._is_displayed(run)
         if not hasattr(self.app, 'main_conversation'):
-            self.app.main_conversation = []
+            self.app.main_conversation = Conversation()
         
         # Add user input if provided
         if user_input:
@@ -1102,7 +1129,7 @@ class ConversationManager:
             self.app.left_pane.display_conversation(visible_conversation)
             
             # Update the HTML conversation document when user adds a message
-            self.update_conversation_html(self.app.main_conversation)
+            self.update_conversation_html(self.app.main_conversation, run)
         
         # Get number of AIs from app state
         num_ais = self.app.num_ais
@@ -1110,26 +1137,28 @@ class ConversationManager:
         # Get selected scenario from app state
         selected_prompt_pair = self.app.current_scenario
         
-        # Start loading animation
-        self.app.left_pane.start_loading()
-        
-        # Set signal indicator to active
-        if hasattr(self.app, 'set_signal_active'):
-            self.app.set_signal_active(True)
+        # Start loading animation (not for a round continuing behind another conversation)
+        if displayed:
+            self.app.left_pane.start_loading()
+            
+            # Set signal indicator to active
+            if hasattr(self.app, 'set_signal_active'):
+                self.app.set_signal_active(True)
         
         # Track request start time for latency
-        self._request_start_time = time.time()
+        run.request_started = time.time()
         
         # Reset turn count ONLY if this is a new conversation or explicit user input
         max_iterations = self.app.max_iterations
         if user_input is not None or not self.app.main_conversation:
-            self.app.turn_count = 0
+            run.turn_count = 0
             print(f"MAIN: Resetting turn count - starting new conversation with {max_iterations} iterations and {num_ais} AIs")
         else:
-            print(f"MAIN: Continuing conversation - turn {self.app.turn_count+1} of {max_iterations}")
+            print(f"MAIN: Continuing conversation - turn {run.turn_count+1} of {max_iterations}")
         
         # Update iteration counter in status bar
-        self.app.update_iteration(self.app.turn_count + 1, max_iterations)
+        if displayed:
+            self.app.update_iteration(run.turn_count + 1, max_iterations)
         
         # Create worker threads dynamically based on number of AIs
         workers = []
@@ -1163,11 +1192,7 @@ class ConversationManager:
             invite_tier = self.app.invite_tier
 
             worker = Worker(ai_name, self.app.main_conversation, model, prompt, gui=self.app, invite_tier=invite_tier, prompt_modifications=self.ai_prompt_additions, ai_temperatures=self.ai_temperatures)
-            worker.signals.started.connect(self.on_ai_started)
-            worker.signals.response.connect(self.on_ai_response_received)
-            worker.signals.result.connect(self.on_ai_result_received)
-            worker.signals.streaming_chunk.connect(self.on_streaming_chunk)
-            worker.signals.error.connect(self.on_ai_error)
+            self._connect_worker(worker, run)
             
             workers.append(worker)
         
@@ -1177,74 +1202,54 @@ class ConversationManager:
         # Handle case where all AIs are muted
         if not workers:
             print("[Mute] All AIs are muted this turn, proceeding to next iteration")
-            self.app.left_pane.render_conversation()
-            self.handle_turn_completion(max_iterations)
+            if displayed:
+                self.app.left_pane.render_conversation()
+            self.handle_turn_completion(max_iterations, run)
             return
         
         # Chain workers together AFTER all are created (avoids closure issues)
-        for i, worker in enumerate(workers):
-            if i < len(workers) - 1:
-                # Not the last worker - connect to start next worker
-                next_worker = workers[i + 1]
-                ai_num = i + 2  # AI number for next worker (1-indexed, so i=0 means next is AI-2)
-                # Use a factory function to properly capture values
-                worker.signals.finished.connect(
-                    self._make_next_turn_callback(next_worker, ai_num)
-                )
-            else:
-                # Last worker - connect to handle turn completion
-                max_iter = max_iterations  # Capture the value
-                worker.signals.finished.connect(lambda mi=max_iter: self.handle_turn_completion(mi))
-        
-        # Start first AI's turn
-        self.thread_pool.start(workers[0])
+        self._start_round(run, workers, max_iterations)
     
-    def _make_next_turn_callback(self, worker, ai_number):
+    def _make_next_turn_callback(self, worker, ai_number, run=None):
         """Factory function to create a callback for starting the next AI turn.
         This avoids closure issues with lambdas in loops."""
         def callback():
-            self.start_next_ai_turn(worker, ai_number)
+            self.start_next_ai_turn(worker, ai_number, run)
         return callback
     
-    def start_next_ai_turn(self, worker, ai_number):
+    def start_next_ai_turn(self, worker, ai_number, run=None):
         """Start the next AI's turn in the conversation"""
-        # Get the latest conversation state
-        if self.app.active_branch:
-            branch_id = self.app.active_branch
-            branch_data = self.app.branch_conversations[branch_id]
-            latest_conversation = branch_data['conversation']
-        else:
-            latest_conversation = self.app.main_conversation
-        
-        # Update worker's conversation reference to ensure it has the latest state
-        worker.conversation = latest_conversation.copy()
-        
-        # Add a small delay between turns
-        time.sleep(TURN_DELAY)
-        
-        # Start next AI's turn
+        # Add a small delay between turns (a timer, so other branches keep streaming meanwhile)
         print(f"Starting AI-{ai_number}'s turn")
-        self.thread_pool.start(worker)
+        run = self._run_for(run)
+        QTimer.singleShot(int(TURN_DELAY * 1000), lambda: self._submit_worker(run, worker))
+    
+    def _submit_worker(self, run, worker):
+        """Give worker the latest state of run's conversation and queue it."""
+        conversation = self._conversation_for(run)
+        if conversation is None:
+            print(f"[Branches] Branch {run.branch_id} no longer exists, dropping {worker.ai_name}'s turn")
+            return
+        worker.conversation = conversation.copy()
+        self.branches.submit(run, worker)
     
-    def handle_turn_completion(self, max_iterations=1):
+    def handle_turn_completion(self, max_iterations=1, run=None):
         """Handle the completion of a full turn (both AIs)"""
+        run = self._run_for(run)
         
         # Check for pending AIs that were added mid-round
-        if hasattr(self, '_pending_ais') and self._pending_ais:
-            pending = self._pending_ais.copy()
-            self._pending_ais = []  # Clear the queue
+        if run.pending_ais:
+            pending = run.pending_ais.copy()
+            run.pending_ais = []  # Clear the queue
             
             print(f"[Agent] Processing {len(pending)} pending AI(s) added during this round")
             for idx, p in enumerate(pending):
                 print(f"[Agent]   Pending #{idx+1}: {p['ai_name']} -> {p['model']} (invited by {p.get('invited_by', 'unknown')})")
             
             # Get current conversation and prompt pair
-            if self.app.active_branch:
-                branch_id = self.app.active_branch
-                branch_data = self.app.branch_conversations[branch_id]
-                conversation = branch_data['conversation']
-            else:
-                conversation = self.app.main_conversation
+            conversation = self._conversation_for(run)
+            if conversation is None:
+                return
             
             selected_prompt_pair = self.app.current_scenario
             
@@ -1274,11 +1279,7 @@ class ConversationManager:
                 invite_tier = self.app.invite_tier
 
                 worker = Worker(ai_name, conversation.copy(), model, prompt, gui=self.app, invite_tier=invite_tier, prompt_modifications=self.ai_prompt_additions, ai_temperatures=self.ai_temperatures)
-                worker.signals.started.connect(self.on_ai_started)
-                worker.signals.response.connect(self.on_ai_response_received)
-                worker.signals.result.connect(self.on_ai_result_received)
-                worker.signals.streaming_chunk.connect(self.on_streaming_chunk)
-                worker.signals.error.connect(self.on_ai_error)
+                self._connect_worker(worker, run)
                 pending_workers.append(worker)
             
             # Store remaining workers for sequential processing
@@ -1287,123 +1288,98 @@ class ConversationManager:
                 print(f"[Agent]   Worker #{idx+1}: {w.ai_name} -> {w.model}")
             
             if len(pending_workers) > 1:
-                self._remaining_pending_workers = pending_workers[1:]
-                print(f"[Agent] Queued {len(self._remaining_pending_workers)} workers for sequential processing")
+                run.pending_workers = pending_workers[1:]
+                print(f"[Agent] Queued {len(run.pending_workers)} workers for sequential processing")
                 # First worker chains to process_next
-                pending_workers[0].signals.finished.connect(self._process_next_pending_worker)
+                pending_workers[0].signals.finished.connect(lambda run=run: self._process_next_pending_worker(run))
             else:
                 # Only one pending worker - chain directly to finish
-                self._remaining_pending_workers = []
+                run.pending_workers = []
                 pending_workers[0].signals.finished.connect(
-                    lambda mi=max_iterations: self._finish_turn_completion(mi)
+                    lambda mi=max_iterations, run=run: self._finish_turn_completion(mi, run)
                 )
             
             # Store max_iterations for later use
-            self._pending_max_iterations = max_iterations
+            run.max_iterations = max_iterations
             
             # Start first pending AI
             print(f"[Agent] Starting first pending worker: {pending_workers[0].ai_name} ({pending_workers[0].model})")
-            self.thread_pool.start(pending_workers[0])
+            self.branches.submit(run, pending_workers[0])
             
             return  # Exit - turn completion will be called after pending AIs finish
         
-        self._finish_turn_completion(max_iterations)
+        self._finish_turn_completion(max_iterations, run)
     
-    def _process_next_pending_worker(self):
+    def _process_next_pending_worker(self, run=None):
         """Process the next pending worker in the queue."""
-        print(f"[Agent] _process_next_pending_worker called, remaining: {len(getattr(self, '_remaining_pending_workers', []))}")
-        if hasattr(self, '_remaining_pending_workers') and self._remaining_pending_workers:
-            worker = self._remaining_pending_workers.pop(0)
+        run = self._run_for(run)
+        print(f"[Agent] _process_next_pending_worker called, remaining: {len(run.pending_workers)}")
+        if run.pending_workers:
+            worker = run.pending_workers.pop(0)
             print(f"[Agent] Processing next pending worker: {worker.ai_name} ({worker.model})")
-            print(f"[Agent]   Remaining after pop: {len(self._remaining_pending_workers)}")
-            
-            # Update conversation to latest state
-            if self.app.active_branch:
-                branch_id = self.app.active_branch
-                branch_data = self.app.branch_conversations[branch_id]
-                worker.conversation = branch_data['conversation'].copy()
-            else:
-                worker.conversation = self.app.main_conversation.copy()
+            print(f"[Agent]   Remaining after pop: {len(run.pending_workers)}")
             
             # If more workers remain, chain to this function again
-            if self._remaining_pending_workers:
+            if run.pending_workers:
                 print(f"[Agent]   More workers remain, will chain to next")
-                worker.signals.finished.connect(self._process_next_pending_worker)
+                worker.signals.finished.connect(lambda run=run: self._process_next_pending_worker(run))
             else:
                 # Last one - finish turn completion
                 print(f"[Agent]   This is the last pending worker")
-                max_iterations = getattr(self, '_pending_max_iterations', 
-                    self.app.max_iterations)
-                worker.signals.finished.connect(lambda mi=max_iterations: self._finish_turn_completion(mi))
+                worker.signals.finished.connect(
+                    lambda mi=run.max_iterations, run=run: self._finish_turn_completion(mi, run))
             
-            time.sleep(TURN_DELAY)
+            # Update conversation to latest state after the turn delay
             print(f"[Agent] Starting worker: {worker.ai_name}")
-            self.thread_pool.start(worker)
+            QTimer.singleShot(int(TURN_DELAY * 1000), lambda: self._submit_worker(run, worker))
         else:
             # No more pending workers, finish turn
             print(f"[Agent] No remaining pending workers, finishing turn")
-            max_iterations = getattr(self, '_pending_max_iterations',
-                self.app.max_iterations)
-            self._finish_turn_completion(max_iterations)
+            self._finish_turn_completion(run.max_iterations, run)
     
-    def _finish_turn_completion(self, max_iterations=1):
+    def _finish_turn_completion(self, max_iterations=1, run=None):
         """Complete the turn after all AIs (including pending) have finished."""
-        # Stop the loading animation
-        self.app.left_pane.stop_loading()
+        run = self._run_for(run)
+        displayed = self._is_displayed(run)
+        
+        # Stop the loading animation (a background run never started it)
+        if displayed:
+            self.app.left_pane.stop_loading()
         
         # Increment turn count
-        self.app.turn_count += 1
+        run.turn_count += 1
         
         # Check which conversation we're dealing with (main or branch)
-        if self.app.active_branch:
-            # Branch conversation
-            branch_id = self.app.active_branch
-            branch_data = self.app.branch_conversations[branch_id]
-            conversation = branch_data['conversation']
-            
-            print(f"BRANCH: Turn {self.app.turn_count} of {max_iterations} completed")
-            
-            # Update the full conversation HTML
-            self.update_conversation_html(conversation)
-            
-            # Check if we should start another turn
-            if self.app.turn_count < max_iterations:
-                print(f"BRANCH: Starting turn {self.app.turn_count + 1} of {max_iterations}")
-                
-                # Process through branch_input but with no user input to continue the conversation
-                self.process_branch_input(None)  # None = no user input, just continue
+        conversation = self._conversation_for(run)
+        if conversation is None:
+            print(f"BRANCH: {run.branch_id} no longer exists, stopping")
+            return
+        
+        print(f"{run.label}: Turn {run.turn_count} of {max_iterations} completed")
+        
+        # Update the run's full conversation HTML (each branch has its own file)
+        self.update_conversation_html(conversation, run)
+        
+        # Check if we should start another turn
+        if run.turn_count < max_iterations:
+            print(f"{run.label}: Starting turn {run.turn_count + 1} of {max_iterations}")
+            # No user input, just continue - in the background if another conversation is displayed
+            if run.branch_id is None:
+                self.process_input(None, run)
             else:
-                print(f"BRANCH: All {max_iterations} turns completed")
-                self.app.statusBar().showMessage(f"Completed {max_iterations} turns")
-                self.app.clear_iteration()  # Clear iteration counter
-                # Set signal indicator to idle
-                if hasattr(self.app, 'set_signal_active'):
-                    self.app.set_signal_active(False)
-                # Auto-backup the session
-                print(f"BRANCH: Auto-backing up session after round completion...")
-                self.app.left_pane.auto_backup_session()
+                self.process_branch_input(None, run.branch_id)
         else:
-            # Main conversation
-            print(f"MAIN: Turn {self.app.turn_count} of {max_iterations} completed")
-            
-            # Update the full conversation HTML
-            self.update_conversation_html(self.app.main_conversation)
-            
-            # Check if we should start another turn
-            if self.app.turn_count < max_iterations:
-                print(f"MAIN: Starting turn {self.app.turn_count + 1} of {max_iterations}")
-                # Call process_input with no user input to continue the conversation
-                self.process_input(None)  # None = no user input, just continue
-            else:
-                print(f"MAIN: All {max_iterations} turns completed")
+            print(f"{run.label}: All {max_iterations} turns completed")
+            if displayed:
                 self.app.statusBar().showMessage(f"Completed {max_iterations} turns")
                 self.app.clear_iteration()  # Clear iteration counter
                 # Set signal indicator to idle
                 if hasattr(self.app, 'set_signal_active'):
                     self.app.set_signal_active(False)
-                # Auto-backup the session
-                print(f"MAIN: Auto-backing up session after round completion...")
-                self.app.left_pane.auto_backup_session()
+            # Auto-backup the run's own conversation, whichever one is on screen
+            print(f"{run.label}: Auto-backing up session after round completion...")
+            visible = [msg for msg in conversation if not msg.get('hidden', False)]
+            self.app.left_pane.auto_backup_session(visible, run.branch_id)
     
     def handle_progress(self, message):
         """Handle progress update from worker"""
@@ -1419,16 +1395,21 @@ class ConversationManager:
         if hasattr(self.app, 'set_signal_active'):
             self.app.set_signal_active(False)
     
-    def process_branch_input(self, user_input=None):
-        """Process input from the user specifically for branch conversations"""
-        # Check if we have an active branch
-        if not self.app.active_branch:
+    def process_branch_input(self, user_input=None, branch_id=None):
+        """Process input from the user specifically for branch conversations
+        
+        Args:
+            branch_id: Branch to continue (default: the active branch); set when a
+                branch's next round starts in the background
+        """
+        branch_id = branch_id or self.app.active_branch
+        # Check if we have a branch to run
+        if not branch_id or branch_id not in self.app.branch_conversations:
             # Fallback to main conversation if no active branch
             self.process_input(user_input)
             return
             
         # Get branch data
-        branch_id = self.app.active_branch
         branch_data = self.app.branch_conversations[branch_id]
         conversation = branch_data['conversation']
         branch_type = branch_data.get('type', 'branch')
@@ -1527,13 +1508,23 @@ class ConversationManager:
             ai_2_prompt = SYSTEM_PROMPT_PAIRS[selected_prompt_pair]["AI-2"]
             ai_3_prompt = SYSTEM_PROMPT_PAIRS[selected_prompt_pair]["AI-3"]
         
-        # Start loading animation
-        self.app.left_pane.start_loading()
+        self._start_branch_round(branch_id, conversation, [ai_1_model, ai_2_model, ai_3_model],
+                                 [ai_1_prompt, ai_2_prompt, ai_3_prompt],
+                                 reset=user_input is not None or not has_ai_responses)
+    
+    def _start_branch_round(self, branch_id, conversation, models, prompts, reset=False):
+        """Run one round of AI-1..AI-3 in a branch, in the background if it isn't displayed."""
+        run = self.branches.run_for(branch_id)
+        
+        # Start loading animation (only for the branch on screen)
+        if self._is_displayed(run):
+            self.app.left_pane.start_loading()
+        run.request_started = time.time()
         
         # Reset turn count ONLY if this is a new conversation or explicit user input
         # Don't reset during automatic iterations
-        if user_input is not None or not has_ai_responses:
-            self.app.turn_count = 0
+        if reset:
+            run.turn_count = 0
             print("Resetting turn count - starting new conversation")
         
         # Get max iterations
@@ -1543,48 +1534,26 @@ class ConversationManager:
         invite_tier = self.app.invite_tier
         
         # Create worker threads for AI-1, AI-2, and AI-3
-        worker1 = Worker("AI-1", conversation, ai_1_model, ai_1_prompt, is_branch=True, branch_id=branch_id, gui=self.app, invite_tier=invite_tier, prompt_modifications=self.ai_prompt_additions, ai_temperatures=self.ai_temperatures)
-        worker2 = Worker("AI-2", conversation, ai_2_model, ai_2_prompt, is_branch=True, branch_id=branch_id, gui=self.app, invite_tier=invite_tier, prompt_modifications=self.ai_prompt_additions, ai_temperatures=self.ai_temperatures)
-        worker3 = Worker("AI-3", conversation, ai_3_model, ai_3_prompt, is_branch=True, branch_id=branch_id, gui=self.app, invite_tier=invite_tier, prompt_modifications=self.ai_prompt_additions, ai_temperatures=self.ai_temperatures)
-        
-        # Connect signals for worker1
-        worker1.signals.started.connect(self.on_ai_started)
-        worker1.signals.response.connect(self.on_ai_response_received)
-        worker1.signals.result.connect(self.on_ai_result_received)
-        worker1.signals.streaming_chunk.connect(self.on_streaming_chunk)
-        worker1.signals.finished.connect(lambda: self.start_ai2_turn(conversation, worker2))
-        worker1.signals.error.connect(self.on_ai_error)
-        
-        # Connect signals for worker2
-        worker2.signals.started.connect(self.on_ai_started)
-        worker2.signals.response.connect(self.on_ai_response_received)
-        worker2.signals.result.connect(self.on_ai_result_received)
-        worker2.signals.streaming_chunk.connect(self.on_streaming_chunk)
-        worker2.signals.finished.connect(lambda: self.start_ai3_turn(conversation, worker3))
-        worker2.signals.error.connect(self.on_ai_error)
-        
-        # Connect signals for worker3
-        worker3.signals.started.connect(self.on_ai_started)
-        worker3.signals.response.connect(self.on_ai_response_received)
-        worker3.signals.result.connect(self.on_ai_result_received)
-        worker3.signals.streaming_chunk.connect(self.on_streaming_chunk)
-        worker3.signals.finished.connect(lambda: self.handle_turn_completion(max_iterations))
-        worker3.signals.error.connect(self.on_ai_error)
-        
-        # Start AI-1's turn
-        self.thread_pool.start(worker1)
-        
-    def on_streaming_chunk(self, ai_name, chunk):
-        """Handle streaming chunks as they arrive"""
-        # Initialize streaming buffer if not exists
-        if not hasattr(self, '_streaming_buffers'):
-            self._streaming_buffers = {}
+        workers = []
+        for i, (model, prompt) in enumerate(zip(models, prompts, strict=True), 1):
+            worker = Worker(f"AI-{i}", conversation, model, prompt, is_branch=True, branch_id=branch_id, gui=self.app, invite_tier=invite_tier, prompt_modifications=self.ai_prompt_additions, ai_temperatures=self.ai_temperatures)
+            self._connect_worker(worker, run)
+            workers.append(worker)
+        
+        # Start AI-1's turn; the others follow as each finishes
+        self._start_round(run, workers, max_iterations)
+    
+    def on_streaming_chunk(self, ai_name, chunk, run=None):
+        """Handle streaming chunks as they arrive (into run's conversation, shown only if it's on screen)"""
+        run = self._run_for(run)
+        displayed = self._is_displayed(run)
+        buffers = run.streaming_buffers
         
         # Initialize buffer for this AI if needed (first chunk)
-        is_first_chunk = ai_name not in self._streaming_buffers
+        is_first_chunk = ai_name not in buffers
         
         if is_first_chunk:
-            self._streaming_buffers[ai_name] = ""
+            buffers[ai_name] = ""
             
             # Remove typing indicator when first chunk arrives - AI is now "speaking" not "thinking"
             self._remove_typing_indicator(ai_name)
@@ -1595,57 +1564,53 @@ class ConversationManager:
             model_name = self.get_model_for_ai(ai_number)
             
             # Track the placeholder message so we can update it
-            if not hasattr(self, '_streaming_messages'):
-                self._streaming_messages = {}
-            
-            placeholder_msg = {
-                "role": "assistant",
-                "content": "",  # Start empty, will be filled by streaming
-                "ai_name": ai_name,
-                "model": model_name,
-                "_streaming": True  # Mark as streaming so we know to update it
-            }
-            self._streaming_messages[ai_name] = placeholder_msg
-            
-            # Add to the correct conversation
-            if self.app.active_branch:
-                branch_id = self.app.active_branch
-                if branch_id in self.app.branch_conversations:
-                    self.app.branch_conversations[branch_id]['conversation'].append(placeholder_msg)
-                    self.app.left_pane.conversation = self.app.branch_conversations[branch_id]['conversation']
-            else:
-                if not hasattr(self.app, 'main_conversation'):
-                    self.app.main_conversation = []
-                self.app.main_conversation.append(placeholder_msg)
-                self.app.left_pane.conversation = self.app.main_conversation
+            placeholder_msg = Message(
+                role="assistant",
+                content="",  # Start empty, will be filled by streaming
+                ai_name=ai_name,
+                model=model_name,
+                _streaming=True  # Mark as streaming so we know to update it
+            )
+            run.streaming_messages[ai_name] = placeholder_msg
             
-            # Now render - this creates a widget for our placeholder
-            self.app.left_pane.render_conversation()
+            # Add to the run's own conversation, whichever is displayed
+            conversation = self._conversation_for(run)
+            if conversation is not None:
+                conversation.append(placeholder_msg)
             
-            # Calculate and update latency on first chunk
-            if hasattr(self, '_request_start_time') and hasattr(self.app, 'update_signal_latency'):
-                latency_ms = int((time.time() - self._request_start_time) * 1000)
-                self.app.update_signal_latency(latency_ms)
+            if displayed:
+                # Now render - this creates a widget for our placeholder
+                self.app.left_pane.conversation = conversation
+                self.app.left_pane.render_conversation()
+                
+                # Calculate and update latency on first chunk
+                if run.request_started and hasattr(self.app, 'update_signal_latency'):
+                    latency_ms = int((time.time() - run.request_started) * 1000)
+                    self.app.update_signal_latency(latency_ms)
         
         # Append chunk to buffer
-        self._streaming_buffers[ai_name] += chunk
+        buffers[ai_name] += chunk
         
         # Update the placeholder message content in the conversation data
-        if hasattr(self, '_streaming_messages') and ai_name in self._streaming_messages:
-            self._streaming_messages[ai_name]["content"] = self._streaming_buffers[ai_name]
+        # (a branch forked mid-stream keeps the text it was forked with)
+        placeholder = run.streaming_messages.get(ai_name)
+        if placeholder is not None:
+            placeholder = run.streaming_messages[ai_name] = self._writable(run, placeholder)
+            placeholder["content"] = buffers[ai_name]
         
         # CRITICAL: Directly update the specific widget for this AI
         # Do NOT call render_conversation() - that causes cross-contamination when multiple AIs stream
-        self.app.left_pane.update_streaming_widget(ai_name, self._streaming_buffers[ai_name])
+        if displayed:
+            self.app.left_pane.update_streaming_widget(ai_name, buffers[ai_name])
     
-    def on_ai_started(self, ai_name, model):
+    def on_ai_started(self, ai_name, model, run=None):
         """Handle AI starting to process - update status"""
         print(f"[Typing] {ai_name} ({model}) started processing")
+        run = self._run_for(run)
         
         # Update iteration counter with current AI
-        max_iterations = self.app.max_iterations
-        current_turn = getattr(self.app, 'turn_count', 0) + 1
-        self.app.update_iteration(current_turn, max_iterations, ai_name)
+        if self._is_displayed(run):
+            self.app.update_iteration(run.turn_count + 1, self.app.max_iterations, ai_name)
         
         # Extract AI number for styling
         ai_number = int(ai_name.split('-')[1]) if '-' in ai_name else 1
@@ -1656,14 +1621,14 @@ class ConversationManager:
         
         # --- OLD TYPING INDICATOR CODE (disabled) ---
         # Create typing indicator message
-        typing_message = {
-            "role": "assistant",
-            "content": "",  # Empty content - the render function will show the animation
-            "ai_name": ai_name,
-            "model": model,
-            "_type": "typing_indicator",
-            "_ai_number": ai_number
-        }
+        typing_message = Message(
+            role="assistant",
+            content="",  # Empty content - the render function will show the animation
+            ai_name=ai_name,
+            model=model,
+            _type="typing_indicator",
+            _ai_number=ai_number
+        )
         
         # Store reference for removal later
         if not hasattr(self, '_typing_indicators'):
@@ -1680,7 +1645,7 @@ class ConversationManager:
                 self.app.left_pane.conversation = self.app.branch_conversations[branch_id]['conversation']
         else:
             if not hasattr(self.app, 'main_conversation'):
-                self.app.main_conversation = []
+                self.app.main_conversation = Conversation()
             self.app.main_conversation.append(typing_message)
             self.app.left_pane.conversation = self.app.main_conversation
         
@@ -1721,41 +1686,54 @@ class ConversationManager:
         for ai_name in ai_names:
             self._remove_typing_indicator(ai_name)
     
-    def on_ai_response_received(self, ai_name, response_content):
-        """Handle AI responses for both main and branch conversations"""
+    def on_ai_response_received(self, ai_name, response_content, run=None, served_by=""):
+        """Handle AI responses for both main and branch conversations.
+        
+        served_by is the fallback model that answered when the requested one
+        failed; the message is labelled with it (requested_model keeps the other).
+        """
         print(f"Response received from {ai_name}: {response_content[:100]}...")
+        run = self._run_for(run)
+        displayed = self._is_displayed(run)
+        conversation = self._conversation_for(run)
+        if conversation is None:
+            run.reset_streaming()
+            print(f"[Branches] Branch {run.branch_id} no longer exists, dropping {ai_name}'s response")
+            return
         
         # Remove typing indicator for this AI
         self._remove_typing_indicator(ai_name)
         
         # Check if we have a streaming placeholder for this AI
-        has_streaming_placeholder = (
-            hasattr(self, '_streaming_messages') and 
-            ai_name in self._streaming_messages
-        )
+        has_streaming_placeholder = ai_name in run.streaming_messages
         
         # Get streaming tracking data BEFORE clearing
-        if hasattr(self, '_streaming_buffers') and ai_name in self._streaming_buffers:
-            del self._streaming_buffers[ai_name]
-        if hasattr(self, '_streaming_messages') and ai_name in self._streaming_messages:
-            streaming_msg = self._streaming_messages[ai_name]
-            del self._streaming_messages[ai_name]
-        else:
-            streaming_msg = None
+        run.streaming_buffers.pop(ai_name, None)
+        streaming_msg = run.streaming_messages.pop(ai_name, None)
         
         # Parse response for agentic commands
         cleaned_content, commands = parse_commands(response_content)
         
         # Extract AI number for model lookup
         ai_number = int(ai_name.split('-')[1]) if '-' in ai_name else 1
+        requested_model = self.get_model_for_ai(ai_number)
+        model_fields = {"model": served_by or requested_model}
+        if served_by and served_by != requested_model:
+            model_fields["requested_model"] = requested_model
+            print(f"[Fallback] {ai_name}: {requested_model} failed, answered by {served_by}")
+            if displayed:
+                self.app.statusBar().showMessage(f"{ai_name} answered by {served_by} (fallback for {requested_model})", 8000)
         
         # CRITICAL: Update streaming message content FIRST, before any notifications
         # This ensures the widget shows cleaned content during notification renders
         if has_streaming_placeholder and streaming_msg:
+            # Forks taken while streaming keep their copy of the placeholder
+            streaming_msg = self._writable(run, streaming_msg)
             streaming_msg["content"] = cleaned_content
-            streaming_msg["model"] = self.get_model_for_ai(ai_number)
+            streaming_msg.update(model_fields)
             # Update widget directly so it shows cleaned content
-            self.app.left_pane.update_streaming_widget(ai_name, cleaned_content)
+            if displayed:
+                self.app.left_pane.update_streaming_widget(ai_name, cleaned_content)
             # Remove streaming flag now that content is finalized
             if "_streaming" in streaming_msg:
                 del streaming_msg["_streaming"]
@@ -1765,7 +1743,7 @@ class ConversationManager:
             print(f"[Agent] Found {len(commands)} command(s) in {ai_name}'s response")
             
             for cmd in commands:
-                success, message = self.execute_agent_command(cmd, ai_name)
+                success, message = self.execute_agent_command(cmd, ai_name, run)
                 print(f"[Agent] Command result: success={success}, message={message}")
                 
                 # Add notification as a system message in the conversation
@@ -1785,22 +1763,15 @@ class ConversationManager:
                         self._pending_notifications = {}
                     prompt_key = cmd.params.get('prompt', '')[:50] if cmd.params else ''
                     self._pending_notifications[f"{ai_name}:{prompt_key}"] = notification_id
+                    self._pending_targets[f"{ai_name}:{prompt_key}"] = run
                     print(f"[Agent] Stored pending notification ID: {notification_id} for {ai_name}:{prompt_key[:30]}...")
                 
-                # Add to the correct conversation (no render yet - batch it)
-                if self.app.active_branch:
-                    branch_id = self.app.active_branch
-                    if branch_id in self.app.branch_conversations:
-                        self.app.branch_conversations[branch_id]['conversation'].append(notification_msg)
-                        print(f"[Agent] Added notification to branch conversation")
-                else:
-                    if not hasattr(self.app, 'main_conversation'):
-                        self.app.main_conversation = []
-                    self.app.main_conversation.append(notification_msg)
-                    print(f"[Agent] Added notification to main conversation, total messages: {len(self.app.main_conversation)}")
+                # Add to the run's conversation (no render yet - batch it)
+                conversation.append(notification_msg)
+                print(f"[Agent] Added notification to {run.label.lower()} conversation, total messages: {len(conversation)}")
                 
                 # Update status bar with the notification
-                if hasattr(self.app, 'notification_label'):
+                if displayed and hasattr(self.app, 'notification_label'):
                     self.app.notification_label.setText(message)
         
         # Use cleaned content (commands stripped out) for the conversation
@@ -1813,67 +1784,51 @@ class ConversationManager:
             # since cleaned_content is empty (was only commands)
             if has_streaming_placeholder and streaming_msg:
                 # Remove the streaming placeholder from conversation
-                if self.app.active_branch:
-                    branch_id = self.app.active_branch
-                    if branch_id in self.app.branch_conversations:
-                        conv = self.app.branch_conversations[branch_id]['conversation']
-                        if streaming_msg in conv:
-                            conv.remove(streaming_msg)
-                        self.app.left_pane.conversation = conv
-                else:
-                    if streaming_msg in self.app.main_conversation:
-                        self.app.main_conversation.remove(streaming_msg)
-                    self.app.left_pane.conversation = self.app.main_conversation
+                if streaming_msg in conversation:
+                    conversation.remove(streaming_msg)
+                if displayed:
+                    self.app.left_pane.conversation = conversation
             # Do final render to show notifications (if any)
-            self._final_render_after_response()
+            self._final_render_after_response(run)
             return
         
         # If there was a streaming placeholder, content was already updated above
         # Just need to do the final render
         if has_streaming_placeholder and streaming_msg:
-            self._final_render_after_response()
+            self._final_render_after_response(run)
         else:
             # No streaming placeholder - add message normally
             ai_message = {
                 "role": "assistant",
                 "content": response_content,
                 "ai_name": ai_name,
-                "model": self.get_model_for_ai(ai_number)
+                **model_fields
             }
             
             # Add to conversation
-            if self.app.active_branch:
-                branch_id = self.app.active_branch
-                if branch_id in self.app.branch_conversations:
-                    self.app.branch_conversations[branch_id]['conversation'].append(ai_message)
-            else:
-                if not hasattr(self.app, 'main_conversation'):
-                    self.app.main_conversation = []
-                self.app.main_conversation.append(ai_message)
+            conversation.append(ai_message)
             
-            self._final_render_after_response()
+            self._final_render_after_response(run)
         
-        # Update status bar
-        self.app.statusBar().showMessage(f"Received response from {ai_name}")
+        # Update status bar (keeping a fallback notice visible)
+        if displayed and "requested_model" not in model_fields:
+            self.app.statusBar().showMessage(f"Received response from {ai_name}")
     
-    def _final_render_after_response(self):
+    def _final_render_after_response(self, run=None):
         """Do a final render after processing an AI response.
         
         Uses immediate render to prevent race conditions with other streaming AIs.
+        Background runs skip it; their messages are rendered when the branch is selected.
         """
-        if self.app.active_branch:
-            branch_id = self.app.active_branch
-            if branch_id in self.app.branch_conversations:
-                branch_data = self.app.branch_conversations[branch_id]
-                visible = [msg for msg in branch_data['conversation'] if not msg.get('hidden', False)]
-                self.app.left_pane.conversation = visible
-                self.app.left_pane.render_conversation(immediate=True)
-        else:
-            visible = [msg for msg in self.app.main_conversation if not msg.get('hidden', False)]
-            self.app.left_pane.conversation = visible
-            self.app.left_pane.render_conversation(immediate=True)
+        run = self._run_for(run)
+        conversation = self._conversation_for(run)
+        if conversation is None or not self._is_displayed(run):
+            return
+        visible = [msg for msg in conversation if not msg.get('hidden', False)]
+        self.app.left_pane.conversation = visible
+        self.app.left_pane.render_conversation(immediate=True)
         
-    def on_ai_result_received(self, ai_name, result):
+    def on_ai_result_received(self, ai_name, result, run=None):
         """Handle the complete AI result - for non-display tasks only.
         
         NOTE: Message display is handled by on_ai_response_received.
@@ -1881,20 +1836,28 @@ class ConversationManager:
         """
         print(f"Result received from {ai_name}")
         
+        # Surface turns that needed retries, hedging or a fallback model
+        metrics = result.get("metrics") if isinstance(result, dict) else None
+        if metrics and len(metrics.get("attempts", [])) > 1:
+            attempts = metrics["attempts"]
+            log.info("[Metrics] %s: %d attempts (%s), served by %s", ai_name, len(attempts),
+                     ", ".join(a.get("error_class") or "ok" for a in attempts),
+                     metrics.get("model_used", "none"))
+        # Token usage with the share of the prompt served from the provider's cache
+        if metrics and metrics.get("usage"):
+            log.info("[Metrics] %s tokens: %s", ai_name, format_usage(metrics["usage"]))
+        
         # Determine which conversation to update
-        conversation = self.app.main_conversation
-        if self.app.active_branch:
-            branch_id = self.app.active_branch
-            branch_data = self.app.branch_conversations[branch_id]
-            conversation = branch_data['conversation']
+        run = self._run_for(run)
+        conversation = self._conversation_for(run)
         
         # Generate an image based on the AI response (for non-image responses) if auto-generation is enabled
         if isinstance(result, dict) and "content" in result and not "image_url" in result:
             response_content = result.get("content", "")
-            if response_content and len(response_content.strip()) > 20:
+            if response_content and len(response_content.strip()) > 20 and conversation is not None:
                 if self.app.auto_image:
                     self.app.left_pane.append_text("\nGenerating an image based on this response...\n", "system")
-                    self.generate_and_display_image(response_content, ai_name)
+                    self.generate_and_display_image(response_content, ai_name, conversation, run)
         
         # NOTE: Content display removed - handled by on_ai_response_received
         # The old code was appending headers and content here, causing duplication
@@ -1924,6 +1887,7 @@ class ConversationManager:
                             seconds=sora_seconds,
                             size=sora_size,
                             poll_interval_seconds=5.0,
+                            ai_name=ai_name,
                         )
                         # Log to console; UI updates from background threads are avoided
                         if result_dict.get("success"):
@@ -1937,8 +1901,13 @@ class ConversationManager:
         
         # NOTE: display_conversation removed - handled by on_ai_response_received
             
-    def generate_and_display_image(self, text, ai_name):
-        """Generate an image based on text and display it in the UI"""
+    def generate_and_display_image(self, text, ai_name, conversation=None, run=None):
+        """Generate an image based on text and display it in the UI
+        
+        Args:
+            conversation: Conversation holding the AI's message (default: the displayed one)
+            run: BranchRun of that conversation (default: the displayed one)
+        """
         # Create a prompt for the image generation
         # Extract the first 100-300 characters to use as the image prompt
         max_length = min(300, len(text))
@@ -1948,30 +1917,29 @@ class ConversationManager:
         enhanced_prompt = f"You are the artist/chronicler of an exchange between multiple AIs. Create an image using the following ai text contribution as inspiration. DO NOT merely repeat text in the image. Interpret the text in image form.{prompt}"
         
         # Generate the image
-        result = generate_image_from_text(enhanced_prompt)
+        result = generate_image_from_text(enhanced_prompt, ai_name=ai_name)
         
         if result["success"]:
             # Display the image in the UI
             image_path = result["image_path"]
             
             # Find the corresponding message in the conversation and add the image path
-            conversation = self.app.main_conversation
-            if self.app.active_branch:
-                branch_id = self.app.active_branch
-                branch_data = self.app.branch_conversations[branch_id]
-                conversation = branch_data['conversation']
+            if conversation is None:
+                conversation = self._conversation_for(self._run_for()) or self.app.main_conversation
             
             # Find the most recent message from this AI
             for msg in reversed(conversation):
                 if msg.get("ai_name") == ai_name and msg.get("role") == "assistant":
-                    # Add the image path and model to the message
+                    # Add the image path and model to the message - only in this
+                    # conversation, not in branches forked from it since
+                    msg = writable_message(conversation, msg) or msg
                     msg["generated_image_path"] = image_path
                     msg["image_model"] = result.get("model", "unknown")
                     print(f"Added generated image {image_path} to message from {ai_name}")
                     break
             
             # Update the conversation HTML to include the new image
-            self.update_conversation_html(conversation)
+            self.update_conversation_html(conversation, run)
             
             # Run on the main thread
             self.app.left_pane.display_image(image_path)
@@ -1987,13 +1955,14 @@ class ConversationManager:
             # Do not automatically open the HTML view
             # open_html_in_browser("conversation_full.html")
     
-    def execute_agent_command(self, command: AgentCommand, ai_name: str) -> tuple[bool, str]:
+    def execute_agent_command(self, command: AgentCommand, ai_name: str, run=None) -> tuple[bool, str]:
         """
         Execute an agentic command from an AI response.
         
         Args:
             command: The parsed AgentCommand to execute
             ai_name: The AI that issued the command
+            run: BranchRun of the conversation the response belongs to (default: displayed)
             
         Returns:
             tuple: (success: bool, message: str)
@@ -2009,7 +1978,7 @@ class ConversationManager:
         elif action == 'video':
             return self._execute_video_command(params.get('prompt', ''), ai_name)
         elif action == 'add_ai':
-            return self._execute_add_ai_command(params.get('model', ''), params.get('persona'), ai_name)
+            return self._execute_add_ai_command(params.get('model', ''), params.get('persona'), ai_name, run)
         elif action == 'remove_ai':
             return self._execute_remove_ai_command(params.get('target', ''), ai_name)
         elif action == 'list_models':
@@ -2017,11 +1986,11 @@ class ConversationManager:
         elif action == 'mute_self':
             return self._execute_mute_command(ai_name)
         elif action == 'search':
-            return self._execute_search_command(params.get('query', ''), ai_name)
+            return self._execute_search_command(params.get('query', ''), ai_name, run)
         elif action == 'prompt':
-            return self._execute_prompt_command(params.get('text', ''), ai_name)
+            return self._execute_prompt_command(params.get('text', ''), ai_name, run)
         elif action == 'temperature':
-            return self._execute_temperature_command(params.get('value'), ai_name)
+            return self._execute_temperature_command(params.get('value'), ai_name, run)
         else:
             # Get AI's model name for consistent formatting
             ai_num = int(ai_name.split('-')[1]) if '-' in ai_name else 1
@@ -2049,33 +2018,17 @@ class ConversationManager:
                 enhanced_prompt = f"Create an image inspired by the following description from an AI conversation: {prompt}"
                 
                 print(f"[Agent] Starting image generation...")
-                result = generate_image_from_text(enhanced_prompt)
+                result = generate_image_from_text(enhanced_prompt, ai_name=ai_name)
                 
                 if result.get('success'):
                     image_path = result['image_path']
                     print(f"[Agent] Image generated successfully: {image_path}")
                     
-                    # Convert image to base64 so other AIs can see it
-                    import base64
+                    # The payload was encoded (and downscaled) when the image was saved;
+                    # the file is only re-read if the generator didn't hand one back
                     try:
-                        with open(image_path, 'rb') as img_file:
-                            image_bytes = img_file.read()
-                            image_base64 = base64.b64encode(image_bytes).decode('utf-8')
-                        
-                        # Determine media type from file header bytes, not extension
-                        # JPEG starts with FF D8 FF, PNG starts with 89 50 4E 47
-                        if image_bytes[:3] == b'\xff\xd8\xff':
-                            media_type = "image/jpeg"
-                        elif image_bytes[:4] == b'\x89PNG':
-                            media_type = "image/png"
-                        elif image_bytes[:4] == b'GIF8':
-                            media_type = "image/gif"
-                        elif image_bytes[:4] == b'RIFF' and image_bytes[8:12] == b'WEBP':
-                            media_type = "image/webp"
-                        else:
-                            # Fallback to extension
-                            media_type = "image/png" if image_path.endswith('.png') else "image/jpeg"
-                        print(f"[Agent] Detected image media type: {media_type}")
+                        media = result.get('media') or get_media_pipeline().ingest_file(image_path)
+                        print(f"[Agent] Image payload: {media.media_type}, {media.payload_bytes} bytes")
                         
                         # Create image message for conversation context
                         # Keep the !image command visible so AIs remember the syntax
@@ -2086,14 +2039,7 @@ class ConversationManager:
                                     "type": "text",
                                     "text": f"[{ai_name} ({model_name})]: !image \"{prompt}\""
                                 },
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": media_type,
-                                        "data": image_base64
-                                    }
-                                }
+                                media.content_part()
                             ],
                             "generated_image_path": image_path,
                             "image_model": result.get("model", "unknown"),
@@ -2158,6 +2104,7 @@ class ConversationManager:
                     seconds=sora_seconds,
                     size=sora_size,
                     poll_interval_seconds=5.0,
+                    ai_name=ai_name,
                 )
                 if result.get("success"):
                     video_path = result.get('video_path')
@@ -2183,8 +2130,9 @@ class ConversationManager:
         # Return None for _command_success to show yellow "in progress" color (not green success)
         return None, f"🎬 [{ai_name} ({model_name})]: !video \"{prompt[:50]}{'...' if len(prompt) > 50 else ''}\" (generating...)"
     
-    def _execute_add_ai_command(self, model_name: str, persona: str, requesting_ai: str) -> tuple[bool, str]:
-        """Execute an add AI participant command."""
+    def _execute_add_ai_command(self, model_name: str, persona: str, requesting_ai: str, run=None) -> tuple[bool, str]:
+        """Execute an add AI participant command (the AI joins at the end of run's current round)."""
+        run = self._run_for(run)
         # Get requester's model name for consistent formatting
         requester_num = int(requesting_ai.split('-')[1]) if '-' in requesting_ai else 1
         requester_model = self.get_model_for_ai(requester_num)
@@ -2196,7 +2144,7 @@ class ConversationManager:
         # Get the base number of AIs from the selector (this is the starting count for this round)
         # We DON'T update the selector until the AI actually joins - just track pending count
         base_num_ais = self.app.num_ais
-        pending_count = len(getattr(self, '_pending_ais', []))
+        pending_count = len(run.pending_ais)
         
         # The effective count is base + pending (selector is NOT updated during pending phase)
         effective_count = base_num_ais + pending_count
@@ -2282,10 +2230,6 @@ class ConversationManager:
                 self.app.custom_personas = {}
             self.app.custom_personas[f"AI-{new_num}"] = persona
         
-        # Track this AI as pending so it can join the current round
-        if not hasattr(self, '_pending_ais'):
-            self._pending_ais = []
-        
         # Check if this model is already an active AI (deduplication)
         # Check setting for whether duplicates are allowed
         allow_duplicates = self.app.allow_duplicate_models
@@ -2301,7 +2245,7 @@ class ConversationManager:
                             return None, f"ℹ️ [{requesting_ai} ({requester_model})]: !add_ai \"{actual_display_name}\" — already in conversation as AI-{i}"
         
         # Check if this model was already invited this round (pending deduplication - always enforce)
-        already_pending = any(p['model'].lower() == actual_model_id.lower() for p in self._pending_ais)
+        already_pending = any(p['model'].lower() == actual_model_id.lower() for p in run.pending_ais)
         if already_pending:
             print(f"[Agent] {actual_model_id} already invited this round, skipping duplicate")
             return None, f"ℹ️ [{requesting_ai} ({requester_model})]: !add_ai \"{actual_display_name}\" — already invited this round"
@@ -2309,7 +2253,8 @@ class ConversationManager:
         # DON'T update the selector here - it will be updated when the AI actually joins
         # This prevents double-counting when multiple AIs are invited in the same round
         
-        self._pending_ais.append({
+        # Track this AI as pending so it can join the current round
+        run.pending_ais.append({
             'ai_name': f"AI-{new_num}",
             'ai_number': new_num,
             'model': actual_model_id,  # Store the model ID, not display name
@@ -2318,7 +2263,7 @@ class ConversationManager:
             'invited_by': requesting_ai
         })
         print(f"[Agent] Queued AI-{new_num} ({actual_model_id}) to join current round")
-        print(f"[Agent] Current pending queue: {[p['ai_name'] + ' -> ' + p['model'] for p in self._pending_ais]}")
+        print(f"[Agent] Current pending queue: {[p['ai_name'] + ' -> ' + p['model'] for p in run.pending_ais]}")
         
         # Create a friendly notification message that shows the command syntax
         if persona:
@@ -2363,7 +2308,7 @@ class ConversationManager:
         self.app.muted_ais.add(ai_name)
         return True, f"🔇 [{ai_name} ({model_name})]: !mute_self"
 
-    def _execute_search_command(self, query: str, ai_name: str) -> tuple[bool, str]:
+    def _execute_search_command(self, query: str, ai_name: str, run=None) -> tuple[bool, str]:
         """Execute a web search command and inject results into conversation."""
         from shared_utils import web_search
 
@@ -2402,14 +2347,15 @@ class ConversationManager:
             "_type": "search_result",
             "hidden": False
         }
-        self.app.main_conversation.append(search_message)
+        run = self._run_for(run)
+        self._conversation_for(run).append(search_message)
 
         # Trigger UI update by redisplaying conversation
-        self.app.left_pane.display_conversation(self.app.main_conversation)
+        self._show_conversation(run)
 
         return True, f"🔍 [{ai_name} ({model_name})]: !search \"{query}\" (found {len(results)} results)"
 
-    def _execute_prompt_command(self, text: str, ai_name: str) -> tuple[bool, str]:
+    def _execute_prompt_command(self, text: str, ai_name: str, run=None) -> tuple[bool, str]:
         """Execute a prompt addition command - AI appends to their own system prompt.
         Note: !prompt commands are stripped from conversation context so other AIs don't see them,
         but the full text is shown in the GUI notification for the human operator.
@@ -2427,6 +2373,7 @@ class ConversationManager:
 
         # Add the new prompt text (appends, doesn't replace)
         self.ai_prompt_additions[ai_name].append(text.strip())
+        get_prompt_compiler().additions_changed(ai_name)
 
         print(f"[Agent] {ai_name} ({model_name}) added to their prompt: {text[:50]}...")
         print(f"[Agent] {ai_name} now has {len(self.ai_prompt_additions[ai_name])} prompt additions")
@@ -2438,15 +2385,16 @@ class ConversationManager:
             "content": f"[{ai_name} modified their system prompt]",
             "_type": "system_notification"
         }
-        self.app.main_conversation.append(context_notification)
+        run = self._run_for(run)
+        self._conversation_for(run).append(context_notification)
 
         # Trigger UI update by redisplaying conversation
-        self.app.left_pane.display_conversation(self.app.main_conversation)
+        self._show_conversation(run)
 
         # Show full untruncated text in notification (only human sees this, not other AIs)
         return True, f"💭 [{ai_name} ({model_name})]: !prompt \"{text}\""
 
-    def _execute_temperature_command(self, value: str, ai_name: str) -> tuple[bool, str]:
+    def _execute_temperature_command(self, value: str, ai_name: str, run=None) -> tuple[bool, str]:
         """Execute a temperature modification command - AI sets their own sampling temperature.
         Note: !temperature commands are stripped from conversation context."""
         # Get AI's model name for consistent formatting
@@ -2472,10 +2420,11 @@ class ConversationManager:
             "content": f"[{ai_name} adjusted their temperature]",
             "_type": "system_notification"
         }
-        self.app.main_conversation.append(context_notification)
+        run = self._run_for(run)
+        self._conversation_for(run).append(context_notification)
 
         # Trigger UI update by redisplaying conversation
-        self.app.left_pane.display_conversation(self.app.main_conversation)
+        self._show_conversation(run)
 
         # Show the actual value in notification for human
         return True, f"🌡️ [{ai_name} ({model_name})]: !temperature {temp}"
@@ -2493,15 +2442,15 @@ class ConversationManager:
         if ai_name not in self.ai_prompt_additions or not self.ai_prompt_additions[ai_name]:
             return ""
 
-        additions = self.ai_prompt_additions[ai_name]
-        return "\n\n[Your remembered insights/perspectives]:\n- " + "\n- ".join(additions)
+        return format_additions(self.ai_prompt_additions[ai_name])
 
     def get_temperature_for_ai(self, ai_name: str) -> float:
         """Get the temperature setting for a specific AI (default 1.0)."""
         return self.ai_temperatures.get(ai_name, 1.0)
 
-    def on_ai_error(self, error_message):
+    def on_ai_error(self, error_message, run=None):
         """Handle AI errors for both main and branch conversations"""
+        run = self._run_for(run)
         # Clear all typing indicators on error
         self._clear_all_typing_indicators()
         
@@ -2513,33 +2462,22 @@ class ConversationManager:
             "_command_success": False  # Show as error notification
         }
         
-        # Check if we're in a branch or main conversation
-        if self.app.active_branch:
-            # Branch conversation
-            branch_id = self.app.active_branch
-            if branch_id in self.app.branch_conversations:
-                branch_data = self.app.branch_conversations[branch_id]
-                conversation = branch_data['conversation']
-                
-                # Add error message to conversation
-                conversation.append(error_message_formatted)
-                
-                # Update the conversation display
-                self.app.left_pane.display_conversation(conversation, branch_data)
-        else:
-            # Main conversation
-            if not hasattr(self.app, 'main_conversation'):
-                self.app.main_conversation = []
-            
-            # Add error message to conversation
-            self.app.main_conversation.append(error_message_formatted)
-            
-            # Update the conversation display
-            self.app.left_pane.display_conversation(self.app.main_conversation)
+        # Drop the failed AI's half-streamed state; its placeholder stays as streamed so far
+        run.reset_streaming()
+        
+        # Add error message to the run's conversation (main or branch)
+        conversation = self._conversation_for(run)
+        if conversation is None:
+            return
+        conversation.append(error_message_formatted)
+        
+        # Update the conversation display
+        self._show_conversation(run)
         
         # Update status bar
-        self.app.statusBar().showMessage(f"Error: {error_message}")
-        self.app.left_pane.stop_loading()
+        if self._is_displayed(run):
+            self.app.statusBar().showMessage(f"Error: {error_message}")
+            self.app.left_pane.stop_loading()
         
     def rabbithole_callback(self, selected_text):
         """Create a rabbithole branch from selected text"""
@@ -2548,10 +2486,7 @@ class ConversationManager:
         # Create unique branch ID
         branch_id = f"rabbithole_{time.time()}"
         
-        # Create a new conversation for the branch
-        branch_conversation = []
-        
-        # If we're branching from another branch, copy over relevant context
+        # If we're branching from another branch, take over its context
         parent_conversation = []
         parent_id = None
         
@@ -2564,11 +2499,13 @@ class ConversationManager:
             # Branching from main conversation
             parent_conversation = self.app.main_conversation
         
-        # Copy ALL previous context except branch indicators
-        for msg in parent_conversation:
+        # Share ALL previous context except branch indicators: everything before
+        # the parent's first indicator is shared history, the rest is filtered
+        shared = _branch_indicator_index(parent_conversation)
+        branch_conversation = fork_conversation(parent_conversation, shared)
+        for msg in parent_conversation[shared:]:
             if not msg.get('_type') == 'branch_indicator':
-                # Copy the message excluding branch indicators
-                branch_conversation.append(msg.copy())
+                branch_conversation.append(msg)
         
         # Add the branch indicator at the END (not beginning) 
         branch_message = {
@@ -2599,7 +2536,7 @@ class ConversationManager:
         self.app.right_sidebar.add_edge(parent_node, branch_id)
         
         # Process the branch conversation
-        self.process_branch_input(selected_text)
+        self.process_branch_input(selected_text, branch_id)
 
     def fork_callback(self, selected_text):
         """Create a fork branch from selected text"""
@@ -2608,10 +2545,7 @@ class ConversationManager:
         # Create unique branch ID
         branch_id = f"fork_{time.time()}"
         
-        # Create a new conversation for the branch
-        branch_conversation = []
-        
-        # If we're branching from another branch, copy over relevant context
+        # If we're branching from another branch, take over relevant context
         parent_conversation = []
         parent_id = None
         
@@ -2635,21 +2569,28 @@ class ConversationManager:
                 msg_with_text = msg
                 break
         
+        # Messages before the parent's first branch indicator (and before the
+        # truncate point) are shared history; the rest is filtered below
+        shared = _branch_indicator_index(parent_conversation)
+        
         # If we didn't find the selected text, include all messages
         # This can happen with multi-line selections that span messages
         if truncate_idx is None:
             print(f"Warning: Selected text not found in any single message, including all context")
-            # Copy all messages except branch indicators
-            for msg in parent_conversation:
+            # Take all messages except branch indicators
+            branch_conversation = fork_conversation(parent_conversation, shared)
+            for msg in parent_conversation[shared:]:
                 if not msg.get('_type') == 'branch_indicator':
-                    branch_conversation.append(msg.copy())
+                    branch_conversation.append(msg)
         else:
             # We found the message with the selected text, proceed as normal
             # Second pass: add all messages up to the truncate point
-            for i, msg in enumerate(parent_conversation):
+            shared = min(shared, truncate_idx)
+            branch_conversation = fork_conversation(parent_conversation, shared)
+            for i, msg in enumerate(parent_conversation[shared:], shared):
                 # Always include system messages that aren't branch indicators
                 if msg.get('role') == 'system' and not msg.get('_type') == 'branch_indicator':
-                    branch_conversation.append(msg.copy())
+                    branch_conversation.append(msg)
                     continue
                 
                 # For non-system messages, only include up to truncate point
@@ -2671,10 +2612,10 @@ class ConversationManager:
                             branch_conversation.append(modified_msg)
                         else:
                             # If we can't find the text (unlikely), just add the whole message
-                            branch_conversation.append(msg.copy())
+                            branch_conversation.append(msg)
                     else:
                         # Regular message before the truncate point
-                        branch_conversation.append(msg.copy())
+                        branch_conversation.append(msg)
         
         # Add the branch indicator as the last message
         branch_message = {
@@ -2708,18 +2649,18 @@ class ConversationManager:
         self.app.right_sidebar.add_edge(parent_node, branch_id)
         
         # Process the branch conversation with the proper instruction but mark it as hidden
-        self.process_branch_input_with_hidden_instruction(fork_instruction)
+        self.process_branch_input_with_hidden_instruction(fork_instruction, branch_id)
 
-    def process_branch_input_with_hidden_instruction(self, user_input):
+    def process_branch_input_with_hidden_instruction(self, user_input, branch_id=None):
         """Process input from the user specifically for branch conversations, but mark the input as hidden"""
-        # Check if we have an active branch
-        if not self.app.active_branch:
+        branch_id = branch_id or self.app.active_branch
+        # Check if we have a branch to run
+        if not branch_id or branch_id not in self.app.branch_conversations:
             # Fallback to main conversation if no active branch
             self.process_input(user_input)
             return
             
         # Get branch data
-        branch_id = self.app.active_branch
         branch_data = self.app.branch_conversations[branch_id]
         conversation = branch_data['conversation']
         
@@ -2766,68 +2707,26 @@ class ConversationManager:
             ai_2_prompt = SYSTEM_PROMPT_PAIRS[selected_prompt_pair]["AI-2"]
             ai_3_prompt = SYSTEM_PROMPT_PAIRS[selected_prompt_pair]["AI-3"]
         
-        # Start loading animation
-        self.app.left_pane.start_loading()
-        
-        # Reset turn count ONLY if this is a new conversation or explicit user input
-        # Don't reset during automatic iterations
-        if user_input is not None or not has_ai_responses:
-            self.app.turn_count = 0
-            print("Resetting turn count - starting new conversation")
-        
-        # Get max iterations
-        max_iterations = self.app.max_iterations
-        
-        # Get invite tier setting
-        invite_tier = self.app.invite_tier
+        self._start_branch_round(branch_id, conversation, [ai_1_model, ai_2_model, ai_3_model],
+                                 [ai_1_prompt, ai_2_prompt, ai_3_prompt],
+                                 reset=user_input is not None or not has_ai_responses)
+
+    def update_conversation_html(self, conversation, run=None):
+        """Update the full conversation HTML document with all messages
         
-        # Create worker threads for AI-1, AI-2, and AI-3
-        worker1 = Worker("AI-1", conversation, ai_1_model, ai_1_prompt, is_branch=True, branch_id=branch_id, gui=self.app, invite_tier=invite_tier, prompt_modifications=self.ai_prompt_additions, ai_temperatures=self.ai_temperatures)
-        worker2 = Worker("AI-2", conversation, ai_2_model, ai_2_prompt, is_branch=True, branch_id=branch_id, gui=self.app, invite_tier=invite_tier, prompt_modifications=self.ai_prompt_additions, ai_temperatures=self.ai_temperatures)
-        worker3 = Worker("AI-3", conversation, ai_3_model, ai_3_prompt, is_branch=True, branch_id=branch_id, gui=self.app, invite_tier=invite_tier, prompt_modifications=self.ai_prompt_additions, ai_temperatures=self.ai_temperatures)
-        
-        # Connect signals for worker1
-        worker1.signals.started.connect(self.on_ai_started)
-        worker1.signals.response.connect(self.on_ai_response_received)
-        worker1.signals.result.connect(self.on_ai_result_received)
-        worker1.signals.streaming_chunk.connect(self.on_streaming_chunk)
-        worker1.signals.finished.connect(lambda: self.start_ai2_turn(conversation, worker2))
-        worker1.signals.error.connect(self.on_ai_error)
-        
-        # Connect signals for worker2
-        worker2.signals.started.connect(self.on_ai_started)
-        worker2.signals.response.connect(self.on_ai_response_received)
-        worker2.signals.result.connect(self.on_ai_result_received)
-        worker2.signals.streaming_chunk.connect(self.on_streaming_chunk)
-        worker2.signals.finished.connect(lambda: self.start_ai3_turn(conversation, worker3))
-        worker2.signals.error.connect(self.on_ai_error)
-        
-        # Connect signals for worker3
-        worker3.signals.started.connect(self.on_ai_started)
-        worker3.signals.response.connect(self.on_ai_response_received)
-        worker3.signals.result.connect(self.on_ai_result_received)
-        worker3.signals.streaming_chunk.connect(self.on_streaming_chunk)
-        worker3.signals.finished.connect(lambda: self.handle_turn_completion(max_iterations))
-        worker3.signals.error.connect(self.on_ai_error)
-        
-        # Start AI-1's turn
-        self.thread_pool.start(worker1)
-
-    def update_conversation_html(self, conversation):
-        """Update the full conversation HTML document with all messages"""
+        Args:
+            run: The BranchRun the conversation belongs to (default: the one on
+                screen); main and each branch write their own file
+        """
         try:
             from datetime import datetime
             
-            # Create a filename for the full conversation HTML using session timestamp
-            from config import OUTPUTS_DIR
-            
-            # Get session timestamp from main window, or create new one
-            session_timestamp = getattr(self.app, 'session_timestamp', datetime.now().strftime("%Y%m%d_%H%M%S"))
-            html_filename = f"conversation_{session_timestamp}.html"
-            html_file = os.path.join(OUTPUTS_DIR, html_filename)
+            run = self._run_for(run)
+            html_file = self.app.html_file_for(run.branch_id)
             
             # Store the current file path on the app for export/view functionality
-            self.app.current_html_file = html_file
+            if self._is_displayed(run):
+                self.app.current_html_file = html_file
             
             # Generate HTML content for the conversation
             html_content = """<!DOCTYPE html>
@@ -3182,50 +3081,39 @@ class ConversationManager:
                 content = msg.get("content", "")
                 ai_name = msg.get("ai_name", "")
                 model = msg.get("model", "")
-                msg_type = msg.get("_type", "")
+                kind = message_kind(msg)
                 image_model = msg.get("image_model", "")
                 timestamp = datetime.now().strftime("%b %d, %Y %I:%M %p")
                 
                 # Skip special system messages or empty messages
-                if role == "system" and msg_type == "branch_indicator":
+                if role == "system" and kind is MessageKind.BRANCH_INDICATOR:
                     continue
                 
                 # Skip most notifications in HTML output - only keep !add_ai ones
-                if msg_type == "agent_notification":
+                if kind is MessageKind.AGENT_NOTIFICATION:
                     content_str = content if isinstance(content, str) else ""
                     if "!add_ai" not in content_str:
                         continue
                 
-                # Check if content is empty (handle both string and list)
-                is_empty = False
-                if isinstance(content, str):
-                    is_empty = not content.strip()
-                elif isinstance(content, list):
-                    text_parts = [part.get('text', '') for part in content if part.get('type') == 'text']
-                    is_empty = not any(text_parts) and not any(part.get('type') == 'image' for part in content)
-                else:
-                    is_empty = not content
-                
-                if is_empty:
+                # Skip empty messages (no text and no image; cached on the message)
+                projection = project(msg)
+                if not projection.text.strip() and not projection.images:
                     continue
                 
-                # Extract text content from structured messages
-                text_content = ""
-                if isinstance(content, str):
-                    text_content = content
-                elif isinstance(content, list):
-                    text_parts = [part.get('text', '') for part in content if part.get('type') == 'text']
-                    text_content = '\n'.join(text_parts)
+                # Text content, structured parts on separate lines
+                text_content = projection.joined('\n')
                 
                 # Process content to properly format code blocks and add greentext styling
-                processed_content = self.app.left_pane.process_content_with_code_blocks(text_content) if text_content else ""
-                processed_content = self.apply_greentext_styling(processed_content)
+                # (once per message text - the export is rewritten after every turn)
+                processed_content = get_format_cache().get_or_format(
+                    "html_export", text_content, self._format_export_content
+                ) if text_content else ""
                 
                 # Message class based on role and type
                 message_class = role
-                if msg_type == "agent_notification":
+                if kind is MessageKind.AGENT_NOTIFICATION:
                     message_class = "agent-notification"
-                elif msg_type == "generated_image":
+                elif kind is MessageKind.GENERATED_IMAGE:
                     message_class = "generated-image"
                 
                 # Check if this message has an associated image
@@ -3238,14 +3126,9 @@ class ConversationManager:
                     if image_path:
                         has_image = True
                 
-                if isinstance(content, list):
-                    for part in content:
-                        if part.get('type') == 'image':
-                            source = part.get('source', {})
-                            if source.get('type') == 'base64':
-                                image_base64 = source.get('data', '')
-                                has_image = True
-                                break
+                image_base64 = projection.base64_image()
+                if image_base64 is not None:
+                    has_image = True
                 
                 # Helper to get AI number from ai_name
                 def get_ai_num(name):
@@ -3260,7 +3143,7 @@ class ConversationManager:
                 
                 # Build message class with AI-specific border styling
                 # Apply to assistant and generated-image messages
-                ai_msg_class = f"ai-{ai_num}-msg" if role == "assistant" or msg_type == "generated_image" else ""
+                ai_msg_class = f"ai-{ai_num}-msg" if role == "assistant" or kind is MessageKind.GENERATED_IMAGE else ""
                 full_message_class = f"{message_class} {ai_msg_class}".strip()
                 
                 # Start message div
@@ -3268,15 +3151,15 @@ class ConversationManager:
                 html_content += f'\n            <div class="message-content">'
                 
                 # Add header based on role
-                if role == "assistant" or msg_type == "generated_image":
+                if role == "assistant" or kind is MessageKind.GENERATED_IMAGE:
                     display_name = ai_name if ai_name else "AI"
                     color_class = f"ai-{ai_num}"
                     html_content += f'\n                <div class="header"><span class="ai-name {color_class}">{display_name}</span>'
                     if model:
-                        html_content += f' <span class="model-name">({model})</span>'
+                        html_content += f' <span class="model-name">({model_label(msg)})</span>'
                     html_content += f' <span class="timestamp">{timestamp}</span></div>'
                 elif role == "user":
-                    if msg_type == "generated_image" or (has_image and ai_name):
+                    if kind is MessageKind.GENERATED_IMAGE or (has_image and ai_name):
                         display_name = ai_name if ai_name else "AI"
                         color_class = f"ai-{ai_num}"
                         html_content += f'\n                <div class="header"><span class="ai-name {color_class}">{display_name}</span>'
@@ -3285,7 +3168,7 @@ class ConversationManager:
                         html_content += f' <span class="timestamp">{timestamp}</span></div>'
                     else:
                         html_content += f'\n                <div class="header"><span class="ai-name human">Human User</span> <span class="timestamp">{timestamp}</span></div>'
-                elif role == "system" and msg_type != "agent_notification":
+                elif role == "system" and kind is not MessageKind.AGENT_NOTIFICATION:
                     html_content += f'\n                <div class="header"><span class="ai-name system">System</span> <span class="timestamp">{timestamp}</span></div>'
                 
                 # Add message content
@@ -3302,7 +3185,7 @@ class ConversationManager:
                     elif image_path:
                         web_path = image_path.replace('\\', '/')
                         html_content += f'\n                <img src="{web_path}" alt="Generated image" loading="lazy" />'
-                    if ai_name and (msg_type == "generated_image" or role != "user"):
+                    if ai_name and (kind is MessageKind.GENERATED_IMAGE or role != "user"):
                         if image_model:
                             # Format model name nicely (remove provider prefix)
                             model_display = image_model.split("/")[-1] if "/" in image_model else image_model
@@ -3359,6 +3242,11 @@ class ConversationManager:
             traceback.print_exc()
             return False
 
+    def _format_export_content(self, text_content):
+        """Message text -> export HTML (code blocks, inline markdown, greentext)"""
+        processed_content = self.app.left_pane.process_content_with_code_blocks(text_content)
+        return self.apply_greentext_styling(processed_content)
+
     def apply_greentext_styling(self, html_content):
         """Apply greentext styling to lines starting with '>'"""
         try:
@@ -3424,8 +3312,45 @@ class LiminalBackroomsManager:
         # Initialize the application
         self.initialize()
 
+class ModelListRefresher(QObject):
+    """
+    Revalidates AI_MODELS against OpenRouter after the window is up.
+    
+    config.py only validates against the cached model list so startup never
+    waits on the network; this fetches in a background thread and, if the list
+    changed, updates AI_MODELS and every GroupedModelComboBox on the GUI thread.
+    """
+    refreshed = pyqtSignal(object)
+    
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        self.refreshed.connect(self._apply)
+    
+    def start(self):
+        threading.Thread(target=self._run, name="model-refresh", daemon=True).start()
+    
+    def _run(self):
+        try:
+            models = fetch_validated_models()
+        except Exception as e:
+            log.warning("[Startup] Model list refresh failed: %s", e)
+            return
+        self.refreshed.emit(models)
+    
+    def _apply(self, models):
+        if not apply_ai_models(models):
+            return
+        selectors = self.main_window.findChildren(GroupedModelComboBox)
+        for selector in selectors:
+            selector.refresh_models()
+        log.info("[Startup] Model list refreshed from OpenRouter, %d selectors updated", len(selectors))
+
 def create_gui():
     """Create the GUI application"""
+    # Route hot-path logging through the queue handler before any worker starts
+    setup_logging(verbose=DEVELOPER_TOOLS, levels=LOG_LEVELS, log_dir=LOGS_DIR)
+    
     app = QApplication(sys.argv)
     
     # Platform-specific setup for taskbar/dock icon
@@ -3487,6 +3412,10 @@ def create_gui():
         except ImportError as e:
             print(f"Warning: Could not load debug tools: {e}")
     
+    # Refresh the model list once the event loop is running (window already painted)
+    main_window._model_refresher = ModelListRefresher(main_window)
+    QTimer.singleShot(0, main_window._model_refresher.start)
+    
     return main_window, app
 
 def run_gui(main_window, app):
@@ -3525,7 +3454,16 @@ def run_gui(main_window, app):
             freeze_log = os.path.join(LOGS_DIR, "freeze_log.txt")
             crash_log = os.path.join(LOGS_DIR, "crash_log.txt")
             enable_faulthandler(crash_log)  # Enables segfault logging to logs folder
-            freeze_detector = FreezeDetector(timeout_seconds=5, log_file=freeze_log)
+            if PROFILER_SAMPLE_HZ > 0:
+                # Profiler mode also covers long freezes (logs/freeze_log.txt)
+                freeze_detector = SamplingProfiler(
+                    sample_hz=PROFILER_SAMPLE_HZ,
+                    stall_threshold_ms=PROFILER_STALL_MS,
+                    output_dir=LOGS_DIR
+                )
+                app.aboutToQuit.connect(freeze_detector.stop)
+            else:
+                freeze_detector = FreezeDetector(timeout_seconds=5, log_file=freeze_log)
             freeze_detector.start()
         except Exception as e:
             print(f"Warning: Could not start freeze detector: {e}")
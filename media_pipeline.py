@@ -0,0 +1,220 @@
+# media_pipeline.py
+"""
+Decode-once ingestion for generated and uploaded images.
+
+An image used to be base64-handled several times on its way into a
+conversation: generate_image_from_text decoded the data URL and wrote the
+file, then _execute_image_command read the file back, re-encoded it and
+sniffed its type; handle_upload_image read and encoded uploads on the GUI
+thread and guessed the type from the extension. Either way the payload was
+the full-resolution original - multi-megabyte Gemini PNGs went into every
+later request.
+
+ingest() now does it in one pass over the raw bytes:
+
+- sniff the MIME type from the magic bytes (extension only as a fallback)
+- write the original bytes to disk, with the matching extension
+- downscale to IMAGE_MAX_EDGE on the longest edge and recompress (JPEG, or
+  PNG when there is transparency) if Pillow is installed and that is smaller
+- base64-encode the payload once
+
+and returns an IngestedImage holding the file path and the ready-made
+content part. The generated-image job already runs on its own thread; GUI
+code hands work to the pipeline's small thread pool with submit().
+
+Usage:
+    media = get_media_pipeline().ingest_data_url(url, "images/generated_...")
+    future = get_media_pipeline().submit(get_media_pipeline().ingest_file, path)
+    message["content"].append(media.content_part())
+"""
+
+import base64
+import importlib.util
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app_logging import get_logger
+
+# Pillow is imported on the first downscale, not at startup (shared_utils imports this module)
+HAS_PILLOW = importlib.util.find_spec("PIL") is not None
+
+log = get_logger("media_pipeline")
+
+# Longest edge of images sent to models (pixels) and the recompression quality
+DEFAULT_MAX_EDGE = 1568
+DEFAULT_JPEG_QUALITY = 85
+# Ingestion threads - decoding and resizing are CPU bound, a couple is plenty
+INGEST_WORKERS = 2
+
+EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+_EXTENSION_TYPES = {".jpeg": "image/jpeg", **{ext: media_type for media_type, ext in EXTENSIONS.items()}}
+_FORMAT_TYPES = {"jpeg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+def sniff_media_type(data, fallback=None):
+    """MIME type of image bytes from their header; fallback (a type or a file name) if unknown."""
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if not fallback:
+        return "image/jpeg"
+    if fallback.startswith("image/"):
+        return fallback.split(";")[0].strip()
+    return _EXTENSION_TYPES.get(os.path.splitext(str(fallback))[1].lower(), "image/jpeg")
+
+
+class IngestedImage:
+    """An image on disk plus the (possibly downscaled) base64 payload sent to models."""
+
+    __slots__ = ("path", "media_type", "base64", "width", "height", "original_bytes", "payload_bytes")
+
+    def __init__(self, path, media_type, base64_data, width=None, height=None, original_bytes=0, payload_bytes=0):
+        self.path = path
+        self.media_type = media_type
+        self.base64 = base64_data
+        self.width = width
+        self.height = height
+        self.original_bytes = original_bytes
+        self.payload_bytes = payload_bytes
+
+    def content_part(self):
+        """The message content part for this image (Anthropic-style base64 source)."""
+        return {
+            "type": "image",
+            "source": {"type": "base64", "media_type": self.media_type, "data": self.base64},
+        }
+
+    def __repr__(self):
+        return (f"IngestedImage({self.path!r}, {self.media_type}, {self.width}x{self.height}, "
+                f"{self.original_bytes} -> {self.payload_bytes} bytes)")
+
+
+def _has_alpha(img):
+    return img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def downscale(data, media_type, max_edge=DEFAULT_MAX_EDGE, quality=DEFAULT_JPEG_QUALITY, fmt=None):
+    """
+    Payload bytes for an image: downscaled to max_edge and recompressed when that helps.
+
+    Args:
+        fmt: None only recompresses oversized images (as JPEG, PNG if there is
+            transparency). "jpeg" (same transparency rule), "webp" or "png"
+            also converts an image that already fits but is in another format.
+
+    Returns (bytes, media_type, width, height). The original comes back
+    unchanged when Pillow is missing, there is nothing to do, it is animated,
+    or recompressing would not make it smaller.
+    """
+    if not HAS_PILLOW:
+        return data, media_type, None, None
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(data)) as img:
+            width, height = img.size
+            oversized = bool(max_edge) and max(width, height) > max_edge
+            target = fmt or "jpeg"
+            if target == "jpeg" and _has_alpha(img):
+                target = "png"
+            if getattr(img, "is_animated", False) or not (oversized or (fmt and _FORMAT_TYPES[target] != media_type)):
+                return data, media_type, width, height
+            if oversized:
+                img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            out = io.BytesIO()
+            if target == "png":
+                img.save(out, "PNG", optimize=True)
+            elif target == "webp":
+                img.save(out, "WEBP", quality=quality)
+            else:
+                img.convert("RGB").save(out, "JPEG", quality=quality, optimize=True)
+            if out.tell() >= len(data):
+                return data, media_type, width, height
+            return out.getvalue(), _FORMAT_TYPES[target], img.width, img.height
+    except Exception as e:
+        log.warning("[Media] Could not downscale %s image (%d bytes): %s", media_type, len(data), e)
+        return data, media_type, None, None
+
+
+class MediaPipeline:
+    """Image ingestion settings plus a small worker pool for GUI callers."""
+
+    def __init__(self, max_edge=DEFAULT_MAX_EDGE, quality=DEFAULT_JPEG_QUALITY, workers=INGEST_WORKERS):
+        self.max_edge = max_edge
+        self.quality = quality
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="media")
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn (usually one of the ingest methods) on the pool; returns a Future."""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def ingest(self, data, save_to=None, fallback_type=None):
+        """
+        Sniff, save and encode raw image bytes in one pass.
+
+        Args:
+            data: The image bytes (already decoded)
+            save_to: Where to write the original bytes; the extension for the
+                sniffed type is added unless it already has one. None = don't write
+            fallback_type: MIME type or file name to use if the bytes aren't recognised
+        """
+        media_type = sniff_media_type(data, fallback_type)
+        path = None
+        if save_to is not None:
+            path = str(save_to)
+            if not os.path.splitext(path)[1]:
+                path += EXTENSIONS.get(media_type, ".png")
+            with open(path, "wb") as f:
+                f.write(data)
+        payload, payload_type, width, height = downscale(data, media_type, self.max_edge, self.quality)
+        if payload is not data:
+            log.info("[Media] %s: %dx%d payload, %d -> %d bytes", path or media_type, width, height, len(data), len(payload))
+        return IngestedImage(path, payload_type, base64.b64encode(payload).decode("ascii"),
+                             width, height, len(data), len(payload))
+
+    def ingest_file(self, path):
+        """Ingest an image that is already on disk (the file is left as is)."""
+        with open(path, "rb") as f:
+            data = f.read()
+        media = self.ingest(data, fallback_type=path)
+        media.path = str(path)
+        return media
+
+    def ingest_data_url(self, url, save_to=None):
+        """Ingest a data:image/...;base64,... URL (or bare base64)."""
+        header, _, encoded = url.partition(",")
+        if not encoded:
+            header, encoded = "", url
+        fallback = header[5:].split(";")[0] if header.startswith("data:") else None
+        return self.ingest(base64.b64decode(encoded), save_to, fallback or None)
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_media_pipeline():
+    """The shared MediaPipeline, configured from config.py on first use."""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                try:
+                    from config import IMAGE_MAX_EDGE, IMAGE_JPEG_QUALITY
+                except ImportError:
+                    IMAGE_MAX_EDGE, IMAGE_JPEG_QUALITY = DEFAULT_MAX_EDGE, DEFAULT_JPEG_QUALITY
+                _pipeline = MediaPipeline(IMAGE_MAX_EDGE, IMAGE_JPEG_QUALITY)
+                if not HAS_PILLOW:
+                    log.info("[Media] Pillow not installed - images are sent at their original size")
+    return _pipeline
@@ -0,0 +1,315 @@
+# message_record.py
+"""
+Compact, typed conversation messages.
+
+Messages used to be free-form dicts: a handful of common keys (role,
+content, ai_name, model, _type) plus flags that only some messages carry
+(_streaming, hidden, generated_image_path, _notification_id, _prompt, ...).
+Each one paid for a full hash table, the same model and AI name strings
+were stored once per message, and the hot scans - _do_render, ai_turn,
+update_conversation_html, format_conversation_for_judge - did a string
+.get('_type') comparison and re-walked structured content on every pass.
+
+A Message keeps the known keys in __slots__ (anything else goes in a small
+'extra' dict, created only when needed), interns role / ai_name / model /
+_type, and exposes
+
+- kind: a MessageKind derived from role and _type
+- projection: a MessageProjection of the content - its text parts, plain
+  text, image parts, length and a token estimate
+- text / has_image: shortcuts (has_image also counts a generated_image_path)
+
+The derived fields are computed on first use and reset when the keys they
+depend on are assigned. Content is replaced, never edited in place, so
+assigning msg['content'] is the one mutation that invalidates the
+projection; render, HTML/text export, ai_turn and the BackroomsBench judge
+transcript all read it instead of re-walking structured content.
+
+Message is a MutableMapping, so existing code that reads, writes, copies
+or compares messages as dicts keeps working; Conversation
+(conversation_history.py) turns plain dicts into Messages as they are
+added. Code that keeps a reference to a message it appends and
+edits it later (streaming placeholders) should create the Message itself.
+
+The message_kind / message_text / message_has_image / project helpers
+accept both Messages (cached) and plain dicts (computed on the spot), for
+code that still builds lists of dicts such as API payloads.
+"""
+
+import sys
+from collections.abc import Mapping, MutableMapping
+from enum import Enum
+
+
+class MessageKind(Enum):
+    """What a conversation message is, from its _type (or role when untyped)."""
+    USER = "user"
+    ASSISTANT = "assistant"
+    SYSTEM = "system"
+    BRANCH_INDICATOR = "branch_indicator"
+    AGENT_NOTIFICATION = "agent_notification"
+    SYSTEM_NOTIFICATION = "system_notification"
+    TYPING_INDICATOR = "typing_indicator"
+    GENERATED_IMAGE = "generated_image"
+    GENERATED_VIDEO = "generated_video"
+    SEARCH_RESULT = "search_result"
+    OTHER = "other"
+
+
+_KINDS = {kind.value: kind for kind in MessageKind}
+_ROLE_KINDS = {"user": MessageKind.USER, "assistant": MessageKind.ASSISTANT, "system": MessageKind.SYSTEM}
+
+# dict key -> slot; keys are yielded in this order
+_FIELDS = {
+    "role": "role",
+    "content": "content",
+    "ai_name": "ai_name",
+    "model": "model",
+    "_type": "type",
+    "hidden": "hidden",
+    "_streaming": "streaming",
+    "generated_image_path": "generated_image_path",
+    "_notification_id": "notification_id",
+    "_prompt": "prompt",
+}
+_INTERNED = frozenset(("role", "ai_name", "model", "_type"))
+_KIND_KEYS = frozenset(("role", "_type"))
+
+_MISSING = object()
+
+
+class MessageProjection:
+    """Plain-text and image view of a message's content, computed in one pass."""
+
+    __slots__ = ("text_parts", "text", "images", "length", "tokens")
+
+    def __init__(self, content):
+        if isinstance(content, list):
+            text_parts = []
+            images = []
+            for part in content:
+                if not isinstance(part, dict):
+                    continue
+                part_type = part.get('type')
+                if part_type == 'text':
+                    text_parts.append(part.get('text', ''))
+                elif part_type == 'image':
+                    images.append(part)
+            self.text_parts = tuple(text_parts)
+            self.images = tuple(images)
+            self.text = ''.join(text_parts)
+        else:
+            self.text = str(content) if content else ''
+            self.text_parts = (self.text,) if self.text else ()
+            self.images = ()
+        self.length = len(self.text)
+        self.tokens = self.length // 4  # same rough estimate as the input token counters
+
+    @property
+    def has_image(self):
+        return bool(self.images)
+
+    def joined(self, separator):
+        """The text parts joined with separator (text is the '' join)."""
+        return self.text if not separator else separator.join(self.text_parts)
+
+    def base64_image(self):
+        """Data of the first base64 image part, or None."""
+        for part in self.images:
+            source = part.get('source', {})
+            if source.get('type') == 'base64':
+                return source.get('data', '')
+        return None
+
+
+_EMPTY_PROJECTION = MessageProjection("")
+
+
+def _kind_of(role, msg_type):
+    if msg_type:
+        return _KINDS.get(msg_type, MessageKind.OTHER)
+    return _ROLE_KINDS.get(role, MessageKind.OTHER)
+
+
+class Message(MutableMapping):
+    """A conversation message: slotted storage with a dict interface."""
+
+    __slots__ = tuple(_FIELDS.values()) + ("extra", "_kind", "_projection")
+
+    def __init__(self, *args, **kwargs):
+        for slot in _FIELDS.values():
+            setattr(self, slot, _MISSING)
+        self.extra = None
+        self._kind = self._projection = None
+        if args or kwargs:
+            self.update(*args, **kwargs)
+
+    # -- mapping protocol ----------------------------------------------------
+
+    def __getitem__(self, key):
+        slot = _FIELDS.get(key)
+        if slot is None:
+            if self.extra is None:
+                raise KeyError(key)
+            return self.extra[key]
+        value = getattr(self, slot)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        slot = _FIELDS.get(key)
+        if slot is None:
+            return self.extra.get(key, default) if self.extra is not None else default
+        value = getattr(self, slot)
+        return default if value is _MISSING else value
+
+    def __contains__(self, key):
+        slot = _FIELDS.get(key)
+        if slot is None:
+            return self.extra is not None and key in self.extra
+        return getattr(self, slot) is not _MISSING
+
+    def __setitem__(self, key, value):
+        slot = _FIELDS.get(key)
+        if slot is None:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+            return
+        if key in _INTERNED and type(value) is str:
+            value = sys.intern(value)
+        setattr(self, slot, value)
+        self._invalidate(key)
+
+    def __delitem__(self, key):
+        slot = _FIELDS.get(key)
+        if slot is None:
+            if self.extra is None:
+                raise KeyError(key)
+            del self.extra[key]
+            return
+        if getattr(self, slot) is _MISSING:
+            raise KeyError(key)
+        setattr(self, slot, _MISSING)
+        self._invalidate(key)
+
+    def __iter__(self):
+        for key, slot in _FIELDS.items():
+            if getattr(self, slot) is not _MISSING:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        count = sum(1 for slot in _FIELDS.values() if getattr(self, slot) is not _MISSING)
+        return count + (len(self.extra) if self.extra else 0)
+
+    def _invalidate(self, key):
+        if key == "content":
+            self._projection = None
+        elif key in _KIND_KEYS:
+            self._kind = None
+
+    # -- dict compatibility --------------------------------------------------
+
+    def copy(self):
+        """A shallow copy (derived fields carried over)."""
+        new = Message.__new__(Message)
+        for slot in self.__slots__:
+            setattr(new, slot, getattr(self, slot))
+        if self.extra is not None:
+            new.extra = dict(self.extra)
+        return new
+
+    __copy__ = copy
+
+    def to_dict(self):
+        return dict(self)
+
+    def __eq__(self, other):
+        # Mapping.__eq__ builds two dicts per comparison - and `msg in conversation` /
+        # conversation.remove(msg) compare against every earlier message
+        if self is other:
+            return True
+        if not isinstance(other, Message):
+            return dict(self) == dict(other) if isinstance(other, Mapping) else NotImplemented
+        for slot in _FIELDS.values():
+            mine, theirs = getattr(self, slot), getattr(other, slot)
+            if mine is not theirs and mine != theirs:
+                return False
+        return (self.extra or {}) == (other.extra or {})
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Message({dict(self)!r})"
+
+    def __reduce__(self):
+        return (Message, (dict(self),))
+
+    # -- derived fields ------------------------------------------------------
+
+    @property
+    def kind(self):
+        kind = self._kind
+        if kind is None:
+            kind = self._kind = _kind_of(self.get("role"), self.get("_type"))
+        return kind
+
+    @property
+    def projection(self):
+        projection = self._projection
+        if projection is None:
+            content = self.content
+            projection = self._projection = \
+                _EMPTY_PROJECTION if content is _MISSING else MessageProjection(content)
+        return projection
+
+    @property
+    def text(self):
+        return self.projection.text
+
+    @property
+    def has_image(self):
+        path = self.generated_image_path
+        return bool(path is not _MISSING and path) or bool(self.projection.images)
+
+
+def as_message(message):
+    """message as a Message (unchanged if it already is one or is not a mapping)."""
+    if isinstance(message, Message) or not isinstance(message, Mapping):
+        return message
+    return Message(message)
+
+
+def message_kind(message):
+    if isinstance(message, Message):
+        return message.kind
+    return _kind_of(message.get("role"), message.get("_type"))
+
+
+def project(message):
+    """The MessageProjection of a message (cached on Messages)."""
+    if isinstance(message, Message):
+        return message.projection
+    return MessageProjection(message.get("content", ""))
+
+
+def message_text(message):
+    return project(message).text
+
+
+def model_label(message):
+    """The model shown for a message: the one that answered, noting the requested one after a fallback."""
+    model = message.get("model") or ""
+    requested = message.get("requested_model")
+    if requested and requested != model:
+        return f"{model}, fallback for {requested}"
+    return model
+
+
+def message_has_image(message):
+    if isinstance(message, Message):
+        return message.has_image
+    return bool(message.get("generated_image_path")) or project(message).has_image
@@ -0,0 +1,140 @@
+# model_registry.py
+"""
+Precomputed model lookups and system-prompt templates for ai_turn.
+
+Every turn used to scan _FLAT_AI_MODELS linearly for the display name, filter
+and sort the whole model dict for the invite list, and run up to three regex
+searches plus a sub over the system prompt to inject that list. None of it
+changes between turns, so:
+
+- ModelRegistry is built once from AI_MODELS (and rebuilt by
+  config.apply_ai_models after a background refresh): name->id and id->name
+  maps, the invite text for each tier, and the OpenRouter metadata cached by
+  tools/model_updater.py (context length, pricing, modalities), loaded on
+  first use
+- PromptTemplate splits a system prompt at its model-list slot once; filling
+  it is a str.join. Templates are cached per prompt string
+
+Per-turn preparation is then a couple of dict lookups:
+
+    registry = get_model_registry()
+    prompt = registry.system_prompt(ai_name, model_id, system_prompt, invite_tier)
+"""
+
+import re
+
+from app_logging import get_logger
+
+log = get_logger("model_registry")
+
+INVITE_TIERS = ("Free", "Paid", "Both")
+
+# Model-list slots, in the order ai_turn has always tried them. The first one
+# present in the prompt is replaced everywhere it occurs.
+_SLOT_PATTERNS = (
+    # The placeholder text: [Models list injected based on tier setting]
+    re.compile(r'\[Models list injected based on tier setting\]'),
+    # Emphatic format: ⚠️ ONLY USE FREE/PAID MODELS: ... — DO NOT ...
+    re.compile(r'⚠️ ONLY USE (?:FREE|PAID) MODELS:[^\n]*'),
+    # Old format or "Available models" line
+    re.compile(r'(?:FREE MODELS[^:]*:|PAID MODELS[^:]*:|Available[^:]*:)[^\n]*'),
+)
+_ADD_AI_ANCHOR = '!add_ai "Model Name"'
+
+# Distinct system prompts seen in a session: one per scenario slot plus edits
+MAX_TEMPLATES = 256
+
+
+def is_free_model(model_id):
+    return bool(model_id) and ":free" in model_id.lower()
+
+
+class PromptTemplate:
+    """A system prompt pre-split at its model-list slot."""
+
+    __slots__ = ("parts", "separator")
+
+    def __init__(self, prompt):
+        self.parts = [prompt]
+        self.separator = None  # str with a {models} field, None = nothing to inject
+        if "!add_ai" not in prompt:
+            return
+        for pattern in _SLOT_PATTERNS:
+            parts = pattern.split(prompt)
+            if len(parts) > 1:
+                self.parts = parts
+                self.separator = "{models}"
+                return
+        # No slot: add the list after the !add_ai line
+        parts = prompt.split(_ADD_AI_ANCHOR)
+        if len(parts) > 1:
+            self.parts = parts
+            self.separator = _ADD_AI_ANCHOR + "\n  {models}\n "
+
+    def render(self, models_text):
+        if self.separator is None:
+            return self.parts[0]
+        return self.separator.replace("{models}", models_text).join(self.parts)
+
+
+class ModelRegistry:
+    """Lookup tables for one AI_MODELS snapshot."""
+
+    def __init__(self, ai_models, metadata_loader=None):
+        self.name_to_id = {}
+        for tier_models in ai_models.values():
+            for provider_models in tier_models.values():
+                self.name_to_id.update(provider_models)
+        # First display name wins, as with the old linear scan
+        self.id_to_name = {}
+        for name, model_id in self.name_to_id.items():
+            self.id_to_name.setdefault(model_id, name)
+        self.invite_text = {tier: self._format_invite_text(tier) for tier in INVITE_TIERS}
+        self._metadata_loader = metadata_loader
+        self._metadata = None
+        self._templates = {}
+
+    def _format_invite_text(self, tier):
+        if tier == "Free":
+            names = [name for name, mid in self.name_to_id.items() if is_free_model(mid)]
+        elif tier == "Paid":
+            names = [name for name, mid in self.name_to_id.items() if not is_free_model(mid)]
+        else:
+            names = list(self.name_to_id)
+        if not names:
+            return "No models available for this tier."
+        model_list = "\n".join(f"  - {name}" for name in sorted(names))
+        tier_label = f"{tier} models" if tier != "Both" else "Available models"
+        return f"{tier_label}:\n{model_list}"
+
+    def get_model_id(self, display_name):
+        return self.name_to_id.get(display_name)
+
+    def get_display_name(self, model_id):
+        return self.id_to_name.get(model_id, model_id)
+
+    def get_invite_text(self, tier="Both"):
+        return self.invite_text.get(tier, self.invite_text["Both"])
+
+    def metadata(self, model_id):
+        """OpenRouter metadata for model_id ({} if unknown): context_length, pricing, modalities."""
+        if self._metadata is None:
+            try:
+                self._metadata = self._metadata_loader() if self._metadata_loader else {}
+            except Exception as e:
+                log.warning("[ModelRegistry] Could not load model metadata: %s", e)
+                self._metadata = {}
+        return self._metadata.get(model_id, {})
+
+    def template(self, prompt):
+        template = self._templates.get(prompt)
+        if template is None:
+            if len(self._templates) >= MAX_TEMPLATES:
+                self._templates.clear()
+            template = self._templates[prompt] = PromptTemplate(prompt)
+        return template
+
+    def system_prompt(self, ai_name, model_id, prompt, tier="Both"):
+        """The full system prompt for a turn: identity line plus the prompt with the tier's model list."""
+        body = self.template(prompt).render(self.get_invite_text(tier))
+        return f"You are {ai_name} ({self.get_display_name(model_id)}).\n\n{body}"
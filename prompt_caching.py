@@ -0,0 +1,138 @@
+# prompt_caching.py
+"""
+Provider-side prompt caching: cache-control breakpoints and cached-token usage.
+
+Each AI resends its long scenario system prompt plus the whole shared history
+every turn. Anthropic (directly or via OpenRouter) and Gemini via OpenRouter
+only cache a prefix that ends in an explicit cache_control breakpoint; OpenAI,
+DeepSeek and Grok cache automatically once the prefix is identical. We mark
+two breakpoints:
+
+- the system prompt (stable per AI - see prompt_compiler.py)
+- the last history message before the new prompt, so the next turn reads
+  everything up to here from cache and only the newest messages are uncached
+
+Usage blocks from both APIs are normalised by parse_*_usage() into
+
+    {"prompt_tokens", "completion_tokens", "cached_tokens",
+     "cache_write_tokens", "uncached_tokens", "cost"}
+
+which call_openrouter_api / call_claude_api store in the turn's metrics.
+"""
+
+from config import PROMPT_CACHING
+
+EPHEMERAL = {"type": "ephemeral"}
+
+# OpenRouter model prefixes that need explicit breakpoints
+_EXPLICIT_CACHE_PREFIXES = ("anthropic/", "google/gemini")
+
+
+def needs_breakpoints(model_id):
+    """True for models whose provider only caches at explicit cache_control markers."""
+    return PROMPT_CACHING and bool(model_id) and model_id.lower().startswith(_EXPLICIT_CACHE_PREFIXES)
+
+
+def _mark_content(content):
+    """Copy of a message's content with a breakpoint on its last block (never mutates the input)."""
+    if isinstance(content, str):
+        if not content:
+            return content
+        return [{"type": "text", "text": content, "cache_control": EPHEMERAL}]
+    if isinstance(content, list) and content:
+        marked = list(content)
+        last = dict(marked[-1])
+        last["cache_control"] = EPHEMERAL
+        marked[-1] = last
+        return marked
+    return content
+
+
+def add_cache_breakpoints(messages):
+    """
+    Chat-completions messages (OpenRouter) with breakpoints on the system
+    prompt and on the last message before the final (new) one.
+    """
+    marked = list(messages)
+    if marked and marked[0].get("role") == "system":
+        marked[0] = {**marked[0], "content": _mark_content(marked[0]["content"])}
+    if len(marked) >= 3:
+        marked[-2] = {**marked[-2], "content": _mark_content(marked[-2]["content"])}
+    return marked
+
+
+def anthropic_cached_request(system_prompt, messages):
+    """
+    (system, messages) for the Anthropic Messages API with the same two
+    breakpoints. system becomes a list of blocks when caching is on.
+    """
+    if not PROMPT_CACHING:
+        return system_prompt, messages
+    system = _mark_content(system_prompt) if system_prompt else system_prompt
+    marked = list(messages)
+    if len(marked) >= 2:
+        marked[-2] = {**marked[-2], "content": _mark_content(marked[-2].get("content"))}
+    return system, marked
+
+
+def _int(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_openai_usage(usage):
+    """OpenRouter / OpenAI usage: prompt_tokens includes cached ones."""
+    if not usage:
+        return None
+    details = usage.get("prompt_tokens_details") or {}
+    prompt = _int(usage.get("prompt_tokens"))
+    cached = _int(details.get("cached_tokens"))
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": _int(usage.get("completion_tokens")),
+        "cached_tokens": cached,
+        "cache_write_tokens": _int(details.get("cache_write_tokens")),
+        "uncached_tokens": max(prompt - cached, 0),
+        "cost": usage.get("cost"),
+    }
+
+
+def parse_anthropic_usage(usage):
+    """Anthropic usage: input_tokens excludes cache reads and writes."""
+    if not usage:
+        return None
+    uncached = _int(usage.get("input_tokens"))
+    cached = _int(usage.get("cache_read_input_tokens"))
+    written = _int(usage.get("cache_creation_input_tokens"))
+    return {
+        "prompt_tokens": uncached + cached + written,
+        "completion_tokens": _int(usage.get("output_tokens")),
+        "cached_tokens": cached,
+        "cache_write_tokens": written,
+        "uncached_tokens": uncached + written,
+        "cost": None,
+    }
+
+
+def anthropic_stream_usage(payload, usage):
+    """Accumulate raw usage from Anthropic stream events (message_start, message_delta) into usage."""
+    event_type = payload.get("type")
+    if event_type == "message_start":
+        usage.update((payload.get("message") or {}).get("usage") or {})
+    elif event_type == "message_delta" and payload.get("usage"):
+        usage.update(payload["usage"])
+
+
+def format_usage(usage):
+    """One-line summary for logs, e.g. '12840 prompt (11200 cached, 87%), 410 completion'."""
+    prompt = usage.get("prompt_tokens", 0)
+    cached = usage.get("cached_tokens", 0)
+    share = f", {cached * 100 // prompt}%" if prompt else ""
+    text = f"{prompt} prompt ({cached} cached{share}), {usage.get('completion_tokens', 0)} completion"
+    if usage.get("cache_write_tokens"):
+        text += f", {usage['cache_write_tokens']} written to cache"
+    if isinstance(usage.get("cost"), (int, float)):
+        text += f", ${usage['cost']:.4f}"
+    return text
@@ -0,0 +1,101 @@
+# prompt_compiler.py
+"""
+Rendered system prompts, cached per AI.
+
+ai_turn assembled each AI's system prompt from scratch every turn: tier
+model-list injection, the "You are {ai_name} ({display_name})" prefix and the
+!prompt additions list. The inputs only change when an AI uses !prompt, the
+invite tier is switched, a different model/scenario is selected or the model
+list refreshes, so the finished string is cached under
+
+    (ai_name, model_id, scenario prompt, tier, additions version)
+
+Scenario prompts are compiled into templates once by the model registry
+(model_registry.PromptTemplate). additions_changed() is called from
+_execute_prompt_command and tier_changed() from the settings dialog; a model
+registry rebuild drops everything.
+
+The layout keeps a stable prefix - identity line, scenario prompt, then the
+additions appended last - so provider-side prompt caching keeps hitting
+across turns.
+"""
+
+import threading
+
+from config import get_model_registry
+
+# Header for the !prompt additions block (also used by get_prompt_additions_for_ai)
+ADDITIONS_HEADER = "\n\n[Your remembered insights/perspectives]:\n- "
+
+
+def format_additions(additions):
+    if not additions:
+        return ""
+    return ADDITIONS_HEADER + "\n- ".join(additions)
+
+
+class PromptCompiler:
+    """Caches the fully rendered system prompt per (AI, model, scenario, tier, additions)."""
+
+    def __init__(self):
+        self._rendered = {}
+        self._versions = {}  # ai_name -> bumped on every !prompt
+        self._registry = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def additions_changed(self, ai_name):
+        """An AI's !prompt additions changed: drop its rendered prompts."""
+        with self._lock:
+            self._versions[ai_name] = self._versions.get(ai_name, 0) + 1
+            for key in [k for k in self._rendered if k[0] == ai_name]:
+                del self._rendered[key]
+
+    def tier_changed(self):
+        """The invite tier changed: every AI's model list is different."""
+        with self._lock:
+            self._rendered.clear()
+
+    def render(self, ai_name, model_id, prompt, tier="Both", additions=None):
+        """
+        The system prompt for one turn.
+
+        Args:
+            additions: The AI's !prompt additions (list), or a str that
+                replaces the whole prompt (the old single-prompt form)
+        """
+        if isinstance(additions, str):
+            return additions
+
+        registry = get_model_registry()
+        # The length catches appends that bypassed additions_changed()
+        key = (ai_name, model_id, prompt, tier,
+               self._versions.get(ai_name, 0), len(additions) if additions else 0)
+        with self._lock:
+            if registry is not self._registry:
+                self._rendered.clear()
+                self._registry = registry
+            rendered = self._rendered.get(key)
+            if rendered is not None:
+                self.hits += 1
+                return rendered
+            self.misses += 1
+
+        rendered = registry.system_prompt(ai_name, model_id, prompt, tier) + format_additions(additions)
+        with self._lock:
+            if registry is self._registry:
+                self._rendered[key] = rendered
+        return rendered
+
+    def stats(self):
+        with self._lock:
+            return {"prompts": len(self._rendered), "hits": self.hits, "misses": self.misses}
+
+
+_compiler = PromptCompiler()
+
+
+def get_prompt_compiler():
+    """The process-wide PromptCompiler used by ai_turn."""
+    return _compiler
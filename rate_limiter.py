@@ -0,0 +1,279 @@
+# rate_limiter.py
+"""
+Shared rate limiting for every outbound model API call.
+
+Main turns, branch turns, BackroomsBench judges and image jobs all go through
+shared_utils, and used to hit providers independently - under load that meant
+429s, burned retries and "Error: OpenRouter API error 429" strings in the
+transcript. Every call now takes a permit from one process-wide RateLimiter:
+
+- A token bucket per key smooths request starts (rps / burst)
+- An adaptive concurrency window per key caps requests in flight (AIMD):
+  +1/limit on success, halved on 429/5xx, never below min_concurrency
+- Retry-After (or exponential backoff without it) pauses the throttled model
+- Waiters queue FIFO per model, so a burst of judges can't starve a turn
+
+Keys are a provider ("openrouter") plus "provider:model" for a per-model budget;
+a request needs room in both. Limits come from config.RATE_LIMITS.
+
+Usage:
+    from rate_limiter import rate_limited
+
+    with rate_limited("openrouter", model) as permit:
+        response = requests.post(...)
+        permit.observe(response.status_code, response.headers)
+        ...read the (streaming) body while still holding the permit...
+"""
+
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from app_logging import get_logger
+
+log = get_logger("rate_limiter")
+
+# Statuses that mean "slow down": shrink the concurrency window and back off
+THROTTLE_STATUSES = frozenset({429, 500, 502, 503, 504, 529})
+
+# Fallback limits when config.RATE_LIMITS is unavailable or a key isn't listed
+DEFAULT_LIMITS = {
+    "default": {"rps": 2, "burst": 4, "max_concurrency": 4},
+    "default_model": {"rps": 2, "burst": 4, "max_concurrency": 3},
+}
+
+# How long acquire() waits for a permit before giving up (seconds)
+DEFAULT_ACQUIRE_TIMEOUT = 300
+
+# Backoff used when a throttle response carries no Retry-After
+_BASE_BACKOFF = 1.0
+_MAX_BACKOFF = 30.0
+
+# Only one multiplicative decrease per window - a burst of 429s from requests
+# that were already in flight shouldn't collapse the limit to 1
+_DECREASE_COOLDOWN = 2.0
+
+
+class RateLimitTimeout(Exception):
+    """Raised when no permit became available within the acquire timeout."""
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class _Limit:
+    """Token bucket plus AIMD concurrency window for one key. Guarded by the limiter's lock."""
+
+    def __init__(self, key, rps, burst, max_concurrency, min_concurrency=1):
+        self.key = key
+        self.rate = float(rps)
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.min_concurrency = max(1, min(int(min_concurrency), self.max_concurrency))
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttle_streak = 0
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, now):
+        """0 if a request may start now, seconds to wait, or None (wait for a release)."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= int(self.limit):
+            return None
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        if self.rate > 0:
+            self.tokens -= 1
+        self.in_flight += 1
+
+    def release(self, status, retry_after, now, pause=True):
+        self.in_flight = max(0, self.in_flight - 1)
+        if status is None:
+            return
+        if status in THROTTLE_STATUSES:
+            self.throttle_streak += 1
+            if retry_after is None:
+                retry_after = min(_MAX_BACKOFF, _BASE_BACKOFF * 2 ** (self.throttle_streak - 1))
+            if pause:
+                self.blocked_until = max(self.blocked_until, now + retry_after)
+            if now - self._last_decrease >= _DECREASE_COOLDOWN:
+                self.limit = max(float(self.min_concurrency), self.limit / 2)
+                self._last_decrease = now
+            log.warning("[RateLimit] %s throttled (HTTP %s): concurrency %d, pausing %.1fs",
+                        self.key, status, int(self.limit), retry_after if pause else 0)
+        elif status < 400:
+            self.throttle_streak = 0
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+
+    def snapshot(self, now):
+        self._refill(now)
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "tokens": round(self.tokens, 2),
+            "paused_for": round(max(0.0, self.blocked_until - now), 1),
+        }
+
+
+class Permit:
+    """A granted request slot. Release it by leaving the with-block (or calling release())."""
+
+    def __init__(self, limiter, limits):
+        self._limiter = limiter
+        self._limits = limits
+        self._status = None
+        self._retry_after = None
+        self._released = False
+
+    def observe(self, status_code, headers=None):
+        """Record the response status (and Retry-After) so the limiter can adapt."""
+        self._status = status_code
+        if headers is not None:
+            self._retry_after = parse_retry_after(headers.get("Retry-After"))
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._limiter._release(self._limits, self._status, self._retry_after)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class RateLimiter:
+    """Process-wide registry of per-provider and per-model limits."""
+
+    def __init__(self, limits=None):
+        self._config = dict(DEFAULT_LIMITS)
+        self._config.update(limits or {})
+        self._limits = {}
+        self._queues = {}
+        self._cond = threading.Condition()
+
+    def _settings(self, key, is_model):
+        if key in self._config:
+            return self._config[key]
+        return self._config["default_model" if is_model else "default"]
+
+    def _get(self, key, is_model):
+        limit = self._limits.get(key)
+        if limit is None:
+            limit = _Limit(key, **self._settings(key, is_model))
+            self._limits[key] = limit
+        return limit
+
+    def acquire(self, provider, model=None, timeout=DEFAULT_ACQUIRE_TIMEOUT):
+        """
+        Block until both the provider and model budgets admit a request.
+
+        Raises:
+            RateLimitTimeout: if no permit was granted within timeout seconds
+        """
+        deadline = time.monotonic() + timeout
+        ticket = object()
+        waited = False
+
+        with self._cond:
+            limits = [self._get(provider, False)]
+            queue_key = provider
+            if model:
+                queue_key = f"{provider}:{model}"
+                limits.append(self._get(queue_key, True))
+            queue = self._queues.setdefault(queue_key, deque())
+            queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = 0.5
+                    if queue[0] is ticket:
+                        waits = [limit.wait_time(now) for limit in limits]
+                        if all(w == 0 for w in waits):
+                            for limit in limits:
+                                limit.take()
+                            break
+                        known = [w for w in waits if w]
+                        if known:
+                            delay = max(known)
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise RateLimitTimeout(
+                            f"Rate limit: no capacity for {queue_key} after {timeout:g}s"
+                        )
+                    waited = True
+                    self._cond.wait(min(delay, remaining))
+            finally:
+                queue.remove(ticket)
+                self._cond.notify_all()
+
+        if waited:
+            log.debug("[RateLimit] %s admitted after %.2fs queueing", queue_key,
+                      timeout - (deadline - time.monotonic()))
+        return Permit(self, limits)
+
+    def _release(self, limits, status, retry_after):
+        now = time.monotonic()
+        with self._cond:
+            # A throttled model pauses only its own queue; the provider window still shrinks
+            for i, limit in enumerate(limits):
+                limit.release(status, retry_after, now, pause=(i == len(limits) - 1))
+            self._cond.notify_all()
+
+    def stats(self):
+        """Current state per key: {key: {limit, in_flight, tokens, paused_for}}."""
+        now = time.monotonic()
+        with self._cond:
+            return {key: limit.snapshot(now) for key, limit in self._limits.items()}
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """The shared RateLimiter, built from config.RATE_LIMITS on first use."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                try:
+                    from config import RATE_LIMITS
+                except ImportError:
+                    RATE_LIMITS = {}
+                _limiter = RateLimiter(RATE_LIMITS)
+    return _limiter
+
+
+def rate_limited(provider, model=None, timeout=DEFAULT_ACQUIRE_TIMEOUT):
+    """Acquire a permit from the shared limiter (use as a context manager)."""
+    return get_rate_limiter().acquire(provider, model, timeout=timeout)
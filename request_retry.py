@@ -0,0 +1,264 @@
+# request_retry.py
+"""
+Retry, hedging and fallback building blocks for the model API calls.
+
+call_openrouter_api used to retry once after a fixed sleep and otherwise hand
+an error string to the transcript, so the slowest/flakiest model set the tail
+latency of every round. This module holds the policy side of its call
+pipeline:
+
+- classify_status / classify_exception map a failure to an error class
+- RETRY_POLICIES gives each class its own retry budget, backoff curve and
+  whether falling back to another model can help
+- backoff_delay: exponential backoff with full jitter (honours Retry-After)
+- hedged_call: starts a duplicate streaming request when the first one hasn't
+  produced a chunk within the hedge delay; the first to stream wins
+- fallback_models: ordered alternates for a model id from the same provider
+  group in config.AI_MODELS (or config.MODEL_FALLBACKS)
+- model_health: consecutive-failure tracking across calls, so a model that
+  keeps failing goes straight to its fallbacks instead of burning retries
+"""
+
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+
+from app_logging import get_logger
+from rate_limiter import RateLimitTimeout
+
+log = get_logger("request_retry")
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How to handle one class of failure."""
+    max_retries: int        # Retries on the same model before giving up on it
+    base_delay: float = 1.0  # First backoff step (seconds)
+    max_delay: float = 30.0  # Backoff ceiling (seconds)
+    fallback: bool = True    # Whether another model could succeed where this one failed
+
+
+# Error class -> policy. Keys are what classify_status/classify_exception return.
+RETRY_POLICIES = {
+    "throttled": RetryPolicy(max_retries=3, base_delay=2.0, max_delay=30.0),
+    "server": RetryPolicy(max_retries=2, base_delay=1.0, max_delay=15.0),
+    "timeout": RetryPolicy(max_retries=1, base_delay=1.0, max_delay=10.0),
+    "network": RetryPolicy(max_retries=2, base_delay=0.5, max_delay=8.0),
+    "empty": RetryPolicy(max_retries=1, base_delay=1.0, max_delay=4.0),
+    "not_found": RetryPolicy(max_retries=0),
+    "queue_timeout": RetryPolicy(max_retries=0),
+    "no_images": RetryPolicy(max_retries=0),  # Handled by retrying without images
+    "auth": RetryPolicy(max_retries=0, fallback=False),
+    "bad_request": RetryPolicy(max_retries=0, fallback=False),
+    "unknown": RetryPolicy(max_retries=1, base_delay=1.0, max_delay=5.0),
+}
+
+# A model with this many failed calls in a row is "degraded" for DEGRADED_COOLDOWN
+# seconds: it gets one attempt per call, then its fallbacks are used
+DEGRADED_AFTER = 3
+DEGRADED_COOLDOWN = 300
+
+
+def classify_status(status_code, error_text=""):
+    """Map an HTTP error response to an error class."""
+    text = (error_text or "").lower()
+    if status_code == 429:
+        return "throttled"
+    if status_code in (500, 502, 503, 504, 520, 524, 529):
+        return "server"
+    if status_code == 408:
+        return "timeout"
+    if status_code == 404 and "support image" in text:
+        return "no_images"
+    if status_code == 404:
+        return "not_found"
+    if status_code in (401, 402, 403):
+        return "auth"
+    if status_code in (400, 413, 422):
+        return "bad_request"
+    return "unknown"
+
+
+def classify_exception(exc):
+    """Map an exception raised during a call to an error class."""
+    if isinstance(exc, RateLimitTimeout):
+        return "queue_timeout"
+    if isinstance(exc, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(exc, requests.exceptions.RequestException):
+        return "network"
+    return "unknown"
+
+
+def backoff_delay(retry_index, policy, retry_after=None):
+    """Exponential backoff with full jitter; never shorter than Retry-After."""
+    ceiling = min(policy.max_delay, policy.base_delay * (2 ** retry_index))
+    delay = random.uniform(0, ceiling)
+    if retry_after:
+        delay = max(delay, min(retry_after, policy.max_delay * 2))
+    return delay
+
+
+# =============================================================================
+# Hedged requests
+# =============================================================================
+
+class HedgeRace:
+    """Shared by the attempts of one hedged call: the first to stream output wins."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._responses = {}
+        self.winner = None
+        self.first_chunk = threading.Event()
+
+    def register(self, attempt, response):
+        """Track an attempt's open response so a winner can close it. False if already lost."""
+        with self._lock:
+            if self.winner is not None and self.winner != attempt:
+                return False
+            self._responses[attempt] = response
+            return True
+
+    def claim(self, attempt):
+        """Called on an attempt's first chunk. True if it may stream to the caller."""
+        with self._lock:
+            if self.winner is None:
+                self.winner = attempt
+                losers = [r for a, r in self._responses.items() if a != attempt]
+                self.first_chunk.set()
+            else:
+                return self.winner == attempt
+        for response in losers:
+            try:
+                response.close()
+            except Exception:
+                pass
+        return True
+
+    def lost(self, attempt):
+        return self.winner is not None and self.winner != attempt
+
+
+def hedged_call(fn, hedge_after, max_hedges=1):
+    """
+    Run fn(race, attempt_index) and start up to max_hedges duplicates if no
+    attempt has streamed a chunk after hedge_after seconds.
+
+    fn must call race.register() with its open response and race.claim() on its
+    first chunk, and give up once race.lost() is True.
+
+    Returns:
+        (attempt_index, result, hedged). result is whatever fn returned or the
+        exception it raised. Without a winner, the primary's result is returned.
+    """
+    race = HedgeRace()
+    results = queue.Queue()
+
+    def runner(index):
+        try:
+            outcome = fn(race, index)
+        except Exception as e:
+            outcome = e
+        results.put((index, outcome))
+
+    def launch(index):
+        threading.Thread(target=runner, args=(index,), name=f"hedge-{index}", daemon=True).start()
+
+    launch(0)
+    launched = 1
+    pending = 1
+    outcomes = {}
+    next_hedge = time.monotonic() + hedge_after
+
+    while pending:
+        timeout = None
+        if launched <= max_hedges and not race.first_chunk.is_set():
+            timeout = max(0.0, next_hedge - time.monotonic())
+        try:
+            index, outcome = results.get(timeout=timeout)
+        except queue.Empty:
+            if not race.first_chunk.is_set():
+                log.info("[Hedge] No output after %.1fs, starting hedge request #%d", hedge_after, launched)
+                launch(launched)
+                launched += 1
+                pending += 1
+                next_hedge = time.monotonic() + hedge_after
+            continue
+        pending -= 1
+        outcomes[index] = outcome
+        if race.winner == index:
+            return index, outcome, launched > 1
+
+    if race.winner is not None and race.winner in outcomes:
+        return race.winner, outcomes[race.winner], launched > 1
+    return 0, outcomes[0], launched > 1
+
+
+# =============================================================================
+# Fallback routing
+# =============================================================================
+
+def fallback_models(model_id, limit=2):
+    """
+    Ordered alternates for model_id.
+
+    config.MODEL_FALLBACKS wins if it lists the model. Otherwise the other chat
+    models of the same tier/provider group in AI_MODELS are used, starting with
+    the ones listed after it (older siblings) and wrapping around.
+    """
+    try:
+        from config import AI_MODELS, MODEL_FALLBACKS
+    except ImportError:
+        return []
+
+    if model_id in MODEL_FALLBACKS:
+        return [m for m in MODEL_FALLBACKS[model_id] if m != model_id][:limit]
+
+    for providers in AI_MODELS.values():
+        for models in providers.values():
+            ids = list(dict.fromkeys(models.values()))
+            if model_id not in ids:
+                continue
+            pos = ids.index(model_id)
+            ordered = ids[pos + 1:] + ids[:pos]
+            return [m for m in ordered if _is_chat_model(m)][:limit]
+    return []
+
+
+def _is_chat_model(model_id):
+    """Image/video generators can't stand in for a conversation model."""
+    lowered = model_id.lower()
+    return not (lowered.startswith("sora") or "image" in lowered or "flux" in lowered)
+
+
+class ModelHealth:
+    """Consecutive failed calls per model, shared across turns, branches and judges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._failures = {}  # model_id -> (consecutive failures, last failure time)
+
+    def record_success(self, model_id):
+        with self._lock:
+            self._failures.pop(model_id, None)
+
+    def record_failure(self, model_id):
+        with self._lock:
+            count, _ = self._failures.get(model_id, (0, 0.0))
+            self._failures[model_id] = (count + 1, time.monotonic())
+            if count + 1 == DEGRADED_AFTER:
+                log.warning("[Fallback] %s failed %d calls in a row, preferring fallbacks for %ds",
+                            model_id, DEGRADED_AFTER, DEGRADED_COOLDOWN)
+
+    def is_degraded(self, model_id):
+        with self._lock:
+            count, last = self._failures.get(model_id, (0, 0.0))
+        return count >= DEGRADED_AFTER and time.monotonic() - last < DEGRADED_COOLDOWN
+
+
+model_health = ModelHealth()
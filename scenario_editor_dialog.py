@@ -248,7 +248,7 @@ class ScenarioEditorDialog(QDialog):
         return layout
 
     def _load_scenarios(self):
-        """Load scenarios from config.py."""
+        """Load scenarios from the scenario store."""
         try:
             self.scenarios = ScenarioManager.load_scenarios()
             self._populate_scenario_list()
@@ -470,7 +470,7 @@ class ScenarioEditorDialog(QDialog):
         self.modified = True
 
     def _on_save(self):
-        """Save all scenarios to config.py."""
+        """Save changed scenarios to the scenario store."""
         # Update current scenario from editor before saving
         if self.current_scenario_name:
             new_name, prompts = self._get_current_editor_data()
@@ -502,14 +502,14 @@ class ScenarioEditorDialog(QDialog):
             )
             return
 
-        # Save to config.py
+        # Only scenarios that were added, edited, renamed or deleted are written
         success, message = ScenarioManager.save_scenarios(self.scenarios)
 
         if success:
             QMessageBox.information(
                 self,
                 "Success",
-                f"{message}\n\nRestart the application to use updated scenarios."
+                message
             )
             self.modified = False
             self.accept()  # Close dialog with success
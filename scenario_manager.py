@@ -1,94 +1,58 @@
 """
-Scenario Manager - Business logic for managing conversation scenarios in config.py
-
-Handles CRUDR operations (Create, Read, Update, Delete, Rename) for SYSTEM_PROMPT_PAIRS
-in config.py with safe file operations and automatic backups.
+Scenario Manager - Business logic for managing conversation scenarios
+
+Handles CRUDR operations (Create, Read, Update, Delete, Rename) for scenarios
+(SYSTEM_PROMPT_PAIRS) and starting prompts (STARTING_PROMPTS). Both are kept
+in scenarios.db (see scenario_store.py), seeded from the dicts in config.py;
+single-record operations write a single row. config.SYSTEM_PROMPT_PAIRS and
+STARTING_PROMPTS are live views of the store, so saved changes take effect
+without a restart.
 """
 
-import os
-import ast
-import shutil
-from datetime import datetime
+import sys
 from typing import Dict, List, Tuple, Optional
 
+from scenario_store import get_scenario_store, SCENARIO, STARTING_PROMPT
+
 
 class ScenarioValidationError(Exception):
     """Raised when scenario validation fails."""
     pass
 
 
+def _sync_config(attr: str, values: Dict) -> None:
+    """Update an already-imported config dict in place (other modules hold references to it).
+
+    A no-op for the StoreViews config.py normally exports - they read the store directly.
+    """
+    config = sys.modules.get("config")
+    target = getattr(config, attr, None) if config is not None else None
+    if isinstance(target, dict):
+        target.clear()
+        target.update(values)
+
+
 class ScenarioManager:
     """Manages reading and writing scenario configurations."""
 
-    CONFIG_PATH = "config.py"
-
     # Required AI slots for each scenario
     REQUIRED_SLOTS = ["AI-1", "AI-2", "AI-3", "AI-4", "AI-5"]
 
     @classmethod
     def load_scenarios(cls) -> Dict[str, Dict[str, str]]:
         """
-        Load SYSTEM_PROMPT_PAIRS from config.py using AST parsing.
+        Load all scenarios from the scenario store.
 
         Returns:
             Dict mapping scenario names to their AI prompt dictionaries
-
-        Raises:
-            FileNotFoundError: If config.py doesn't exist
-            ValueError: If SYSTEM_PROMPT_PAIRS can't be parsed
         """
-        if not os.path.exists(cls.CONFIG_PATH):
-            raise FileNotFoundError(f"{cls.CONFIG_PATH} not found")
+        return get_scenario_store().get_all(SCENARIO)
 
-        with open(cls.CONFIG_PATH, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Parse the file as AST
-        try:
-            tree = ast.parse(content)
-        except SyntaxError as e:
-            raise ValueError(f"config.py has syntax errors: {e}")
-
-        # Find the SYSTEM_PROMPT_PAIRS assignment
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name) and target.id == "SYSTEM_PROMPT_PAIRS":
-                        # Extract the dictionary literal from the AST node
-                        # Get the text of just the value part
-                        start_line = node.value.lineno
-                        end_line = node.value.end_lineno
-                        start_col = node.value.col_offset
-                        end_col = node.value.end_col_offset
-
-                        # Extract those lines
-                        lines = content.split('\n')
-                        if start_line == end_line:
-                            dict_text = lines[start_line - 1][start_col:end_col]
-                        else:
-                            dict_lines = []
-                            for line_num in range(start_line, end_line + 1):
-                                line = lines[line_num - 1]
-                                if line_num == start_line:
-                                    dict_lines.append(line[start_col:])
-                                elif line_num == end_line:
-                                    dict_lines.append(line[:end_col])
-                                else:
-                                    dict_lines.append(line)
-                            dict_text = '\n'.join(dict_lines)
-
-                        # Parse the dictionary literal
-                        try:
-                            scenarios = ast.literal_eval(dict_text)
-                        except (SyntaxError, ValueError) as e:
-                            raise ValueError(f"Failed to parse SYSTEM_PROMPT_PAIRS value: {e}")
-
-                        if not isinstance(scenarios, dict):
-                            raise ValueError("SYSTEM_PROMPT_PAIRS is not a dictionary")
-
-                        return scenarios
-
-        raise ValueError("SYSTEM_PROMPT_PAIRS not found in config.py")
+    @classmethod
+    def load_scenario(cls, name: str) -> Optional[Dict[str, str]]:
+        """Load a single scenario, or None if it doesn't exist."""
+        prompts = get_scenario_store().get(SCENARIO, name)
+        return dict(prompts) if prompts is not None else None
 
     @classmethod
     def validate_scenario(cls, name: str, prompts: Dict[str, str]) -> Tuple[bool, Optional[str]]:
@@ -106,10 +70,6 @@ class ScenarioManager:
         if not name or not name.strip():
             return False, "Scenario name cannot be empty"
 
-        # Check for problematic characters in name
-        if '"' in name and "'" in name:
-            return False, "Scenario name cannot contain both single and double quotes"
-
         # Check all required slots are present
         if not isinstance(prompts, dict):
             return False, "Prompts must be a dictionary"
@@ -139,11 +99,6 @@ class ScenarioManager:
         if not scenarios:
             return False, "Must have at least one scenario"
 
-        # Check for duplicate names (case-sensitive check)
-        names = list(scenarios.keys())
-        if len(names) != len(set(names)):
-            return False, "Duplicate scenario names found"
-
         # Validate each scenario
         for name, prompts in scenarios.items():
             is_valid, error = cls.validate_scenario(name, prompts)
@@ -155,137 +110,68 @@ class ScenarioManager:
     @classmethod
     def create_backup(cls) -> str:
         """
-        Create a timestamped backup of config.py.
+        Create a timestamped backup of the scenario store.
 
         Returns:
             Path to the backup file
-
-        Raises:
-            FileNotFoundError: If config.py doesn't exist
         """
-        if not os.path.exists(cls.CONFIG_PATH):
-            raise FileNotFoundError(f"{cls.CONFIG_PATH} not found")
-
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        backup_path = f"{cls.CONFIG_PATH}.backup-{timestamp}"
-
-        shutil.copy2(cls.CONFIG_PATH, backup_path)
-        return backup_path
+        return get_scenario_store().backup()
 
     @classmethod
-    def generate_config_content(cls, scenarios: Dict[str, Dict[str, str]]) -> str:
+    def save_scenario(cls, name: str, prompts: Dict[str, str]) -> Tuple[bool, Optional[str]]:
         """
-        Generate new config.py content with updated scenarios.
-
-        This uses a template approach: reads the original config.py,
-        replaces only the SYSTEM_PROMPT_PAIRS section, and preserves
-        everything else.
-
-        Args:
-            scenarios: Dictionary of scenarios to write
+        Create or update a single scenario.
 
         Returns:
-            Complete config.py content as a string
+            Tuple of (success, error_message)
         """
-        # Read original config
-        with open(cls.CONFIG_PATH, 'r', encoding='utf-8') as f:
-            original_content = f.read()
-
-        # Use AST to find where SYSTEM_PROMPT_PAIRS ends
-        # This is more reliable than manual parsing
+        is_valid, error = cls.validate_scenario(name, prompts)
+        if not is_valid:
+            return False, error
         try:
-            tree = ast.parse(original_content)
-        except SyntaxError as e:
-            raise ValueError(f"config.py has syntax errors: {e}")
-
-        # Find the SYSTEM_PROMPT_PAIRS assignment in the AST
-        start_idx = None
-        end_idx = None
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name) and target.id == "SYSTEM_PROMPT_PAIRS":
-                        # Found it! Get line and column info
-                        start_line = target.lineno
-                        end_line = node.end_lineno
-
-                        # Convert line numbers to character positions
-                        lines = original_content.split('\n')
-
-                        # Start is at the beginning of the assignment line
-                        start_idx = sum(len(line) + 1 for line in lines[:start_line-1])
-
-                        # End is at the end of the last line of the assignment
-                        end_idx = sum(len(line) + 1 for line in lines[:end_line])
-
-                        break
-
-        if start_idx is None or end_idx is None:
-            raise ValueError("Could not locate SYSTEM_PROMPT_PAIRS in config.py")
-
-        # Generate new SYSTEM_PROMPT_PAIRS content
-        lines = ["SYSTEM_PROMPT_PAIRS = {"]
-        lines.append("    # this is a basic system prompt for a conversation between two AIs. Experiment with different prompts to see how they affect the conversation. Add new prompts to the library to use them in the GUI.")
-        lines.append("    ")
-
-        # Sort scenarios by name for consistent ordering
-        sorted_scenarios = sorted(scenarios.items())
-
-        for idx, (scenario_name, prompts) in enumerate(sorted_scenarios):
-            # Determine quote style for scenario name
-            if '"' in scenario_name:
-                name_quote = "'"
-            else:
-                name_quote = '"'
-
-            lines.append(f'    {name_quote}{scenario_name}{name_quote}: {{')
-
-            # Write each AI slot
-            for slot in cls.REQUIRED_SLOTS:
-                prompt_text = prompts.get(slot, "")
-
-                # For triple-quoted strings, we need to handle:
-                # 1. Backslashes (\ -> \\)
-                # 2. Triple quotes (""" -> \"\"\")
-                # 3. String ending with " (would create """" at the end)
-
-                escaped_prompt = prompt_text.replace('\\', '\\\\').replace('"""', '\\"""')
-
-                # If string ends with one or two quotes, escape the last one
-                # to prevent creating """ " or """" at the end
-                if escaped_prompt.endswith('"'):
-                    escaped_prompt = escaped_prompt[:-1] + '\\"'
-                elif escaped_prompt.endswith('""'):
-                    escaped_prompt = escaped_prompt[:-2] + '"\\"'
-
-                lines.append(f'        "{slot}": """{escaped_prompt}""",')
-
-                # Add blank line after each AI except the last
-                if slot != cls.REQUIRED_SLOTS[-1]:
-                    lines.append("        ")
-
-            # Close scenario dict
-            if idx < len(sorted_scenarios) - 1:
-                lines.append("    },")
-                lines.append("    ")
-            else:
-                lines.append("    }")
-
-        lines.append("}")
-
-        new_dict_content = "\n".join(lines)
+            store = get_scenario_store()
+            store.put(SCENARIO, name, dict(prompts))
+            _sync_config("SYSTEM_PROMPT_PAIRS", store.get_all(SCENARIO))
+            return True, f"Scenario '{name}' saved"
+        except Exception as e:
+            return False, f"Failed to save scenario: {str(e)}"
 
-        # Construct final content: before + new dict + after
-        before = original_content[:start_idx]
-        after = original_content[end_idx:]
+    @classmethod
+    def delete_scenario(cls, name: str) -> Tuple[bool, Optional[str]]:
+        """Delete a single scenario (the last one can't be deleted)."""
+        try:
+            store = get_scenario_store()
+            scenarios = store.get_all(SCENARIO)
+            if name not in scenarios:
+                return False, f"Scenario '{name}' not found"
+            if len(scenarios) == 1:
+                return False, "Must have at least one scenario"
+            store.delete(SCENARIO, name)
+            _sync_config("SYSTEM_PROMPT_PAIRS", store.get_all(SCENARIO))
+            return True, f"Scenario '{name}' deleted"
+        except Exception as e:
+            return False, f"Failed to delete scenario: {str(e)}"
 
-        return before + new_dict_content + after
+    @classmethod
+    def rename_scenario(cls, old_name: str, new_name: str) -> Tuple[bool, Optional[str]]:
+        """Rename a single scenario, keeping its position."""
+        if not new_name or not new_name.strip():
+            return False, "Scenario name cannot be empty"
+        try:
+            store = get_scenario_store()
+            if store.get(SCENARIO, old_name) is None:
+                return False, f"Scenario '{old_name}' not found"
+            if not store.rename(SCENARIO, old_name, new_name):
+                return False, f"Scenario '{new_name}' already exists"
+            _sync_config("SYSTEM_PROMPT_PAIRS", store.get_all(SCENARIO))
+            return True, f"Scenario renamed to '{new_name}'"
+        except Exception as e:
+            return False, f"Failed to rename scenario: {str(e)}"
 
     @classmethod
     def save_scenarios(cls, scenarios: Dict[str, Dict[str, str]], create_backup: bool = True) -> Tuple[bool, Optional[str]]:
         """
-        Save scenarios to config.py with validation and atomic write.
+        Save a full set of scenarios, writing only the ones that changed.
 
         Args:
             scenarios: Dictionary of scenarios to save
@@ -304,30 +190,9 @@ class ScenarioManager:
             if create_backup:
                 backup_path = cls.create_backup()
 
-            # Generate new content
-            new_content = cls.generate_config_content(scenarios)
-
-            # Validate the generated content is valid Python
-            try:
-                ast.parse(new_content)
-            except SyntaxError as e:
-                return False, f"Generated config has invalid Python syntax: {e}"
-
-            # Atomic write: write to temp file first
-            temp_path = f"{cls.CONFIG_PATH}.tmp"
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-
-            # Verify temp file can be parsed
-            try:
-                with open(temp_path, 'r', encoding='utf-8') as f:
-                    ast.parse(f.read())
-            except Exception as e:
-                os.remove(temp_path)
-                return False, f"Failed to validate temp config: {e}"
-
-            # Replace original with temp file
-            os.replace(temp_path, cls.CONFIG_PATH)
+            store = get_scenario_store()
+            store.replace_all(SCENARIO, scenarios)
+            _sync_config("SYSTEM_PROMPT_PAIRS", store.get_all(SCENARIO))
 
             backup_msg = f" (backup: {backup_path})" if create_backup else ""
             return True, f"Scenarios saved successfully{backup_msg}"
@@ -344,179 +209,38 @@ class ScenarioManager:
             List of scenario names, sorted alphabetically
         """
         try:
-            scenarios = cls.load_scenarios()
-            return sorted(scenarios.keys())
+            return sorted(cls.load_scenarios().keys())
         except Exception:
             return []
 
 
 class StartingPromptManager:
-    """Manages CRUD operations for starting prompts in config.py"""
-
-    CONFIG_PATH = "config.py"
+    """Manages CRUD operations for starting prompts"""
 
     @classmethod
     def load_prompts(cls) -> Dict[str, str]:
         """
-        Load STARTING_PROMPTS from config.py using AST parsing.
+        Load all starting prompts from the scenario store.
 
         Returns:
             Dict mapping prompt names to prompt text
-
-        Raises:
-            FileNotFoundError: If config.py doesn't exist
-            ValueError: If STARTING_PROMPTS can't be parsed
         """
-        if not os.path.exists(cls.CONFIG_PATH):
-            raise FileNotFoundError(f"{cls.CONFIG_PATH} not found")
-
-        with open(cls.CONFIG_PATH, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Parse the file as AST
-        try:
-            tree = ast.parse(content)
-        except SyntaxError as e:
-            raise ValueError(f"config.py has syntax errors: {e}")
-
-        # Find the STARTING_PROMPTS assignment
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name) and target.id == "STARTING_PROMPTS":
-                        # Extract the dictionary literal
-                        start_line = node.value.lineno
-                        end_line = node.value.end_lineno
-                        start_col = node.value.col_offset
-                        end_col = node.value.end_col_offset
-
-                        # Extract those lines
-                        lines = content.split('\n')
-                        if start_line == end_line:
-                            dict_text = lines[start_line - 1][start_col:end_col]
-                        else:
-                            dict_lines = []
-                            for line_num in range(start_line, end_line + 1):
-                                line = lines[line_num - 1]
-                                if line_num == start_line:
-                                    dict_lines.append(line[start_col:])
-                                elif line_num == end_line:
-                                    dict_lines.append(line[:end_col])
-                                else:
-                                    dict_lines.append(line)
-                            dict_text = '\n'.join(dict_lines)
-
-                        # Parse the dictionary literal
-                        try:
-                            prompts = ast.literal_eval(dict_text)
-                        except (SyntaxError, ValueError) as e:
-                            raise ValueError(f"Failed to parse STARTING_PROMPTS value: {e}")
-
-                        if not isinstance(prompts, dict):
-                            raise ValueError("STARTING_PROMPTS is not a dictionary")
-
-                        return prompts
-
-        raise ValueError("STARTING_PROMPTS not found in config.py")
+        return get_scenario_store().get_all(STARTING_PROMPT)
 
     @classmethod
     def create_backup(cls) -> str:
         """
-        Create a timestamped backup of config.py.
+        Create a timestamped backup of the scenario store.
 
         Returns:
             Path to the backup file
         """
-        if not os.path.exists(cls.CONFIG_PATH):
-            raise FileNotFoundError(f"{cls.CONFIG_PATH} not found")
-
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        backup_path = f"{cls.CONFIG_PATH}.backup-{timestamp}"
-
-        shutil.copy2(cls.CONFIG_PATH, backup_path)
-        return backup_path
-
-    @classmethod
-    def generate_config_content(cls, prompts: Dict[str, str]) -> str:
-        """
-        Generate new config.py content with updated starting prompts.
-
-        Args:
-            prompts: Dictionary of starting prompts to write
-
-        Returns:
-            Complete config.py content as a string
-        """
-        # Read original config
-        with open(cls.CONFIG_PATH, 'r', encoding='utf-8') as f:
-            original_content = f.read()
-
-        # Use AST to find where STARTING_PROMPTS is
-        try:
-            tree = ast.parse(original_content)
-        except SyntaxError as e:
-            raise ValueError(f"config.py has syntax errors: {e}")
-
-        # Find the STARTING_PROMPTS assignment
-        start_idx = None
-        end_idx = None
-
-        for node in ast.walk(tree):
-            if isinstance(node, ast.Assign):
-                for target in node.targets:
-                    if isinstance(target, ast.Name) and target.id == "STARTING_PROMPTS":
-                        start_line = target.lineno
-                        end_line = node.end_lineno
-
-                        # Convert line numbers to character positions
-                        lines = original_content.split('\n')
-
-                        # Start at beginning of assignment line
-                        start_idx = sum(len(line) + 1 for line in lines[:start_line-1])
-
-                        # End at end of last line
-                        end_idx = sum(len(line) + 1 for line in lines[:end_line])
-
-                        break
-
-        if start_idx is None or end_idx is None:
-            raise ValueError("Could not locate STARTING_PROMPTS in config.py")
-
-        # Generate new STARTING_PROMPTS content
-        lines = ["# Starting prompts for conversations"]
-        lines.append("STARTING_PROMPTS = {")
-
-        # Sort prompts by name for consistent ordering
-        sorted_prompts = sorted(prompts.items())
-
-        for idx, (name, text) in enumerate(sorted_prompts):
-            # Determine quote style for name
-            if '"' in name:
-                name_quote = "'"
-            else:
-                name_quote = '"'
-
-            # Escape the text for Python string literal
-            # Use double quotes for text values
-            escaped_text = text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
-
-            comma = "," if idx < len(sorted_prompts) - 1 else ""
-            lines.append(f'    {name_quote}{name}{name_quote}: "{escaped_text}"{comma}')
-
-        lines.append("}")
-
-        new_dict_content = "\n".join(lines)
-
-        # Construct final content
-        before = original_content[:start_idx]
-        after = original_content[end_idx:]
-
-        return before + new_dict_content + after
+        return get_scenario_store().backup()
 
     @classmethod
     def save_prompts(cls, prompts: Dict[str, str], create_backup: bool = True) -> Tuple[bool, Optional[str]]:
         """
-        Save starting prompts to config.py with validation and atomic write.
+        Save a full set of starting prompts, writing only the ones that changed.
 
         Args:
             prompts: Dictionary of prompts to save
@@ -540,30 +264,9 @@ class StartingPromptManager:
             if create_backup:
                 backup_path = cls.create_backup()
 
-            # Generate new content
-            new_content = cls.generate_config_content(prompts)
-
-            # Validate the generated content is valid Python
-            try:
-                ast.parse(new_content)
-            except SyntaxError as e:
-                return False, f"Generated config has invalid Python syntax: {e}"
-
-            # Atomic write: write to temp file first
-            temp_path = f"{cls.CONFIG_PATH}.tmp"
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-
-            # Verify temp file can be parsed
-            try:
-                with open(temp_path, 'r', encoding='utf-8') as f:
-                    ast.parse(f.read())
-            except Exception as e:
-                os.remove(temp_path)
-                return False, f"Failed to validate temp config: {e}"
-
-            # Replace original with temp file
-            os.replace(temp_path, cls.CONFIG_PATH)
+            store = get_scenario_store()
+            store.replace_all(STARTING_PROMPT, prompts)
+            _sync_config("STARTING_PROMPTS", store.get_all(STARTING_PROMPT))
 
             backup_msg = f" (backup: {backup_path})" if create_backup else ""
             return True, f"Starting prompts saved successfully{backup_msg}"
@@ -572,26 +275,49 @@ class StartingPromptManager:
             return False, f"Failed to save starting prompts: {str(e)}"
 
     @classmethod
-    def add_prompt(cls, name: str, text: str) -> Tuple[bool, Optional[str]]:
-        """Add a new starting prompt."""
+    def save_prompt(cls, name: str, text: str, old_name: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """
+        Create or update one starting prompt, renaming it first if old_name is given.
+
+        Returns:
+            Tuple of (success, error_message)
+        """
+        if not name or not name.strip():
+            return False, "Prompt name cannot be empty"
+        if not isinstance(text, str):
+            return False, f"Prompt text for '{name}' must be a string"
         try:
-            prompts = cls.load_prompts()
-            if name in prompts:
-                return False, f"Prompt '{name}' already exists"
-            prompts[name] = text
-            return cls.save_prompts(prompts)
+            store = get_scenario_store()
+            if old_name and old_name != name:
+                if store.get(STARTING_PROMPT, name) is not None:
+                    return False, f"Prompt '{name}' already exists"
+                store.rename(STARTING_PROMPT, old_name, name)
+            store.put(STARTING_PROMPT, name, text)
+            _sync_config("STARTING_PROMPTS", store.get_all(STARTING_PROMPT))
+            return True, f"Starting prompt '{name}' saved"
         except Exception as e:
-            return False, str(e)
+            return False, f"Failed to save starting prompt: {str(e)}"
+
+    @classmethod
+    def add_prompt(cls, name: str, text: str) -> Tuple[bool, Optional[str]]:
+        """Add a new starting prompt."""
+        if get_scenario_store().get(STARTING_PROMPT, name) is not None:
+            return False, f"Prompt '{name}' already exists"
+        return cls.save_prompt(name, text)
 
     @classmethod
     def delete_prompt(cls, name: str) -> Tuple[bool, Optional[str]]:
         """Delete a starting prompt."""
         try:
-            prompts = cls.load_prompts()
+            store = get_scenario_store()
+            prompts = store.get_all(STARTING_PROMPT)
             if name not in prompts:
                 return False, f"Prompt '{name}' not found"
-            del prompts[name]
-            return cls.save_prompts(prompts)
+            if len(prompts) == 1:
+                return False, "Must have at least one starting prompt"
+            store.delete(STARTING_PROMPT, name)
+            _sync_config("STARTING_PROMPTS", store.get_all(STARTING_PROMPT))
+            return True, f"Starting prompt '{name}' deleted"
         except Exception as e:
             return False, str(e)
 
@@ -599,20 +325,12 @@ class StartingPromptManager:
     def rename_prompt(cls, old_name: str, new_name: str) -> Tuple[bool, Optional[str]]:
         """Rename a starting prompt."""
         try:
-            prompts = cls.load_prompts()
-            if old_name not in prompts:
+            store = get_scenario_store()
+            if store.get(STARTING_PROMPT, old_name) is None:
                 return False, f"Prompt '{old_name}' not found"
-            if new_name in prompts and new_name != old_name:
+            if not store.rename(STARTING_PROMPT, old_name, new_name):
                 return False, f"Prompt '{new_name}' already exists"
-
-            # Preserve order by rebuilding dict
-            new_prompts = {}
-            for k, v in prompts.items():
-                if k == old_name:
-                    new_prompts[new_name] = v
-                else:
-                    new_prompts[k] = v
-
-            return cls.save_prompts(new_prompts)
+            _sync_config("STARTING_PROMPTS", store.get_all(STARTING_PROMPT))
+            return True, f"Prompt renamed to '{new_name}'"
         except Exception as e:
             return False, str(e)
@@ -0,0 +1,331 @@
+# scenario_store.py
+"""
+Scenario and starting-prompt store (SQLite, stdlib only).
+
+Scenarios used to live only in config.py: ScenarioManager read and ast.parse'd
+the whole 1200-line file, sliced out SYSTEM_PROMPT_PAIRS and literal_eval'd
+it, and saving regenerated the Python source, parsed it twice and rewrote the
+file - for every edit of a single prompt. StartingPromptManager did the same
+for STARTING_PROMPTS. They now live in scenarios.db:
+
+- One `records` table keyed by (kind, name), values stored as JSON; adding,
+  changing, renaming or deleting one scenario is a single-row transaction
+- Reads come from an in-memory copy that is reloaded only when the database
+  file's mtime/size changed (another process or a restored backup)
+- config.py's dicts seed the store on first run (migration) and whenever an
+  entry there is added or edited later; entries deleted in the GUI stay
+  deleted unless their config.py text changes again
+- Seeding is lazy: config.py only registers its dicts (no file access at
+  import, so tools that import config never create or touch scenarios.db),
+  and config.SYSTEM_PROMPT_PAIRS / STARTING_PROMPTS are read-only StoreViews
+  that seed and read the store on first access
+
+Kinds: "scenario" ({"AI-1": ..., "AI-5": ...}) and "starting_prompt" (str).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from datetime import datetime
+from pathlib import Path
+
+STORE_PATH = Path(__file__).parent / "scenarios.db"
+
+SCENARIO = "scenario"
+STARTING_PROMPT = "starting_prompt"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (kind, name)
+);
+CREATE TABLE IF NOT EXISTS seeds (
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (kind, name)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _digest(value):
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()
+
+
+class ScenarioStore:
+    """Named records per kind with an mtime-validated in-memory cache."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._cache = None  # {kind: {name: value}} in insertion order
+        self._stamp = None  # (mtime_ns, size) of the file the cache was read from
+        self._initialized = False
+        self._defaults = {}  # kind -> defaults registered but not seeded yet
+
+    # ------------------------------------------------------------ internals
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=5)
+        if not self._initialized:
+            conn.executescript(_SCHEMA)
+            self._initialized = True
+        return conn
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _seed_pending(self):
+        """Seed defaults registered with register_defaults() (first store access only)."""
+        if self._defaults:
+            with self._lock:
+                pending, self._defaults = self._defaults, {}
+                for kind, defaults in pending.items():
+                    self.seed(kind, defaults)
+
+    def _records(self):
+        """The cached records, reloaded if the file changed underneath us."""
+        self._seed_pending()
+        stamp = self._file_stamp()
+        if self._cache is None or stamp != self._stamp:
+            conn = self._connect()
+            try:
+                rows = conn.execute("SELECT kind, name, value FROM records ORDER BY rowid").fetchall()
+            finally:
+                conn.close()
+            cache = {}
+            for kind, name, value in rows:
+                cache.setdefault(kind, {})[name] = json.loads(value)
+            self._cache = cache
+            self._stamp = self._file_stamp()
+        return self._cache
+
+    def _write(self, statements):
+        """Run [(sql, params), ...] in one transaction, then refresh the file stamp."""
+        self._seed_pending()
+        conn = self._connect()
+        try:
+            with conn:
+                for sql, params in statements:
+                    conn.execute(sql, params)
+        finally:
+            conn.close()
+        self._stamp = self._file_stamp()
+
+    @staticmethod
+    def _upsert(kind, name, value):
+        return (
+            "INSERT INTO records (kind, name, value, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(kind, name) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+            (kind, name, json.dumps(value, ensure_ascii=False), time.time()),
+        )
+
+    # ------------------------------------------------------------------ API
+
+    def get_all(self, kind):
+        """All records of a kind as a new {name: value} dict."""
+        with self._lock:
+            return dict(self._records().get(kind, {}))
+
+    def get(self, kind, name, default=None):
+        with self._lock:
+            return self._records().get(kind, {}).get(name, default)
+
+    def put(self, kind, name, value):
+        """Insert or replace one record."""
+        self.apply(kind, upserts={name: value})
+
+    def delete(self, kind, name):
+        """Delete one record. Returns False if it didn't exist."""
+        with self._lock:
+            if name not in self._records().get(kind, {}):
+                return False
+            self.apply(kind, deletes=[name])
+            return True
+
+    def rename(self, kind, old_name, new_name):
+        """Rename a record in place (keeps its position). Returns False if missing or taken."""
+        with self._lock:
+            records = self._records().get(kind, {})
+            if old_name not in records or (new_name in records and new_name != old_name):
+                return False
+            if new_name == old_name:
+                return True
+            self._write([(
+                "UPDATE records SET name = ?, updated_at = ? WHERE kind = ? AND name = ?",
+                (new_name, time.time(), kind, old_name),
+            )])
+            self._cache[kind] = {new_name if k == old_name else k: v for k, v in records.items()}
+            return True
+
+    def apply(self, kind, upserts=None, deletes=()):
+        """Upsert and delete several records of one kind in a single transaction."""
+        upserts = upserts or {}
+        with self._lock:
+            records = self._records().setdefault(kind, {})
+            statements = [self._upsert(kind, name, value) for name, value in upserts.items()]
+            statements += [("DELETE FROM records WHERE kind = ? AND name = ?", (kind, name)) for name in deletes]
+            if not statements:
+                return
+            self._write(statements)
+            for name in deletes:
+                records.pop(name, None)
+            records.update(upserts)
+
+    def replace_all(self, kind, values):
+        """
+        Make the stored records of a kind equal to values, writing only the
+        records that actually differ. Returns (changed, deleted) counts.
+        """
+        with self._lock:
+            current = self._records().get(kind, {})
+            upserts = {name: value for name, value in values.items() if current.get(name) != value}
+            deletes = [name for name in current if name not in values]
+            self.apply(kind, upserts, deletes)
+            return len(upserts), len(deletes)
+
+    def seed(self, kind, defaults):
+        """
+        Merge built-in defaults (the config.py dicts) into the store.
+
+        A default is written when it is new or its content changed since it
+        was last seeded; records the user deleted or edited are otherwise left
+        alone. Costs one meta lookup when the defaults haven't changed.
+        """
+        with self._lock:
+            overall = _digest(defaults)
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = ?", (f"seed:{kind}",)).fetchone()
+                if row and row[0] == overall:
+                    return 0
+                seeded = dict(conn.execute("SELECT name, digest FROM seeds WHERE kind = ?", (kind,)).fetchall())
+            finally:
+                conn.close()
+
+            statements = []
+            changed = {}
+            for name, value in defaults.items():
+                digest = _digest(value)
+                if seeded.get(name) == digest:
+                    continue
+                changed[name] = value
+                statements.append(self._upsert(kind, name, value))
+                statements.append((
+                    "INSERT OR REPLACE INTO seeds (kind, name, digest) VALUES (?, ?, ?)",
+                    (kind, name, digest),
+                ))
+            statements.append(("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (f"seed:{kind}", overall)))
+            self._write(statements)
+            if self._cache is not None:
+                self._cache.setdefault(kind, {}).update(changed)
+            return len(changed)
+
+    def register_defaults(self, kind, defaults):
+        """Have seed(kind, defaults) run on the first access to the store instead of now."""
+        with self._lock:
+            self._defaults[kind] = defaults
+
+    def backup(self):
+        """Copy the database to scenarios.db.backup-YYYYMMDD-HHMMSS. Returns the backup path."""
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        backup_path = f"{self.path}.backup-{timestamp}"
+        with self._lock:
+            self._seed_pending()
+            source = self._connect()
+            target = sqlite3.connect(backup_path)
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+        return backup_path
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_scenario_store():
+    """The shared ScenarioStore for scenarios.db."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ScenarioStore()
+    return _store
+
+
+_MISSING = object()
+
+
+class StoreView(Mapping):
+    """
+    Read-only live view of one kind of record, e.g. config.SYSTEM_PROMPT_PAIRS.
+
+    Reads go to the store (seeding it on first use), so edits made through
+    ScenarioManager show up without syncing. If the store can't be opened
+    the view serves the built-in defaults instead.
+    """
+
+    def __init__(self, kind, defaults):
+        self.kind = kind
+        self.defaults = defaults
+        self._failed = False
+
+    def _records(self):
+        if not self._failed:
+            try:
+                return get_scenario_store().get_all(self.kind)
+            except (sqlite3.Error, OSError, ValueError) as e:
+                print(f"[Config] Scenario store unavailable, using built-in {self.kind}s: {e}")
+                self._failed = True
+        return self.defaults
+
+    def __getitem__(self, name):
+        if not self._failed:
+            try:
+                value = get_scenario_store().get(self.kind, name, _MISSING)
+            except (sqlite3.Error, OSError, ValueError):
+                return self._records()[name]
+            if value is _MISSING:
+                raise KeyError(name)
+            return value
+        return self.defaults[name]
+
+    def __iter__(self):
+        return iter(self._records())
+
+    def __len__(self):
+        return len(self._records())
+
+    def __repr__(self):
+        return f"StoreView({self.kind!r}, {len(self)} records)"
+
+
+def store_views(default_scenarios, default_prompts):
+    """
+    (scenarios, starting_prompts) StoreViews over the store, seeded from config.py's dicts on first access.
+
+    Called once from config.py at import time; touches no files.
+    """
+    store = get_scenario_store()
+    store.register_defaults(SCENARIO, default_scenarios)
+    store.register_defaults(STARTING_PROMPT, default_prompts)
+    return StoreView(SCENARIO, default_scenarios), StoreView(STARTING_PROMPT, default_prompts)
@@ -0,0 +1,269 @@
+# session_archive.py
+"""
+Machine-readable session records in exports and backups.
+
+Session exports and auto-backups (exports/backups/session_<timestamp>/)
+only held conversation.txt / .html renderings, which lose the scenario and
+the participant list and can't be turned back into messages reliably - so a
+session could only be evaluated by BackroomsBench while it was still open
+in the app.
+
+Each export folder now also gets session.json:
+
+    {"version": 1, "timestamp": "20260101_120000", "session_id": "20260101_113000",
+     "branch_id": null, "scenario": "...", "participants": ["Claude Opus 4.5", ...],
+     "messages": [...]}
+
+holding the dialogue messages (user and assistant turns, without branch
+indicators - the same selection the BackroomsBench menu action evaluates)
+with role, ai_name, model and content. Image parts keep their type but not
+their data, so the judge transcript rebuilt from the record matches the one
+made from the live conversation.
+
+session_id is the app session (LiminalBackroomsApp.session_timestamp) and
+branch_id the conversation within it (None = main). Auto-backup writes a new
+cumulative folder after every round, so one conversation has many snapshots;
+latest_snapshots() keeps the newest per (session_id, branch_id), and session
+key() names the conversation rather than the snapshot.
+
+load_session() reads a folder back, falling back to parsing conversation.txt
+for folders written before session.json existed (scenario unknown,
+participants taken from the speaker headers; a snapshot whose messages are
+a prefix of another's counts as superseded). find_sessions() lists the
+session folders under one or more roots; tools/backroomsbench_batch.py uses
+these to score the archive.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+from message_record import MessageKind, message_kind
+
+SESSION_FILE = "session.json"
+SESSION_VERSION = 2
+BACKUPS_DIR = os.path.join("exports", "backups")
+UNKNOWN_SCENARIO = "Unknown (archived)"
+
+# Speaker headers written by ConversationPane._get_conversation_as_text
+_HEADER_RE = re.compile(r"^(You|[^\n:()]{1,60}?(?: \(([^()\n]+)\))?):$")
+_SESSION_DIR_RE = re.compile(r"session_(\d{8}_\d{6})")
+_UNSAFE_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def dialogue_messages(conversation):
+    """The user / assistant turns of a conversation, without branch indicators."""
+    return [
+        msg for msg in conversation
+        if msg.get('role') in ('user', 'assistant') and message_kind(msg) is not MessageKind.BRANCH_INDICATOR
+    ]
+
+
+def _journal_content(content):
+    if not isinstance(content, list):
+        return content
+    parts = []
+    for part in content:
+        if not isinstance(part, dict):
+            continue
+        if part.get('type') == 'image':
+            parts.append({'type': 'image'})  # Data lives in images/, only its presence matters here
+        else:
+            parts.append(part)
+    return parts
+
+
+def journal_message(msg):
+    """A JSON-safe dict of a message's role, speaker and content."""
+    record = {'role': msg.get('role'), 'content': _journal_content(msg.get('content', ''))}
+    for key in ('ai_name', 'model', 'requested_model'):
+        if msg.get(key):
+            record[key] = msg[key]
+    return record
+
+
+def write_session_record(folder, conversation, scenario, participants, timestamp, session_id=None, branch_id=None):
+    """Write session.json for an export folder; returns its path."""
+    record = {
+        "version": SESSION_VERSION,
+        "timestamp": timestamp,
+        "session_id": session_id,
+        "branch_id": branch_id,
+        "scenario": scenario,
+        "participants": list(participants),
+        "messages": [journal_message(msg) for msg in dialogue_messages(conversation)],
+    }
+    path = os.path.join(folder, SESSION_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=1, ensure_ascii=False)
+    return path
+
+
+def parse_conversation_text(text):
+    """Messages from a conversation.txt export (best effort: a message line ending in ':' after a blank line reads as a header)."""
+    messages = []
+    current = None
+    body = []
+    previous_blank = True
+
+    def flush():
+        if current is not None:
+            current['content'] = '\n'.join(body).strip()
+            if current['content']:
+                messages.append(current)
+
+    for line in text.splitlines():
+        match = _HEADER_RE.match(line) if previous_blank else None
+        if match:
+            flush()
+            body = []
+            if match.group(1) == 'You':
+                current = {'role': 'user'}
+            else:
+                model = match.group(2)
+                ai_name = match.group(1)[:-len(model) - 3] if model else match.group(1)
+                current = {'role': 'assistant', 'ai_name': ai_name}
+                if model:
+                    current['model'] = model
+        elif previous_blank and line.startswith('[System: '):
+            # System notes aren't dialogue; drop them up to the next header
+            flush()
+            current, body = None, []
+        else:
+            body.append(line)
+        previous_blank = not line.strip()
+    flush()
+    return messages
+
+
+def _timestamp_of(folder):
+    match = _SESSION_DIR_RE.search(os.path.basename(os.path.normpath(folder)))
+    return match.group(1) if match else None
+
+
+def session_key(session_id, branch_id, name):
+    """Stable name of an archived conversation: its app session and branch, else the folder name."""
+    if not session_id:
+        return name
+    key = f"session_{session_id}"
+    if branch_id:
+        key += f"_branch_{branch_id}"
+    return _UNSAFE_RE.sub("_", key)
+
+
+def load_session(folder):
+    """
+    The archived session in folder, or None if it has neither session.json nor conversation.txt.
+
+    Returns a dict with name (the folder name), key (see session_key), path,
+    timestamp, session_id, branch_id, scenario, participants, messages and
+    source ("session.json" or "conversation.txt").
+    """
+    name = os.path.basename(os.path.normpath(folder))
+    record_path = os.path.join(folder, SESSION_FILE)
+    if os.path.exists(record_path):
+        with open(record_path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+        session_id, branch_id = record.get("session_id"), record.get("branch_id")
+        return {
+            "name": name,
+            "key": session_key(session_id, branch_id, name),
+            "path": folder,
+            "timestamp": record.get("timestamp") or _timestamp_of(folder) or name,
+            "session_id": session_id,
+            "branch_id": branch_id,
+            "scenario": record.get("scenario") or UNKNOWN_SCENARIO,
+            "participants": record.get("participants") or [],
+            "messages": record.get("messages") or [],
+            "source": SESSION_FILE,
+        }
+
+    text_path = os.path.join(folder, "conversation.txt")
+    if not os.path.exists(text_path):
+        return None
+    with open(text_path, 'r', encoding='utf-8') as f:
+        messages = parse_conversation_text(f.read())
+    participants = []
+    for msg in messages:
+        speaker = msg.get('model') or msg.get('ai_name')
+        if msg['role'] == 'assistant' and speaker not in participants:
+            participants.append(speaker)
+    return {
+        "name": name,
+        "key": name,
+        "path": folder,
+        "timestamp": _timestamp_of(folder) or name,
+        "session_id": None,
+        "branch_id": None,
+        "scenario": UNKNOWN_SCENARIO,
+        "participants": participants,
+        "messages": messages,
+        "source": "conversation.txt",
+    }
+
+
+def find_sessions(roots=None):
+    """Session folders under roots (default exports/backups), oldest first; a root may itself be a session folder."""
+    folders = []
+    for root in roots or [BACKUPS_DIR]:
+        if not os.path.isdir(root):
+            continue
+        if os.path.exists(os.path.join(root, SESSION_FILE)) or os.path.exists(os.path.join(root, "conversation.txt")):
+            folders.append(root)
+            continue
+        for entry in sorted(os.listdir(root)):
+            path = os.path.join(root, entry)
+            if os.path.isdir(path) and (os.path.exists(os.path.join(path, SESSION_FILE))
+                                        or os.path.exists(os.path.join(path, "conversation.txt"))):
+                folders.append(path)
+    return sorted(folders, key=lambda path: _timestamp_of(path) or os.path.basename(path))
+
+
+def _prefix_digests(messages):
+    """Digests of every prefix of messages (role, speaker and content), the empty prefix first."""
+    running = hashlib.sha256()
+    digests = [running.digest()]
+    for msg in messages:
+        # json.dumps escapes newlines, so one line per message keeps message boundaries unambiguous
+        line = json.dumps([msg.get('role'), msg.get('ai_name'), str(msg.get('content'))])
+        running.update(line.encode('utf-8') + b"\n")
+        digests.append(running.digest())
+    return digests
+
+
+def latest_snapshots(sessions):
+    """
+    The newest snapshot of each archived conversation, oldest conversation first.
+
+    Sessions with a session_id are grouped by key; older ones without are
+    dropped when their messages are a prefix of another such snapshot's
+    (sessions are expected oldest first, as find_sessions returns them).
+    """
+    latest = {}
+    legacy = []
+    for session in sessions:
+        if not session.get("session_id"):
+            legacy.append(session)
+            continue
+        current = latest.get(session["key"])
+        if current is None or (str(session["timestamp"]), len(session["messages"])) >= \
+                (str(current["timestamp"]), len(current["messages"])):
+            latest[session["key"]] = session
+
+    # For every message prefix, the (length, position) of the longest - then latest - snapshot
+    # starting with it; one pass over all messages instead of comparing every pair of snapshots
+    prefix_digests = [_prefix_digests(session["messages"]) for session in legacy]
+    newest = {}
+    for index, digests in enumerate(prefix_digests):
+        rank = (len(digests), index)
+        for digest in digests:
+            if newest.get(digest, rank) <= rank:
+                newest[digest] = rank
+    for index, session in enumerate(legacy):
+        digests = prefix_digests[index]
+        # A longer snapshot starting with these messages, or an identical later one
+        superseded = newest[digests[-1]] != (len(digests), index)
+        if not superseded and session["key"] not in latest:
+            latest[session["key"]] = session
+    return sorted(latest.values(), key=lambda session: str(session["timestamp"]))
@@ -606,25 +606,12 @@ class SettingsDialog(QDialog):
             return
 
         try:
-            prompts = StartingPromptManager.load_prompts()
-
             # Check if this is a rename
             current_item = self.prompt_list.currentItem()
             old_name = current_item.text() if current_item else None
 
-            if old_name and old_name != name and name in prompts:
-                QMessageBox.warning(self, "Error", f"A prompt named '{name}' already exists")
-                return
-
-            # Update or add the prompt
-            prompts[name] = text
-
-            # Remove old name if renamed
-            if old_name and old_name != name and old_name in prompts:
-                del prompts[old_name]
-
-            # Save to file
-            success, message = StartingPromptManager.save_prompts(prompts)
+            # Writes just this prompt (renaming it in place if the name changed)
+            success, message = StartingPromptManager.save_prompt(name, text, old_name=old_name)
 
             if success:
                 self.prompts_modified = True
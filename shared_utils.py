@@ -2,47 +2,89 @@
 
 import requests
 import logging
-import replicate
-import openai
 import time
 import json
 import os
+from collections.abc import Mapping
+from functools import partial
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
-from anthropic import Anthropic
-import base64
-from together import Together
-from openai import OpenAI
 import re
-from config import OUTPUTS_DIR
-try:
-    from bs4 import BeautifulSoup
-except ImportError:
-    print("BeautifulSoup not found. Please install it with 'pip install beautifulsoup4'")
-
-try:
-    from duckduckgo_search import DDGS
-except ImportError:
-    DDGS = None
-    print("DuckDuckGo Search not found. Install with: pip install duckduckgo-search")
+from lazy_import import lazy_module
+from config import OUTPUTS_DIR, OPENROUTER_HEDGE_AFTER, MAX_MODEL_FALLBACKS, IMAGE_PAYLOAD_BUDGET
+from app_logging import get_logger, is_debug, Sampler
+from rate_limiter import rate_limited, parse_retry_after
+from sse_stream import read_stream, openai_delta, anthropic_delta
+from prompt_caching import (
+    add_cache_breakpoints,
+    anthropic_cached_request,
+    anthropic_stream_usage,
+    needs_breakpoints,
+    parse_anthropic_usage,
+    parse_openai_usage,
+)
+from usage_ledger import get_usage_ledger, make_record
+from message_record import project
+from media_pipeline import get_media_pipeline
+from image_policy import policy_for, fit_images, get_image_variants
+from request_retry import (
+    RETRY_POLICIES,
+    backoff_delay,
+    classify_exception,
+    classify_status,
+    fallback_models,
+    hedged_call,
+    model_health,
+)
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Anthropic client with API key
-anthropic = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+log = get_logger("shared_utils")
+
+# The SDKs (anthropic, openai, replicate) and the search client are only needed
+# by a few rarely used paths and add noticeably to startup, so they are imported
+# the first time a model routed to them is used (see lazy_import.py). The main
+# call paths talk to the HTTP APIs with requests.
+anthropic_sdk = lazy_module("anthropic")
+openai = lazy_module("openai")
+replicate = lazy_module("replicate")
+
+_anthropic_client = None
+
+
+def get_anthropic_client():
+    """Anthropic SDK client, created on first use."""
+    global _anthropic_client
+    if _anthropic_client is None:
+        _anthropic_client = anthropic_sdk.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+    return _anthropic_client
+
+
+def _load_ddgs():
+    """DDGS search class from ddgs (or its old name duckduckgo_search), or None."""
+    try:
+        from ddgs import DDGS
+    except ImportError:
+        try:
+            from duckduckgo_search import DDGS
+        except ImportError:
+            return None
+    return DDGS
 
-# Initialize OpenAI client (optional - only needed for Sora video generation)
-openai_api_key = os.getenv('OPENAI_API_KEY')
-openai_client = OpenAI(api_key=openai_api_key) if openai_api_key else None
+# Per-message request summaries are sampled; long sessions send hundreds per turn
+_message_sample = Sampler(every=int(os.getenv("LOUNGE_LOG_SAMPLE_EVERY", "10")))
 
-def call_claude_api(prompt, messages, model_id, system_prompt=None, stream_callback=None, temperature=1.0):
+def call_claude_api(prompt, messages, model_id, system_prompt=None, stream_callback=None, temperature=1.0, metrics=None):
     """Call the Claude API with the given messages and prompt
     
     Args:
         stream_callback: Optional function(chunk: str) to call with each streaming token
         temperature: Sampling temperature (0-2, default 1.0)
+        metrics: Optional dict for the turn's metrics; token usage (including cached
+                 prompt tokens) is stored in metrics["usage"]. Its "kind" and "ai_name"
+                 keys tag the call's usage ledger entry (usage_ledger.py)
     """
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
@@ -61,9 +103,9 @@ def call_claude_api(prompt, messages, model_id, system_prompt=None, stream_callb
     # Set system if provided
     if system_prompt:
         payload["system"] = system_prompt
-        print(f"CLAUDE API USING SYSTEM PROMPT: {system_prompt}")
+        log.debug("Claude system prompt (%d chars): %.200s", len(system_prompt), system_prompt)
     
-    print(f"CLAUDE API USING TEMPERATURE: {temperature}")
+    log.debug("Claude temperature: %s", temperature)
     
     # Clean messages to remove duplicates
     filtered_messages = []
@@ -74,23 +116,13 @@ def call_claude_api(prompt, messages, model_id, system_prompt=None, stream_callb
         if msg.get("role") == "system":
             continue
             
-        # Get content - handle both string and list formats
-        content = msg.get("content", "")
-        
-        # For duplicate detection, use a hashable representation (always a string)
-        if isinstance(content, list):
-            # For image messages, create a hash based on text content only
-            text_parts = [part.get('text', '') for part in content if part.get('type') == 'text']
-            content_hash = ''.join(text_parts)
-        elif isinstance(content, str):
-            content_hash = content
-        else:
-            # For any other type, convert to string
-            content_hash = str(content) if content else ""
+        # For duplicate detection, use a hashable representation (always a string):
+        # the text parts for image messages
+        content_hash = project(msg).text
             
         # Check for duplicates
         if content_hash and content_hash in seen_contents:
-            print(f"Skipping duplicate message in API call: {str(content_hash)[:30]}...")
+            log.debug("Skipping duplicate message in API call: %.30s...", content_hash)
             continue
             
         if content_hash:
@@ -104,8 +136,12 @@ def call_claude_api(prompt, messages, model_id, system_prompt=None, stream_callb
             "content": prompt
         })
 
-    # Add filtered messages to payload
-    payload["messages"] = filtered_messages
+    # Add filtered messages to payload, with cache breakpoints on the system prompt
+    # and the older history (see prompt_caching.py)
+    system, payload["messages"] = anthropic_cached_request(payload.get("system"), filtered_messages)
+    if system:
+        payload["system"] = system
+    usage = {}
     
     # Actual API call
     headers = {
@@ -114,54 +150,62 @@ def call_claude_api(prompt, messages, model_id, system_prompt=None, stream_callb
         "anthropic-version": "2023-06-01"
     }
     
+    started = time.monotonic()
+    timing = {}
+    ok = False
     try:
-        if stream_callback:
-            # Streaming mode using REST API directly
-            payload["stream"] = True
-            full_response = ""
-            
-            response = requests.post(url, json=payload, headers=headers, stream=True)
-            
-            if response.status_code == 200:
-                for line in response.iter_lines():
-                    if line:
-                        line_text = line.decode('utf-8')
-                        if line_text.startswith('data: '):
-                            json_str = line_text[6:]  # Remove 'data: ' prefix
-                            # Skip if this is a ping or message_stop event
-                            if json_str.strip() in ['[DONE]', '']:
-                                continue
-                            try:
-                                chunk_data = json.loads(json_str)
-                                # Handle different event types from Claude's SSE stream
-                                event_type = chunk_data.get('type')
-                                
-                                if event_type == 'content_block_delta':
-                                    delta = chunk_data.get('delta', {})
-                                    if delta.get('type') == 'text_delta':
-                                        text = delta.get('text', '')
-                                        if text:
-                                            full_response += text
-                                            stream_callback(text)
-                            except json.JSONDecodeError:
-                                continue
-                return full_response
+        # Shared provider budget; the permit is held until the stream is fully read
+        with rate_limited("anthropic", model_id) as permit:
+            if stream_callback:
+                # Streaming mode using REST API directly
+                payload["stream"] = True
+                
+                response = requests.post(url, json=payload, headers=headers, stream=True)
+                permit.observe(response.status_code, response.headers)
+                
+                if response.status_code == 200:
+                    # Only text_delta events carry output; pings and stop events are skipped.
+                    # message_start / message_delta carry the usage counts.
+                    def on_event(event):
+                        timing.setdefault("ttft", round(time.monotonic() - started, 3))
+                        if event.get("type") == "message_start":
+                            timing["generation_id"] = (event.get("message") or {}).get("id")
+                        anthropic_stream_usage(event, usage)
+                    
+                    text = read_stream(response, anthropic_delta, on_text=stream_callback, on_event=on_event).text
+                    if metrics is not None and usage:
+                        metrics["usage"] = parse_anthropic_usage(usage)
+                    ok = True
+                    return text
+                else:
+                    return f"Error: API returned status {response.status_code}: {response.text}"
             else:
-                return f"Error: API returned status {response.status_code}: {response.text}"
-        else:
-            # Non-streaming mode (original behavior)
-            response = requests.post(url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            if 'content' in data and len(data['content']) > 0:
-                for content_item in data['content']:
-                    if content_item.get('type') == 'text':
-                        return content_item.get('text', '')
-                # Fallback if no text type content is found
-                return str(data['content'])
-            return "No content in response"
+                # Non-streaming mode (original behavior)
+                response = requests.post(url, json=payload, headers=headers)
+                permit.observe(response.status_code, response.headers)
+                response.raise_for_status()
+                data = response.json()
+                usage.update(data.get('usage') or {})
+                timing["generation_id"] = data.get('id')
+                if metrics is not None and usage:
+                    metrics["usage"] = parse_anthropic_usage(usage)
+                ok = True
+                if 'content' in data and len(data['content']) > 0:
+                    for content_item in data['content']:
+                        if content_item.get('type') == 'text':
+                            return content_item.get('text', '')
+                    # Fallback if no text type content is found
+                    return str(data['content'])
+                return "No content in response"
     except Exception as e:
         return f"Error calling Claude API: {str(e)}"
+    finally:
+        tags = metrics or {}
+        get_usage_ledger().record(make_record(
+            tags.get("kind", "turn"), model_id, parse_anthropic_usage(usage),
+            ttft=timing.get("ttft"), duration=round(time.monotonic() - started, 3), ok=ok,
+            ai_name=tags.get("ai_name"), provider="anthropic", generation_id=timing.get("generation_id"),
+        ))
 
 def call_llama_api(prompt, conversation_history, model, system_prompt):
     # Only use the last 3 exchanges to prevent context length issues
@@ -237,12 +281,19 @@ def call_openai_api(prompt, conversation_history, model, system_prompt):
         print(f"Error calling OpenAI API: {e}")
         return None
 
-def call_openrouter_api(prompt, conversation_history, model, system_prompt, stream_callback=None, temperature=1.0):
+def call_openrouter_api(prompt, conversation_history, model, system_prompt, stream_callback=None, temperature=1.0, metrics=None):
     """Call the OpenRouter API to access various LLM models.
     
     Args:
         stream_callback: Optional function(chunk: str) to call with each streaming token
         temperature: Sampling temperature (0-2, default 1.0)
+        metrics: Optional dict for the turn's metrics; each attempt (model, status, error class,
+                 ttft, duration, hedged, usage) is appended to metrics["attempts"] - other hedge legs
+                 too, as error class "superseded" if another leg won the race - the model that
+                 answered is stored in metrics["model_used"] (plus metrics["fallback_from"], the
+                 requested model, when a fallback answered) and its token usage (including
+                 cached prompt tokens, see prompt_caching.py) in metrics["usage"]. Its "kind"
+                 and "ai_name" keys tag the call's usage ledger entry (usage_ledger.py)
     """
     try:
         headers = {
@@ -256,19 +307,20 @@ def call_openrouter_api(prompt, conversation_history, model, system_prompt, stre
         openrouter_model = model
         if model.startswith("claude-") and not model.startswith("anthropic/"):
             openrouter_model = f"anthropic/{model}"
-            print(f"Normalized Claude model ID for OpenRouter: {model} -> {openrouter_model}")
+            log.debug("Normalized Claude model ID for OpenRouter: %s -> %s", model, openrouter_model)
         
         # Format messages - need to handle structured content with images
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         
-        def convert_to_openai_format(content, include_images=True):
+        def convert_to_openai_format(content, include_images=True, policy=None):
             """Convert Anthropic-style image format to OpenAI/OpenRouter format.
             
             Args:
                 content: The message content (string or list)
                 include_images: If False, strip image content and keep only text
+                policy: ImagePolicy the images are converted to (cached variants, image_policy.py)
             """
             if not isinstance(content, list):
                 return content
@@ -284,6 +336,8 @@ def call_openrouter_api(prompt, conversation_history, model, system_prompt, stre
                         if source.get('type') == 'base64':
                             media_type = source.get('media_type', 'image/png')
                             data = source.get('data', '')
+                            if policy is not None:
+                                media_type, data = get_image_variants().get(media_type, data, policy)
                             converted.append({
                                 "type": "image_url",
                                 "image_url": {
@@ -307,14 +361,33 @@ def call_openrouter_api(prompt, conversation_history, model, system_prompt, stre
             
             return converted
         
-        def build_messages(include_images=True, max_images=5):
+        def image_payload_size(content, policy):
+            """Bytes the images in content add to a request once converted to policy."""
+            size = 0
+            for part in content:
+                if not isinstance(part, dict):
+                    continue
+                if part.get('type') == 'image':
+                    source = part.get('source', {})
+                    if source.get('type') == 'base64':
+                        _, data = get_image_variants().get(source.get('media_type', 'image/png'),
+                                                           source.get('data', ''), policy)
+                        size += len(data)
+                elif part.get('type') == 'image_url':
+                    size += len(part.get('image_url', {}).get('url', ''))
+            return size
+        
+        def build_messages(include_images=True, max_images=5, model_id=None):
             """Build the messages list, optionally stripping images.
             
             Args:
                 include_images: If False, strip ALL images
                 max_images: Maximum number of images to include (from most recent). 
-                           Older images are stripped but text is preserved.
+                           Older images are stripped but text is preserved. Lowered
+                           further when the images exceed IMAGE_PAYLOAD_BUDGET bytes.
+                model_id: Model the request goes to; selects the image policy
             """
+            policy = policy_for(model_id or openrouter_model)
             msgs = []
             if system_prompt:
                 msgs.append({"role": "system", "content": system_prompt})
@@ -332,12 +405,24 @@ def call_openrouter_api(prompt, conversation_history, model, system_prompt, stre
                         if has_image:
                             image_message_indices.append(i)
                 
-                # Determine which indices should keep their images (last N)
-                indices_to_keep_images = set(image_message_indices[-max_images:]) if image_message_indices else set()
+                # Determine which indices should keep their images: the last N, fewer if
+                # their converted size is over the byte budget
+                newest_first = image_message_indices[::-1]
+                
+                def size_of(n):
+                    if n >= len(newest_first):
+                        return None
+                    return image_payload_size(conversation_history[newest_first[n]]["content"], policy)
+                
+                keep = fit_images(size_of, max_images, IMAGE_PAYLOAD_BUDGET)
+                indices_to_keep_images = set(newest_first[:keep])
                 
                 if len(image_message_indices) > max_images:
                     stripped_count = len(image_message_indices) - max_images
-                    print(f"[Context] Stripping {stripped_count} older images, keeping last {max_images}")
+                    log.info("[Context] Stripping %d older images, keeping last %d", stripped_count, max_images)
+                if keep < min(max_images, len(image_message_indices)):
+                    log.info("[Context] Image payload over %d bytes: sending the last %d image(s) instead of %d",
+                             IMAGE_PAYLOAD_BUDGET, keep, min(max_images, len(image_message_indices)))
                 
                 # Build messages with selective image inclusion
                 for i, msg in enumerate(conversation_history):
@@ -345,7 +430,7 @@ def call_openrouter_api(prompt, conversation_history, model, system_prompt, stre
                         keep_images = i in indices_to_keep_images
                         msgs.append({
                             "role": msg["role"],
-                            "content": convert_to_openai_format(msg["content"], include_images=keep_images)
+                            "content": convert_to_openai_format(msg["content"], include_images=keep_images, policy=policy)
                         })
             else:
                 # No images mode - strip all
@@ -357,175 +442,310 @@ def call_openrouter_api(prompt, conversation_history, model, system_prompt, stre
                         })
             
             # Also convert the prompt if it's structured content (always include images in current prompt)
-            msgs.append({"role": "user", "content": convert_to_openai_format(prompt, include_images)})
+            msgs.append({"role": "user", "content": convert_to_openai_format(prompt, include_images, policy)})
             return msgs
         
-        def make_api_call(include_images=True, max_images=5):
-            """Make the API call, returns (success, result_or_error)"""
-            msgs = build_messages(include_images=include_images, max_images=max_images)
+        def make_api_call(include_images=True, max_images=5, model_id=None, attempt=None, race=None, race_index=0):
+            """Make one API call, returns (success, result_or_error)
+            
+            Args:
+                model_id: OpenRouter model id (differs from the requested model on fallback)
+                attempt: Dict filled in with status, retry_after, ttft and streamed for metrics
+                race: HedgeRace when this call is one leg of a hedged streaming request
+            """
+            model_id = model_id or openrouter_model
+            attempt = attempt if attempt is not None else {}
+            msgs = build_messages(include_images=include_images, max_images=max_images, model_id=model_id)
+            if needs_breakpoints(model_id):
+                # Cache the system prompt and older history provider-side (prompt_caching.py)
+                msgs = add_cache_breakpoints(msgs)
             
             payload = {
-                "model": openrouter_model,
+                "model": model_id,
                 "messages": msgs,
                 "temperature": temperature,  # Use AI's custom temperature
                 "max_tokens": 4000,
-                "stream": stream_callback is not None
+                "stream": stream_callback is not None,
+                # Usage accounting: token counts incl. cached prompt tokens (last stream chunk)
+                "usage": {"include": True}
             }
             
-            print(f"\nSending to OpenRouter:")
-            print(f"Model: {model}")
-            print(f"Temperature: {temperature}")
-            print(f"Include images: {include_images}")
-            # Log message summary (avoid huge base64 dumps)
-            for i, m in enumerate(msgs):
-                content = m.get('content', '')
-                if isinstance(content, list):
-                    parts_summary = [p.get('type', 'unknown') for p in content]
-                    print(f"  [{i}] {m.get('role')}: [structured: {parts_summary}]")
-                else:
-                    preview = str(content)[:80] + "..." if len(str(content)) > 80 else content
-                    print(f"  [{i}] {m.get('role')}: {preview}")
+            log.info("Sending to OpenRouter: model=%s temperature=%s images=%s messages=%d",
+                     model_id, temperature, include_images, len(msgs))
+            # Message summary (avoid huge base64 dumps) - debug only, sampled per request
+            if is_debug(log) and _message_sample.hit("openrouter_request"):
+                for i, m in enumerate(msgs):
+                    content = m.get('content', '')
+                    if isinstance(content, list):
+                        log.debug("  [%d] %s: [structured: %s]", i, m.get('role'),
+                                  [p.get('type', 'unknown') for p in content])
+                    else:
+                        log.debug("  [%d] %s: %.80s", i, m.get('role'), content)
             
-            if stream_callback:
-                # Streaming mode
-                response = requests.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers=headers,
-                    json=payload,
-                    timeout=180,
-                    stream=True
-                )
-                
-                print(f"Response status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    full_response = ""
-                    chunk_count = 0
-                    last_finish_reason = None
-                    debug_chunks = []  # Store first few chunks for debugging
-                    for line in response.iter_lines():
-                        if line:
-                            line_text = line.decode('utf-8')
-                            if line_text.startswith('data: '):
-                                json_str = line_text[6:]
-                                if json_str.strip() == '[DONE]':
-                                    break
-                                try:
-                                    chunk_data = json.loads(json_str)
-                                    # Store first 5 chunks for debugging
-                                    if len(debug_chunks) < 5:
-                                        debug_chunks.append(chunk_data)
-                                    if 'choices' in chunk_data and len(chunk_data['choices']) > 0:
-                                        choice = chunk_data['choices'][0]
-                                        delta = choice.get('delta', {})
-                                        content = delta.get('content', '')
-                                        last_finish_reason = choice.get('finish_reason')
-                                        if content:
-                                            full_response += content
-                                            stream_callback(content)
-                                        chunk_count += 1
-                                except json.JSONDecodeError:
-                                    continue
-                    # Log if response is empty
-                    if not full_response or not full_response.strip():
-                        print(f"[OpenRouter STREAM] Empty response from {model}", flush=True)
-                        print(f"[OpenRouter STREAM]   Chunks received: {chunk_count}", flush=True)
-                        print(f"[OpenRouter STREAM]   Last finish_reason: {last_finish_reason}", flush=True)
-                        print(f"[OpenRouter STREAM]   Response repr: {repr(full_response)}", flush=True)
-                        # Print the actual chunk data for debugging
-                        for i, chunk in enumerate(debug_chunks):
-                            print(f"[OpenRouter STREAM]   Chunk {i}: {json.dumps(chunk)[:300]}", flush=True)
-                    return True, full_response
+            started = time.monotonic()
+            # Shared OpenRouter budget (turns, branches, judges, images); held for the whole stream
+            with rate_limited("openrouter", model_id) as permit:
+                if stream_callback:
+                    # Streaming mode
+                    response = requests.post(
+                        "https://openrouter.ai/api/v1/chat/completions",
+                        headers=headers,
+                        json=payload,
+                        timeout=180,
+                        stream=True
+                    )
+                    permit.observe(response.status_code, response.headers)
+                    attempt["status"] = response.status_code
+                    attempt["retry_after"] = parse_retry_after(response.headers.get("Retry-After"))
+                    
+                    log.debug("Response status: %s", response.status_code)
+                    
+                    if response.status_code == 200:
+                        if race is not None and not race.register(race_index, response):
+                            response.close()
+                            return False, (None, "Superseded by hedge request")
+                        debug_chunks = []  # Store first few chunks for debugging
+                        
+                        def on_event(chunk_data):
+                            if race is not None and race.lost(race_index):
+                                return False
+                            if chunk_data.get("usage"):
+                                attempt["usage"] = parse_openai_usage(chunk_data["usage"])
+                            if "generation_id" not in attempt and chunk_data.get("id"):
+                                attempt["generation_id"] = chunk_data["id"]
+                                attempt["provider"] = chunk_data.get("provider")
+                            if "ttft" not in attempt:
+                                attempt["ttft"] = round(time.monotonic() - started, 3)
+                                # Only the first leg to produce output streams to the UI
+                                if race is not None and not race.claim(race_index):
+                                    return False
+                            # Store first 5 chunks for debugging
+                            if len(debug_chunks) < 5:
+                                debug_chunks.append(chunk_data)
+                        
+                        def on_text(content):
+                            attempt["streamed"] = True
+                            stream_callback(content)
+                        
+                        stream = read_stream(response, openai_delta, on_text=on_text, on_event=on_event)
+                        if stream.aborted:
+                            response.close()
+                            return False, (None, "Superseded by hedge request")
+                        full_response = stream.text
+                        # Log if response is empty
+                        if not full_response or not full_response.strip():
+                            log.warning("[OpenRouter STREAM] Empty response from %s (chunks=%d, finish_reason=%s)",
+                                        model_id, stream.chunk_count, stream.finish_reason)
+                            if is_debug(log):
+                                for i, chunk in enumerate(debug_chunks):
+                                    log.debug("[OpenRouter STREAM]   Chunk %d: %.300s", i, json.dumps(chunk))
+                        return True, full_response
+                    else:
+                        return False, (response.status_code, response.text)
                 else:
-                    return False, (response.status_code, response.text)
-            else:
-                # Non-streaming mode
-                response = requests.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
-                    headers=headers,
-                    json=payload,
-                    timeout=60
-                )
-                
-                print(f"Response status: {response.status_code}")
-                
-                if response.status_code == 200:
-                    response_data = response.json()
-                    # Debug: log full response structure for empty responses
-                    if 'choices' in response_data and len(response_data['choices']) > 0:
-                        choice = response_data['choices'][0]
-                        message = choice.get('message', {})
-                        content = message.get('content', '') if message else ''
-                        if content and content.strip():
-                            return True, content
+                    # Non-streaming mode
+                    response = requests.post(
+                        "https://openrouter.ai/api/v1/chat/completions",
+                        headers=headers,
+                        json=payload,
+                        timeout=60
+                    )
+                    permit.observe(response.status_code, response.headers)
+                    attempt["status"] = response.status_code
+                    attempt["retry_after"] = parse_retry_after(response.headers.get("Retry-After"))
+                    
+                    log.debug("Response status: %s", response.status_code)
+                    
+                    if response.status_code == 200:
+                        response_data = response.json()
+                        if isinstance(response_data, dict):
+                            attempt["usage"] = parse_openai_usage(response_data.get("usage"))
+                            attempt["generation_id"] = response_data.get("id")
+                            attempt["provider"] = response_data.get("provider")
+                        # Debug: log full response structure for empty responses
+                        if 'choices' in response_data and len(response_data['choices']) > 0:
+                            choice = response_data['choices'][0]
+                            message = choice.get('message', {})
+                            content = message.get('content', '') if message else ''
+                            if content and content.strip():
+                                return True, content
+                            else:
+                                # Log detailed info about empty response (avoiding base64)
+                                log.warning("[OpenRouter] Empty content from model: %s (finish_reason=%s)",
+                                            model_id, choice.get('finish_reason', 'unknown'))
+                                log.debug("[OpenRouter]   Choice keys: %s, message keys: %s, content: %r",
+                                          list(choice.keys()), list(message.keys()) if message else None, content)
+                                # Check for refusal or other indicators
+                                if message.get('refusal'):
+                                    log.warning("[OpenRouter]   Refusal: %s", message.get('refusal'))
+                                # Check for tool_calls that might indicate the model is doing something else
+                                if message.get('tool_calls'):
+                                    log.debug("[OpenRouter]   Tool calls: %d call(s)", len(message.get('tool_calls')))
+                                return True, None
                         else:
-                            # Log detailed info about empty response (avoiding base64)
-                            import sys
-                            print(f"[OpenRouter] Empty content from model: {model}", flush=True)
-                            print(f"[OpenRouter]   Choice keys: {list(choice.keys())}", flush=True)
-                            print(f"[OpenRouter]   Message keys: {list(message.keys()) if message else 'None'}", flush=True)
-                            print(f"[OpenRouter]   Finish reason: {choice.get('finish_reason', 'unknown')}", flush=True)
-                            print(f"[OpenRouter]   Content type: {type(content).__name__}, len: {len(content) if content else 0}", flush=True)
-                            print(f"[OpenRouter]   Content repr: {repr(content)}", flush=True)
-                            # Check for refusal or other indicators
-                            if message.get('refusal'):
-                                print(f"[OpenRouter]   Refusal: {message.get('refusal')}", flush=True)
-                            # Check for tool_calls that might indicate the model is doing something else
-                            if message.get('tool_calls'):
-                                print(f"[OpenRouter]   Tool calls: {len(message.get('tool_calls'))} call(s)", flush=True)
-                            sys.stdout.flush()
-                            return True, None
+                            log.warning("[OpenRouter] No choices in response. Keys: %s",
+                                        list(response_data.keys()) if isinstance(response_data, dict) else 'non-dict')
+                        return True, None
                     else:
-                        print(f"[OpenRouter] No choices in response. Keys: {list(response_data.keys()) if isinstance(response_data, dict) else 'non-dict'}")
-                    return True, None
-                else:
-                    return False, (response.status_code, response.text)
+                        return False, (response.status_code, response.text)
         
-        # Try with images first
-        success, result = make_api_call(include_images=True)
-        print(f"[OpenRouter] First call result - success: {success}, result type: {type(result).__name__}, result: {repr(result)[:100] if result else 'None'}", flush=True)
+        # Call pipeline: per-error-class retries with jittered backoff, a hedged duplicate
+        # when a stream is slow to start, then ordered fallback to sibling models.
+        # Every attempt is recorded in metrics["attempts"] for the turn.
+        attempts = metrics.setdefault("attempts", []) if metrics is not None else []
+        call_started = time.monotonic()
+        tags = metrics or {}
+        
+        def record_call(attempt, ok):
+            # One ledger entry per call: the final attempt's usage, whole-call duration
+            get_usage_ledger().record(make_record(
+                tags.get("kind", "turn"), attempt.get("model"), attempt.get("usage"),
+                ttft=attempt.get("ttft"), duration=round(time.monotonic() - call_started, 3), ok=ok,
+                ai_name=tags.get("ai_name"), provider=attempt.get("provider"),
+                generation_id=attempt.get("generation_id"), attempts=len(attempts),
+            ))
+        
+        def hedge_leg(race, index, hedge, base_attempt, include_images, model_id):
+            # One leg of a hedged request; everything it needs is bound up front (legs run on threads)
+            hedge["race"] = race
+            leg_attempt = hedge["legs"][index] = dict(base_attempt)
+            try:
+                success, result = make_api_call(include_images, model_id=model_id, attempt=leg_attempt,
+                                                race=race, race_index=index)
+            except Exception as e:
+                leg_attempt["error_class"] = classify_exception(e)
+                raise
+            if not success:
+                leg_attempt["error_class"] = classify_status(*result)
+            elif result is None or (isinstance(result, str) and not result.strip()):
+                leg_attempt["error_class"] = "empty"
+            return success, result
         
-        if success:
-            # Check for empty response and retry once
-            if result is None or (isinstance(result, str) and not result.strip()):
-                print(f"[OpenRouter] WARNING: Model {model} returned empty response, retrying...", flush=True)
-                import time
-                time.sleep(1)
-                success, result = make_api_call(include_images=True)
-                print(f"[OpenRouter] Retry result - success: {success}, result type: {type(result).__name__}, result: {repr(result)[:100] if result else 'None'}", flush=True)
-                if success and result and (not isinstance(result, str) or result.strip()):
+        def record_hedge_leg(leg_attempt, superseded, duration):
+            # A leg that isn't the call's result was still a request (and may have used tokens).
+            # Losing to a leg that streamed is "superseded"; without a winner it failed on its own.
+            error_class = "superseded" if superseded else leg_attempt.get("error_class") or "unknown"
+            leg = dict(leg_attempt, hedged=True, error_class=error_class, duration=duration)
+            attempts.append(leg)
+            get_usage_ledger().record(make_record(
+                tags.get("kind", "turn"), leg.get("model"), leg.get("usage"),
+                ttft=leg.get("ttft"), duration=duration, ok=False, ai_name=tags.get("ai_name"),
+                provider=leg.get("provider"), generation_id=leg.get("generation_id"), hedged=superseded,
+            ))
+        candidates = [openrouter_model] + fallback_models(openrouter_model, limit=MAX_MODEL_FALLBACKS)
+        error_class, status_code, error_text = None, None, ""
+        
+        for model_index, model_id in enumerate(candidates):
+            # A fallback may take images the previous model refused
+            include_images = True
+            if model_index > 0:
+                log.warning("[OpenRouter] Falling back from %s to %s after %s",
+                            candidates[model_index - 1], model_id, error_class)
+            # A model that keeps failing gets one attempt per call while fallbacks remain
+            degraded = model_index < len(candidates) - 1 and model_health.is_degraded(model_id)
+            retries = {}
+            
+            while True:
+                attempt = {"model": model_id, "images": include_images}
+                status_code, error_text = None, ""
+                started = time.monotonic()
+                try:
+                    if stream_callback and OPENROUTER_HEDGE_AFTER > 0:
+                        hedge = {"legs": {}, "race": None}
+                        leg = partial(hedge_leg, hedge=hedge, base_attempt=attempt,
+                                      include_images=include_images, model_id=model_id)
+                        index, outcome, hedged = hedged_call(leg, OPENROUTER_HEDGE_AFTER)
+                        legs, race = hedge["legs"], hedge["race"]
+                        attempt = legs.get(index, attempt)
+                        attempt["hedged"] = hedged
+                        winner = race.winner if race is not None else None
+                        for other in sorted(legs):
+                            if other != index:
+                                record_hedge_leg(legs[other], winner is not None and winner != other,
+                                                 round(time.monotonic() - started, 3))
+                        if isinstance(outcome, Exception):
+                            raise outcome
+                        success, result = outcome
+                    else:
+                        success, result = make_api_call(include_images, model_id=model_id, attempt=attempt)
+                except Exception as e:
+                    success, result = False, (None, str(e))
+                    error_class = classify_exception(e)
+                else:
+                    if not success:
+                        error_class = classify_status(*result)
+                    elif result is None or (isinstance(result, str) and not result.strip()):
+                        error_class = "empty"
+                    else:
+                        error_class = None
+                attempt["duration"] = round(time.monotonic() - started, 3)
+                attempt["error_class"] = error_class
+                attempts.append(attempt)
+                
+                if error_class is None:
+                    model_health.record_success(model_id)
+                    record_call(attempt, True)
+                    if metrics is not None:
+                        metrics["model_used"] = model_id
+                        if model_id != openrouter_model:
+                            metrics["fallback_from"] = openrouter_model
+                        if attempt.get("usage"):
+                            metrics["usage"] = attempt["usage"]
+                    if model_id != openrouter_model:
+                        log.warning("[OpenRouter] Response for %s served by fallback %s", model, model_id)
                     return result
-                print(f"[OpenRouter] WARNING: Model {model} returned empty response again after retry", flush=True)
-                return "[Model returned empty response - it may be experiencing issues]"
-            return result
+                if not success:
+                    status_code, error_text = result
+                
+                # Check if error is due to model not supporting images
+                if error_class == "no_images" and include_images:
+                    log.info("[OpenRouter] Model %s doesn't support images, retrying without images...", model_id)
+                    include_images = False
+                    continue
+                
+                policy = RETRY_POLICIES.get(error_class, RETRY_POLICIES["unknown"])
+                used = retries.get(error_class, 0)
+                # Output already reached the UI - a retry would duplicate it
+                if attempt.get("streamed") or degraded or used >= policy.max_retries:
+                    break
+                retries[error_class] = used + 1
+                delay = backoff_delay(used, policy, attempt.get("retry_after"))
+                log.warning("[OpenRouter] %s: %s (HTTP %s), retry %d/%d in %.1fs",
+                            model_id, error_class, status_code, used + 1, policy.max_retries, delay)
+                time.sleep(delay)
+            
+            model_health.record_failure(model_id)
+            if attempt.get("streamed") or not policy.fallback:
+                break
         
-        # Check if error is due to model not supporting images
-        status_code, error_text = result
-        if status_code == 404 and "support image" in error_text.lower():
-            print(f"[OpenRouter] Model {model} doesn't support images, retrying without images...")
-            success, result = make_api_call(include_images=False)
-            if success:
-                return result
-            status_code, error_text = result
+        # Every attempt failed
+        record_call(attempts[-1] if attempts else {"model": openrouter_model}, False)
+        if error_class == "empty":
+            log.warning("[OpenRouter] Model %s returned empty response on every attempt", model)
+            return "[Model returned empty response - it may be experiencing issues]"
+        if error_class == "timeout" and status_code is None:
+            log.error("Request timed out. The server took too long to respond.")
+            return "Error: Request timed out"
+        if error_class == "network":
+            log.error("Network error: %s", error_text)
+            return f"Error: Network error - {error_text}"
         
-        # Handle other errors
-        error_msg = f"OpenRouter API error {status_code}: {error_text}"
-        print(error_msg)
+        error_msg = f"OpenRouter API error {status_code}: {error_text}" if status_code else error_text
+        log.error(error_msg)
         if status_code == 404:
-            print("Model not found or doesn't support this request type.")
+            log.error("Model not found or doesn't support this request type.")
         elif status_code == 401:
-            print("Authentication error. Please check your API key.")
+            log.error("Authentication error. Please check your API key.")
         return f"Error: {error_msg}"
             
     except requests.exceptions.Timeout:
-        print("Request timed out. The server took too long to respond.")
+        log.error("Request timed out. The server took too long to respond.")
         return "Error: Request timed out"
     except requests.exceptions.RequestException as e:
-        print(f"Network error: {e}")
+        log.error("Network error: %s", e)
         return f"Error: Network error - {str(e)}"
     except Exception as e:
-        print(f"Error calling OpenRouter API: {e}")
-        print(f"Error type: {type(e)}")
+        log.exception("Error calling OpenRouter API: %s", e)
         return f"Error: {str(e)}"
 
 def call_replicate_api(prompt, conversation_history, model, gui=None):
@@ -574,8 +794,17 @@ def call_replicate_api(prompt, conversation_history, model, gui=None):
         print(f"Error calling Flux API: {e}")
         return None
 
-def call_deepseek_api(prompt, conversation_history, model, system_prompt, stream_callback=None):
-    """Call the DeepSeek model through OpenRouter API."""
+def call_deepseek_api(prompt, conversation_history, model, system_prompt, stream_callback=None, metrics=None):
+    """Call the DeepSeek model through OpenRouter API.
+
+    Args:
+        metrics: Optional dict for the turn's metrics; token usage is stored in
+                 metrics["usage"]. Its "kind" and "ai_name" keys tag the call's usage
+                 ledger entry (usage_ledger.py)
+    """
+    started = time.monotonic()
+    call = {}  # usage, ttft, provider and generation id for the ledger
+    ok = False
     try:
         import re
         from config import SHOW_CHAIN_OF_THOUGHT_IN_CONTEXT
@@ -587,7 +816,7 @@ def call_deepseek_api(prompt, conversation_history, model, system_prompt, stream
         
         # Add conversation history
         for msg in conversation_history:
-            if isinstance(msg, dict):
+            if isinstance(msg, Mapping):
                 role = msg.get("role", "user")
                 content = msg.get("content", "")
                 if isinstance(content, str) and content.strip():
@@ -607,65 +836,59 @@ def call_deepseek_api(prompt, conversation_history, model, system_prompt, stream
             "messages": messages,
             "max_tokens": 8000,
             "temperature": 1,
-            "stream": stream_callback is not None
+            "stream": stream_callback is not None,
+            "usage": {"include": True}  # Token counts and cost for the usage ledger
         }
         
-        print(f"\nSending to DeepSeek via OpenRouter:")
-        print(f"Model: deepseek/deepseek-r1")
-        print(f"Messages: {len(messages)} messages")
+        log.info("Sending to DeepSeek via OpenRouter: model=deepseek/deepseek-r1 messages=%d", len(messages))
         
-        if stream_callback:
-            # Streaming mode
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=180,
-                stream=True
-            )
-            
-            if response.status_code == 200:
-                full_response = ""
-                for line in response.iter_lines():
-                    if line:
-                        line_text = line.decode('utf-8')
-                        if line_text.startswith('data: '):
-                            json_str = line_text[6:]
-                            if json_str.strip() == '[DONE]':
-                                break
-                            try:
-                                chunk_data = json.loads(json_str)
-                                if 'choices' in chunk_data and len(chunk_data['choices']) > 0:
-                                    delta = chunk_data['choices'][0].get('delta', {})
-                                    content = delta.get('content', '')
-                                    if content:
-                                        full_response += content
-                                        stream_callback(content)
-                            except json.JSONDecodeError:
-                                continue
-                response_text = full_response
-            else:
-                error_msg = f"OpenRouter API error {response.status_code}: {response.text}"
-                print(error_msg)
-                return None
-        else:
-            # Non-streaming mode
-            response = requests.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=180
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                response_text = data['choices'][0]['message']['content']
+        with rate_limited("openrouter", payload["model"]) as permit:
+            if stream_callback:
+                # Streaming mode
+                response = requests.post(
+                    "https://openrouter.ai/api/v1/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=180,
+                    stream=True
+                )
+                permit.observe(response.status_code, response.headers)
+                
+                if response.status_code == 200:
+                    def on_event(chunk_data):
+                        if "ttft" not in call:
+                            call["ttft"] = round(time.monotonic() - started, 3)
+                        if chunk_data.get("usage"):
+                            call["usage"] = parse_openai_usage(chunk_data["usage"])
+                        if "generation_id" not in call and chunk_data.get("id"):
+                            call["generation_id"] = chunk_data["id"]
+                            call["provider"] = chunk_data.get("provider")
+                    
+                    response_text = read_stream(response, openai_delta, on_text=stream_callback, on_event=on_event).text
+                else:
+                    log.error("OpenRouter API error %s: %s", response.status_code, response.text)
+                    return None
             else:
-                error_msg = f"OpenRouter API error {response.status_code}: {response.text}"
-                print(error_msg)
-                return None
+                # Non-streaming mode
+                response = requests.post(
+                    "https://openrouter.ai/api/v1/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=180
+                )
+                permit.observe(response.status_code, response.headers)
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    call["usage"] = parse_openai_usage(data.get("usage"))
+                    call["generation_id"] = data.get("id")
+                    call["provider"] = data.get("provider")
+                    response_text = data['choices'][0]['message']['content']
+                else:
+                    log.error("OpenRouter API error %s: %s", response.status_code, response.text)
+                    return None
         
-        print(f"\nRaw Response: {response_text[:500]}...")
+        log.debug("Raw DeepSeek response: %.500s...", response_text)
         
         # Initialize result with content
         result = {
@@ -700,12 +923,24 @@ def call_deepseek_api(prompt, conversation_history, model, system_prompt, stream
                 content = re.sub(r'<(think|thinking)>.*?</\1>', '', content, flags=re.DOTALL | re.IGNORECASE).strip()
                 result["content"] = content
         
+        ok = bool(response_text)
         return result
         
     except Exception as e:
-        print(f"Error calling DeepSeek via OpenRouter: {e}")
-        print(f"Error type: {type(e)}")
+        log.exception("Error calling DeepSeek via OpenRouter: %s", e)
         return None
+    finally:
+        tags = metrics or {}
+        if metrics is not None:
+            if ok:
+                metrics["model_used"] = "deepseek/deepseek-r1"
+            if call.get("usage"):
+                metrics["usage"] = call["usage"]
+        get_usage_ledger().record(make_record(
+            tags.get("kind", "turn"), "deepseek/deepseek-r1", call.get("usage"),
+            ttft=call.get("ttft"), duration=round(time.monotonic() - started, 3), ok=ok,
+            ai_name=tags.get("ai_name"), provider=call.get("provider"), generation_id=call.get("generation_id"),
+        ))
 
 def setup_image_directory():
     """Create an 'images' directory in the project root if it doesn't exist"""
@@ -765,7 +1000,7 @@ def print_conversation_state(conversation):
 def call_claude_vision_api(image_url):
     """Have Claude analyze the generated image"""
     try:
-        response = anthropic.messages.create(
+        response = get_anthropic_client().messages.create(
             model="claude-3-opus-20240229",
             max_tokens=1000,
             messages=[{
@@ -913,8 +1148,17 @@ def read_living_document(*args, **kwargs):
 def process_living_document_edits(result, model_name):
     return result
 
-def generate_image_from_text(text, model="google/gemini-3-pro-image-preview"):
-    """Generate an image based on text using OpenRouter's image generation API"""
+def generate_image_from_text(text, model="google/gemini-3-pro-image-preview", ai_name=None):
+    """Generate an image based on text using OpenRouter's image generation API
+
+    Args:
+        ai_name: AI the image is attributed to in the usage ledger
+
+    On success the result's "media" is the IngestedImage (saved file plus the
+    downscaled base64 payload for conversation context), see media_pipeline.py
+    """
+    started = time.monotonic()
+    recorded = False  # Every call gets one ledger entry, failures included
     try:
         # Create a directory for the images if it doesn't exist
         image_dir = Path("images")
@@ -938,19 +1182,36 @@ def generate_image_from_text(text, model="google/gemini-3-pro-image-preview"):
                 }
             ],
             "modalities": ["image", "text"],
-            "max_tokens": 1024  # Limit tokens for image generation to avoid credit issues
+            "max_tokens": 1024,  # Limit tokens for image generation to avoid credit issues
+            "usage": {"include": True}  # Token counts and cost for the usage ledger
         }
         
         print(f"Generating image with {model}...")
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            data=json.dumps(payload),
-            timeout=60
-        )
+        started = time.monotonic()
+        # Image jobs share the OpenRouter budget with conversation turns and judges
+        with rate_limited("openrouter", model) as permit:
+            response = requests.post(
+                "https://openrouter.ai/api/v1/chat/completions",
+                headers=headers,
+                data=json.dumps(payload),
+                timeout=60
+            )
+            permit.observe(response.status_code, response.headers)
+        duration = round(time.monotonic() - started, 3)
+        
+        if response.status_code != 200:
+            get_usage_ledger().record(make_record("image", model, duration=duration, ok=False, ai_name=ai_name))
+            recorded = True
         
         if response.status_code == 200:
             result = response.json()
+            if isinstance(result, dict):
+                get_usage_ledger().record(make_record(
+                    "image", model, parse_openai_usage(result.get("usage")), duration=duration,
+                    ok=bool(result.get("choices")), ai_name=ai_name,
+                    provider=result.get("provider"), generation_id=result.get("id"),
+                ))
+                recorded = True
             
             # The generated image will be in the assistant message
             if result.get("choices"):
@@ -965,29 +1226,15 @@ def generate_image_from_text(text, model="google/gemini-3-pro-image-preview"):
                         # Handle base64 data URL
                         if image_url.startswith('data:image'):
                             try:
-                                # Detect actual image format from data URL header
-                                # Format: data:image/jpeg;base64,... or data:image/png;base64,...
-                                ext = ".jpg"  # Default to jpg
-                                if image_url.startswith('data:image/png'):
-                                    ext = ".png"
-                                elif image_url.startswith('data:image/gif'):
-                                    ext = ".gif"
-                                elif image_url.startswith('data:image/webp'):
-                                    ext = ".webp"
+                                # Decode once: the file (extension from the magic bytes) and the
+                                # context payload come out of the same pass
+                                media = get_media_pipeline().ingest_data_url(image_url, image_dir / f"generated_{timestamp}")
                                 
-                                # Extract base64 data after comma
-                                base64_data = image_url.split(',', 1)[1] if ',' in image_url else image_url
-                                
-                                # Decode base64 to image
-                                image_data = base64.b64decode(base64_data)
-                                image_path = image_dir / f"generated_{timestamp}{ext}"
-                                with open(image_path, "wb") as f:
-                                    f.write(image_data)
-                                
-                                print(f"Generated image saved to {image_path}")
+                                print(f"Generated image saved to {media.path}")
                                 return {
                                     "success": True,
-                                    "image_path": str(image_path),
+                                    "image_path": media.path,
+                                    "media": media,
                                     "timestamp": timestamp,
                                     "model": model
                                 }
@@ -1002,14 +1249,15 @@ def generate_image_from_text(text, model="google/gemini-3-pro-image-preview"):
                             try:
                                 img_response = requests.get(image_url, timeout=30)
                                 if img_response.status_code == 200:
-                                    image_path = image_dir / f"generated_{timestamp}.png"
-                                    with open(image_path, "wb") as f:
-                                        f.write(img_response.content)
+                                    media = get_media_pipeline().ingest(
+                                        img_response.content, image_dir / f"generated_{timestamp}",
+                                        img_response.headers.get("Content-Type"))
                                     
-                                    print(f"Generated image saved to {image_path}")
+                                    print(f"Generated image saved to {media.path}")
                                     return {
                                         "success": True,
-                                        "image_path": str(image_path),
+                                        "image_path": media.path,
+                                        "media": media,
                                         "timestamp": timestamp,
                                         "model": model
                                     }
@@ -1042,6 +1290,9 @@ def generate_image_from_text(text, model="google/gemini-3-pro-image-preview"):
             
     except Exception as e:
         print(f"Error generating image: {e}")
+        if not recorded:
+            get_usage_ledger().record(make_record(
+                "image", model, duration=round(time.monotonic() - started, 3), ok=False, ai_name=ai_name))
         return {
             "success": False,
             "error": str(e)
@@ -1060,12 +1311,18 @@ def generate_video_with_sora(
     seconds: int | None = None,
     size: str | None = None,
     poll_interval_seconds: float = 5.0,
+    ai_name: str | None = None,
 ) -> dict:
     """
     Create a Sora video via REST API, poll until completion, and save MP4 to videos/.
 
+    ai_name attributes the job's usage ledger entry (kind "video"; render time as duration).
+
     Returns a dict with keys: success, video_id, status, video_path (when completed), error
     """
+    started = time.monotonic()
+    video_id = None
+    ok = False
     try:
         api_key = os.getenv('OPENAI_API_KEY')
         if not api_key:
@@ -1091,7 +1348,9 @@ def generate_video_with_sora(
         create_url = f"{base_url}/videos"
         vlog(f"[Sora] Create: url={create_url} model={model} seconds={seconds} size={size}")
         vlog(f"[Sora] Prompt (truncated): {prompt[:200]}{'...' if len(prompt) > 200 else ''}")
-        resp = requests.post(create_url, headers=headers_json, json=payload, timeout=60)
+        with rate_limited("openai", model) as permit:
+            resp = requests.post(create_url, headers=headers_json, json=payload, timeout=60)
+            permit.observe(resp.status_code, resp.headers)
         if not resp.ok:
             err_text = resp.text
             try:
@@ -1147,6 +1406,7 @@ def generate_video_with_sora(
                     f.write(chunk)
 
         vlog(f"[Sora] Saved video: {out_path}")
+        ok = True
         return {
             "success": True,
             "video_id": video_id,
@@ -1156,6 +1416,11 @@ def generate_video_with_sora(
     except Exception as e:
         logging.exception("Sora video generation error")
         return {"success": False, "error": str(e)}
+    finally:
+        get_usage_ledger().record(make_record(
+            "video", model, duration=round(time.monotonic() - started, 3), ok=ok,
+            ai_name=ai_name, provider="openai", generation_id=video_id,
+        ))
 
 # -------------------- Web Search Utilities --------------------
 def web_search(query: str, max_results: int = 5) -> dict:
@@ -1169,6 +1434,7 @@ def web_search(query: str, max_results: int = 5) -> dict:
     Returns:
         dict with keys: success, results (list of {title, url, snippet}), error
     """
+    DDGS = _load_ddgs()
     if DDGS is None:
         return {
             "success": False,
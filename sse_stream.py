@@ -0,0 +1,254 @@
+# sse_stream.py
+"""
+Incremental Server-Sent Events decoding for the streaming API calls.
+
+The streaming paths used to run response.iter_lines(), decode every line to
+str, json.loads it and grow the reply with `full_response += content`. With
+five concurrent streams at high tokens/s that per-chunk overhead shows up.
+This module replaces it for every streaming provider:
+
+- SSEDecoder works on the raw byte chunks from response.iter_content(): one
+  buffer, line splitting with bytes.find, multi-line `data:` events joined per
+  the SSE spec, comments (": OPENROUTER PROCESSING" keep-alives) counted and
+  skipped, CR/LF/CRLF line endings
+- Event data stays bytes; it is sliced out of the buffer once and handed
+  straight to the JSON parser (orjson when installed, else json.loads, which
+  both accept bytes) - no str decode per line
+- read_stream() drives a response through a provider-specific delta extractor
+  and collects text in a list that is joined once at the end
+
+Usage:
+    result = read_stream(response, openai_delta, on_text=stream_callback)
+    result.text, result.chunk_count, result.finish_reason
+"""
+
+import json
+
+try:
+    import orjson
+    _loads = orjson.loads
+    _JSONDecodeError = orjson.JSONDecodeError
+except ImportError:
+    orjson = None
+    _loads = json.loads
+    _JSONDecodeError = json.JSONDecodeError
+
+# Data payload that ends an OpenAI-style stream
+DONE = b"[DONE]"
+
+
+class SSEEvent:
+    """One dispatched event. data is raw bytes (multi-line data joined with \\n)."""
+    __slots__ = ("event", "data", "id")
+
+    def __init__(self, event, data, id=None):
+        self.event = event
+        self.data = data
+        self.id = id
+
+    def json(self):
+        """Parse the data payload (raises ValueError on invalid JSON)."""
+        return loads(self.data)
+
+    def __repr__(self):
+        return f"SSEEvent(event={self.event!r}, data={self.data[:60]!r})"
+
+
+def loads(data):
+    """Fast JSON path: orjson if available, else the C-accelerated json module."""
+    return _loads(data)
+
+
+class SSEDecoder:
+    """
+    Incremental SSE parser. feed() raw bytes as they arrive, get back complete events.
+
+    Only `data`, `event` and `id` fields are kept; `retry` and unknown fields are
+    ignored, comment lines are counted in .comments.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._data = []
+        self._event = None
+        self._last_id = None
+        self._has_cr = False
+        self._first = True
+        self.comments = 0
+
+    def feed(self, chunk):
+        """Add raw bytes; returns the list of events completed by them."""
+        if not chunk:
+            return []
+        buf = self._buf
+        buf += chunk
+
+        if self._first:
+            # Strip a UTF-8 BOM at the very start of the stream
+            if len(buf) < 3 and b"\xef\xbb\xbf".startswith(bytes(buf)):
+                return []
+            if buf.startswith(b"\xef\xbb\xbf"):
+                del buf[:3]
+            self._first = False
+
+        # Normalise CRLF / lone CR to LF. A trailing CR might be half of a CRLF,
+        # so it waits for the next chunk.
+        held_cr = False
+        if self._has_cr or b"\r" in chunk:
+            self._has_cr = True
+            if buf.endswith(b"\r"):
+                held_cr = True
+                del buf[-1]
+            if b"\r" in buf:
+                buf = bytearray(buf.replace(b"\r\n", b"\n").replace(b"\r", b"\n"))
+
+        events = []
+        data = self._data
+        pos = 0
+        find = buf.find
+        while True:
+            nl = find(b"\n", pos)
+            if nl < 0:
+                break
+            if nl == pos:
+                # Blank line: dispatch
+                if data:
+                    payload = data[0] if len(data) == 1 else b"\n".join(data)
+                    events.append(SSEEvent(self._event or "message", payload, self._last_id))
+                    data.clear()
+                self._event = None
+            elif buf[pos] == 0x3A:  # ':' comment / keep-alive
+                self.comments += 1
+            elif buf.startswith(b"data: ", pos):
+                # Fast path for the line that carries every token
+                data.append(bytes(buf[pos + 6:nl]))
+            else:
+                self._field(bytes(buf[pos:nl]))
+            pos = nl + 1
+
+        del buf[:pos]
+        if held_cr:
+            buf += b"\r"
+        self._buf = buf
+        return events
+
+    def _field(self, line):
+        colon = line.find(b":")
+        if colon < 0:
+            name, value = line, b""
+        else:
+            name, value = line[:colon], line[colon + 1:]
+            if value[:1] == b" ":
+                value = value[1:]
+        if name == b"data":
+            self._data.append(value)
+        elif name == b"event":
+            self._event = value.decode("utf-8", "replace")
+        elif name == b"id" and b"\0" not in value:
+            self._last_id = value.decode("utf-8", "replace")
+
+    def flush(self):
+        """End of stream: dispatch a final event that wasn't followed by a blank line."""
+        events = []
+        if self._buf:
+            events = self.feed(b"\n\n")
+        elif self._data:
+            events = self.feed(b"\n")
+        self._buf = bytearray()
+        return events
+
+
+def iter_events(response, decoder=None):
+    """Yield SSEEvents from a streaming requests response as bytes arrive."""
+    decoder = decoder or SSEDecoder()
+    # chunk_size=None: hand over data as soon as the socket delivers it
+    for chunk in response.iter_content(chunk_size=None):
+        if chunk:
+            yield from decoder.feed(chunk)
+    yield from decoder.flush()
+
+
+# =============================================================================
+# Provider delta extractors: payload dict -> (text or None, finish_reason or None)
+# =============================================================================
+
+def openai_delta(payload):
+    """OpenAI / OpenRouter chat.completion.chunk."""
+    choices = payload.get("choices")
+    if not choices:
+        return None, None
+    choice = choices[0]
+    delta = choice.get("delta")
+    return (delta.get("content") if delta else None), choice.get("finish_reason")
+
+
+def anthropic_delta(payload):
+    """Anthropic Messages API stream events."""
+    event_type = payload.get("type")
+    if event_type == "content_block_delta":
+        delta = payload.get("delta", {})
+        if delta.get("type") == "text_delta":
+            return delta.get("text"), None
+    elif event_type == "message_delta":
+        return None, payload.get("delta", {}).get("stop_reason")
+    return None, None
+
+
+class StreamResult:
+    """Outcome of read_stream()."""
+    __slots__ = ("parts", "chunk_count", "finish_reason", "aborted", "_text")
+
+    def __init__(self):
+        self.parts = []
+        self.chunk_count = 0
+        self.finish_reason = None
+        self.aborted = False
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = "".join(self.parts)
+        return self._text
+
+
+def read_stream(response, extract, on_text=None, on_event=None):
+    """
+    Consume an SSE response.
+
+    Args:
+        response: requests response opened with stream=True
+        extract: Delta extractor (openai_delta, anthropic_delta)
+        on_text: Called with each non-empty text delta (the UI stream callback)
+        on_event: Called with each parsed payload before extraction; returning
+                  False stops reading (sets result.aborted)
+
+    Returns:
+        StreamResult with the joined text, chunk count and last finish reason
+    """
+    result = StreamResult()
+    parts = result.parts
+    for event in iter_events(response):
+        data = event.data
+        if data == DONE:
+            break
+        if not data:
+            continue
+        try:
+            payload = _loads(data)
+        except (_JSONDecodeError, ValueError):
+            continue
+        if not isinstance(payload, dict):
+            continue
+        if on_event is not None and on_event(payload) is False:
+            result.aborted = True
+            break
+        text, finish_reason = extract(payload)
+        if finish_reason:
+            result.finish_reason = finish_reason
+        if text:
+            parts.append(text)
+            if on_text is not None:
+                on_text(text)
+        result.chunk_count += 1
+    return result
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Conversation (conversation_history.py) must behave like the list it replaces, forks included."""
+
+import random
+
+from conversation_history import Conversation, fork_conversation
+
+
+def _msg(i):
+    return {"role": "user" if i % 2 else "assistant", "content": f"message {i}"}
+
+
+def _as_dicts(messages):
+    return [dict(msg) for msg in messages]
+
+
+def test_list_semantics_under_random_edits():
+    rng = random.Random(1234)
+    conversation, reference = Conversation(), []
+    forks = []
+    for step in range(600):
+        op = rng.choice(["append", "append", "append", "insert", "delete", "set", "pop", "remove", "fork"])
+        if op == "append" or not reference:
+            conversation.append(_msg(step))
+            reference.append(_msg(step))
+        elif op == "insert":
+            index = rng.randint(-len(reference) - 2, len(reference) + 2)
+            conversation.insert(index, _msg(step))
+            reference.insert(index, _msg(step))
+        elif op == "delete":
+            index = rng.randrange(len(reference))
+            del conversation[index]
+            del reference[index]
+        elif op == "set":
+            index = rng.randrange(len(reference))
+            conversation[index] = _msg(step)
+            reference[index] = _msg(step)
+        elif op == "pop":
+            index = rng.randrange(-len(reference), len(reference))
+            assert dict(conversation.pop(index)) == reference.pop(index)
+        elif op == "remove":
+            target = conversation[rng.randrange(len(conversation))]
+            index = reference.index(dict(target))
+            conversation.remove(target)
+            del reference[index]
+        else:
+            forks.append((conversation.fork(), list(reference)))
+        assert len(conversation) == len(reference)
+
+    assert _as_dicts(conversation) == reference
+    assert _as_dicts(reversed(conversation)) == reference[::-1]
+    # Forks keep the history they were taken from, whatever the parent did later
+    for fork, snapshot in forks:
+        assert _as_dicts(fork) == snapshot
+
+
+def test_slices_and_indexing_match_list():
+    conversation = Conversation()
+    reference = []
+    for i in range(40):
+        conversation.append(_msg(i))
+        reference.append(_msg(i))
+        if i % 7 == 0:
+            conversation.fork()  # Freeze the tail into shared segments
+    for start in (None, -50, -5, 0, 3, 17, 39, 40, 60):
+        for stop in (None, -50, -3, 0, 5, 21, 40, 60):
+            for step in (None, 1, 2, -1):
+                assert _as_dicts(conversation[start:stop:step]) == reference[start:stop:step]
+    for index in (0, 13, 39, -1, -40):
+        assert dict(conversation[index]) == reference[index]
+    for index in (40, -41):
+        try:
+            conversation[index]
+        except IndexError:
+            pass
+        else:
+            raise AssertionError(f"index {index} should be out of range")
+
+
+def test_fork_is_unshared_by_edits():
+    parent = Conversation(_msg(i) for i in range(10))
+    child = parent.fork()
+    child.append(_msg(100))
+    del child[2]
+    child[0] = _msg(200)
+    parent.remove(parent[5])
+
+    assert _as_dicts(child) == [_msg(200), _msg(1)] + [_msg(i) for i in range(3, 10)] + [_msg(100)]
+    assert _as_dicts(parent) == [_msg(i) for i in range(10) if i != 5]
+    # Messages are shared like a list.copy(): the same objects until replaced
+    assert child[1] is parent[1]
+
+
+def test_fork_stop_and_plain_lists():
+    parent = Conversation()
+    for i in range(12):
+        parent.append(_msg(i))
+        if i in (3, 8):
+            parent.fork()
+    for stop in range(-1, 14):
+        assert _as_dicts(parent.fork(stop)) == [_msg(i) for i in range(12)][:max(stop, 0)]
+
+    plain = [_msg(i) for i in range(5)]
+    forked = fork_conversation(plain, 3)
+    assert isinstance(forked, Conversation)
+    assert _as_dicts(forked) == plain[:3]
+
+
+def test_equality_and_membership():
+    conversation = Conversation(_msg(i) for i in range(5))
+    assert conversation == [_msg(i) for i in range(5)]
+    assert conversation == conversation.fork()
+    assert conversation != [_msg(i) for i in range(4)]
+    assert _msg(3) in conversation
+    assert _msg(99) not in conversation
+    assert conversation.index(_msg(2)) == 2
+    assert conversation.count(_msg(4)) == 1
+
+
+def test_fork_then_edit_message_in_parent():
+    parent = Conversation(_msg(i) for i in range(6))
+    placeholder = parent[5]
+    child = parent.fork()
+
+    # A stream finishing (or an image being attached) in the parent after the fork
+    edited = parent.writable(placeholder)
+    assert edited is not placeholder
+    edited["content"] = "final text"
+    edited["generated_image_path"] = "images/x.png"
+    assert parent[5] is edited and parent[5]["content"] == "final text"
+    assert child[5] is placeholder
+    assert dict(child[5]) == _msg(5)
+
+    # Now private to the parent: later edits need no further copy
+    assert parent.writable(edited) is edited
+    # Unforked tail messages are edited in place, unknown ones aren't found
+    parent.append(_msg(6))
+    assert parent.writable(parent[6]) is parent[6]
+    assert parent.writable(_msg(6)) is None
+
+    # And the other way round: the branch edits, the parent keeps its message
+    branch_copy = child.writable(child[2])
+    branch_copy["content"] = "branch only"
+    assert parent[2]["content"] == "message 2"
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Image payload budget and per-model policies (image_policy.py)."""
+
+import image_policy
+from image_policy import DEFAULT_POLICY, ImagePolicy, ImageVariants, fit_images, policy_for
+
+
+def _sizes(values):
+    return lambda index: values[index] if index < len(values) else None
+
+
+def test_fit_images_budget():
+    sizes = [400, 300, 200, 100, 50]
+    assert fit_images(_sizes(sizes), 5, 0) == 5            # No budget: only max_images applies
+    assert fit_images(_sizes(sizes), 3, 0) == 3
+    assert fit_images(_sizes(sizes), 5, 10_000) == 5
+    assert fit_images(_sizes(sizes), 5, 700) == 2          # 400 + 300 fits, + 200 doesn't
+    assert fit_images(_sizes(sizes), 5, 699) == 1
+    assert fit_images(_sizes(sizes), 2, 10_000) == 2
+    assert fit_images(_sizes(sizes), 5, 100) == 1          # The newest image is always sent
+    assert fit_images(_sizes([50, 60]), 5, 10_000) == 2    # Fewer images than max_images
+    assert fit_images(_sizes([]), 5, 10_000) == 0
+
+
+def test_fit_images_only_measures_what_it_considers():
+    measured = []
+
+    def sizes(index):
+        measured.append(index)
+        return 1000
+
+    assert fit_images(sizes, 5, 2500) == 2
+    assert measured == [0, 1, 2]
+
+
+def test_policy_for_longest_prefix():
+    policies = {
+        "default": {"max_edge": 1024},
+        "anthropic/": {"max_edge": 1568},
+        "anthropic/claude-3": {"max_edge": 800, "format": "webp"},
+    }
+    assert policy_for("anthropic/claude-3.5-sonnet", policies) == ImagePolicy(max_edge=800, format="webp")
+    assert policy_for("anthropic/claude-opus-4.5", policies) == ImagePolicy(max_edge=1568)
+    assert policy_for("openai/gpt-4o", policies) == ImagePolicy(max_edge=1024)
+    assert policy_for("openai/gpt-4o", {"x/": {"max_edge": 1}}) == DEFAULT_POLICY
+
+
+class _CountingVariants(ImageVariants):
+    """ImageVariants with a stand-in converter: halves "big" images, leaves "keep" ones alone."""
+
+    def __init__(self, max_bytes):
+        super().__init__(max_bytes)
+        self.converted = []
+
+    def _convert(self, media_type, data, policy):
+        self.converted.append(data[:4])
+        if data.startswith("keep"):
+            return media_type, data
+        return "image/jpeg", data[:len(data) // 2]
+
+
+def test_variants_convert_once_and_stay_within_budget(monkeypatch):
+    monkeypatch.setattr(image_policy, "HAS_PILLOW", True)
+    variants = _CountingVariants(max_bytes=400)
+    big, other = "big1" + "A" * 296, "big2" + "B" * 296
+
+    first = variants.get("image/png", big, DEFAULT_POLICY)
+    assert first == ("image/jpeg", big[:150])
+    assert variants.get("image/png", big, DEFAULT_POLICY) == first
+    assert variants.converted == ["big1"]
+
+    # Every retained byte counts - converted data, media type and key digest - and the
+    # oldest entry goes once the budget is exceeded
+    variants.get("image/png", other, DEFAULT_POLICY)
+    variants.get("image/png", "big3" + "C" * 296, DEFAULT_POLICY)
+    stats = variants.stats()
+    assert stats["bytes"] <= 400 and stats["entries"] == 2
+    variants.get("image/png", big, DEFAULT_POLICY)
+    assert variants.converted == ["big1", "big2", "big3", "big1"]
+
+
+def test_variants_remember_unchanged_images_without_pinning_them(monkeypatch):
+    monkeypatch.setattr(image_policy, "HAS_PILLOW", True)
+    variants = _CountingVariants(max_bytes=10_000)
+    original = "keep" + "x" * 5000
+
+    assert variants.get("image/png", original, DEFAULT_POLICY)[1] is original
+    # Second request: served from the marker, no decode or re-encode, same object back
+    media_type, data = variants.get("image/png", original, DEFAULT_POLICY)
+    assert (media_type, data is original) == ("image/png", True)
+    assert variants.converted == ["keep"]
+    # The marker holds the digest only, not the 5000-character original
+    assert variants.stats()["bytes"] < 100
+
+
+def test_variants_pass_through_without_work():
+    variants = _CountingVariants(max_bytes=10_000)
+    keep = ImagePolicy(max_edge=0, format="keep")
+    data = "big1" + "A" * 100
+    assert variants.get("image/png", data, keep) == ("image/png", data)
+    assert variants.converted == []
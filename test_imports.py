@@ -1,8 +1,23 @@
 #!/usr/bin/env python3
-"""Quick import test to verify all dependencies are satisfied."""
+"""Quick import test to verify all dependencies are satisfied, plus a startup-time regression check."""
 
+import os
 import sys
 
+# Startup budgets: cumulative import time (ms) of each module in a fresh interpreter.
+# Generous on purpose so a slow disk doesn't flap; scale them all with
+# LOUNGE_IMPORT_BUDGET_SCALE (e.g. 2 on CI) while investigating.
+IMPORT_BUDGETS_MS = {
+    "config": 250,
+    "styles": 50,
+    "command_parser": 150,
+    "shared_utils": 800,
+}
+
+# Heavy modules that must stay lazy (lazy_import.py): importing the app's
+# modules must not pull them in
+LAZY_MODULES = ["openai", "anthropic", "replicate", "together", "ddgs", "duckduckgo_search"]
+
 def test_imports():
     """Test that all critical imports work."""
     print("Testing imports...")
@@ -65,6 +80,47 @@ def test_imports():
         traceback.print_exc()
         return False
 
+def check_startup_time():
+    """Check import time of the startup modules against IMPORT_BUDGETS_MS; returns True if all are within budget."""
+    from tools.import_profiler import profile_import, top_modules
+
+    scale = float(os.getenv("LOUNGE_IMPORT_BUDGET_SCALE", "1"))
+    print("\nChecking startup import times...")
+
+    ok = True
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        budget *= scale
+        result = profile_import(module)
+        if not result["ok"]:
+            print(f"  [ERROR] import {module} failed: {result['error']}")
+            ok = False
+            continue
+
+        loaded_lazy = sorted({row["module"].split(".")[0] for row in result["rows"]} & set(LAZY_MODULES))
+        if loaded_lazy:
+            print(f"  [ERROR] {module} imports {', '.join(loaded_lazy)} at startup (should be lazy)")
+            ok = False
+
+        elapsed = result["import_ms"]
+        if elapsed > budget:
+            print(f"  [ERROR] {module}: {elapsed:.0f} ms > budget {budget:.0f} ms. Slowest imports:")
+            for row in top_modules(result["rows"], 5, top_level_only=True):
+                if row["module"] != module:
+                    print(f"      {row['cumulative_us'] / 1000:8.1f} ms  {row['module']}")
+            ok = False
+        else:
+            print(f"    [OK] {module}: {elapsed:.0f} ms (budget {budget:.0f} ms)")
+
+    if ok:
+        print("\n[SUCCESS] Startup imports within budget")
+    return ok
+
+def test_startup_time():
+    """pytest entry point: fails on a budget overrun or an eagerly imported lazy module."""
+    assert check_startup_time(), "startup imports over budget or pulling in lazy modules (see output above)"
+
 if __name__ == "__main__":
     success = test_imports()
+    if success:
+        success = check_startup_time()
     sys.exit(0 if success else 1)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Judge cache (judge_cache.py): request keys, expiry, invalidation and BackroomsBench's force rerun."""
+
+import judge_cache
+from judge_cache import JudgeCache, prompt_version
+
+
+def _key(**changes):
+    request = dict(kind="judge", model_id="judge/model", system_prompt="You are a judge.",
+                   temperature=0.7, text="AI-1: hello\nAI-2: hi")
+    request.update(changes)
+    return JudgeCache.key(**request)
+
+
+def test_key_covers_every_request_field():
+    base = _key()
+    assert base == _key()
+    assert base == _key(temperature=0.7000)
+    for changes in ({"kind": "consensus"}, {"model_id": "other/model"}, {"temperature": 0.2},
+                    {"system_prompt": "You are Judge B."}, {"text": "AI-1: hello"}):
+        assert _key(**changes) != base, changes
+
+
+def test_put_get_replace_and_invalidate(tmp_path):
+    cache = JudgeCache(tmp_path / "judge_cache.db")
+    key = _key()
+    assert cache.get(key) is None
+
+    cache.put(key, "   ", kind="judge", model_id="judge/model")  # Empty reports are never stored
+    assert cache.get(key) is None
+    cache.put(key, "First report", kind="judge", model_id="judge/model",
+              prompt_version=prompt_version("You are a judge."))
+    assert cache.get(key) == "First report"
+    cache.put(key, "Fresh report", kind="judge", model_id="judge/model")
+    assert cache.get(key) == "Fresh report"
+
+    other = _key(model_id="other/model")
+    cache.put(other, "Other report", kind="judge", model_id="other/model")
+    stats = cache.stats()
+    assert stats["entries"] == {"judge": 2} and stats["hits"] == 2 and stats["misses"] == 2
+
+    assert cache.invalidate(model_id="judge/model") == 1
+    assert cache.get(key) is None and cache.get(other) == "Other report"
+    assert JudgeCache(tmp_path / "off.db", enabled=False).get(other) is None
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(judge_cache.time, "time", lambda: now[0])
+    cache = JudgeCache(tmp_path / "judge_cache.db", max_age_days=1)
+    cache.put(_key(), "Report", kind="judge", model_id="judge/model")
+    cache.put(_key(text="later"), "Later", kind="judge", model_id="judge/model")
+
+    now[0] += 86400 - 1
+    assert cache.get(_key()) == "Report"
+    now[0] += 2
+    assert cache.get(_key()) is None
+    assert cache.prune() == 1  # The other expired entry
+    assert cache.stats()["entries"] == {}
+
+
+def test_run_single_judge_reuses_report_unless_forced(tmp_path, monkeypatch):
+    import backroomsbench
+    cache = JudgeCache(tmp_path / "judge_cache.db")
+    monkeypatch.setattr(backroomsbench, "get_judge_cache", lambda: cache)
+    calls = []
+
+    def fake_call(prompt, conversation_history, model, system_prompt, temperature, metrics):
+        calls.append(model)
+        metrics["model_used"] = model
+        return f"Report {len(calls)}"
+
+    monkeypatch.setattr(backroomsbench, "call_openrouter_api", fake_call)
+    judge = {"model_id": "judge/model", "temperature": 0.5}
+
+    first = backroomsbench.run_single_judge("Judge A", judge, "transcript")
+    again = backroomsbench.run_single_judge("Judge A", judge, "transcript")
+    assert (first["report"], first["cached"]) == ("Report 1", False)
+    assert (again["report"], again["cached"]) == ("Report 1", True)
+
+    forced = backroomsbench.run_single_judge("Judge A", judge, "transcript", force=True)
+    assert (forced["report"], forced["cached"]) == ("Report 2", False)
+    assert backroomsbench.run_single_judge("Judge A", judge, "transcript")["report"] == "Report 2"
+    assert len(calls) == 2
+
+
+def test_fallback_reports_are_not_cached(tmp_path, monkeypatch):
+    import backroomsbench
+    cache = JudgeCache(tmp_path / "judge_cache.db")
+    monkeypatch.setattr(backroomsbench, "get_judge_cache", lambda: cache)
+
+    def fallback_call(prompt, conversation_history, model, system_prompt, temperature, metrics):
+        metrics["model_used"] = "fallback/model"
+        return "Fallback report"
+
+    monkeypatch.setattr(backroomsbench, "call_openrouter_api", fallback_call)
+    backroomsbench.run_single_judge("Judge A", {"model_id": "judge/model"}, "transcript")
+    assert cache.stats()["entries"] == {}
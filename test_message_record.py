@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Message (message_record.py) must read and write like the dict it replaces; derived fields track edits."""
+
+import copy
+import pickle
+
+from message_record import Message, MessageKind, as_message, message_text, project
+
+
+def _sample():
+    return {
+        "role": "assistant",
+        "content": "Hello there",
+        "ai_name": "AI-1",
+        "model": "Claude Opus 4.5",
+        "_streaming": True,
+        "custom_flag": 1,
+    }
+
+
+def test_dict_parity():
+    original = _sample()
+    msg = Message(original)
+    assert dict(msg) == original
+    assert set(msg) == set(original)
+    assert len(msg) == len(original)
+    assert msg == original and original == msg
+    for key, value in original.items():
+        assert msg[key] == value
+        assert msg.get(key) == value
+        assert key in msg
+    assert msg.get("missing") is None
+    assert msg.get("missing", 5) == 5
+    assert "missing" not in msg
+    try:
+        msg["missing"]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("missing key should raise KeyError")
+
+    msg["hidden"] = True
+    msg["another"] = "x"
+    del msg["_streaming"]
+    del msg["custom_flag"]
+    original.update(hidden=True, another="x")
+    del original["_streaming"], original["custom_flag"]
+    assert dict(msg) == original
+    assert msg.pop("another") == "x"
+    assert msg.setdefault("_prompt", "p") == "p"
+    try:
+        del msg["_streaming"]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("deleting a missing slot key should raise KeyError")
+
+
+def test_copies_are_independent():
+    msg = Message(_sample())
+    for clone in (msg.copy(), copy.copy(msg), pickle.loads(pickle.dumps(msg)), Message(msg)):
+        assert clone == msg and clone is not msg
+        clone["content"] = "changed"
+        clone["custom_flag"] = 2
+        assert msg["content"] == "Hello there" and msg["custom_flag"] == 1
+    assert as_message(msg) is msg
+    assert msg != Message(_sample(), content="other")
+    assert msg != Message({k: v for k, v in _sample().items() if k != "custom_flag"})
+
+
+def test_projection_invalidated_by_content():
+    msg = Message(role="user", content="first")
+    assert msg.text == "first" and not msg.has_image
+    msg["content"] = [
+        {"type": "text", "text": "look "},
+        {"type": "image", "source": {"type": "base64", "media_type": "image/png", "data": "AAAA"}},
+        {"type": "text", "text": "here"},
+    ]
+    assert msg.text == "look here"
+    assert msg.has_image
+    assert msg.projection.base64_image() == "AAAA"
+    assert message_text(msg) == message_text(dict(msg)) == project(dict(msg)).text
+    del msg["content"]
+    assert msg.text == "" and not msg.has_image
+    msg["generated_image_path"] = "images/x.png"
+    assert msg.has_image
+
+
+def test_kind_invalidated_by_role_and_type():
+    msg = Message(role="user", content="hi")
+    assert msg.kind is MessageKind.USER
+    msg["role"] = "assistant"
+    assert msg.kind is MessageKind.ASSISTANT
+    msg["_type"] = "branch_indicator"
+    assert msg.kind is MessageKind.BRANCH_INDICATOR
+    msg["_type"] = "something_new"
+    assert msg.kind is MessageKind.OTHER
+    del msg["_type"]
+    assert msg.kind is MessageKind.ASSISTANT
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Rendered system prompt cache (prompt_compiler.py): reuse, and invalidation on !prompt or a tier change."""
+
+import prompt_compiler
+from prompt_compiler import ADDITIONS_HEADER, PromptCompiler
+
+
+class _Registry:
+    """Counts renders; the real ModelRegistry.system_prompt injects the tier's model list."""
+
+    def __init__(self):
+        self.renders = 0
+
+    def system_prompt(self, ai_name, model_id, prompt, tier):
+        self.renders += 1
+        return f"You are {ai_name} ({model_id}) [{tier}]\n{prompt}"
+
+
+def _compiler(monkeypatch):
+    registry = _Registry()
+    monkeypatch.setattr(prompt_compiler, "get_model_registry", lambda: registry)
+    return PromptCompiler(), registry
+
+
+def test_rendered_once_per_inputs(monkeypatch):
+    compiler, registry = _compiler(monkeypatch)
+    first = compiler.render("AI-1", "m", "Be curious.")
+    assert compiler.render("AI-1", "m", "Be curious.") is first
+    assert registry.renders == 1
+    # Any input in the key renders again
+    compiler.render("AI-2", "m", "Be curious.")
+    compiler.render("AI-1", "other", "Be curious.")
+    compiler.render("AI-1", "m", "Be bold.")
+    compiler.render("AI-1", "m", "Be curious.", tier="Free")
+    assert registry.renders == 5
+    assert compiler.stats() == {"prompts": 5, "hits": 1, "misses": 5}
+
+
+def test_prompt_command_invalidates_that_ai_only(monkeypatch):
+    compiler, registry = _compiler(monkeypatch)
+    additions = ["I like spirals"]
+    before = compiler.render("AI-1", "m", "p", additions=additions)
+    compiler.render("AI-2", "m", "p")
+    assert before.endswith(ADDITIONS_HEADER + "I like spirals")
+
+    # !prompt replaces the insight in place (same length): only the version bump catches it
+    additions[0] = "I like fractals"
+    compiler.additions_changed("AI-1")
+    after = compiler.render("AI-1", "m", "p", additions=additions)
+    assert after.endswith("I like fractals") and after.startswith(before[:len("You are AI-1")])
+    compiler.render("AI-2", "m", "p")
+    assert registry.renders == 3
+
+    # An append that skipped additions_changed() still misses (length is in the key)
+    additions.append("and tides")
+    assert compiler.render("AI-1", "m", "p", additions=additions).endswith("\n- and tides")
+
+
+def test_tier_change_and_registry_rebuild_drop_everything(monkeypatch):
+    compiler, registry = _compiler(monkeypatch)
+    compiler.render("AI-1", "m", "p")
+    compiler.render("AI-2", "m", "p")
+    compiler.tier_changed()
+    assert compiler.stats()["prompts"] == 0
+    compiler.render("AI-1", "m", "p")
+    assert registry.renders == 3
+
+    rebuilt = _Registry()
+    monkeypatch.setattr(prompt_compiler, "get_model_registry", lambda: rebuilt)
+    compiler.render("AI-1", "m", "p")
+    assert rebuilt.renders == 1 and compiler.stats()["prompts"] == 1
+
+
+def test_string_additions_replace_the_prompt(monkeypatch):
+    compiler, registry = _compiler(monkeypatch)
+    assert compiler.render("AI-1", "m", "p", additions="Whole new prompt") == "Whole new prompt"
+    assert registry.renders == 0
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Token bucket and adaptive (AIMD) concurrency limits of rate_limiter.py."""
+
+import rate_limiter
+from rate_limiter import RateLimiter, RateLimitTimeout, _Limit, parse_retry_after
+
+
+class _Clock:
+    """Stands in for time.monotonic so bucket refills are deterministic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_burst_then_rate(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    limit = _Limit("openrouter", rps=2, burst=3, max_concurrency=10)
+
+    for _ in range(3):
+        assert limit.wait_time(clock.now) == 0.0
+        limit.take()
+    # Bucket empty: the next request waits for one token at 2/s
+    assert abs(limit.wait_time(clock.now) - 0.5) < 1e-9
+    clock.now += 0.5
+    assert limit.wait_time(clock.now) == 0.0
+    # Refills never exceed the burst size
+    clock.now += 60
+    limit._refill(clock.now)
+    assert limit.tokens == 3.0
+
+
+def test_aimd_window():
+    limit = _Limit("openrouter:m", rps=0, burst=1, max_concurrency=8, min_concurrency=2)
+    now = 100.0
+    for _ in range(8):
+        limit.take()
+    assert limit.wait_time(now) is None  # Window full: wait for a release
+
+    limit.release(429, 5.0, now)
+    assert limit.limit == 4.0                      # Halved on a throttle ...
+    assert limit.wait_time(now) == 5.0             # ... and paused for Retry-After
+    limit.release(503, None, now + 0.5)
+    assert limit.limit == 4.0                      # One decrease per cooldown window
+    limit.release(429, None, now + 3)
+    limit.release(429, None, now + 6)
+    assert limit.limit == 2.0                      # Never below min_concurrency
+
+    limit.release(200, None, now + 10)
+    assert abs(limit.limit - 2.5) < 1e-9           # Additive increase: +1/limit
+    for _ in range(100):
+        limit.take()
+        limit.release(200, None, now + 20)
+    assert limit.limit == 8.0                      # Capped at max_concurrency
+    assert limit.throttle_streak == 0
+
+
+def test_backoff_without_retry_after_grows():
+    limit = _Limit("k", rps=0, burst=1, max_concurrency=4)
+    pauses = []
+    for i in range(7):
+        limit.take()
+        now = 100.0 * (i + 1)
+        limit.release(429, None, now)
+        pauses.append(limit.blocked_until - now)
+    assert pauses == [1.0, 2.0, 4.0, 8.0, 16.0, 30.0, 30.0]
+
+
+def test_acquire_respects_concurrency_and_times_out():
+    limiter = RateLimiter({"p": {"rps": 0, "burst": 1, "max_concurrency": 1}})
+    permit = limiter.acquire("p", timeout=1)
+    try:
+        limiter.acquire("p", timeout=0.05)
+    except RateLimitTimeout:
+        pass
+    else:
+        raise AssertionError("second permit should not fit a window of 1")
+    permit.release()
+    permit.release()  # Idempotent
+    with limiter.acquire("p", "model-a", timeout=1) as second:
+        second.observe(200, {})
+        assert limiter.stats()["p"]["in_flight"] == 1
+    assert limiter.stats()["p"]["in_flight"] == 0
+    assert "p:model-a" in limiter.stats()
+
+
+def test_model_throttle_pauses_only_its_own_queue():
+    limiter = RateLimiter({"p": {"rps": 0, "burst": 1, "max_concurrency": 4}})
+    with limiter.acquire("p", "slow") as permit:
+        permit.observe(429, {"Retry-After": "30"})
+    stats = limiter.stats()
+    assert stats["p:slow"]["paused_for"] > 25
+    assert stats["p"]["paused_for"] == 0
+    with limiter.acquire("p", "other", timeout=0.5):
+        pass
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("-3") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0  # In the past
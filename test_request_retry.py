@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Retry policy (request_retry.py): error classification and backoff bounds."""
+
+import random
+
+import pytest
+
+pytest.importorskip("requests")
+
+import requests  # noqa: E402
+
+from rate_limiter import RateLimitTimeout  # noqa: E402
+from request_retry import RETRY_POLICIES, RetryPolicy, backoff_delay, classify_exception, classify_status  # noqa: E402
+
+
+@pytest.mark.parametrize("status, text, expected", [
+    (429, "", "throttled"),
+    (500, "", "server"),
+    (503, "", "server"),
+    (529, "overloaded", "server"),
+    (408, "", "timeout"),
+    (404, "No endpoints found that support image input", "no_images"),
+    (404, "model not found", "not_found"),
+    (401, "", "auth"),
+    (402, "insufficient credits", "auth"),
+    (400, "", "bad_request"),
+    (413, "", "bad_request"),
+    (418, "", "unknown"),
+    (None, "", "unknown"),
+])
+def test_classify_status(status, text, expected):
+    assert classify_status(status, text) == expected
+    assert expected in RETRY_POLICIES
+
+
+def test_classify_exception():
+    assert classify_exception(requests.exceptions.ReadTimeout()) == "timeout"
+    assert classify_exception(requests.exceptions.ConnectionError()) == "network"
+    assert classify_exception(RateLimitTimeout("openrouter")) == "queue_timeout"
+    assert classify_exception(ValueError()) == "unknown"
+
+
+def test_backoff_stays_within_bounds():
+    random.seed(3)
+    policy = RetryPolicy(max_retries=5, base_delay=1.0, max_delay=8.0)
+    for retry in range(8):
+        ceiling = min(policy.max_delay, policy.base_delay * 2 ** retry)
+        delays = [backoff_delay(retry, policy) for _ in range(200)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+    # Retry-After is honoured, but capped at twice the policy ceiling
+    assert all(backoff_delay(0, policy, retry_after=5) >= 5 for _ in range(50))
+    assert all(backoff_delay(0, policy, retry_after=60) <= 2 * policy.max_delay for _ in range(50))
+
+
+def test_policies_that_cannot_help_do_not_fall_back():
+    assert not RETRY_POLICIES["auth"].fallback
+    assert not RETRY_POLICIES["bad_request"].fallback
+    assert RETRY_POLICIES["not_found"].max_retries == 0 and RETRY_POLICIES["not_found"].fallback
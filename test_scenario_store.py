@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Scenario store (scenario_store.py): seeding, persistence of edits, lazy seeding and views."""
+
+import os
+
+from scenario_store import SCENARIO, STARTING_PROMPT, ScenarioStore, StoreView
+
+DEFAULTS = {
+    "Backrooms": {"AI-1": "explore", "AI-2": "wander"},
+    "Museum": {"AI-1": "curate", "AI-2": "visit"},
+}
+
+
+def test_seed_rename_delete_persist(tmp_path):
+    path = tmp_path / "scenarios.db"
+    store = ScenarioStore(path)
+    assert store.seed(SCENARIO, DEFAULTS) == 2
+    assert store.seed(SCENARIO, DEFAULTS) == 0  # Unchanged defaults: nothing written
+
+    store.put(SCENARIO, "Garden", {"AI-1": "grow"})
+    assert store.rename(SCENARIO, "Museum", "Gallery")
+    assert not store.rename(SCENARIO, "Missing", "X")
+    assert not store.rename(SCENARIO, "Gallery", "Garden")  # Name taken
+    assert store.delete(SCENARIO, "Backrooms")
+    assert not store.delete(SCENARIO, "Backrooms")
+
+    # A fresh store on the same file sees every edit, in order
+    reopened = ScenarioStore(path)
+    assert list(reopened.get_all(SCENARIO)) == ["Gallery", "Garden"]
+    assert reopened.get(SCENARIO, "Gallery") == DEFAULTS["Museum"]
+
+    # Reseeding the same defaults doesn't bring deleted or renamed entries back ...
+    assert reopened.seed(SCENARIO, DEFAULTS) == 0
+    assert "Backrooms" not in reopened.get_all(SCENARIO)
+    # ... but a default whose text changed in config.py is merged in again
+    changed = dict(DEFAULTS, Backrooms={"AI-1": "explore further", "AI-2": "wander"})
+    assert reopened.seed(SCENARIO, changed) == 1
+    assert reopened.get(SCENARIO, "Backrooms")["AI-1"] == "explore further"
+
+
+def test_other_process_writes_are_picked_up(tmp_path):
+    path = tmp_path / "scenarios.db"
+    reader, writer = ScenarioStore(path), ScenarioStore(path)
+    reader.put(STARTING_PROMPT, "hello", "Hi there")
+    assert reader.get(STARTING_PROMPT, "hello") == "Hi there"
+    writer.put(STARTING_PROMPT, "hello", "Hello again, this time longer")
+    assert reader.get(STARTING_PROMPT, "hello") == "Hello again, this time longer"
+
+
+def test_seeding_is_lazy(tmp_path):
+    path = tmp_path / "scenarios.db"
+    store = ScenarioStore(path)
+    store.register_defaults(SCENARIO, DEFAULTS)
+    assert not os.path.exists(path)  # Registering touches no files
+    assert list(store.get_all(SCENARIO)) == list(DEFAULTS)
+    assert os.path.exists(path)
+
+    other = ScenarioStore(tmp_path / "other.db")
+    other.register_defaults(SCENARIO, DEFAULTS)
+    other.put(SCENARIO, "First write", {"AI-1": "x"})  # A write seeds first too
+    assert list(other.get_all(SCENARIO)) == list(DEFAULTS) + ["First write"]
+
+
+def test_store_view_reads_live_records(tmp_path, monkeypatch):
+    import scenario_store
+    store = ScenarioStore(tmp_path / "scenarios.db")
+    monkeypatch.setattr(scenario_store, "_store", store)
+    store.register_defaults(SCENARIO, DEFAULTS)
+    view = StoreView(SCENARIO, DEFAULTS)
+
+    assert len(view) == 2 and view["Museum"] == DEFAULTS["Museum"]
+    store.put(SCENARIO, "Garden", {"AI-1": "grow"})
+    store.delete(SCENARIO, "Museum")
+    assert sorted(view) == ["Backrooms", "Garden"]
+    assert "Museum" not in view and view.get("Museum") is None
+    try:
+        view["Museum"]
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("deleted scenario should raise KeyError")
+
+
+def test_store_view_falls_back_to_defaults(tmp_path, monkeypatch):
+    import scenario_store
+    # A directory where the database file should be: sqlite can't open it
+    broken = ScenarioStore(tmp_path)
+    monkeypatch.setattr(scenario_store, "_store", broken)
+    view = StoreView(SCENARIO, DEFAULTS)
+    assert dict(view) == DEFAULTS
+    assert view["Backrooms"] == DEFAULTS["Backrooms"]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Session archive (session_archive.py): session records and latest-snapshot selection."""
+
+import os
+
+from session_archive import find_sessions, latest_snapshots, load_session, write_session_record
+
+
+def _turns(count, speaker="AI-1"):
+    return [{"role": "assistant", "ai_name": speaker, "model": "m", "content": f"turn {i}"} for i in range(count)]
+
+
+def _legacy(name, messages):
+    return {"name": name, "key": name, "timestamp": name[len("session_"):], "session_id": None,
+            "branch_id": None, "messages": messages}
+
+
+def _recorded(timestamp, session_id, branch_id, count):
+    key = f"session_{session_id}" + (f"_branch_{branch_id}" if branch_id else "")
+    return {"name": f"session_{timestamp}", "key": key, "timestamp": timestamp, "session_id": session_id,
+            "branch_id": branch_id, "messages": _turns(count)}
+
+
+def test_latest_snapshot_per_session_and_branch():
+    sessions = [
+        _recorded("20260101_120000", "20260101_113000", None, 2),
+        _recorded("20260101_120500", "20260101_113000", "b1", 3),
+        _recorded("20260101_121000", "20260101_113000", None, 4),
+        _recorded("20260102_090000", "20260102_080000", None, 1),
+    ]
+    latest = latest_snapshots(sessions)
+    assert [(s["key"], s["timestamp"]) for s in latest] == [
+        ("session_20260101_113000_branch_b1", "20260101_120500"),
+        ("session_20260101_113000", "20260101_121000"),
+        ("session_20260102_080000", "20260102_090000"),
+    ]
+
+
+def test_legacy_snapshots_drop_prefixes_and_duplicates():
+    sessions = [
+        _legacy("session_20250101_100000", _turns(2)),
+        _legacy("session_20250101_100500", _turns(3)),         # Extends the first
+        _legacy("session_20250101_101000", _turns(3)),         # Same as the second: newest kept
+        _legacy("session_20250101_110000", _turns(2, "AI-2")),  # Different speaker: own conversation
+        _legacy("session_20250101_120000", []),                # Empty: prefix of everything
+        # Same text split across messages differently isn't the same conversation
+        _legacy("session_20250101_130000", [{"role": "assistant", "ai_name": "AI-1", "content": "turn 0\nturn 1"}]),
+    ]
+    names = [s["name"] for s in latest_snapshots(sessions)]
+    assert names == ["session_20250101_101000", "session_20250101_110000", "session_20250101_130000"]
+
+
+def test_many_legacy_snapshots_of_one_conversation():
+    sessions = [_legacy(f"session_20250101_{i:06d}", _turns(i + 1)) for i in range(300)]
+    latest = latest_snapshots(sessions)
+    assert len(latest) == 1 and len(latest[0]["messages"]) == 300
+
+
+def test_session_record_round_trip(tmp_path):
+    folder = tmp_path / "session_20260101_120000"
+    os.makedirs(folder)
+    conversation = [
+        {"role": "user", "content": "Hello"},
+        {"role": "system", "_type": "branch_indicator", "content": "Branch"},
+        {"role": "assistant", "ai_name": "AI-1", "model": "Model A",
+         "content": [{"type": "text", "text": "Look"},
+                     {"type": "image", "source": {"type": "base64", "data": "AAAA"}}]},
+    ]
+    write_session_record(str(folder), conversation, "Backrooms", ["Model A"], "20260101_120000",
+                         session_id="20260101_113000", branch_id="b1")
+    assert find_sessions([str(tmp_path)]) == [str(folder)]
+
+    session = load_session(str(folder))
+    assert session["key"] == "session_20260101_113000_branch_b1"
+    assert session["scenario"] == "Backrooms" and session["participants"] == ["Model A"]
+    assert [m["role"] for m in session["messages"]] == ["user", "assistant"]
+    image = session["messages"][1]["content"][1]
+    assert image["type"] == "image" and "AAAA" not in str(image)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""SSE decoding (sse_stream.py) must not depend on where the network splits the byte stream."""
+
+import json
+import random
+
+from sse_stream import SSEDecoder, openai_delta, read_stream
+
+STREAM = (
+    b"\xef\xbb\xbf: OPENROUTER PROCESSING\r\n\r\n"
+    b"event: message\r\nid: 1\r\ndata: {\"choices\": [{\"delta\": {\"content\": \"Hel\"}}]}\r\n\r\n"
+    b"data: {\"choices\": [{\"delta\": {\"content\": \"lo \\u00e9\"}}]}\n\n"
+    b"data: first line\rdata: second line\r\r"
+    b": keep-alive\n\n"
+    b"data: {\"choices\": [{\"delta\": {}, \"finish_reason\": \"stop\"}]}\n\n"
+    b"data: [DONE]\n\n"
+)
+
+
+def _decode(chunks):
+    decoder = SSEDecoder()
+    events = []
+    for chunk in chunks:
+        events.extend(decoder.feed(chunk))
+    events.extend(decoder.flush())
+    return [(event.event, event.data, event.id) for event in events], decoder.comments
+
+
+def _split(data, cuts):
+    bounds = [0] + sorted(cuts) + [len(data)]
+    return [data[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def test_events_independent_of_chunk_boundaries():
+    expected, comments = _decode([STREAM])
+    assert [data for _, data, _ in expected] == [
+        b'{"choices": [{"delta": {"content": "Hel"}}]}',
+        b'{"choices": [{"delta": {"content": "lo \\u00e9"}}]}',
+        b"first line\nsecond line",
+        b'{"choices": [{"delta": {}, "finish_reason": "stop"}]}',
+        b"[DONE]",
+    ]
+    assert expected[0][2] == "1"
+    assert comments == 2
+
+    # Every single split point (including inside the BOM and between CR and LF) ...
+    for cut in range(1, len(STREAM)):
+        assert _decode(_split(STREAM, [cut])) == (expected, comments), cut
+    # ... byte-at-a-time, and random multi-way splits
+    assert _decode([STREAM[i:i + 1] for i in range(len(STREAM))]) == (expected, comments)
+    rng = random.Random(7)
+    for _ in range(200):
+        cuts = rng.sample(range(1, len(STREAM)), rng.randint(2, 12))
+        assert _decode(_split(STREAM, cuts)) == (expected, comments)
+
+
+def test_flush_dispatches_unterminated_event():
+    decoder = SSEDecoder()
+    assert decoder.feed(b"data: tail") == []
+    assert [event.data for event in decoder.flush()] == [b"tail"]
+    assert decoder.flush() == []
+
+
+class _Response:
+    """Just enough of a streaming requests response for read_stream."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_content(self, chunk_size=None):
+        return iter(self.chunks)
+
+
+def test_read_stream_joins_text_across_chunks():
+    deltas = ["Hel", "lo", ", ", "wörld"]
+    body = b"".join(
+        b"data: " + json.dumps({"choices": [{"delta": {"content": text}}]}).encode() + b"\n\n" for text in deltas
+    ) + b"data: {\"choices\": [{\"delta\": {}, \"finish_reason\": \"length\"}]}\n\ndata: [DONE]\n\n"
+    streamed = []
+    result = read_stream(_Response(_split(body, [5, 31, 32, 77])), openai_delta, on_text=streamed.append)
+    assert result.text == "Hello, wörld"
+    assert streamed == deltas
+    assert result.finish_reason == "length"
+    assert result.chunk_count == len(deltas) + 1
+    assert not result.aborted
+
+    aborted = read_stream(_Response([body]), openai_delta, on_event=lambda payload: False)
+    assert aborted.aborted and aborted.text == ""
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Usage ledger (usage_ledger.py): record shape, cost from cached pricing, aggregation and the JSONL mirror."""
+
+import json
+
+import config
+from usage_ledger import UsageLedger, compute_cost, make_record, registry_ids, summarize
+
+PRICING = {
+    "anthropic/claude-opus-4.5": {"prompt": "0.000005", "completion": "0.000025",
+                                  "input_cache_read": "0.0000005", "input_cache_write": "0.00000625"},
+}
+
+
+class _Registry:
+    def metadata(self, model_id):
+        return {"pricing": PRICING[model_id]} if model_id in PRICING else {}
+
+
+def _use_registry(monkeypatch):
+    monkeypatch.setattr(config, "get_model_registry", lambda: _Registry())
+
+
+def test_record_shape(monkeypatch):
+    _use_registry(monkeypatch)
+    usage = {"prompt_tokens": 1000, "completion_tokens": 200, "cached_tokens": 600, "cost": 0.0123}
+    record = make_record("turn", "openai/gpt-5", usage, ttft=0.5, duration=2.5, ai_name="AI-1",
+                         provider="OpenAI", generation_id="gen-1", attempts=2)
+    assert set(record) == {
+        "kind", "ai_name", "model", "provider", "generation_id", "ok", "prompt_tokens",
+        "completion_tokens", "cached_tokens", "cache_write_tokens", "ttft", "duration",
+        "tokens_per_s", "cost", "attempts", "hedged",
+    }
+    assert record["cost"] == 0.0123  # OpenRouter's own figure wins
+    assert record["tokens_per_s"] == 100.0  # 200 tokens over the 2s after the first token
+    assert record["cache_write_tokens"] == 0 and record["attempts"] == 2 and not record["hedged"]
+
+    failed = make_record("image", "unknown/model", ok=False)
+    assert failed["prompt_tokens"] == 0 and failed["tokens_per_s"] is None and failed["cost"] is None
+
+
+def test_cost_prices_cache_reads_and_writes(monkeypatch):
+    _use_registry(monkeypatch)
+    assert registry_ids("claude-opus-4-5-20251101")[-1] == "anthropic/claude-opus-4.5"
+    assert registry_ids("openai/gpt-5") == ["openai/gpt-5"]
+
+    usage = {"prompt_tokens": 1000, "completion_tokens": 100, "cached_tokens": 600, "cache_write_tokens": 300}
+    expected = 100 * 0.000005 + 600 * 0.0000005 + 300 * 0.00000625 + 100 * 0.000025
+    assert abs(compute_cost("claude-opus-4-5-20251101", usage) - expected) < 1e-12
+    assert compute_cost("unknown/model", usage) is None
+    assert compute_cost("anthropic/claude-opus-4.5", None) is None
+
+
+def test_summarize_counts_lost_hedge_legs_as_cost_only():
+    records = [
+        {"model": "a", "ok": True, "prompt_tokens": 100, "cached_tokens": 50, "cost": 0.01, "ttft": 1.0},
+        {"model": "a", "ok": False, "hedged": True, "prompt_tokens": 100, "cost": 0.01, "ttft": 3.0},
+        {"model": "a", "ok": False, "cost": None},
+        {"model": "b", "ok": True, "completion_tokens": 10, "tokens_per_s": 20.0},
+    ]
+    groups = summarize(records)
+    assert groups["a"]["calls"] == 3 and groups["a"]["errors"] == 1
+    assert groups["a"]["cost"] == 0.02 and groups["a"]["avg_ttft"] == 2.0
+    assert groups["a"]["cached_share"] == 0.25
+    assert groups["b"]["avg_tokens_per_s"] == 20.0 and groups["b"]["cached_share"] == 0.0
+    assert summarize(records, by=None)["total"]["calls"] == 4
+
+
+def test_ledger_mirrors_records_to_session_file(tmp_path):
+    ledger = UsageLedger(tmp_path)
+    assert ledger.status_text() == ""
+    ledger.start_session("20260101_120000")
+    ledger.record({"kind": "turn", "model": "a", "ok": True, "prompt_tokens": 1500,
+                   "completion_tokens": 500, "cached_tokens": 750, "cost": 0.25})
+    lines = (tmp_path / "session_20260101_120000.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    stored = json.loads(lines[0])
+    assert stored["session"] == "20260101_120000" and "ts" in stored
+    assert ledger.records() == [stored]
+    assert ledger.status_text() == "1 calls · 2.0k tok (50% cached) · $0.250"
+
+    ledger.start_session("20260101_130000")  # A new session starts empty
+    assert ledger.records() == [] and summarize(ledger.records()) == {}
@@ -3,6 +3,9 @@
 Development tools for Liminal Backrooms.
 
 - debug_tools: GUI inspector (F12)
-- freeze_detector: Detects UI freezes and logs stack traces
+- freeze_detector: Detects UI freezes and logs stack traces; SamplingProfiler
+  adds collapsed-stack profiling and sub-second stall logging
+- import_profiler: Per-module import time report (python tools/import_profiler.py)
+- usage_report: Token, latency and cost report over the usage ledgers (python tools/usage_report.py)
 - check_developer_tools: Pre-commit hook script
 """
\ No newline at end of file
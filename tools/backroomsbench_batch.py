@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Score archived sessions with BackroomsBench in bulk.
+
+The BackroomsBench menu action evaluates the open conversation only. This
+reads session exports / auto-backups (session_archive.py: session.json, or
+conversation.txt for older folders) and evaluates them all with one judge
+pool shared across sessions. Auto-backup archives a snapshot after every
+round, so only the newest snapshot of each conversation (app session and
+branch) is scored, into <output>/<session key>/. Rerunning skips
+conversations already scored, so an interrupted batch resumes; the output folder's leaderboard is rebuilt once
+at the end. Judge reports come from judge_cache.py when the same transcript
+was already judged with the same model, temperature and prompt, so
+--rescore after a consensus change only pays for the new calls.
+
+    python tools/backroomsbench_batch.py                         # exports/backups -> backroomsbench_reports/archive
+    python tools/backroomsbench_batch.py --dry-run
+    python tools/backroomsbench_batch.py --output backroomsbench_reports/rescore_v2 --judges 9
+    python tools/backroomsbench_batch.py exports/backups/session_20260101_120000 --rescore --force
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from session_archive import find_sessions, latest_snapshots, load_session
+
+
+def load_sessions(roots, since=None):
+    """The newest snapshot of each conversation under roots, optionally only those from YYYYMMDD on."""
+    sessions = []
+    for folder in find_sessions(roots):
+        try:
+            session = load_session(folder)
+        except (OSError, ValueError) as e:
+            print(f"[BackroomsBatch] Could not read {folder}: {e}", file=sys.stderr)
+            continue
+        if session is None or (since and str(session["timestamp"]) < since):
+            continue
+        sessions.append(session)
+    return latest_snapshots(sessions)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluate archived sessions with BackroomsBench")
+    parser.add_argument("folders", nargs="*", help="Session folders or folders of them (default: exports/backups)")
+    parser.add_argument("--output", default=os.path.join("backroomsbench_reports", "archive"),
+                        help="Where reports and the batch leaderboard go")
+    parser.add_argument("--judges", type=int, default=6, help="Judge calls in flight across all sessions")
+    parser.add_argument("--sessions", type=int, help="Sessions in flight (default: enough to keep the judges busy)")
+    parser.add_argument("--since", help="Only sessions from this date on (YYYYMMDD)")
+    parser.add_argument("--min-messages", type=int, default=5, help="Skip sessions with fewer dialogue messages")
+    parser.add_argument("--rescore", action="store_true", help="Evaluate sessions that are already scored again")
+    parser.add_argument("--force", action="store_true", help="Call the judges even if their reports are cached")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be evaluated and exit")
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.folders, args.since)
+    if not sessions:
+        print("[BackroomsBatch] No archived sessions found")
+        sys.exit(1)
+
+    if args.dry_run:
+        from backroomsbench import is_scored
+        for session in sessions:
+            scored = is_scored(os.path.join(args.output, session["key"]), len(session["messages"]))
+            state = "scored" if scored and not args.rescore else "pending"
+            print(f"{session['key']:<40} {state:<8} {len(session['messages']):>5} msgs  "
+                  f"{session['name']:<24} {session['scenario']}")
+        sys.exit(0)
+
+    from backroomsbench import run_backroomsbench_batch
+
+    def report(name, status, done, total):
+        print(f"[BackroomsBatch] {done}/{total} {name}: {status}")
+
+    outcome = run_backroomsbench_batch(
+        sessions, args.output,
+        max_judges=args.judges,
+        max_sessions=args.sessions,
+        min_messages=args.min_messages,
+        rescore=args.rescore,
+        force=args.force,
+        progress_callback=report
+    )
+    print(f"\n[BackroomsBatch] {len(outcome['scored'])} scored, {len(outcome['skipped'])} skipped, "
+          f"{len(outcome['failed'])} failed - leaderboard in {args.output}")
+    sys.exit(1 if outcome["failed"] else 0)
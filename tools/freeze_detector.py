@@ -16,14 +16,35 @@ Usage:
     # The detector will automatically log warnings when freezes are detected.
     # Check freeze_log.txt for details.
 
+Sampling profiler mode:
+    Real jank is rarely a 5-second freeze - it's many 100-500ms stalls
+    (a render overrunning its 16ms debounce, a big QPixmap rescale).
+    SamplingProfiler extends FreezeDetector with a fast heartbeat that measures
+    every late event-loop tick, plus a sampler thread that records all thread
+    stacks as collapsed stacks (flame graph input):
+
+    profiler = SamplingProfiler(sample_hz=100, stall_threshold_ms=100, output_dir="logs")
+    profiler.start()
+    app.aboutToQuit.connect(profiler.stop)
+
+    Output (rewritten periodically and on stop):
+        logs/profile_collapsed.txt  - "thread;outer;...;inner count" lines for
+                                      flamegraph.pl, speedscope or inferno
+        logs/stall_log.txt          - every UI stall with its main-thread stack
+
+    Main-thread functions can be tagged with @profiled_section("name", budget_ms)
+    to get named overrun counts; the decorator is a no-op unless a profiler runs.
+
 Note: This is a DEBUG tool. Disable in production as it adds overhead.
 """
 
 import sys
 import os
+import functools
 import threading
 import traceback
 import time
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
 
@@ -169,6 +190,282 @@ class FreezeDetector:
             print(f"[FreezeDetector] Failed to write log: {e}")
 
 
+# =============================================================================
+# Sampling profiler
+# =============================================================================
+
+# The running SamplingProfiler (if any) - read by @profiled_section
+_active_profiler = None
+
+
+def profiled_section(name, budget_ms=16):
+    """
+    Decorator that reports main-thread functions running over budget.
+
+    Costs one global lookup when no profiler is running, so it can stay on
+    hot GUI methods permanently.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _active_profiler
+            if profiler is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if elapsed_ms > budget_ms:
+                    profiler.record_section(name, elapsed_ms, budget_ms)
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler(FreezeDetector):
+    """
+    Continuous sampling profiler with sub-second stall detection.
+
+    How it works:
+    1. The inherited QTimer heartbeat runs every heartbeat_ms; each tick measures
+       how late it fired. Lateness above stall_threshold_ms is a UI stall.
+    2. A sampler thread grabs sys._current_frames() sample_hz times per second
+       and counts each thread's stack as a collapsed "a;b;c" string.
+    3. Main-thread samples taken while the heartbeat is overdue are kept apart,
+       so each stall is reported with the stacks that were running during it.
+    4. The long-freeze watchdog from FreezeDetector keeps working unchanged.
+
+    All file I/O happens on the sampler thread; the main thread only appends to
+    in-memory lists.
+    """
+
+    def __init__(self, sample_hz=100, stall_threshold_ms=100, heartbeat_ms=10,
+                 max_depth=64, output_dir="logs", flush_interval=30,
+                 timeout_seconds=5, check_interval=1):
+        """
+        Args:
+            sample_hz: Stack samples per second (all threads)
+            stall_threshold_ms: Heartbeat lateness that counts as a UI stall
+            heartbeat_ms: Main-thread heartbeat interval
+            max_depth: Frames kept per stack (innermost frames win)
+            output_dir: Where profile_collapsed.txt / stall_log.txt / freeze_log.txt go
+            flush_interval: Seconds between periodic writes of the output files
+            timeout_seconds: Long-freeze threshold (see FreezeDetector)
+            check_interval: Long-freeze watchdog interval (see FreezeDetector)
+        """
+        self.output_dir = Path(output_dir)
+        super().__init__(timeout_seconds=timeout_seconds, check_interval=check_interval,
+                         log_file=self.output_dir / "freeze_log.txt")
+        self.sample_interval = 1.0 / max(1, sample_hz)
+        self.stall_threshold = stall_threshold_ms / 1000.0
+        self.heartbeat_ms = max(1, int(heartbeat_ms))
+        self.max_depth = max_depth
+        self.flush_interval = flush_interval
+        self.collapsed_file = self.output_dir / "profile_collapsed.txt"
+        self.stall_file = self.output_dir / "stall_log.txt"
+
+        self._lock = threading.Lock()
+        self._stacks = Counter()         # collapsed stack -> samples (all threads)
+        self._stall_samples = Counter()  # main-thread stacks of the stall in progress
+        self._pending_stalls = []        # stalls not yet written to stall_log.txt
+        self._sections = {}              # section name -> [overruns, total_ms, max_ms, budget_ms]
+        self._sample_count = 0
+        self._stall_count = 0
+        self._labels = {}                # code object -> "func (file)" label
+        self._thread_names = {}
+        self._main_ident = threading.main_thread().ident
+        self._last_beat = time.perf_counter()
+        self._sampler = None
+
+    def start(self):
+        """Start the heartbeat, the long-freeze watchdog and the sampler thread."""
+        global _active_profiler
+        if not HAS_QT or self._running:
+            super().start()
+            return
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        super().start()
+        # Fast heartbeat: lateness of each tick is the stall measurement
+        self._last_beat = time.perf_counter()
+        self._timer.start(self.heartbeat_ms)
+
+        self._sampler = threading.Thread(target=self._sample_loop, name="SamplingProfiler",
+                                         daemon=True)
+        self._sampler.start()
+        _active_profiler = self
+        print(f"[Profiler] Sampling at {1 / self.sample_interval:.0f} Hz, "
+              f"stall threshold {self.stall_threshold * 1000:.0f}ms, output in {self.output_dir}")
+
+    def stop(self):
+        """Stop sampling and write the final profile and stall log."""
+        global _active_profiler
+        was_running = self._running
+        super().stop()
+        if _active_profiler is self:
+            _active_profiler = None
+        if self._sampler is not None:
+            self._sampler.join(timeout=2)
+            self._sampler = None
+        if was_running:
+            self.flush()
+            print(f"[Profiler] Stopped: {self._sample_count} samples, {self._stall_count} stalls "
+                  f"-> {self.collapsed_file}")
+
+    def _heartbeat(self):
+        """Main-thread tick: a late tick means the event loop was blocked."""
+        super()._heartbeat()
+        now = time.perf_counter()
+        late = now - self._last_beat - self.heartbeat_ms / 1000.0
+        self._last_beat = now
+        if late >= self.stall_threshold:
+            self._close_stall(late * 1000)
+
+    def _close_stall(self, duration_ms):
+        """Attach the samples collected during the stall and queue it for logging."""
+        with self._lock:
+            samples, self._stall_samples = self._stall_samples, Counter()
+            self._stall_count += 1
+            self._pending_stalls.append({
+                "time": datetime.now().strftime("%H:%M:%S.%f")[:-3],
+                "duration_ms": duration_ms,
+                "samples": samples,
+            })
+
+    def record_section(self, name, elapsed_ms, budget_ms):
+        """Called by @profiled_section when a tagged function overruns its budget."""
+        with self._lock:
+            stats = self._sections.setdefault(name, [0, 0.0, 0.0, budget_ms])
+            stats[0] += 1
+            stats[1] += elapsed_ms
+            stats[2] = max(stats[2], elapsed_ms)
+
+    # -------------------------------------------------------------------------
+    # Sampling (background thread)
+    # -------------------------------------------------------------------------
+
+    def _label(self, code):
+        """Frame label for collapsed stacks, cached per code object."""
+        label = self._labels.get(code)
+        if label is None:
+            filename = os.path.basename(code.co_filename)
+            # ';' separates frames in the collapsed format
+            label = f"{code.co_name} ({filename})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def _thread_name(self, ident):
+        name = self._thread_names.get(ident)
+        if name is None:
+            self._thread_names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._thread_names.get(ident, f"thread-{ident}")
+        return name
+
+    def collapse(self, frame, thread_name):
+        """Turn a frame chain into 'thread;outermost;...;innermost'."""
+        labels = []
+        depth = 0
+        while frame is not None and depth < self.max_depth:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+            depth += 1
+        labels.append(thread_name)
+        labels.reverse()
+        return ";".join(labels)
+
+    def _sample_loop(self):
+        own_ident = threading.get_ident()
+        overdue = self.stall_threshold + self.heartbeat_ms / 1000.0
+        last_flush = time.monotonic()
+
+        while self._running:
+            time.sleep(self.sample_interval)
+            if not self._running:
+                break
+
+            frames = sys._current_frames()
+            stalled = time.perf_counter() - self._last_beat > overdue
+            collapsed = []
+            for ident, frame in frames.items():
+                if ident == own_ident:
+                    continue
+                collapsed.append((ident, self.collapse(frame, self._thread_name(ident))))
+            del frames  # don't keep other threads' frames alive
+
+            with self._lock:
+                self._sample_count += 1
+                for ident, stack in collapsed:
+                    self._stacks[stack] += 1
+                    if stalled and ident == self._main_ident:
+                        self._stall_samples[stack] += 1
+
+            if self._pending_stalls:
+                self._write_stalls()
+            if time.monotonic() - last_flush >= self.flush_interval:
+                self.flush()
+                last_flush = time.monotonic()
+
+    # -------------------------------------------------------------------------
+    # Output
+    # -------------------------------------------------------------------------
+
+    def collapsed_stacks(self):
+        """Snapshot of the aggregated profile: {collapsed stack: sample count}."""
+        with self._lock:
+            return dict(self._stacks)
+
+    def flush(self):
+        """Rewrite profile_collapsed.txt and log pending stalls and section overruns."""
+        self._write_profile()
+        self._write_stalls(include_sections=True)
+
+    def _write_profile(self):
+        with self._lock:
+            stacks = sorted(self._stacks.items(), key=lambda item: item[1], reverse=True)
+        try:
+            tmp_path = self.collapsed_file.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for stack, count in stacks:
+                    f.write(f"{stack} {count}\n")
+            os.replace(tmp_path, self.collapsed_file)
+        except Exception as e:
+            print(f"[Profiler] Failed to write profile: {e}")
+
+    def _write_stalls(self, include_sections=False):
+        with self._lock:
+            stalls, self._pending_stalls = self._pending_stalls, []
+            sections = {name: list(stats) for name, stats in self._sections.items()}
+        if not include_sections:
+            sections = {}
+        if not stalls and not sections:
+            return
+
+        lines = []
+        for stall in stalls:
+            samples = stall["samples"]
+            lines.append(f"[{stall['time']}] UI stall {stall['duration_ms']:.0f}ms "
+                         f"({sum(samples.values())} samples)")
+            for stack, count in samples.most_common(3):
+                # Innermost frames are the interesting part
+                frames = stack.split(";")[1:]
+                lines.append(f"    {count:>3}x  " + " <- ".join(reversed(frames[-6:])))
+        if sections:
+            lines.append(f"[{datetime.now().strftime('%H:%M:%S')}] Section overruns so far:")
+            for name, (overruns, total_ms, max_ms, budget_ms) in sorted(sections.items()):
+                lines.append(f"    {name}: {overruns} over {budget_ms}ms budget, "
+                             f"avg {total_ms / overruns:.0f}ms, max {max_ms:.0f}ms")
+
+        try:
+            with open(self.stall_file, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except Exception as e:
+            print(f"[Profiler] Failed to write stall log: {e}")
+
+        for stall in stalls:
+            if stall["duration_ms"] >= self.stall_threshold * 1000 * 2:
+                print(f"[Profiler] UI stall {stall['duration_ms']:.0f}ms (see {self.stall_file})")
+
+
 # Also add faulthandler for segfaults
 def enable_faulthandler(log_file="crash_log.txt"):
     """
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Import-time report for the app's modules.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter (so
+nothing is cached in sys.modules) and breaks the cost down per imported
+module. Use it as a benchmark before/after touching top-level imports:
+
+    python tools/import_profiler.py                 # main entry modules
+    python tools/import_profiler.py shared_utils -n 30
+    python tools/import_profiler.py gui --json      # machine-readable
+
+Times are cumulative (the module plus everything it imported first) unless
+--self is given.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Modules reported when none are given on the command line
+DEFAULT_MODULES = ["config", "shared_utils", "command_parser", "gui", "main"]
+
+
+def parse_importtime(stderr):
+    """
+    Parse -X importtime output.
+
+    Returns:
+        List of {module, self_us, cumulative_us, depth} in import order
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, fields = line.split(":", 1)
+            self_us, cumulative_us, name = fields.split("|", 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": depth,
+        })
+    return rows
+
+
+def profile_import(module, python=None, timeout=120):
+    """
+    Import `module` in a fresh interpreter from the project root.
+
+    Returns:
+        dict with module, ok, wall_ms (whole interpreter run), import_ms
+        (the module's own cumulative entry), rows and error
+    """
+    python = python or sys.executable
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(PROJECT_ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=timeout,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    rows = parse_importtime(proc.stderr)
+
+    import_ms = None
+    for row in rows:
+        if row["module"] == module and row["depth"] == 0:
+            import_ms = row["cumulative_us"] / 1000
+    error = None
+    if proc.returncode != 0:
+        messages = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        error = messages[-1] if messages else "failed"
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "wall_ms": round(wall_ms, 1),
+        "import_ms": round(import_ms, 1) if import_ms is not None else None,
+        "rows": rows,
+        "error": error,
+    }
+
+
+def top_modules(rows, count=20, by="cumulative_us", top_level_only=False):
+    """The `count` most expensive entries (optionally only packages' top-level modules)."""
+    selected = rows
+    if top_level_only:
+        selected = [r for r in rows if "." not in r["module"]]
+    return sorted(selected, key=lambda r: r[by], reverse=True)[:count]
+
+
+def print_report(result, count=20, by="cumulative_us"):
+    print(f"\n═══ import {result['module']} ═══")
+    if not result["ok"]:
+        print(f"  [X] Import failed: {result['error']}")
+    if result["import_ms"] is not None:
+        print(f"  {result['module']}: {result['import_ms']:.1f} ms cumulative, "
+              f"{result['wall_ms']:.0f} ms interpreter wall time")
+    label = "cumulative" if by == "cumulative_us" else "self"
+    print(f"  Top {count} by {label} time (top-level modules):")
+    for row in top_modules(result["rows"], count, by=by, top_level_only=True):
+        print(f"    {row[by] / 1000:8.1f} ms  {row['module']}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Per-module import time breakdown")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument("-n", "--top", type=int, default=20, help="Entries to show per module")
+    parser.add_argument("--self", dest="self_time", action="store_true", help="Sort by self time")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    by = "self_us" if args.self_time else "cumulative_us"
+    results = [profile_import(module) for module in args.modules]
+
+    if args.json:
+        for result in results:
+            result["top"] = top_modules(result.pop("rows"), args.top, by=by, top_level_only=True)
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print_report(result, args.top, by=by)
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
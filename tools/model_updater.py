@@ -5,7 +5,8 @@ This script validates your hand-curated model list against the live API,
 removing any models that no longer exist (404) while preserving your curation.
 
 Features:
-- Fast startup (5 second timeout)
+- Non-blocking startup: config.py validates from the cache only (fresh or
+  stale); main.py refreshes from the API in the background once the window is up
 - Caches validation results for 24 hours  
 - Silently falls back to curated list if network unavailable
 
@@ -18,17 +19,14 @@ Usage:
     AI_MODELS = validate_models(CURATED_MODELS)
 """
 
+import importlib.util
 import json
 import time
 from datetime import datetime
 from pathlib import Path
 
-# Try to import requests
-try:
-    import requests
-    HAS_REQUESTS = True
-except ImportError:
-    HAS_REQUESTS = False
+# requests is only imported when a fetch actually happens (keeps config import fast)
+HAS_REQUESTS = importlib.util.find_spec("requests") is not None
 
 # Cache file location (in project root, not tools folder)
 CACHE_FILE = Path(__file__).parent.parent / "models_cache.json"
@@ -38,16 +36,31 @@ CACHE_MAX_AGE_HOURS = 24
 OPENROUTER_API_URL = "https://openrouter.ai/api/v1/models"
 
 
-def fetch_available_model_ids(timeout: float = 5.0) -> set | None:
+def _summarize_model(model: dict) -> dict:
+    """The parts of a /models entry the app uses (see model_registry.py)."""
+    architecture = model.get("architecture") or {}
+    pricing = model.get("pricing") or {}
+    return {
+        "context_length": model.get("context_length"),
+        "pricing": {k: pricing[k] for k in ("prompt", "completion", "image", "input_cache_read") if k in pricing},
+        "input_modalities": architecture.get("input_modalities") or [],
+        "output_modalities": architecture.get("output_modalities") or [],
+    }
+
+
+def fetch_model_catalog(timeout: float = 5.0) -> dict | None:
     """
-    Fetch all available model IDs from OpenRouter API.
+    Fetch all available models from OpenRouter API.
     
-    Returns a set of model IDs, or None on failure.
+    Returns {model_id: {context_length, pricing, input_modalities,
+    output_modalities}}, or None on failure.
     """
     if not HAS_REQUESTS:
         print("[ModelUpdater] requests library not available")
         return None
     
+    import requests
+    
     try:
         start_time = time.time()
         response = requests.get(OPENROUTER_API_URL, timeout=timeout)
@@ -60,11 +73,10 @@ def fetch_available_model_ids(timeout: float = 5.0) -> set | None:
         data = response.json()
         models = data.get("data", [])
         
-        # Extract just the IDs
-        model_ids = {m.get("id", "") for m in models if m.get("id")}
+        catalog = {m["id"]: _summarize_model(m) for m in models if m.get("id")}
         
-        print(f"[ModelUpdater] Fetched {len(model_ids)} model IDs in {elapsed:.2f}s")
-        return model_ids
+        print(f"[ModelUpdater] Fetched {len(catalog)} models in {elapsed:.2f}s")
+        return catalog
         
     except requests.exceptions.Timeout:
         print(f"[ModelUpdater] API timeout after {timeout}s")
@@ -77,6 +89,16 @@ def fetch_available_model_ids(timeout: float = 5.0) -> set | None:
         return None
 
 
+def fetch_available_model_ids(timeout: float = 5.0) -> set | None:
+    """
+    Fetch all available model IDs from OpenRouter API.
+    
+    Returns a set of model IDs, or None on failure.
+    """
+    catalog = fetch_model_catalog(timeout)
+    return set(catalog) if catalog is not None else None
+
+
 def load_cached_ids() -> set | None:
     """Load cached model IDs if fresh."""
     if not CACHE_FILE.exists():
@@ -103,13 +125,27 @@ def load_cached_ids() -> set | None:
         return None
 
 
-def save_cached_ids(model_ids: set) -> bool:
-    """Save model IDs to cache."""
+def load_cached_metadata() -> dict:
+    """Per-model metadata from the cache (any age), {} if there is none."""
+    if not CACHE_FILE.exists():
+        return {}
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f).get("models", {})
+    except Exception as e:
+        print(f"[ModelUpdater] Error loading cached metadata: {e}")
+        return {}
+
+
+def save_cached_ids(model_ids: set, metadata: dict | None = None) -> bool:
+    """Save model IDs (and their metadata, if fetched) to cache."""
     try:
         cache_data = {
             "cached_at": datetime.now().isoformat(),
             "model_ids": list(model_ids),
         }
+        if metadata:
+            cache_data["models"] = metadata
         
         with open(CACHE_FILE, "w", encoding="utf-8") as f:
             json.dump(cache_data, f)
@@ -120,8 +156,13 @@ def save_cached_ids(model_ids: set) -> bool:
         return False
 
 
-def get_available_ids() -> set | None:
-    """Get available model IDs from cache or API."""
+def get_available_ids(allow_network: bool = True) -> set | None:
+    """
+    Get available model IDs from cache or API.
+    
+    With allow_network=False a stale cache is used instead of fetching, so the
+    call never blocks on the network (used at import time).
+    """
     # Try cache first
     cached = load_cached_ids()
     if cached:
@@ -129,10 +170,12 @@ def get_available_ids() -> set | None:
         return cached
     
     # Fetch from API
-    ids = fetch_available_model_ids()
-    if ids:
-        save_cached_ids(ids)
-        return ids
+    if allow_network:
+        catalog = fetch_model_catalog()
+        if catalog:
+            ids = set(catalog)
+            save_cached_ids(ids, catalog)
+            return ids
     
     # Try stale cache as last resort
     if CACHE_FILE.exists():
@@ -147,7 +190,7 @@ def get_available_ids() -> set | None:
     return None
 
 
-def validate_models(curated_models: dict) -> dict:
+def validate_models(curated_models: dict, allow_network: bool = True) -> dict:
     """
     Validate curated model list against OpenRouter API.
 
@@ -156,11 +199,12 @@ def validate_models(curated_models: dict) -> dict:
 
     Args:
         curated_models: Your hand-curated AI_MODELS dict
+        allow_network: False to validate against cached IDs only (never blocks)
 
     Returns:
         Validated dict with 404'd models removed, providers sorted A-Z
     """
-    available_ids = get_available_ids()
+    available_ids = get_available_ids(allow_network)
 
     if available_ids is None:
         print("[ModelUpdater] Validation skipped (no API data), using curated list as-is")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Aggregate report over the usage ledgers (logs/usage/session_*.jsonl).
+
+Every API call the app makes - conversation turns, BackroomsBench judges and
+consensus summaries, image generation - is recorded by usage_ledger.py with
+tokens (prompt, completion, cached), time to first token, duration, tokens/s
+and cost. This rolls them up for model selection:
+
+    python tools/usage_report.py                      # all sessions, per model
+    python tools/usage_report.py --by kind
+    python tools/usage_report.py --since 20260101 --by ai_name
+    python tools/usage_report.py exports/.../usage.jsonl --json
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from usage_ledger import LEDGER_DIR, summarize
+
+
+def load_records(paths=None, since=None):
+    """Records from the given ledger files (default: every session ledger), optionally since YYYYMMDD."""
+    files = [Path(p) for p in paths] if paths else sorted(LEDGER_DIR.glob("session_*.jsonl"))
+    records = []
+    for path in files:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if since and str(record.get("session", "")) < since:
+                        continue
+                    records.append(record)
+        except OSError as e:
+            print(f"[UsageReport] Could not read {path}: {e}", file=sys.stderr)
+    return records
+
+
+def print_report(groups, by):
+    header = f"{by or 'total':<44} {'calls':>6} {'err':>4} {'prompt':>10} {'cached':>7} {'compl':>9} {'ttft s':>7} {'tok/s':>7} {'cost $':>10}"
+    print(header)
+    print("-" * len(header))
+    for key, g in sorted(groups.items(), key=lambda item: -item[1]["cost"]):
+        ttft = f"{g['avg_ttft']:.2f}" if g["avg_ttft"] is not None else "-"
+        tps = f"{g['avg_tokens_per_s']:.1f}" if g["avg_tokens_per_s"] else "-"
+        print(f"{str(key)[:44]:<44} {g['calls']:>6} {g['errors']:>4} {g['prompt_tokens']:>10} "
+              f"{g['cached_share']:>7.0%} {g['completion_tokens']:>9} {ttft:>7} {tps:>7} {g['cost']:>10.4f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Token, latency and cost report from the usage ledgers")
+    parser.add_argument("files", nargs="*", help="Ledger files (default: logs/usage/session_*.jsonl)")
+    parser.add_argument("--by", default="model", choices=["model", "ai_name", "kind", "provider", "session", "total"],
+                        help="Group by this field")
+    parser.add_argument("--since", help="Only sessions started on/after this date (YYYYMMDD)")
+    parser.add_argument("--json", action="store_true", help="Print the aggregates as JSON")
+    args = parser.parse_args()
+
+    by = None if args.by == "total" else args.by
+    records = load_records(args.files, args.since)
+    if not records:
+        print("[UsageReport] No usage records found")
+        sys.exit(1)
+
+    groups = summarize(records, by)
+    if args.json:
+        print(json.dumps({str(k): v for k, v in groups.items()}, indent=2))
+    else:
+        print(f"\n═══ {len(records)} calls ═══\n")
+        print_report(groups, by)
@@ -0,0 +1,211 @@
+# usage_ledger.py
+"""
+Per-call token, latency and cost ledger.
+
+call_openrouter_api, call_claude_api and generate_image_from_text used to
+reduce every response to its text; usage, generation id and the provider
+OpenRouter routed to were dropped, so there was no way to compare models on
+real sessions. Every call now adds one record:
+
+    {ts, session, kind, ai_name, model, provider, generation_id, ok,
+     prompt_tokens, completion_tokens, cached_tokens, cache_write_tokens,
+     ttft, duration, tokens_per_s, cost, attempts, hedged}
+
+- kind: "turn", "judge", "summary" (BackroomsBench consensus), "image" or
+  "video" (Sora jobs);
+  callers tag calls through the metrics dict they already pass
+- hedged: the duplicate streaming request that lost a hedge race gets its
+  own record (ok False, not counted as an error) so its cost isn't lost;
+  a leg that failed with no winner is recorded as the error it was
+- cost: OpenRouter's own figure when usage accounting returns one, else
+  computed from the /models pricing cached by tools/model_updater.py
+  (cache reads and writes at their own prices; direct Anthropic ids are
+  looked up under their anthropic/ registry id)
+- Records are appended to logs/usage/<session>.jsonl as they happen (and
+  copied into session exports/backups); summary() and status_text() feed
+  the status bar, tools/usage_report.py aggregates across sessions
+"""
+
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from app_logging import get_logger
+
+log = get_logger("usage_ledger")
+
+LEDGER_DIR = Path(__file__).parent / "logs" / "usage"
+
+_DATE_SUFFIX_RE = re.compile(r"-\d{8}$")
+_VERSION_RE = re.compile(r"(?<=-)(\d+)-(\d+)(?=-|$)")
+
+
+def registry_ids(model_id):
+    """Registry ids to try for model_id; "claude-opus-4-5-20251101" (direct Anthropic) -> "anthropic/claude-opus-4.5"."""
+    if not model_id or not model_id.startswith("claude-"):
+        return [model_id]
+    undated = _DATE_SUFFIX_RE.sub("", model_id)
+    dotted = _VERSION_RE.sub(r"\1.\2", undated)
+    return list(dict.fromkeys(f"anthropic/{name}" for name in (model_id, undated, dotted)))
+
+
+def _pricing(model_id):
+    from config import get_model_registry
+    registry = get_model_registry()
+    for name in registry_ids(model_id):
+        pricing = registry.metadata(name).get("pricing")
+        if pricing:
+            return pricing
+    return {}
+
+
+def compute_cost(model_id, usage):
+    """USD cost of a call from the cached /models pricing, or None if the model's pricing is unknown."""
+    if not usage:
+        return None
+    if isinstance(usage.get("cost"), (int, float)):
+        return float(usage["cost"])
+    try:
+        pricing = _pricing(model_id)
+        prompt_price = float(pricing["prompt"])
+        completion_price = float(pricing["completion"])
+        # Cache reads are discounted, cache writes (Anthropic) cost more than plain input
+        cached_price = float(pricing.get("input_cache_read") or prompt_price)
+        write_price = float(pricing.get("input_cache_write") or prompt_price)
+    except (ImportError, KeyError, TypeError, ValueError):
+        return None
+    cached = usage.get("cached_tokens", 0)
+    written = usage.get("cache_write_tokens", 0)
+    uncached = max(usage.get("prompt_tokens", 0) - cached - written, 0)
+    return (uncached * prompt_price + cached * cached_price + written * write_price
+            + usage.get("completion_tokens", 0) * completion_price)
+
+
+def make_record(kind, model, usage=None, ttft=None, duration=None, ok=True, ai_name=None,
+                provider=None, generation_id=None, attempts=1, hedged=False):
+    """Build a ledger record from a call's normalised usage (see prompt_caching.py) and timings."""
+    usage = usage or {}
+    completion = usage.get("completion_tokens", 0)
+    generating = (duration - ttft) if duration and ttft is not None else duration
+    return {
+        "kind": kind,
+        "ai_name": ai_name,
+        "model": model,
+        "provider": provider,
+        "generation_id": generation_id,
+        "ok": ok,
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": completion,
+        "cached_tokens": usage.get("cached_tokens", 0),
+        "cache_write_tokens": usage.get("cache_write_tokens", 0),
+        "ttft": ttft,
+        "duration": duration,
+        "tokens_per_s": round(completion / generating, 1) if completion and generating else None,
+        "cost": compute_cost(model, usage),
+        "attempts": attempts,
+        "hedged": hedged,
+    }
+
+
+def summarize(records, by="model"):
+    """
+    Aggregate records per `by` field ("model", "ai_name", "kind" or None for one total).
+
+    Returns:
+        {group: {calls, errors, prompt_tokens, completion_tokens, cached_tokens,
+                 cost, avg_ttft, avg_tokens_per_s, cached_share}}
+    """
+    groups = {}
+    for record in records:
+        key = record.get(by) if by else "total"
+        group = groups.setdefault(key, {
+            "calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "cached_tokens": 0, "cost": 0.0, "_ttft": [], "_tps": [],
+        })
+        group["calls"] += 1
+        if not record.get("ok", True) and not record.get("hedged"):
+            group["errors"] += 1  # A hedge leg that lost the race isn't an error, only a cost
+        for field in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+            group[field] += record.get(field) or 0
+        group["cost"] += record.get("cost") or 0.0
+        if record.get("ttft") is not None:
+            group["_ttft"].append(record["ttft"])
+        if record.get("tokens_per_s"):
+            group["_tps"].append(record["tokens_per_s"])
+
+    for group in groups.values():
+        ttfts, tps = group.pop("_ttft"), group.pop("_tps")
+        group["avg_ttft"] = round(sum(ttfts) / len(ttfts), 2) if ttfts else None
+        group["avg_tokens_per_s"] = round(sum(tps) / len(tps), 1) if tps else None
+        group["cached_share"] = (round(group["cached_tokens"] / group["prompt_tokens"], 3)
+                                 if group["prompt_tokens"] else 0.0)
+        group["cost"] = round(group["cost"], 6)
+    return groups
+
+
+class UsageLedger:
+    """Thread-safe in-memory ledger for the current session, mirrored to a JSONL file."""
+
+    def __init__(self, directory=LEDGER_DIR):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._records = []
+        self.version = 0  # bumped on every record; the status bar polls it
+        self.start_session(datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+    def start_session(self, session_id):
+        """Start recording into a new session (the GUI passes its session timestamp)."""
+        with self._lock:
+            self.session = session_id
+            self.path = self.directory / f"session_{session_id}.jsonl"
+            self._records = []
+            self.version += 1
+
+    def record(self, entry):
+        """Add one call's record (see make_record); safe from worker threads."""
+        entry = dict(entry, ts=round(time.time(), 3), session=self.session)
+        with self._lock:
+            self._records.append(entry)
+            self.version += 1
+            path = self.path
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            log.warning("[Ledger] Could not write %s: %s", path, e)
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def summary(self, by="model"):
+        return summarize(self.records(), by)
+
+    def status_text(self):
+        """Compact session total for the status bar ('' before the first call)."""
+        total = self.summary(by=None).get("total")
+        if not total:
+            return ""
+        tokens = total["prompt_tokens"] + total["completion_tokens"]
+        text = f"{total['calls']} calls · {tokens / 1000:.1f}k tok ({total['cached_share']:.0%} cached)"
+        if total["cost"]:
+            text += f" · ${total['cost']:.3f}"
+        return text
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_usage_ledger():
+    """The process-wide UsageLedger."""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = UsageLedger()
+    return _ledger